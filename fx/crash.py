@@ -6,6 +6,7 @@ import framebuf
 
 from colors.framebuffer_palette import FramebufferPalette
 from fx.scanline_fade import ScanlineFade
+from particles import ParticleSystem
 from sprites.spritesheet import Spritesheet
 from colors import color_util as colors
 
@@ -13,7 +14,10 @@ from colors import color_util as colors
 class Crash():
     x = 0
     y = 0
-    particles = []
+    particles: ParticleSystem
+    max_particles = 128
+    num_frames = 50
+    frame_ms = 30     # nominal, the animation runs frame by frame
     explode_sprite: Spritesheet
     palette: FramebufferPalette
     alpha_color: int
@@ -52,9 +56,9 @@ class Crash():
         self.center_x = self.explode_sprite.frame_width // 2
         self.center_y = self.explode_sprite.frame_height // 2
 
-        # Create a list to store particle data
-        particles = []
-        new_particle = []
+        frames_ms = self.num_frames * self.frame_ms
+        particles = ParticleSystem(self.max_particles, colors=(1, 2), width=self.display.width,
+                                   height=self.display.height, bounce=True)
 
         # Get the particle data from the bitmap
         for x in range(0, 25, 3):
@@ -62,23 +66,19 @@ class Crash():
                 if bitmap.pixel(x, y) != 0 and round(random.random() + 0.6):
                     # Calculate the distance from the center
                     distance = math.sqrt((x - self.center_x) ** 2 + (y - self.center_y) ** 2)
-                    distance = abs(distance)
-                    if distance < 3:
-                        distance == 3
-
-                    if distance > 10:
-                        distance == 10
 
                     # Calculate the angle from the center
                     angle = math.atan2(y - self.center_y, x - self.center_x)
 
-                    # Center the particles on the source sprite
-                    new_x = int(x + self.explode_sprite.x)
-                    new_y = int(y + self.explode_sprite.y)
+                    # Center the particles on the source sprite. They fly away from the center, faster the further out
+                    # they started (in pixels per ms)
+                    speed = (distance / 10) * 4 / self.frame_ms
+
+                    # Sometimes we draw single pixels, sometimes fat pixels
+                    size = min(random.choice([2, 2, 2, 2, 1, 1, 1, 1, 1, 1]) + int(distance / 10), 3)
 
-                    # Store the particle data as a tuple
-                    new_particle = [new_x, new_y, distance, angle]
-                    particles.append(new_particle)
+                    particles.add(x + self.explode_sprite.x, y + self.explode_sprite.y, math.cos(angle) * speed,
+                                  math.sin(angle) * speed, frames_ms, size, random.randrange(0, 2))
 
         self.particles = particles
 
@@ -105,62 +105,15 @@ class Crash():
 
     def anim_particles(self):
         particles = self.particles
-        speed = 4
         center_x = self.center_x + self.explode_sprite.x
         center_y = self.center_y + self.explode_sprite.y
-        rand_range = 0.6
-        color_offset = 0
 
         # Animate the particles
-        for i in range(50): # number of frames for this animation
-
-            # Create a moving window for picking random colors from the palette
-            color_offset = ((i-5) // 55) * 4
-            if color_offset > 3:
-                color_offset = 3
-            elif color_offset < 0:
-                color_offset = 0
-
-            for i in range(len(particles)):
-                x, y, distance, angle = particles[i]
-
-                # add a bit of random
-                delta = (random.random()*rand_range) - (rand_range//2)
-                angle = angle + delta
-
-                # Calculate the new position
-                x += ((math.cos(angle) * distance) / 10) * speed
-                y += ((math.sin(angle) * distance) / 10) * speed
-
-                # Bounce off the walls
-                if x > self.stage_width:
-                    x = self.stage_width
-                    angle = angle + math.pi
-                elif x < 0:
-                    x = 0
-                    angle = angle + math.pi
-
-
-                # Store the updated particle data
-                particles[i] = (x, y, distance, angle)
-
-                x = int(x)
-                y = int(y)
+        for i in range(self.num_frames):
+            particles.update_and_draw(self.stage, self.frame_ms)
 
-                color_idx = random.randrange(1,3) + color_offset
-                self.stage.pixel(x, y, int(color_idx))
-
-                # Sometimes we draw single pixels, sometimes fat pixels
-                size = random.choice([2, 2, 2, 2, 1, 1, 1, 1, 1, 1])  # (1-3)
-                size = size + int(abs(distance)/10)
-
-                if size > 3:
-                    size = 3
-
-                # if round(random.random()):
-                self.draw_dot(x, y, color_idx, size)
-
-            rand_range = rand_range * 0.95
+            # Slow down by 5% every frame
+            particles.time_scale = (particles.time_scale * 243) >> 8
 
             # And some rays emanating from the center
             if (random.random() * 100) > 75:
@@ -184,7 +137,6 @@ class Crash():
 
             self.display.blit(self.stage, 0, 0, self.alpha_color, self.palette)
             self.display.show()
-            speed = speed * 0.95
 
         fade_fx = ScanlineFade(self.display)
         fade_fx.start()
@@ -193,28 +145,6 @@ class Crash():
         return True
     def cleanup(self):
         # End of animation
-        del self.particles
+        self.particles.clear()
         self.stage.fill(0)
         gc.collect()
-
-    def draw_dot(self, x, y, color, size=1):
-        x, y = int(x), int(y)
-        coords = [[x, y]]
-
-        if size == 2:
-            coords.append([x+1,y])
-            coords.append([x+1,y+1])
-            coords.append([x,y+1])
-        elif size == 3:
-            self.stage.pixel(x, y, 0) # Center pixel transparent
-
-            coords = []
-            coords.append([x + 1, y])
-            coords.append([x - 1, y])
-            coords.append([x, y + 1])
-            coords.append([x, y - 1])
-
-        for x, y in coords:
-            self.stage.pixel(x, y, color)
-
-
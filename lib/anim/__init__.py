@@ -1,4 +1,7 @@
 from . import anim_attr
 from . import animation
+from . import easing
+from . import palette_animator
 from . import palette_rotate
 from . import palette_rotate_one
+from . import tween_manager
@@ -1,9 +1,8 @@
-import math
-
 import uasyncio as asyncio
 import utime
 
 from anim.animation import Animation
+from anim.easing import ease_float, EASE_IN_SINE, EASE_IN_OUT_SINE
 
 
 class AnimAttr(Animation):
@@ -33,13 +32,17 @@ class AnimAttr(Animation):
 
     @staticmethod
     def ease_in_sine(t):
-        return 1 - math.cos((t * math.pi) / 2)
+        return ease_float(EASE_IN_SINE, t)
 
     @staticmethod
     def ease_in_out_sine(t):
-        return -(math.cos(math.pi * t) - 1) / 2
+        return ease_float(EASE_IN_OUT_SINE, t)
 
     async def run_loop(self):
+        self.update()
+
+    def update(self):
+        """ One step of the animation, for when it runs as a job of the frame scheduler rather than its own task """
         self.elapsed = utime.ticks_diff(utime.ticks_us(), self.started)
 
         if self.elapsed == 0:
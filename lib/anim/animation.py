@@ -49,5 +49,6 @@ class Animation:
 
     def start(self):
         self.running = True
+        self.started = utime.ticks_us()
 
 
@@ -0,0 +1,47 @@
+import math
+
+try:
+    from uarray import array
+except ImportError:
+    from array import array
+
+"""
+Easing curves as lookup tables, so that tweens don't need math.cos() (nor floats) on every frame. Each table holds
+STEPS + 1 samples of the curve in fixed point (ONE = 1.0), and ease() interpolates linearly between them.
+"""
+SHIFT = 12
+ONE = 1 << SHIFT
+STEPS = 64
+
+LINEAR = 0
+EASE_IN_CUBIC = 1
+EASE_IN_SINE = 2
+EASE_IN_OUT_SINE = 3
+EASE_OUT_CUBIC = 4
+
+def make_lut(func):
+    return array('H', [round(func(i / STEPS) * ONE) for i in range(STEPS + 1)])
+
+""" Built once, at import time. Indexed by the easing ids above """
+LUTS = (
+    make_lut(lambda t: t),
+    make_lut(lambda t: t * t * t),
+    make_lut(lambda t: 1 - math.cos((t * math.pi) / 2)),
+    make_lut(lambda t: -(math.cos(math.pi * t) - 1) / 2),
+    make_lut(lambda t: 1 - (1 - t) ** 3),
+)
+
+def ease(easing, pos):
+    """ Eased value of pos, both in fixed point (0 to ONE) """
+    lut = LUTS[easing]
+    scaled = pos * STEPS
+    idx = scaled >> SHIFT
+    if idx >= STEPS:
+        return lut[STEPS]
+
+    low = lut[idx]
+    return low + (((lut[idx + 1] - low) * (scaled & (ONE - 1))) >> SHIFT)
+
+def ease_float(easing, t):
+    """ Same as ease(), for t from 0 to 1 """
+    return ease(easing, int(t * ONE)) / ONE
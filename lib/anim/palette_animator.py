@@ -0,0 +1,182 @@
+import utime
+
+class PaletteAnimator:
+    """
+    Central engine for palette animations. Instead of pre-cloning a palette for every rotation step (PaletteRotate)
+    or running one asyncio task per palette (PaletteRotateOne), all the animated colors live in a single
+    contiguous bytearray (the arena), and every animation is advanced from a single tick() per frame.
+
+    Each animation copies a window of its source colors from the arena into the target palette, at an offset that
+    advances by one color every interval_ms. There are two kinds:
+
+    - rotate: the colors of palette[start:end] are rotated in place (the window is the whole slice)
+    - cycle: a single palette index cycles through a list of colors (the window is one color)
+
+    The source colors are stored once, plus enough wrapped around colors to read a full window at any offset, so a
+    rotation of n colors costs (2n - 1) * 2 bytes, instead of n + 1 full palette clones.
+
+    add_rotate() / add_cycle() return a handle that can be used to pause, resume or remove the animation. Removed
+    animations give back their arena space, and their slot (handle) is reused by the next animation added.
+    """
+    max_anims: int = 16
+
+    def __init__(self, arena_size=512, max_anims=16):
+        self.arena = bytearray(arena_size)
+        self.arena_mv = memoryview(self.arena)
+        self.arena_used = 0
+        self.max_anims = max_anims
+
+        """ One entry per animation, in parallel lists so that tick() does not allocate """
+        self.targets = []       # memoryview of the target palette bytearray, None for a free slot
+        self.target_start = []  # first byte in the target to write to
+        self.src_start = []     # first byte of the source colors in the arena
+        self.src_len = []       # size in bytes of the source colors (without the wrapped around copy)
+        self.window = []        # bytes copied to the target on every step
+        self.offset = []        # current offset (bytes) into the source colors
+        self.interval_ms = []
+        self.next_ms = []
+        self.active = []
+
+        """ Stats """
+        self.clone_bytes = 0    # bytes that pre-rotated palette copies would have used
+        self.last_tick_us = 0
+        self.max_tick_us = 0
+
+    def add_rotate(self, palette, interval_ms, start=0, end=None):
+        """ Rotate the colors palette[start:end] by one position every interval_ms """
+        if end is None:
+            end = palette.num_colors
+
+        num_colors = end - start
+        src = palette.palette[start * 2:end * 2]
+
+        """ PaletteRotate keeps the original plus one full clone per step """
+        self.clone_bytes += (num_colors + 1) * palette.num_colors * 2
+
+        return self._add(palette.palette, start * 2, src, num_colors * 2, interval_ms)
+
+    def add_cycle(self, palette, color_list, interval_ms, idx=1):
+        """ Cycle the color at palette[idx] through all the colors of color_list (a FramebufferPalette) """
+        return self._add(palette.palette, idx * 2, color_list.palette, 2, interval_ms)
+
+    def _lists(self):
+        return (self.targets, self.target_start, self.src_start, self.src_len, self.window, self.offset,
+                self.interval_ms, self.next_ms, self.active)
+
+    def _free_slot(self):
+        """ Slot of a removed animation, or a new one. -1 if all the slots are taken """
+        targets = self.targets
+        for i in range(len(targets)):
+            if targets[i] is None:
+                return i
+
+        return len(targets) if len(targets) < self.max_anims else -1
+
+    def _add(self, target, target_start, src, window, interval_ms):
+        slot = self._free_slot()
+        if slot < 0:
+            raise ValueError(f"Max. number of palette animations ({self.max_anims}) reached")
+
+        src_len = len(src)
+        size = src_len + window - 2
+        start = self.arena_used
+
+        if start + size > len(self.arena):
+            raise ValueError(f"Palette arena full ({start} + {size} > {len(self.arena)} bytes)")
+
+        arena = self.arena
+        for i in range(size):
+            arena[start + i] = src[i % src_len]
+
+        self.arena_used += size
+
+        if slot == len(self.targets):
+            for lst in self._lists():
+                lst.append(None)
+
+        self.targets[slot] = memoryview(target)
+        self.target_start[slot] = target_start
+        self.src_start[slot] = start
+        self.src_len[slot] = src_len
+        self.window[slot] = window
+        self.offset[slot] = 0
+        self.interval_ms[slot] = interval_ms
+        self.next_ms[slot] = utime.ticks_add(utime.ticks_ms(), interval_ms)
+        self.active[slot] = True
+
+        return slot
+
+    def pause(self, handle):
+        self.active[handle] = False
+
+    def resume(self, handle):
+        self.active[handle] = True
+        self.next_ms[handle] = utime.ticks_add(utime.ticks_ms(), self.interval_ms[handle])
+
+    def remove(self, handle):
+        """ Free the slot of the animation, and its arena space: the source colors of the animations stored after it
+        are moved down to close the gap """
+        if self.targets[handle] is None:
+            return
+
+        start = self.src_start[handle]
+        size = self.src_len[handle] + self.window[handle] - 2
+        used = self.arena_used
+        self.arena[start:used - size] = self.arena[start + size:used]
+        self.arena_used = used - size
+
+        src_start = self.src_start
+        for i in range(len(self.targets)):
+            if self.targets[i] is not None and src_start[i] > start:
+                src_start[i] -= size
+
+        self.targets[handle] = None
+        self.active[handle] = False
+
+    def reset(self):
+        for lst in self._lists():
+            lst.clear()
+
+        self.arena_used = 0
+        self.clone_bytes = 0
+
+    def tick(self, now=None):
+        """ Advance all the active animations that are due. Meant to be called once per frame """
+        start_us = utime.ticks_us()
+
+        if now is None:
+            now = utime.ticks_ms()
+
+        arena_mv = self.arena_mv
+        offsets = self.offset
+        next_ms = self.next_ms
+
+        for i in range(len(self.targets)):
+            if not self.active[i] or utime.ticks_diff(now, next_ms[i]) < 0:
+                continue
+
+            offset = (offsets[i] + 2) % self.src_len[i]
+            offsets[i] = offset
+            next_ms[i] = utime.ticks_add(now, self.interval_ms[i])
+
+            src = self.src_start[i] + offset
+            dst = self.target_start[i]
+            window = self.window[i]
+            self.targets[i][dst:dst + window] = arena_mv[src:src + window]
+
+        self.last_tick_us = utime.ticks_diff(utime.ticks_us(), start_us)
+        if self.last_tick_us > self.max_tick_us:
+            self.max_tick_us = self.last_tick_us
+
+    def stats(self):
+        """ Memory used by the arena vs. pre-rotated palette copies, and cost of the last / worst tick """
+        return {
+            'anims': sum(1 for target in self.targets if target is not None),
+            'arena_bytes': self.arena_used,
+            'clone_bytes': self.clone_bytes,
+            'saved_bytes': self.clone_bytes - self.arena_used,
+            'last_tick_us': self.last_tick_us,
+            'max_tick_us': self.max_tick_us,
+        }
+
+animator = PaletteAnimator()
@@ -23,6 +23,10 @@ class PaletteRotateOne(Animation):
         self.idx = idx # Color index in the original palette that we will rotate
 
     async def run_loop(self):
+        self.update()
+        await asyncio.sleep_ms(self.interval_ms)
+
+    def update(self):
         now = time.ticks_ms()
         delta = time.ticks_diff(now, self.last_change_ms)
         color_list = self.color_list
@@ -34,6 +38,3 @@ class PaletteRotateOne(Animation):
 
             self.orig_palette.set_int(self.idx, new_color)
             self.last_change_ms = time.ticks_ms()
-
-
-        await asyncio.sleep_ms(self.interval_ms)
@@ -0,0 +1,126 @@
+try:
+    from uarray import array
+except ImportError:
+    from array import array
+
+from anim.easing import ease, LINEAR, SHIFT
+
+class TweenManager:
+    """
+    Central engine for tweens (attributes animated from one value to another over some time). Replaces running an
+    AnimAttr as its own task, with float math, setattr() by name and a clock read on every step: the active tweens
+    live in a fixed size table, and they are all advanced together by a single tick(elapsed_ms) per frame, with
+    integer math and the easing tables of anim.easing.
+
+    The slot of a tween is either the name of an attribute of the target, or an index into it (ie: a field of an
+    array). Values are ints.
+
+    add() returns the index of the tween in the table, which can be passed to cancel(). When a tween ends, its target
+    is set to the exact end value, and its callback (if any) is called.
+    """
+
+    def __init__(self, capacity=16):
+        self.capacity = capacity
+        self.count = 0
+
+        """ One entry per tween, in parallel arrays so that tick() does not allocate. A free entry has no target """
+        self.targets = [None] * capacity
+        self.slots = [None] * capacity
+        self.callbacks = [None] * capacity
+        self.is_index = bytearray(capacity)     # 1 if the slot is an index into the target, 0 if an attribute name
+        self.easing = bytearray(capacity)
+        self.start = array('i', [0] * capacity)
+        self.delta = array('i', [0] * capacity)
+        self.duration_ms = array('I', [0] * capacity)
+        self.elapsed_ms = array('I', [0] * capacity)
+
+    def add(self, target, slot, end, duration_ms, easing=LINEAR, callback=None):
+        """ Tween target.slot (or target[slot]) from its current value to end. Replaces any tween of the same slot """
+        self.cancel(target, slot)
+
+        for i in range(self.capacity):
+            if self.targets[i] is None:
+                break
+        else:
+            raise ValueError(f"Max. number of tweens ({self.capacity}) reached")
+
+        is_index = isinstance(slot, int)
+        start = target[slot] if is_index else getattr(target, slot)
+
+        self.targets[i] = target
+        self.slots[i] = slot
+        self.callbacks[i] = callback
+        self.is_index[i] = is_index
+        self.easing[i] = easing
+        self.start[i] = int(start)
+        self.delta[i] = int(end) - int(start)
+        self.duration_ms[i] = max(1, duration_ms)
+        self.elapsed_ms[i] = 0
+        self.count += 1
+
+        return i
+
+    def cancel(self, target, slot=None):
+        """ Stop the tweens of target (only the one of slot, if given), leaving their current values """
+        for i in range(self.capacity):
+            if self.targets[i] is target and (slot is None or self.slots[i] == slot):
+                self.free(i)
+
+    def cancel_all(self):
+        for i in range(self.capacity):
+            if self.targets[i] is not None:
+                self.free(i)
+
+    def free(self, idx):
+        self.targets[idx] = None
+        self.slots[idx] = None
+        self.callbacks[idx] = None
+        self.count -= 1
+
+    def is_running(self, target, slot=None):
+        for i in range(self.capacity):
+            if self.targets[i] is target and (slot is None or self.slots[i] == slot):
+                return True
+        return False
+
+    def tick(self, elapsed_ms):
+        """ Advance all the tweens by elapsed_ms. Meant to be called once per frame (or per fixed step) """
+        if not self.count:
+            return
+
+        """ One name at a time: unpacking more than 3 values builds a tuple """
+        targets = self.targets
+        slots = self.slots
+        start = self.start
+        delta = self.delta
+        duration_ms = self.duration_ms
+        all_elapsed = self.elapsed_ms
+
+        for i in range(self.capacity):
+            target = targets[i]
+            if target is None:
+                continue
+
+            elapsed = all_elapsed[i] + elapsed_ms
+            duration = duration_ms[i]
+            done = elapsed >= duration
+
+            if done:
+                value = start[i] + delta[i]
+            else:
+                all_elapsed[i] = elapsed
+                pos = (elapsed << SHIFT) // duration
+                value = start[i] + ((delta[i] * ease(self.easing[i], pos)) >> SHIFT)
+
+            if self.is_index[i]:
+                target[slots[i]] = value
+            else:
+                setattr(target, slots[i], value)
+
+            if done:
+                callback = self.callbacks[i]
+                self.free(i)
+                if callback:
+                    callback()
+
+tweens = TweenManager()
@@ -0,0 +1,2 @@
+from . import asset_bundle
+from . import asset_cache
\ No newline at end of file
@@ -0,0 +1,157 @@
+import struct
+
+try:
+    import mmap # Host only
+except ImportError:
+    mmap = None
+
+"""
+Asset bundle: a single file holding all the sprites, fonts and sounds, so that they can be loaded by id without
+scanning directories or opening one file per asset (both slow on LittleFS).
+
+Layout:
+- 16 byte header: magic, version, number of entries, offset of the TOC, offset of the data
+- TOC: one fixed size (24 byte) entry per asset, sorted by name hash, so lookups are a binary search
+- data: the assets, each one starting on a 4 byte boundary. Sprites are stored in the .spr format
+  (see images/sprite_asset.py), everything else as the original file bytes.
+
+Assets are identified by the FNV-1a hash of their path on the device (ie: "/img/skull_16.bmp"), so that the code can
+keep using the same file names.
+"""
+MAGIC = b'WZAB'
+VERSION = 1
+HEADER_FORMAT = "<4sHHII"
+HEADER_SIZE = 16
+ENTRY_FORMAT = "<IIIBBHHHI"  # hash, offset, size, type, flags, width, height, palette offset, reserved
+ENTRY_SIZE = 24
+
+TYPE_RAW = 0
+TYPE_SPRITE = 1
+TYPE_FONT = 2
+TYPE_SOUND = 3
+
+def name_hash(name):
+    """ 32 bit FNV-1a """
+    hash = 0x811C9DC5
+    for char in name.encode() if isinstance(name, str) else name:
+        hash = ((hash ^ char) * 0x01000193) & 0xFFFFFFFF
+    return hash
+
+def pack_bundle(assets):
+    """
+    Build the bundle contents. 'assets' is a list of (name, type, data, width, height, palette_offset). Raises
+    ValueError on hash collisions, since names are not stored in the bundle.
+    """
+    entries = sorted(assets, key=lambda asset: name_hash(asset[0]))
+    num_entries = len(entries)
+    toc_offset = HEADER_SIZE
+    data_offset = toc_offset + num_entries * ENTRY_SIZE
+
+    toc = bytearray()
+    data = bytearray()
+    last_hash = None
+
+    for name, asset_type, asset_data, width, height, palette_offset in entries:
+        hash = name_hash(name)
+        if hash == last_hash:
+            raise ValueError(f"Asset name hash collision: {name}")
+        last_hash = hash
+
+        data += bytes((-len(data)) % 4)
+        toc += struct.pack(ENTRY_FORMAT, hash, data_offset + len(data), len(asset_data), asset_type, 0,
+                           width, height, palette_offset, 0)
+        data += asset_data
+
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, num_entries, toc_offset, data_offset)
+    return header + toc + data
+
+class AssetBundle():
+    """
+    Random access reader for bundles built with local/pack_assets.py. The file stays open, and the TOC is read
+    once, in a single readinto().
+    """
+    def __init__(self, filename, use_mmap=False):
+        self.file = open(filename, "rb")
+        self.map = None
+
+        header = bytearray(HEADER_SIZE)
+        self.file.readinto(header)
+        magic, version, self.num_entries, toc_offset, self.data_offset = struct.unpack(HEADER_FORMAT, header)
+
+        if magic != MAGIC or version != VERSION:
+            self.file.close()
+            raise ValueError(f"Not an asset bundle: {filename} (magic: {magic}, version: {version})")
+
+        self.toc = bytearray(self.num_entries * ENTRY_SIZE)
+        self.file.seek(toc_offset)
+        self.file.readinto(self.toc)
+
+        if use_mmap and mmap:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        if self.map:
+            self.map.close()
+        self.file.close()
+
+    def _hash_at(self, idx):
+        toc = self.toc
+        pos = idx * ENTRY_SIZE
+        return toc[pos] | (toc[pos + 1] << 8) | (toc[pos + 2] << 16) | (toc[pos + 3] << 24)
+
+    def find(self, name):
+        """ Returns the asset id (TOC index) of 'name', or -1 if it is not in the bundle """
+        hash = name_hash(name)
+        low, high = 0, self.num_entries - 1
+
+        while low <= high:
+            mid = (low + high) // 2
+            mid_hash = self._hash_at(mid)
+            if mid_hash == hash:
+                return mid
+            elif mid_hash < hash:
+                low = mid + 1
+            else:
+                high = mid - 1
+
+        return -1
+
+    def entry(self, asset_id):
+        """ (offset, size, type, width, height, palette_offset) """
+        _, offset, size, asset_type, _, width, height, palette_offset, _ = \
+            struct.unpack_from(ENTRY_FORMAT, self.toc, asset_id * ENTRY_SIZE)
+        return offset, size, asset_type, width, height, palette_offset
+
+    def size(self, asset_id):
+        return self.entry(asset_id)[1]
+
+    def readinto(self, asset_id, buffer):
+        """ Read the whole asset into 'buffer' (which must be big enough), and return the number of bytes read """
+        offset, size, _, _, _, _ = self.entry(asset_id)
+        dest = memoryview(buffer)[0:size]
+
+        if self.map:
+            dest[:] = self.map[offset:offset + size]
+            return size
+
+        self.file.seek(offset)
+        return self.file.readinto(dest)
+
+    def view(self, asset_id):
+        """ Zero copy access to an asset, only when memory mapped (host) """
+        if not self.map:
+            raise ValueError("view() needs a memory mapped bundle (use_mmap=True)")
+
+        offset, size, _, _, _, _ = self.entry(asset_id)
+        return memoryview(self.map)[offset:offset + size]
+
+    def load_sprite(self, asset_id, frame_width=None, frame_height=None):
+        """ Load a sprite asset as an Image, in the same way as SpriteAssetReader does for .spr files """
+        from images.sprite_asset import SpriteAssetReader
+
+        offset, _, asset_type, _, _, _ = self.entry(asset_id)
+        if asset_type != TYPE_SPRITE:
+            raise ValueError(f"Asset {asset_id} is not a sprite (type {asset_type})")
+
+        self.file.seek(offset)
+        return SpriteAssetReader().read(self.file, frame_width, frame_height)
@@ -0,0 +1,171 @@
+import utime
+
+class AssetCache:
+    """
+    LRU cache of loaded assets (Images), with a ceiling on the total bytes resident in RAM.
+
+    Every entry keeps its size in bytes, the "time" (a counter, bumped on every get / put) it was last used, and a
+    pin count. When a new asset doesn't fit under max_bytes, the least recently used unpinned entries are evicted
+    until it does. Pinned entries (player, HUD) are never evicted. If everything left is pinned, the new asset is
+    stored anyway, over the ceiling, since refusing it would just break the caller.
+
+    Evicting an entry only drops the cache reference: whoever else holds the same asset must let go of it as well
+    for the memory to be freed, so they can subscribe to evictions with add_listener().
+    """
+    def __init__(self, max_bytes=64 * 1024):
+        self.max_bytes = max_bytes
+
+        """ key -> [value, size, last_used, pins] """
+        self.entries = {}
+        self.resident_bytes = 0
+        self.clock = 0
+        self.listeners = []
+
+        """ Stats """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.loads = 0
+        self.last_load_us = 0
+        self.max_load_us = 0
+        self.total_load_us = 0
+
+    def add_listener(self, callback):
+        """ callback(key) is called after an entry has been evicted """
+        self.listeners.append(callback)
+
+    def get(self, key):
+        """ Returns the cached asset (and marks it as recently used), or None """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.clock += 1
+        entry[2] = self.clock
+        return entry[0]
+
+    def has(self, key):
+        return key in self.entries
+
+    def put(self, key, value, size):
+        if key in self.entries:
+            self.remove(key)
+
+        self.make_room(size)
+
+        self.clock += 1
+        self.entries[key] = [value, size, self.clock, 0]
+        self.resident_bytes += size
+        return value
+
+    def grow(self, key, extra_bytes):
+        """ Account for memory derived from an asset after loading it (ie: prescaled frames), and evict other entries
+        to get back under the ceiling, the same as put(). The grown entry itself is kept, since it was just loaded """
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+
+        entry[1] += extra_bytes
+        self.resident_bytes += extra_bytes
+
+        self.clock += 1
+        entry[2] = self.clock
+        entry[3] += 1
+        self.make_room(0)
+        entry[3] -= 1
+        return True
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return False
+
+        self.resident_bytes -= entry[1]
+        return True
+
+    def pin(self, key):
+        """ Pinned assets are never evicted. Pins are counted, so every pin() needs its own unpin() """
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+
+        entry[3] += 1
+        return True
+
+    def unpin(self, key):
+        entry = self.entries.get(key)
+        if entry is None or not entry[3]:
+            return False
+
+        entry[3] -= 1
+        return True
+
+    def is_pinned(self, key):
+        entry = self.entries.get(key)
+        return bool(entry and entry[3])
+
+    def make_room(self, size):
+        """ Evict least recently used, unpinned entries until 'size' more bytes fit under the ceiling """
+        while self.resident_bytes + size > self.max_bytes:
+            victim = None
+            oldest = None
+
+            for key, entry in self.entries.items():
+                if entry[3]:
+                    continue
+                if oldest is None or entry[2] < oldest:
+                    oldest = entry[2]
+                    victim = key
+
+            if victim is None:
+                return False
+
+            self.evict(victim)
+
+        return True
+
+    def evict(self, key):
+        size = self.entries[key][1]
+        self.remove(key)
+        self.evictions += 1
+        self.evicted_bytes += size
+
+        for callback in self.listeners:
+            callback(key)
+
+    def record_load(self, start_us):
+        """ Call with the ticks_us() taken before a load (on a miss) """
+        load_us = utime.ticks_diff(utime.ticks_us(), start_us)
+        self.loads += 1
+        self.last_load_us = load_us
+        self.total_load_us += load_us
+        if load_us > self.max_load_us:
+            self.max_load_us = load_us
+
+    def stats(self):
+        """ Residency, evictions and load latency """
+        return {
+            'resident': len(self.entries),
+            'resident_bytes': self.resident_bytes,
+            'max_bytes': self.max_bytes,
+            'pinned': sum(1 for entry in self.entries.values() if entry[3]),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'evicted_bytes': self.evicted_bytes,
+            'loads': self.loads,
+            'last_load_us': self.last_load_us,
+            'max_load_us': self.max_load_us,
+            'avg_load_us': self.total_load_us // self.loads if self.loads else 0,
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"Assets: {stats['resident']} resident ({stats['pinned']} pinned), "
+              f"{stats['resident_bytes']:,} / {stats['max_bytes']:,} bytes")
+        print(f"  hits: {stats['hits']} / misses: {stats['misses']} / evictions: {stats['evictions']} "
+              f"({stats['evicted_bytes']:,} bytes)")
+        print(f"  load: avg {stats['avg_load_us']}us / max {stats['max_load_us']}us ({stats['loads']} loads)")
@@ -0,0 +1,171 @@
+import random
+import struct
+
+try:
+    from uarray import array
+except ImportError:
+    from array import array
+
+"""
+Baked effects: an effect (ie: the DeathAnim explosion) is simulated once, offline on the host (local/bake_fx.py) or
+at load time, and its draw calls are recorded as a sequence of frames of fill_rect commands. Playing it back is
+then just a loop of fill_rect() per frame, with no random numbers nor math. Several variants of the same effect are
+baked into the file, and one is picked at random every time it plays, so that it doesn't always look the same.
+
+The files live in flash, and only the commands of the current frame are read into RAM.
+
+File layout (little endian):
+- 12 byte header: magic, version, number of variants (u8), frames per variant (u16), ms per frame (u16),
+  largest frame in bytes (u16)
+- frame offsets (u32, from the start of the commands): one per frame of every variant, plus the end of the last one
+- the commands: 5 bytes each, x, y (i8, relative to the origin of the effect), width, height and color index (u8)
+"""
+MAGIC = b'WZFX'
+VERSION = 1
+HEADER_FORMAT = "<4sBBHHH"
+HEADER_SIZE = 12
+COMMAND_FORMAT = "<bbBBB"
+COMMAND_SIZE = 5
+
+class BakeRecorder:
+    """
+    Stands in for the display while an effect is baked: records its fill_rect() / hline() calls, one frame at a
+    time (end_frame()). Colors are recorded as given, so the effect should draw with color indexes, which are mapped
+    to real colors on playback.
+
+    Rects that can't be seen with the effect placed anywhere on the screen are dropped.
+    """
+
+    def __init__(self, width=96, height=64):
+        self.width = width
+        self.height = height
+        self.frames = []
+        self.current = bytearray()
+        self.dropped = 0
+
+    def fill_rect(self, x, y, width, height, color):
+        if width <= 0 or height <= 0 or x >= self.width or y >= self.height or x + width <= -self.width or \
+                y + height <= -self.height:
+            self.dropped += 1
+            return
+
+        if x < -128:
+            width += x + 128
+            x = -128
+        if y < -128:
+            height += y + 128
+            y = -128
+
+        self.current.extend(struct.pack(COMMAND_FORMAT, x, y, min(width, 255), min(height, 255), color))
+
+    def hline(self, x, y, width, color):
+        self.fill_rect(x, y, width, 1, color)
+
+    def end_frame(self):
+        self.frames.append(bytes(self.current))
+        self.current = bytearray()
+
+def bake(draw_frame, num_variants, num_frames, width=96, height=64):
+    """ Run draw_frame(recorder, frame_idx) num_frames times for every variant. Returns the frames of each variant,
+    and the number of rects dropped """
+    variants = []
+    dropped = 0
+    for _ in range(num_variants):
+        recorder = BakeRecorder(width, height)
+        for frame_idx in range(num_frames):
+            draw_frame(recorder, frame_idx)
+            recorder.end_frame()
+        variants.append(recorder.frames)
+        dropped += recorder.dropped
+
+    return variants, dropped
+
+def save_baked(filename, variants, frame_ms):
+    """ variants: a list of variants, each a list of frames of commands (bytes), all with the same number of frames """
+    num_frames = len(variants[0])
+    offsets = [0]
+    for frames in variants:
+        if len(frames) != num_frames:
+            raise ValueError("All the variants must have the same number of frames")
+        for frame in frames:
+            offsets.append(offsets[-1] + len(frame))
+
+    max_frame = max(len(frame) for frames in variants for frame in frames)
+
+    with open(filename, "wb") as file:
+        file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, len(variants), num_frames, frame_ms, max_frame))
+        file.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        for frames in variants:
+            for frame in frames:
+                file.write(frame)
+
+class BakedEffect:
+    """ Plays back a baked effect file, one frame at a time """
+
+    def __init__(self, file, num_variants, num_frames, frame_ms, max_frame):
+        self.file = file
+        self.num_variants = num_variants
+        self.num_frames = num_frames
+        self.frame_ms = frame_ms
+        self.duration_ms = num_frames * frame_ms
+        self.buffer = bytearray(max_frame)
+        self.variant = 0
+
+        num_offsets = num_variants * num_frames + 1
+        self.offsets = array('I', [0] * num_offsets)
+        file.readinto(self.offsets)
+        self.commands_start = HEADER_SIZE + num_offsets * 4
+
+    @staticmethod
+    def open(filename):
+        """ Returns None if there is no (valid) effect file """
+        try:
+            file = open(filename, "rb")
+        except OSError:
+            return None
+
+        header = file.read(HEADER_SIZE)
+        if len(header) == HEADER_SIZE:
+            magic, version, num_variants, num_frames, frame_ms, max_frame = struct.unpack(HEADER_FORMAT, header)
+            if magic == MAGIC and version == VERSION and num_variants and num_frames:
+                return BakedEffect(file, num_variants, num_frames, frame_ms, max_frame)
+
+        file.close()
+        return None
+
+    def close(self):
+        self.file.close()
+
+    def start(self, variant=None):
+        """ Pick the variant to play (a random one, by default) """
+        if variant is None:
+            variant = random.randrange(self.num_variants)
+        self.variant = variant
+
+    def frame_at(self, elapsed_ms):
+        """ Index of the frame to show at elapsed_ms, or -1 once the effect is over """
+        frame_idx = elapsed_ms // self.frame_ms
+        return frame_idx if frame_idx < self.num_frames else -1
+
+    def draw(self, display, frame_idx, x, y, colors):
+        """ Draw a frame of the current variant with its origin at (x, y). 'colors' maps the color indexes to display
+        colors """
+        idx = self.variant * self.num_frames + frame_idx
+        start = self.offsets[idx]
+        size = self.offsets[idx + 1] - start
+        if not size:
+            return
+
+        """ The whole buffer is read (the tail is ignored), so that there is no slice to allocate """
+        buffer = self.buffer
+        self.file.seek(self.commands_start + start)
+        self.file.readinto(buffer)
+
+        for pos in range(0, size, COMMAND_SIZE):
+            rect_x = buffer[pos]
+            rect_y = buffer[pos + 1]
+            if rect_x > 127:
+                rect_x -= 256
+            if rect_y > 127:
+                rect_y -= 256
+            display.fill_rect(x + rect_x, y + rect_y, buffer[pos + 2], buffer[pos + 3], colors[buffer[pos + 4]])
@@ -0,0 +1,84 @@
+import framebuf as fb
+from uctypes import addressof
+
+def lut_buffer(alignment, size=512):
+    """ A buffer of 'size' bytes whose *data* starts on a multiple of 'alignment'. utils.aligned_buffer() aligns on
+    id(), the address of the bytearray object, which is not where its bytes live """
+    buf = bytearray(size + alignment - 1)
+    addr = addressof(buf)
+    offset = ((addr + alignment - 1) & ~(alignment - 1)) - addr
+    return memoryview(buf)[offset:offset + size]
+
+class ColorLUT():
+    """
+    A 256 entry RGB565 color lookup table, used by the indexed (GS8) display driver to expand each framebuffer pixel
+    into a screen color at scan-out time. Changing an entry recolors every pixel using that index on the next frame,
+    so palette effects are "free".
+
+    Entries are stored as little endian halfwords of the *screen* RGB565 value, so that a 16bit DMA read of an
+    entry can go straight to the SPI state machine, which shifts out the high byte first. The setters and getters
+    take and return colors in the same byte swapped format as the RGB565 framebuffers and FramebufferPalette, so
+    that existing palettes can be loaded as they are.
+
+    The LUT buffer must be aligned to 512 bytes on the device, since the entry address is built by the PIO as
+    (lut_addr | index << 1). Use lut_buffer() to allocate one.
+    """
+    NUM_COLORS = 256
+
+    def __init__(self, buffer=None):
+        if buffer is None:
+            buffer = bytearray(self.NUM_COLORS * 2)
+
+        self.lut = buffer
+        self.next_free = 1 # Index 0 is reserved for the background (black)
+
+    def set_color(self, index, color):
+        lut = self.lut
+        lut[index * 2] = (color >> 8) & 0xFF
+        lut[index * 2 + 1] = color & 0xFF
+
+    def get_color(self, index):
+        lut = self.lut
+        return (lut[index * 2 + 1]) | (lut[index * 2] << 8)
+
+    def alloc(self, num_colors):
+        """ Reserve num_colors consecutive entries, and return the first one """
+        start = self.next_free
+        if start + num_colors > self.NUM_COLORS:
+            raise ValueError(f"Not enough free LUT entries for {num_colors} colors ({start} used)")
+
+        self.next_free += num_colors
+        return start
+
+    def load_palette(self, palette, start=None):
+        """
+        Copy the colors of a FramebufferPalette into the LUT (at `start`, or at newly allocated entries) and return
+        a GS8 palette that maps the original color indices to the LUT indices, so that indexed images can be blitted
+        into the GS8 framebuffer with display.blit(img, x, y, alpha, index_palette)
+        """
+        num_colors = palette.num_colors
+        if start is None:
+            start = self.alloc(num_colors)
+
+        index_palette = fb.FrameBuffer(bytearray(num_colors), num_colors, 1, fb.GS8)
+
+        for i in range(num_colors):
+            self.set_color(start + i, palette.get_bytes(i))
+            index_palette.pixel(i, 0, start + i)
+
+        return index_palette
+
+    def expand(self, indices, out=None):
+        """ Software version of the scan-out expansion: returns the bytes that reach the display (high byte first)
+        for a buffer of GS8 indices. Used in tests, and as a reference for the DMA path. """
+        if out is None:
+            out = bytearray(len(indices) * 2)
+
+        lut = self.lut
+        j = 0
+        for idx in indices:
+            out[j] = lut[idx * 2 + 1]
+            out[j + 1] = lut[idx * 2]
+            j += 2
+
+        return out
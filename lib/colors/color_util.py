@@ -1,4 +1,16 @@
+try:
+    from uarray import array
+except ImportError:
+    from array import array
+
+try:
+    import numpy as np # Host only: faster batch conversions behind the same API
+except (ImportError, AttributeError):
+    # AttributeError: lib/inspect.py shadows the standard one when lib/ is first in sys.path, which breaks numpy
+    np = None
+
 FLOAT_ERROR = 0.0000005
+NP_MIN_COLORS = 64 # Below this, numpy's call overhead is not worth it
 RGB565 = 1
 BGR565 = 2
 
@@ -333,6 +345,114 @@ def color_scale(begin_hsl, end_hsl, nb):
 
     return list
 
+""" BATCH FUNCTIONS
+
+These work on whole palettes at once, and write straight into bytearray / array buffers, instead of building lists
+of tuples one color at a time. 'buffer' here means the same layout as FramebufferPalette.palette: 2 bytes per color,
+in screen byte order, ie: the same colors that hex_to_565() would return, stored as little endian halfwords.
+"""
+def _pack_565(red, green, blue, format):
+    """ Same as rgb_to_565, but returns the bytes as stored in the framebuffer (hi, lo) """
+    if format != RGB565:
+        red, blue = blue, red
+
+    rgb565 = ((red & 0xF8) << 8) | ((green & 0xFC) << 3) | (blue >> 3)
+    return rgb565 >> 8, rgb565 & 0xFF
+
+def hex_to_565_buffer(hex_values, format=color_format, out=None, offset=0):
+    """ Convert a list of 24bit hex colors into a palette buffer (see above). Writes into 'out' starting at color
+    'offset' if given, otherwise into a new bytearray, which is returned """
+    num_colors = len(hex_values)
+    if out is None:
+        out = bytearray(num_colors * 2)
+
+    if np is not None and num_colors >= NP_MIN_COLORS:
+        hex_values = np.fromiter(hex_values, dtype=np.uint32, count=num_colors)
+        _np_pack_565(hex_values >> 16, hex_values >> 8, hex_values, format, out, offset)
+        return out
+
+    i = offset * 2
+    for hex_value in hex_values:
+        out[i], out[i + 1] = _pack_565((hex_value >> 16) & 0xFF, (hex_value >> 8) & 0xFF, hex_value & 0xFF, format)
+        i += 2
+
+    return out
+
+def hex_to_565_array(hex_values, format=color_format):
+    """ Same as hex_to_565_buffer, but returns an array('H') of ints (same values as hex_to_565()), for code that
+    passes colors straight to the drawing functions """
+    buffer = hex_to_565_buffer(hex_values, format)
+    colors = array('H', range(len(hex_values)))
+
+    for i in range(len(colors)):
+        colors[i] = buffer[i * 2] | (buffer[i * 2 + 1] << 8)
+
+    return colors
+
+def gradient_to_buffer(stops, num_colors, format=color_format, out=None, offset=0):
+    """
+    Linear (RGB) gradient of num_colors colors, going through all the 24bit hex colors in 'stops' at even intervals.
+    The first and last colors are exactly the first and last stops. Writes into 'out' at color 'offset' (ie: the
+    bytearray of a FramebufferPalette), or into a new bytearray, which is returned.
+    """
+    num_stops = len(stops)
+    if num_stops < 2 or num_colors < 2:
+        raise ValueError(f"Gradients need at least 2 stops and 2 colors ({num_stops} / {num_colors})")
+
+    if out is None:
+        out = bytearray(num_colors * 2)
+
+    segments = num_stops - 1
+    last = num_colors - 1
+
+    if np is not None and num_colors >= NP_MIN_COLORS:
+        stops = np.array(stops, dtype=np.int32)
+        pos = np.arange(num_colors, dtype=np.int32) * segments
+        seg = np.minimum(pos // last, segments - 1)
+        rem = pos - (seg * last)
+        start, end = stops[seg], stops[seg + 1]
+
+        channels = []
+        for shift in (16, 8, 0):
+            a = (start >> shift) & 0xFF
+            b = (end >> shift) & 0xFF
+            channels.append(a + ((b - a) * rem) // last)
+
+        _np_pack_565(channels[0], channels[1], channels[2], format, out, offset)
+        return out
+
+    i = offset * 2
+    for idx in range(num_colors):
+        pos = idx * segments
+        seg = min(pos // last, segments - 1)
+        rem = pos - (seg * last)
+        start, end = stops[seg], stops[seg + 1]
+
+        rgb = []
+        for shift in (16, 8, 0):
+            a = (start >> shift) & 0xFF
+            b = (end >> shift) & 0xFF
+            rgb.append(a + ((b - a) * rem) // last)
+
+        out[i], out[i + 1] = _pack_565(rgb[0], rgb[1], rgb[2], format)
+        i += 2
+
+    return out
+
+def _np_pack_565(red, green, blue, format, out, offset):
+    red = np.asarray(red, dtype=np.uint32) & 0xFF
+    green = np.asarray(green, dtype=np.uint32) & 0xFF
+    blue = np.asarray(blue, dtype=np.uint32) & 0xFF
+
+    if format != RGB565:
+        red, blue = blue, red
+
+    rgb565 = ((red & 0xF8) << 8) | ((green & 0xFC) << 3) | (blue >> 3)
+    start = offset * 2
+    dest = np.frombuffer(out, dtype=np.uint8, count=len(rgb565) * 2, offset=start)
+    dest[0::2] = rgb565 >> 8
+    dest[1::2] = rgb565 & 0xFF
+
 def mul(step, value):
     return tuple([v * value for v in step])
 
@@ -1,9 +1,17 @@
 import framebuf as fb
 from colors import color_util as colors
 
+try:
+    from uarray import array
+except ImportError:
+    from array import array
+
 class FramebufferPalette(fb.FrameBuffer):
     """
     A color palette in framebuffer format (rgb565), ready to be used by display.blit()
+
+    The palette buffer can also be a memoryview into a bigger buffer (see concat() and mirror()), in which case
+    the palette is a zero copy alias of that memory, and its address can be passed straight to the scaler.
     """
     palette: bytearray
     num_colors: int = 0
@@ -27,7 +35,7 @@ class FramebufferPalette(fb.FrameBuffer):
             byte_size = self.byte_size(self.num_colors)
             palette = bytearray(byte_size)
             self.palette = palette
-        elif isinstance(palette, bytearray):
+        elif isinstance(palette, (bytearray, memoryview)):
             self.num_colors = self.color_size(len(palette))
             self.palette = palette
         else:
@@ -48,18 +56,7 @@ class FramebufferPalette(fb.FrameBuffer):
 
     def __add__(self, second_palette):
         """ Override `+` so that we can merge two palettes easily """
-
-        print(f"Adding palettes ... {self.num_colors} + {second_palette.num_colors}")
-        total_colors = self.num_colors + second_palette.num_colors
-        new_palette = FramebufferPalette(total_colors)
-
-        for i in range(self.num_colors):
-            new_palette.set_bytes(i, self.get_bytes(i))
-
-        for j in range(second_palette.num_colors):
-            new_palette.set_bytes(j + self.num_colors, second_palette.get_bytes(j))
-
-        return new_palette
+        return FramebufferPalette.concat([self, second_palette])
 
     def __getitem__(self, index):
         return self.get_bytes(index)
@@ -135,6 +132,26 @@ class FramebufferPalette(fb.FrameBuffer):
     def set_int(self, index, color):
         self.pixel(index, 0, color)
 
+    def get_ints(self, start=0, count=None, out=None):
+        """ Batch version of get_int(): returns the colors [start:start+count] as an array('H') """
+        if count is None:
+            count = self.num_colors - start
+
+        if out is None:
+            out = array('H', range(count))
+
+        if self.color_mode in (fb.RGB565, self.RGB565, self.BGR565):
+            palette = self.palette
+            j = start * 2
+            for i in range(count):
+                out[i] = palette[j] | (palette[j + 1] << 8)
+                j += 2
+        else:
+            for i in range(count):
+                out[i] = self.pixel(start + i, 0)
+
+        return out
+
     def get_bytes(self, index, invert=False):
         """ Since the palette already stores colors in original screen format, for efficiency,
         there is no need to convert the color on the way out, presuming its meant for the screen"""
@@ -147,21 +164,50 @@ class FramebufferPalette(fb.FrameBuffer):
         return color
 
     def clone(self):
-        new_palette = FramebufferPalette(bytearray(self.num_colors * 2))
-        for i in range(0, self.num_colors):
-            color = self.pixel(i, 0)
-            new_palette.pixel(i, 0, color)
+        return FramebufferPalette(bytearray(self.palette), color_mode=self.color_mode)
 
-        return new_palette
-
-    def mirror(self):
-        new_palette = FramebufferPalette(self.num_colors)
-        for i in range(0, self.num_colors):
-            color = self.get_bytes(i, False)
-            j = self.num_colors - i - 1
-            new_palette.pixel(j, 0, color)
-
-        return new_palette
+    @staticmethod
+    def concat(palettes, arena=None, offset=0):
+        """ Copy several palettes back to back into 'arena' (starting at color 'offset'), or into a new buffer, and
+        return a palette view of the result """
+        first = palettes[0]
+        total = 0
+        for palette in palettes:
+            total += len(palette.palette)
+
+        if arena is None:
+            arena = bytearray(total)
+
+        arena = memoryview(arena)
+        start = pos = first.byte_size(offset)
+
+        for palette in palettes:
+            size = len(palette.palette)
+            arena[pos:pos + size] = palette.palette
+            pos += size
+
+        return FramebufferPalette(arena[start:pos], color_mode=first.color_mode)
+
+    def mirror(self, out=None, offset=0):
+        """ Copy the colors in reverse order into 'out' (at color 'offset') or into a new buffer, in a single pass,
+        and return a palette view of the copy. Only for 2 byte colors """
+        if self.color_mode not in (fb.RGB565, self.RGB565, self.BGR565):
+            raise ValueError(f"mirror() needs 2 byte colors, not color mode {self.color_mode}")
+
+        size = self.num_colors * 2
+        if out is None:
+            out = bytearray(size)
+            offset = 0
+
+        palette = self.palette
+        start = offset * 2
+        last = start + size - 2
+
+        for i in range(0, size, 2):
+            out[last - i] = palette[i]
+            out[last - i + 1] = palette[i + 1]
+
+        return FramebufferPalette(memoryview(out)[start:start + size], color_mode=self.color_mode)
 
     def pick_from_value(self, value, max, min=0):
         """ Given a value that is part of a range, pick the color index on the palette which represents the same ratio"""
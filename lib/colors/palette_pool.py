@@ -0,0 +1,128 @@
+class PalettePool:
+    """
+    Interns the palettes of the loaded images by content, so that identical palettes (the laser wall variants, the
+    white lines, the debris) share one FramebufferPalette and one buffer, instead of a copy per BMP.
+
+    Every holder of a shared palette (the cached image it came with, every sprite type using it) counts as one
+    reference: intern() and acquire() add one, release() drops one, and the palette leaves the pool when the last one
+    is gone.
+
+    Shared palettes must be treated as read only. A holder that needs to change its colors (palette animations) calls
+    make_unique() first, which gives it a private copy if anyone else holds the palette (copy on write).
+    """
+
+    def __init__(self):
+        self.by_key = {}    # content hash -> shared palettes with that hash
+        self.entries = {}   # id(palette) -> [palette, content hash, refs]
+
+        """ Stats """
+        self.hits = 0
+        self.saved_bytes = 0    # bytes of the duplicate palettes that were dropped for a shared one
+        self.copies = 0         # copy on write clones
+
+    @staticmethod
+    def palette_key(palette):
+        """ 32 bit FNV-1a of the colors and the color mode """
+        hash = ((0x811C9DC5 ^ (palette.color_mode & 0xFF)) * 0x01000193) & 0xFFFFFFFF
+        for byte in palette.palette:
+            hash = ((hash ^ byte) * 0x01000193) & 0xFFFFFFFF
+        return hash
+
+    @staticmethod
+    def same_colors(palette_a, palette_b):
+        bytes_a, bytes_b = palette_a.palette, palette_b.palette
+        if palette_a.color_mode != palette_b.color_mode or len(bytes_a) != len(bytes_b):
+            return False
+
+        for i in range(len(bytes_a)):
+            if bytes_a[i] != bytes_b[i]:
+                return False
+        return True
+
+    def intern(self, palette):
+        """ Returns the shared palette with the same colors (one more reference to it), or adds this one to the pool """
+        if not palette:
+            return palette
+
+        entry = self.entries.get(id(palette))
+        if entry:
+            entry[2] += 1
+            return palette
+
+        key = self.palette_key(palette)
+        shared = self.by_key.get(key)
+        if shared:
+            for candidate in shared:
+                if self.same_colors(candidate, palette):
+                    self.entries[id(candidate)][2] += 1
+                    self.hits += 1
+                    self.saved_bytes += len(palette.palette)
+                    return candidate
+        else:
+            shared = self.by_key[key] = []
+
+        shared.append(palette)
+        self.entries[id(palette)] = [palette, key, 1]
+        return palette
+
+    def acquire(self, palette):
+        """ One more reference to a palette that is already in the pool """
+        entry = self.entries.get(id(palette))
+        if entry:
+            entry[2] += 1
+        return palette
+
+    def release(self, palette):
+        """ Drop one reference. Palettes that are not in the pool (private copies) are ignored """
+        entry = palette and self.entries.get(id(palette))
+        if not entry:
+            return False
+
+        entry[2] -= 1
+        if entry[2] <= 0:
+            self._detach(entry)
+        return True
+
+    def make_unique(self, palette):
+        """ Returns a palette that the caller can modify: a private copy if anyone else holds this one (and the
+        caller's reference is dropped), or the same palette, taken out of the pool, if the caller is the only holder """
+        entry = palette and self.entries.get(id(palette))
+        if not entry:
+            return palette
+
+        if entry[2] > 1:
+            entry[2] -= 1
+            self.copies += 1
+            return palette.clone()
+
+        self._detach(entry)
+        return palette
+
+    def refcount(self, palette):
+        entry = self.entries.get(id(palette))
+        return entry[2] if entry else 0
+
+    def _detach(self, entry):
+        palette, key, _ = entry
+        del self.entries[id(palette)]
+
+        shared = self.by_key[key]
+        shared.remove(palette)
+        if not shared:
+            del self.by_key[key]
+
+    def stats(self):
+        return {
+            'palettes': len(self.entries),
+            'shared_bytes': sum(len(entry[0].palette) for entry in self.entries.values()),
+            'hits': self.hits,
+            'saved_bytes': self.saved_bytes,
+            'copies': self.copies,
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"Palettes: {stats['palettes']} shared ({stats['shared_bytes']} bytes), {stats['hits']} duplicates "
+              f"dropped ({stats['saved_bytes']} bytes saved), {stats['copies']} copied on write")
+
+palette_pool = PalettePool()
@@ -63,11 +63,10 @@ PALETTE_CODE_BLUE = {
 }
 
 def convert_hex_palette(hex_palette, color_mode=RGB565):
-    color_list_palette = FramebufferPalette(len(hex_palette), color_mode=color_mode)
-    inv = False if (color_mode == RGB565) else True
-    for i, color in enumerate(hex_palette):
-        color_list_palette.set_rgb(i, colors.hex_to_rgb(color, inv=inv))
+    """ Colors end up in screen (BGR) order with either color_mode, which only affects get_rgb() on the result """
+    buffer = colors.hex_to_565_buffer(list(hex_palette), format=BGR565)
+    mode = FramebufferPalette.RGB565 if color_mode == RGB565 else FramebufferPalette.BGR565
 
-    return color_list_palette
+    return FramebufferPalette(buffer, color_mode=mode)
 
 
@@ -1,5 +1,4 @@
 import gc
-import random
 import framebuf
 import time
 import utime
@@ -10,8 +9,13 @@ from colors.framebuffer_palette import FramebufferPalette as fp
 from sprites_old.spritesheet import Spritesheet
 from colors import color_util as colors
 from profiler import prof
+from particles import ParticleSystem, Emitter
+from baked_fx import BakedEffect
+from explosion_fx import draw_explosion, explosion_radius, bake_explosion
 
 class DeathAnim(Animation):
+    explosion_file = "/fx/explosion.fx"
+
     def __init__(self, display):
         self.display = display
         self.width = display.width
@@ -22,7 +26,6 @@ class DeathAnim(Animation):
         self.elapsed_time = 0
         self.total_duration = 2000  # Total animation duration in milliseconds
         self.debris_count: int = 80
-        self.debris = [None] * self.debris_count
         self.explosion_center = None
         self.running = False
         self.start_time = None
@@ -45,26 +48,38 @@ class DeathAnim(Animation):
             0xB4F0F0,
         ]
 
-        debris_colors_int = [colors.hex_to_565(rgb, format=fp.BGR565) for rgb in self.debris_colors_hex]
-        fire_colors_int = [colors.hex_to_565(rgb) for rgb in self.debris_colors_hex]
+        debris_colors_int = colors.hex_to_565_array(self.debris_colors_hex, format=fp.BGR565)
+        fire_colors_int = colors.hex_to_565_array(self.debris_colors_hex)
 
         # Create 5 separate palettes, one for each color
         self.debris_palettes = []
-        self.fire_palettes = []
+        self.fire_colors = fire_colors_int
 
-        for debris_c, fire_c in zip(debris_colors_int, fire_colors_int):
+        for debris_c in debris_colors_int:
             palette = FramebufferPalette(2)
             palette.set_int(0, 0x0000)
             palette.set_int(1, int(debris_c))
             self.debris_palettes.append(palette)
 
-            palette2 = FramebufferPalette(2)
-            palette2.set_int(0, 0x0000)
-            palette2.set_int(1, int(fire_c))
-            self.fire_palettes.append(palette2)
-
-        """Flyweight objects """
-        self.debris = [None] * self.debris_count
+        self.explosion = self.load_explosion()
+
+        """ The debris: one particle system for the whole animation, and 1 in 4 pieces is a large one, which lasts
+        longer """
+        num_small = len(self.debris_sprites)
+        self.debris = ParticleSystem(self.debris_count, sprites=self.debris_sprites + self.debris_large,
+                                     palettes=self.debris_palettes, gravity=self.gravity, width=self.width,
+                                     height=self.height)
+        debris_speed = self.orig_speed * 0.0007
+        palette_ids = tuple(range(len(self.debris_palettes)))
+        num_large = self.debris_count // 4
+
+        self.emitters = [
+            Emitter(self.debris_count - num_large, speed=(0.7 * debris_speed, 1.8 * debris_speed), max_age=(800, 1300),
+                    spread=8, up=True, sprite_ids=tuple(range(num_small)), palette_ids=palette_ids),
+            Emitter(num_large, speed=(0.5 * debris_speed, 1.5 * debris_speed), max_age=(1300, 1800), spread=8,
+                    up=True, sprite_ids=tuple(range(num_small, num_small + len(self.debris_large))),
+                    palette_ids=palette_ids),
+        ]
 
     def start_animation(self, x, y):
         self.elapsed_time = 0
@@ -72,71 +87,42 @@ class DeathAnim(Animation):
         self.explosion_center = (x + 16, y + 10)
         self.speed = self.orig_speed
 
-        debris_speed = self.speed * 0.0007
-
-        gc.collect()
         prof.start_profile("death.debris_create")
 
-        for idx in range(self.debris_count):
-            pid = self.get_random_palette_id()
-            choice = random.choice([0,1,2,3]) - 1
-
-            if choice < 0: # 1 in 4 chance
-                sprite = random.choice(self.debris_large)
-                max_age = int(1500 + (random.uniform(-200, 300)))
-                this_speed = random.uniform(0.5, 1.5) * debris_speed
-            else:
-                sprite = random.choice(self.debris_sprites)
-                max_age = int(1000 + (random.uniform(-200, 300)))
-                this_speed = random.uniform(0.7, 1.8) * debris_speed
-
-            self.debris[idx] = {
-                'x': self.explosion_center[0] + random.randint(-8, 8),
-                'y': self.explosion_center[1] + random.randint(-8, 8),
-                'dx': random.uniform(-this_speed, this_speed),  # Speed in pixels per millisecond
-                'dy': random.uniform(-this_speed/2, -this_speed),
-                'sprite': sprite,
-                'palette_id': pid,
-                'max_age': max_age,
-            }
+        self.debris.clear()
+        for emitter in self.emitters:
+            emitter.emit(self.debris, *self.explosion_center)
 
         prof.end_profile("death.debris_create")
 
-        gc.collect()
-        self.check_mem()
+        if self.explosion:
+            self.explosion.start()
 
         self.running = True
 
-    def get_random_palette_id(self):
-        idx = random.randint(0, len(self.debris_palettes) - 1)
-        return idx
-
-    def draw_explosion(self, x, y, radius):
-        for i in range(16):
-            palette_id = self.get_random_palette_id()
-            palette = self.fire_palettes[palette_id]
-            color = palette.get_int(1)
-
-            fact = int(radius * self.elapsed_time / 100)  # Scale based on elapsed time
+    def load_explosion(self):
+        """ The baked explosion, from flash. It is baked and saved the first time, if the file is not there (see
+        local/bake_fx.py to bake it on the host). Returns None if that fails too, and then the explosion is drawn live """
+        explosion = BakedEffect.open(self.explosion_file)
+        if explosion:
+            return explosion
 
-            x1 = x + random.randint(0, fact) - int(fact * 0.5)
-            y1 = y + random.randint(0, fact) - int(fact * 0.7)
+        try:
+            bake_explosion(self.explosion_file, len(self.fire_colors), width=self.width, height=self.height)
+        except OSError as error:
+            print(f"Could not bake {self.explosion_file}: {error}")
+            return None
 
-            size = int(radius - ((self.elapsed_time / 700) * (random.random()/2)))
-            if size > 0:
-                self.display.fill_rect(int(x1 - size // 4), int(y1 - size // 2), int(size // 2), size, color)
-
-    def draw_debris(self, x, y, sprite, palette):
-        self.display.blit(sprite, x, y, 0, palette)
+        return BakedEffect.open(self.explosion_file)
 
     def update_and_draw(self):
-        """ This is a very weird and inefficient way of doing things """
+        """ One frame of the animation: the explosion, then the debris. Returns False once it's over """
         if not self.running or not self.start_time:
             return False
 
         current_time = utime.ticks_ms()
         frame_time = utime.ticks_diff(current_time, self.start_time)
-        delta_time = (frame_time - self.elapsed_time) * (self.speed / 1000)
+        elapsed_ms = frame_time - self.elapsed_time
         self.elapsed_time = frame_time
 
         """ Check whether the animation has reached its end """
@@ -147,28 +133,20 @@ class DeathAnim(Animation):
             self.running = False
             return False
 
-        gravity = self.gravity
-
         # Draw explosion
-        explosion_progress = min(self.elapsed_time / self.total_duration, 1)
-        radius = max(16 - int(16 * explosion_progress), 0)
-        radius = radius * 2
-        if radius > 0:
-            self.draw_explosion(*self.explosion_center, radius)
-
-        # Update and draw debris
-        for d in self.debris:
-            if frame_time > d['max_age']:
-                continue
-
-            d['x'] += d['dx'] * delta_time
-            d['y'] += d['dy'] * delta_time
-            d['dy'] += gravity * delta_time
-
-            palette = self.debris_palettes[d['palette_id']]
-
-            if 0 <= d['x'] < self.width and 0 <= d['y'] < self.height:
-                self.draw_debris(int(d['x']), int(d['y']), d['sprite'], palette)
+        center_x, center_y = self.explosion_center
+        if self.explosion:
+            frame_idx = self.explosion.frame_at(frame_time)
+            if frame_idx >= 0:
+                self.explosion.draw(self.display, frame_idx, center_x, center_y, self.fire_colors)
+        else:
+            radius = explosion_radius(frame_time, self.total_duration)
+            if radius > 0:
+                draw_explosion(self.display, center_x, center_y, radius, frame_time, self.fire_colors)
+
+        # Update and draw debris. The debris slows down as self.speed goes down (1000 = normal speed)
+        self.debris.time_scale = (self.speed << 8) // 1000
+        self.debris.update_and_draw(self.display, elapsed_ms)
 
         self.speed = self.speed - 6
         if self.speed < 20:
@@ -0,0 +1,45 @@
+import random
+
+from baked_fx import bake, save_baked
+
+"""
+The fire of the DeathAnim explosion: a burst of random flames (rects) that spreads out and shrinks over the length of
+the animation. Drawn live, or baked into an effect file (see baked_fx.py) and played back.
+"""
+DURATION_MS = 2000
+FRAME_MS = 33
+NUM_FLAMES = 16
+
+def draw_explosion(display, x, y, radius, elapsed_ms, colors):
+    """ One frame of flames around (x, y), in random colors from 'colors' """
+    num_colors = len(colors)
+    fact = int(radius * elapsed_ms / 100)  # Scale based on elapsed time
+
+    for i in range(NUM_FLAMES):
+        color = colors[random.randint(0, num_colors - 1)]
+
+        x1 = x + random.randint(0, fact) - int(fact * 0.5)
+        y1 = y + random.randint(0, fact) - int(fact * 0.7)
+
+        size = int(radius - ((elapsed_ms / 700) * (random.random() / 2)))
+        if size > 0:
+            display.fill_rect(int(x1 - size // 4), int(y1 - size // 2), int(size // 2), size, color)
+
+def explosion_radius(elapsed_ms, duration_ms=DURATION_MS):
+    progress = min(elapsed_ms / duration_ms, 1)
+    return max(16 - int(16 * progress), 0) * 2
+
+def bake_explosion(filename, num_colors, num_variants=4, width=96, height=64):
+    """ Bake num_variants explosions into an effect file, drawn with color indexes 0 to num_colors - 1. Returns the
+    number of rects that were dropped for being off screen """
+    color_ids = tuple(range(num_colors))
+
+    def draw_frame(recorder, frame_idx):
+        elapsed_ms = frame_idx * FRAME_MS
+        radius = explosion_radius(elapsed_ms)
+        if radius > 0:
+            draw_explosion(recorder, 0, 0, radius, elapsed_ms, color_ids)
+
+    variants, dropped = bake(draw_frame, num_variants, DURATION_MS // FRAME_MS + 1, width, height)
+    save_baked(filename, variants, FRAME_MS)
+    return dropped
@@ -0,0 +1,50 @@
+class FixedStep:
+    """
+    Fixed timestep for the game simulation: the frame times are added up in an accumulator, and the simulation runs in
+    steps of exactly step_ms, as many as fit. Every step sees the same elapsed time, so motion and collisions play out
+    the same no matter how long the frames take (a slow frame runs more steps instead of one big one, which used to let
+    sprites jump right over the collision window).
+
+    What is left in the accumulator is how far the render is between the last step and the next one: alpha, from 0 to
+    1, which the sprites use to draw themselves between their last two positions.
+
+    No more than max_steps run per frame. Past that the time is dropped, and the game slows down rather than spending
+    ever longer frames catching up.
+    """
+
+    def __init__(self, step_func, step_ms=8, max_steps=8):
+        self.step_func = step_func
+        self.step_ms = step_ms
+        self.max_steps = max_steps
+        self.accumulator_ms = 0
+        self.alpha = 0.0
+
+        """ Stats """
+        self.steps = 0
+        self.dropped_ms = 0
+
+    def reset(self):
+        self.accumulator_ms = 0
+        self.alpha = 0.0
+
+    def advance(self, elapsed_ms):
+        """ Run the steps that fit in the time accumulated so far. Returns how many ran """
+        step_ms = self.step_ms
+        accumulator = self.accumulator_ms + elapsed_ms
+        steps = 0
+
+        while accumulator >= step_ms:
+            if steps == self.max_steps:
+                dropped = accumulator - accumulator % step_ms
+                self.dropped_ms += dropped
+                accumulator -= dropped
+                break
+
+            self.step_func(step_ms)
+            accumulator -= step_ms
+            steps += 1
+
+        self.accumulator_ms = accumulator
+        self.alpha = accumulator / step_ms
+        self.steps += steps
+        return steps
@@ -0,0 +1,188 @@
+try:
+    import framebuf
+except ImportError:
+    """ The atlas and the string cache also run on the host, without FrameBuffers (see local/bench_font_atlas.py) """
+    framebuf = None
+
+try:
+    from uarray import array
+except ImportError:
+    from array import array
+
+class GlyphAtlas:
+    """
+    The glyphs of a font, rasterized once (the first time they are used) from the 1 bit font data into GS4_HMSB
+    nibbles, and packed back to back in a single buffer. A metrics table (by char code) holds the offset and width of
+    every glyph in the buffer.
+
+    Glyphs are colored the same way ColorWriter.render_char() does it: with the colors at index 0 and 1 of the palette,
+    so a string built from the atlas is identical to one rendered char by char.
+    """
+    NOT_LOADED = 0xFFFF
+
+    def __init__(self, font, palette, fixed_width=None, capacity=32):
+        self.font = font
+        self.height = font.height()
+        self.fixed_width = fixed_width
+        self.paper = palette.get_int(0) & 0x0F
+        self.ink = palette.get_int(1) & 0x0F
+
+        """ Metrics, by char code """
+        self.offsets = array('H', [self.NOT_LOADED] * 128)
+        self.widths = bytearray(128)
+
+        glyph_width = fixed_width or font.max_width()
+        self.pixels = bytearray(capacity * ((glyph_width + 1) // 2) * self.height)
+        self.used = 0
+
+        """ Stats """
+        self.num_glyphs = 0
+
+    def glyph(self, char_code):
+        """ (offset in self.pixels, width) of a glyph, rasterizing it on first use """
+        offset = self.offsets[char_code]
+        if offset == self.NOT_LOADED:
+            offset = self.rasterize(char_code)
+        return offset, self.widths[char_code]
+
+    def rasterize(self, char_code):
+        glyph, height, width = self.font.get_ch(char_code)
+        if self.fixed_width:
+            width = self.fixed_width    # Same as ColorWriter: the 1 bit rows are read at the fixed width
+
+        src_stride = (width + 7) // 8
+        dst_stride = (width + 1) // 2
+        size = dst_stride * height
+
+        if self.used + size > len(self.pixels):
+            """ Out of room: grow (rare, there are only so many different chars in the HUD) """
+            self.pixels.extend(bytearray(max(size, len(self.pixels))))
+
+        pixels, ink, paper = self.pixels, self.ink, self.paper
+        offset = self.used
+
+        for y in range(height):
+            row = offset + y * dst_stride
+            for x in range(0, width, 2):
+                high = ink if glyph[y * src_stride + (x >> 3)] & (0x80 >> (x & 7)) else paper
+                low = paper
+                if x + 1 < width:
+                    low = ink if glyph[y * src_stride + ((x + 1) >> 3)] & (0x80 >> ((x + 1) & 7)) else paper
+                pixels[row + (x >> 1)] = (high << 4) | low
+
+        self.offsets[char_code] = offset
+        self.widths[char_code] = width
+        self.used += size
+        self.num_glyphs += 1
+        return offset
+
+    def text_width(self, text):
+        width = 0
+        for char in text:
+            width += self.glyph(ord(char))[1]
+        return width
+
+    def render(self, text, out, out_width):
+        """ Copy the glyphs of 'text' next to each other into 'out' (GS4_HMSB, out_width wide and one glyph high).
+        Glyphs that land on an even x are copied a byte at a time """
+        pixels, height = self.pixels, self.height
+        out_stride = (out_width + 1) // 2
+        x = 0
+
+        for char in text:
+            offset, width = self.glyph(ord(char))
+            if x + width > out_width:
+                break
+
+            src_stride = (width + 1) // 2
+            if not x & 1:
+                whole = width >> 1
+                for y in range(height):
+                    src = offset + y * src_stride
+                    dst = y * out_stride + (x >> 1)
+                    out[dst:dst + whole] = pixels[src:src + whole]
+                    if width & 1:
+                        out[dst + whole] = (out[dst + whole] & 0x0F) | (pixels[src + whole] & 0xF0)
+            else:
+                for y in range(height):
+                    src = offset + y * src_stride
+                    row = y * out_stride
+                    for i in range(width):
+                        byte = pixels[src + (i >> 1)]
+                        color = byte & 0x0F if (i & 1) else byte >> 4
+                        pos = row + ((x + i) >> 1)
+                        if (x + i) & 1:
+                            out[pos] = (out[pos] & 0xF0) | color
+                        else:
+                            out[pos] = (out[pos] & 0x0F) | (color << 4)
+
+            x += width
+
+        return x
+
+class TextCache:
+    """
+    Recently rendered strings (scores, "GAME OVER"...), as ready to blit GS4_HMSB buffers built from a GlyphAtlas.
+    When the same string comes back, drawing it is a single blit. Least recently used strings are evicted past
+    max_strings.
+
+    Entries are text -> [frame (FrameBuffer, or the buffer itself on the host), width, last_used]
+    """
+    def __init__(self, atlas, max_strings=8, max_width=96):
+        self.atlas = atlas
+        self.max_strings = max_strings
+        self.max_width = max_width
+        self.entries = {}
+        self.tick = 0
+
+        """ Stats """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, text):
+        """ (frame, width) of a string, rendering it on a miss """
+        self.tick += 1
+        entry = self.entries.get(text)
+        if entry:
+            self.hits += 1
+            entry[2] = self.tick
+            return entry[0], entry[1]
+
+        self.misses += 1
+        if len(self.entries) >= self.max_strings:
+            self.evict_oldest()
+
+        atlas = self.atlas
+        width = min(atlas.text_width(text), self.max_width)
+        buffer = bytearray(max(1, (width + 1) // 2 * atlas.height))
+        atlas.render(text, buffer, width)
+
+        frame = framebuf.FrameBuffer(buffer, width, atlas.height, framebuf.GS4_HMSB) if framebuf else buffer
+        self.entries[text] = [frame, width, self.tick]
+        return frame, width
+
+    def evict_oldest(self):
+        oldest = None
+        victim = None
+        for text, entry in self.entries.items():
+            if oldest is None or entry[2] < oldest:
+                oldest = entry[2]
+                victim = text
+
+        if victim is not None:
+            del self.entries[victim]
+            self.evictions += 1
+
+    def clear(self):
+        self.entries = {}
+
+    def stats(self):
+        return {
+            'strings': len(self.entries),
+            'glyphs': self.atlas.num_glyphs,
+            'atlas_bytes': len(self.atlas.pixels),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
@@ -4,6 +4,7 @@ import framebuf
 from typing import Tuple, Optional
 
 import framebuf as fb
+from font_atlas import GlyphAtlas, TextCache
 
 
 class FontRenderer():
@@ -132,6 +133,8 @@ class ColorWriter():
         self.palette = palette
         self.fixed_width = fixed_width
         self.dirty = False
+        self.text_cache = None
+        self.text_frame = None
 
         # print(f"WRITER WITH COLORS: x{palette[0]:#06x} and x{palette[1]:#06x}")
         if color_format:
@@ -156,7 +159,19 @@ class ColorWriter():
         self.pixels = framebuf.FrameBuffer(bytearray(buffer_size),
                                            text_width, text_height, self.color_format)
 
+    def cache_strings(self, max_strings: int = 8) -> TextCache:
+        """ Render text from a glyph atlas, and keep the last few strings ready to blit (see font_atlas.py). Only
+        for single line text """
+        atlas = GlyphAtlas(self.font, self.palette, self.fixed_width)
+        self.text_cache = TextCache(atlas, max_strings, self.text_width)
+        return self.text_cache
+
     def render_text(self, text: str, invert: bool = False) -> None:
+        if self.text_cache and not invert:
+            self.text_frame, _ = self.text_cache.get(text)
+            return
+
+        self.text_frame = None
         self.text_x = self.orig_x
         self.text_y = self.orig_y
 
@@ -216,6 +231,10 @@ class ColorWriter():
         if not palette:
             palette = self.palette
 
+        if self.text_frame:
+            display.blit(self.text_frame, self.orig_x, self.orig_y, -1, palette)
+            return True
+
         if self.color_format in (fb.MONO_HMSB, fb.GS4_HMSB, fb.GS8):
             """ Only indexed formats need a palette"""
             display.blit(self.pixels, self.orig_x, self.orig_y, -1, palette)
@@ -0,0 +1,213 @@
+try:
+    import utime
+except ImportError:
+    utime = None    # On the host, the scheduler runs on a SimClock
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+PHASE_UPDATE = 0
+PHASE_JOBS = 1
+PHASE_RENDER = 2
+PHASE_SLEEP = 3
+PHASE_NAMES = ('update', 'jobs', 'render', 'sleep')
+
+class FrameScheduler:
+    """
+    Runs a frame every period_ms, always in the same order: update, then the per frame jobs (in the order they were
+    added), then render. Replaces the update and render loops that each slept a fixed 30ms, as well as the separate
+    tasks running on their own timers (animations, FPS and profiler printouts).
+
+    After the frame, only the rest of the budget is slept. asyncio.sleep_ms() tends to oversleep, so the overshoot is
+    measured on every frame and taken off the next sleep.
+
+    Jobs can run every frame or every interval_ms. Low priority jobs (HUD, palette animations...) are skipped when
+    running them would push the frame past its deadline, given what they and the render phase usually cost, but never
+    more than max_skips frames in a row.
+
+    Timings of every phase (us) are kept as: last frame, moving average and worst case (see stats()).
+
+    For the host simulation mode, pass a SimClock: time only moves when the phases advance it, and run_sync() sleeps
+    on it.
+    """
+    ema_alpha = 0.1
+    max_skips = 4
+
+    def __init__(self, period_ms=33, update=None, render=None, clock=None):
+        self.clock = clock or utime
+        self.period_ms = period_ms
+        self.update = update
+        self.render = render
+        self.skip_low_priority = True
+        self.running = False
+
+        """ Jobs, in parallel lists so that running them does not allocate """
+        self.job_funcs = []
+        self.job_names = []
+        self.job_interval = []
+        self.job_next_ms = []
+        self.job_low = []
+        self.job_cost_us = []       # moving average of what the job takes
+        self.job_skips_in_row = []
+        self.job_skips = []
+
+        """ Per phase timings, in us """
+        self.phase_us = [0] * 4
+        self.phase_avg_us = [0.0] * 4
+        self.phase_max_us = [0] * 4
+
+        self.frames = 0
+        self.overruns = 0           # frames that took longer than period_ms
+        self.slack_us = 0           # budget left after the last frame (negative if over)
+        self.sleep_overshoot_us = 0.0
+        self.sleep_start_us = 0
+        self.sleep_ms = 0
+
+    def add_job(self, func, name=None, interval_ms=0, low_priority=False):
+        """ Run func() on every frame, or every interval_ms. Returns the job id """
+        self.job_funcs.append(func)
+        self.job_names.append(name or getattr(func, '__name__', 'job'))
+        self.job_interval.append(interval_ms)
+        self.job_next_ms.append(self.clock.ticks_ms())
+        self.job_low.append(low_priority)
+        self.job_cost_us.append(0.0)
+        self.job_skips_in_row.append(0)
+        self.job_skips.append(0)
+        return len(self.job_funcs) - 1
+
+    def remove_job(self, job_id):
+        """ Stops the job from running, without changing the ids of the others """
+        self.job_funcs[job_id] = None
+
+    def run_frame(self):
+        """ Run one frame. Returns how many ms to sleep before the next one """
+        clock = self.clock
+        ticks_us, ticks_diff = clock.ticks_us, clock.ticks_diff
+        frame_start = ticks_us()
+        budget_us = self.period_ms * 1000
+
+        if self.frames:
+            slept_us = ticks_diff(frame_start, self.sleep_start_us)
+            self.record(PHASE_SLEEP, slept_us)
+            overshoot = slept_us - self.sleep_ms * 1000
+            self.sleep_overshoot_us += (overshoot - self.sleep_overshoot_us) * self.ema_alpha
+
+        if self.update:
+            self.update()
+        jobs_start = ticks_us()
+        self.record(PHASE_UPDATE, ticks_diff(jobs_start, frame_start))
+
+        self.run_jobs(frame_start, budget_us)
+        render_start = ticks_us()
+        self.record(PHASE_JOBS, ticks_diff(render_start, jobs_start))
+
+        if self.render:
+            self.render()
+        frame_end = ticks_us()
+        self.record(PHASE_RENDER, ticks_diff(frame_end, render_start))
+
+        self.frames += 1
+        self.slack_us = slack_us = budget_us - ticks_diff(frame_end, frame_start)
+        if slack_us < 0:
+            self.overruns += 1
+
+        """ Sleep what is left of the budget, minus what the sleep usually oversleeps """
+        self.sleep_ms = max(0, int(slack_us - self.sleep_overshoot_us) // 1000)
+        self.sleep_start_us = frame_end
+        return self.sleep_ms
+
+    def run_jobs(self, frame_start, budget_us):
+        clock = self.clock
+        ticks_us, ticks_diff = clock.ticks_us, clock.ticks_diff
+        now_ms = clock.ticks_ms()
+        funcs, interval, next_ms, cost_us = self.job_funcs, self.job_interval, self.job_next_ms, self.job_cost_us
+        render_us = self.phase_avg_us[PHASE_RENDER]
+
+        for i in range(len(funcs)):
+            func = funcs[i]
+            if not func or (interval[i] and ticks_diff(now_ms, next_ms[i]) < 0):
+                continue
+
+            if self.skip_low_priority and self.job_low[i] and self.job_skips_in_row[i] < self.max_skips:
+                used_us = ticks_diff(ticks_us(), frame_start)
+                if used_us + cost_us[i] + render_us > budget_us:
+                    self.job_skips_in_row[i] += 1
+                    self.job_skips[i] += 1
+                    continue
+
+            start_us = ticks_us()
+            func()
+            elapsed_us = ticks_diff(ticks_us(), start_us)
+            cost_us[i] += (elapsed_us - cost_us[i]) * self.ema_alpha if cost_us[i] else elapsed_us
+            self.job_skips_in_row[i] = 0
+            if interval[i]:
+                next_ms[i] = clock.ticks_add(now_ms, interval[i])
+
+    def record(self, phase, elapsed_us):
+        self.phase_us[phase] = elapsed_us
+        if self.phase_avg_us[phase]:
+            self.phase_avg_us[phase] += (elapsed_us - self.phase_avg_us[phase]) * self.ema_alpha
+        else:
+            self.phase_avg_us[phase] = elapsed_us   # First frame: no average yet
+        if elapsed_us > self.phase_max_us[phase]:
+            self.phase_max_us[phase] = elapsed_us
+
+    async def run(self):
+        """ The frame loop, as an asyncio task. The other tasks (image streamer...) run while it sleeps """
+        self.running = True
+        while self.running:
+            await asyncio.sleep_ms(self.run_frame())
+
+    def run_sync(self, num_frames):
+        """ The frame loop without asyncio (and the host simulation, on a SimClock) """
+        for _ in range(num_frames):
+            self.clock.sleep_ms(self.run_frame())
+
+    def stop(self):
+        self.running = False
+
+    def stats(self):
+        stats = {'frames': self.frames, 'overruns': self.overruns, 'slack_us': self.slack_us,
+                 'sleep_overshoot_us': int(self.sleep_overshoot_us)}
+        for phase, name in enumerate(PHASE_NAMES):
+            stats[name] = (self.phase_us[phase], int(self.phase_avg_us[phase]), self.phase_max_us[phase])
+        stats['skipped'] = {name: skips for name, skips in zip(self.job_names, self.job_skips) if skips}
+        return stats
+
+    def print_stats(self):
+        print(f"Frames: {self.frames} ({self.overruns} over {self.period_ms}ms), slack: {self.slack_us}us, "
+              f"oversleep: {int(self.sleep_overshoot_us)}us")
+        for phase, name in enumerate(PHASE_NAMES):
+            print(f"  {name:<7} last {self.phase_us[phase]:>6}us  avg {int(self.phase_avg_us[phase]):>6}us  "
+                  f"max {self.phase_max_us[phase]:>6}us")
+        for i, name in enumerate(self.job_names):
+            print(f"  job {name:<12} avg {int(self.job_cost_us[i]):>6}us  skipped {self.job_skips[i]}")
+
+class SimClock:
+    """ Simulated time for the host: it only moves forward through advance() and sleep_ms(). Sleeps oversleep by
+    oversleep_us, like asyncio.sleep_ms() does on the device """
+    def __init__(self, oversleep_us=0):
+        self.now_us = 0
+        self.oversleep_us = oversleep_us
+
+    def ticks_us(self):
+        return self.now_us
+
+    def ticks_ms(self):
+        return self.now_us // 1000
+
+    @staticmethod
+    def ticks_diff(end, start):
+        return end - start
+
+    @staticmethod
+    def ticks_add(ticks, delta):
+        return ticks + delta
+
+    def advance(self, us):
+        self.now_us += us
+
+    def sleep_ms(self, ms):
+        self.now_us += ms * 1000 + self.oversleep_us
@@ -1,3 +1,4 @@
 from . import bmp_reader
 from . import image_loader
-from . import indexed_image
\ No newline at end of file
+from . import indexed_image
+from . import sprite_asset
\ No newline at end of file
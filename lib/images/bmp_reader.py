@@ -7,7 +7,7 @@ from framebuf import *
 from struct import unpack
 
 from colors.framebuffer_palette import FramebufferPalette as BufPalette
-from images.indexed_image import Image, create_image
+from images.indexed_image import Image, SheetFrames, create_image
 from colors import color_util as colors
 from scaler.const import DEBUG, INK_GREEN
 from utils import aligned_buffer
@@ -59,7 +59,7 @@ class BMPReader():
             maybe_frames, pixel_bytes = self._read_pixels(file, header, frame_width, frame_height, progress_callback)
 
             """ We have multiple frames"""
-            if type(maybe_frames) is list:
+            if isinstance(maybe_frames, SheetFrames):
                 frames = maybe_frames
                 pixels = frames[0]
             else:
@@ -150,30 +150,31 @@ class BMPReader():
         :param file: Open file object
         :param meta: ImageMeta object containing image metadata
         :param frame_height: Height of each frame in a sprite sheet (optional)
-        :return: List of FrameBuffer objects for sprite sheets, or a single FrameBuffer for regular images
+        :return: SheetFrames for sprite sheets, or a single FrameBuffer for regular images
         """
 
         byte_data = None
 
         if (frame_width and frame_height) and frame_height < meta.height:
-            """ This is a spritesheet"""
-
-            self.frames = []
+            """ This is a spritesheet: all the frames go into one buffer, in display order, so a bottom-up BMP (the
+            usual) fills it from the last frame backwards. The FrameBuffer used to decode each frame is thrown away
+            """
             num_frames = math.floor(meta.height / frame_height)
+            frame_bytes = (frame_width * meta.color_depth + 7) // 8 * frame_height
+            byte_data = aligned_buffer(frame_bytes * num_frames)
+            self.frames = SheetFrames(byte_data, frame_width, frame_height, num_frames, meta.color_format,
+                                      meta.color_depth)
 
             for frame_idx in range(num_frames):
-                frame_buffer, byte_data = self._create_frame_buffer(frame_width, frame_height, meta.color_format)
+                slot = frame_idx if meta.is_top_down else num_frames - frame_idx - 1
+                frame_buffer = FrameBuffer(self.frames.frame_bytes(slot), frame_width, frame_height, meta.color_format)
                 self._read_frame_data(file, frame_buffer, meta, frame_height)
-                self.frames.append(frame_buffer)
 
                 if progress_callback:
                     """ Call with the ratio of the image loaded"""
                     progress_callback((frame_idx)/num_frames)
 
-            if not meta.is_top_down:
-                self.frames.reverse()
-
-            return self.frames, byte_data
+            return self.frames, self.frames.frame_bytes(0)
 
         else:
             """ normal sprite """
@@ -214,9 +215,7 @@ class BMPReader():
                     color = (r << 16) | (g << 8) | b
                     frame_buffer.pixel(x, y, color)
 
-        """ After reading the frame, clear the memory to free up space, otherwise several repeated calls (such as for 
-        the player spritesheet) will cause a memory leak. There should be a way to manage this better, but for now, this
-        will do."""
+        """ Free the row buffer (and the FrameBuffer used to decode a spritesheet frame) right away """
         gc.collect()
 
     def _create_frame_buffer(self, width:int, height:int, color_format: int) -> tuple[FrameBuffer, bytearray]:
@@ -1,30 +1,82 @@
 import gc
 
 import uos
+import utime
 from images.bmp_reader import BMPReader
+from images.sprite_asset import SpriteAssetReader, SPRITE_EXT
+from assets.asset_bundle import AssetBundle
+from assets.asset_cache import AssetCache
 from colors.color_util import rgb_to_565
-from images.indexed_image import Image
+from colors.palette_pool import palette_pool
+from images.indexed_image import Image, create_image
 from framebuf import GS4_HMSB
 
 class ImageLoader():
     """Preloads a list of images in order to cache their framebuffers (as RGB565) to later be used by Sprites"""
     img_dir = "/img"
-    images = {}
+
+    """ Loaded images, by filename. LRU, with a byte ceiling: see pin() for the ones that must stay loaded """
+    cache = AssetCache()
+    palettes = {}  # Interned palette of every cached image, by filename (see cache_image())
     bmp_reader = BMPReader()
+    spr_reader = SpriteAssetReader()
+
+    bundle_path = "/assets.bin"  # See local/pack_assets.py
+    bundle = None
+    bundle_checked = False
 
     progress_loaded = 0
     progress_total = 0
     progress_bar_color = rgb_to_565([24, 24, 24])
     progress_bar_bg_color = rgb_to_565([12, 12, 12])
 
+    @staticmethod
+    def get_bundle():
+        """ Open the asset bundle the first time it is needed, if there is one """
+        if not ImageLoader.bundle_checked:
+            ImageLoader.bundle_checked = True
+            try:
+                ImageLoader.bundle = AssetBundle(ImageLoader.bundle_path)
+            except OSError:
+                ImageLoader.bundle = None
+            except ValueError as error:
+                """ Stale or truncated bundle: fall back to the image files """
+                print(error)
+                ImageLoader.bundle = None
+
+        return ImageLoader.bundle
+
+    @staticmethod
+    def pin(filename):
+        """ Keep an image resident (player, HUD) no matter how long ago it was used """
+        return ImageLoader.cache.pin(filename)
+
+    @staticmethod
+    def unpin(filename):
+        return ImageLoader.cache.unpin(filename)
+
+    @staticmethod
+    def image_size(image):
+        """ Bytes of RAM used by an Image: the pixels of the whole image (all the frames) and the palette """
+        depth = image.color_depth or 8
+        size = (image.width * depth + 7) // 8 * image.height
+        if image.palette_bytes:
+            size += len(image.palette_bytes)
+        return size
+
     @staticmethod
     def load_images(images, display):
-        # Get a list of all BMP files in the specified directory
-        bmp_files = [file for file in uos.listdir(ImageLoader.img_dir) if file.endswith(".bmp")]
         image_names = [one_image["name"] for one_image in images]
 
-        # Load each BMP file as a Sprite and add it to the sprites list
-        file_list = [file for file in list(set(image_names) & set(bmp_files))]
+        if ImageLoader.get_bundle():
+            """ No need to scan the directory, the bundle TOC knows what's there """
+            file_list = image_names
+        else:
+            # Get a list of all BMP files in the specified directory
+            bmp_files = [file for file in uos.listdir(ImageLoader.img_dir) if file.endswith(".bmp")]
+
+            # Load each BMP file as a Sprite and add it to the sprites list
+            file_list = [file for file in list(set(image_names) & set(bmp_files))]
 
         total_size = 0
         for one_file in file_list:
@@ -60,6 +112,11 @@ class ImageLoader():
 
     @staticmethod
     def get_size(filename):
+        bundle = ImageLoader.get_bundle()
+        asset_id = bundle.find(filename) if bundle else -1
+        if asset_id >= 0:
+            return bundle.size(asset_id)
+
         stat = uos.stat(filename)
 
         # https://docs.pycom.io/firmwareapi/micropython/uos/
@@ -91,10 +148,23 @@ class ImageLoader():
     @staticmethod
     def load_image(filename, frame_width=0, frame_height=0, color_depth=GS4_HMSB, progress_callback=None, prescale=True) -> Image:
         # First of all, check the cache
-        if filename in ImageLoader.images.keys():
-            image = ImageLoader.images[filename]
+        image = ImageLoader.cache.get(filename)
+        if image:
             return image
 
+        start_us = utime.ticks_us()
+
+        bundle = ImageLoader.get_bundle()
+        asset_id = bundle.find(filename) if bundle else -1
+
+        if asset_id >= 0:
+            image = bundle.load_sprite(asset_id, frame_width, frame_height)
+        else:
+            image = ImageLoader.load_precompiled(filename, frame_width, frame_height)
+
+        if image:
+            return ImageLoader.cache_image(filename, image, start_us)
+
         reader = ImageLoader.bmp_reader
         reader.color_depth = color_depth
 
@@ -104,18 +174,28 @@ class ImageLoader():
         else:
             image = reader.load(filename, progress_callback=progress_callback)
 
-        ImageLoader.images[filename] = image
+        return ImageLoader.cache_image(filename, image, start_us)
+
+
+    @staticmethod
+    def cache_image(filename, image, start_us):
+        image = ImageLoader.share_palette(filename, image)
+        cache = ImageLoader.cache
+        cache.put(filename, image, ImageLoader.image_size(image))
+        cache.record_load(start_us)
         return image
 
-        # if frame_width and frame_height:
-        #     # This is a spritesheet, so lets make frames from the pixel data without allocating new memory
-        #     ImageLoader.images[filename] = reader.frames
-        #     return reader.frames
-        #
-        # else:
-        #     ImageLoader.images[filename] = reader.frames[0]
-        #     return reader.frames[0]
+    @staticmethod
+    def load_precompiled(filename, frame_width=0, frame_height=0):
+        """ Use the .spr version of a BMP if there is one next to it (see local/convert_sprites.py), since it loads
+        with a single read instead of being decoded pixel by pixel """
+        if not filename.endswith(".bmp"):
+            return None
 
+        try:
+            return ImageLoader.spr_reader.load(filename[:-4] + SPRITE_EXT, frame_width, frame_height)
+        except OSError:
+            return None
 
     @staticmethod
     def load_as_palette(filename):
@@ -123,4 +203,23 @@ class ImageLoader():
 
         return image.palette
 
+    @staticmethod
+    def share_palette(filename, image):
+        """ Swap the palette of a freshly loaded image for the identical one already in the palette pool, if any """
+        palette = palette_pool.intern(image.palette)
+        ImageLoader.palettes[filename] = palette
+
+        if palette is image.palette:
+            return image
+
+        return create_image(image.width, image.height, image.pixels, image.pixel_bytes, image.pixel_bytes_addr,
+                            palette, palette.palette, image.color_depth, image.frames)
+
+    @staticmethod
+    def release_palette(filename):
+        """ The image was evicted, drop its reference to the shared palette """
+        palette_pool.release(ImageLoader.palettes.pop(filename, None))
+
+ImageLoader.cache.add_listener(ImageLoader.release_palette)
+
 
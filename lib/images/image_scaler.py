@@ -5,12 +5,13 @@ import framebuf  # For FrameBuffer, GS4_HMSB, GS8
 from images.indexed_image import create_image, Image  # Ensure path is correct
 from scaler.const import INK_CYAN, INK_RED # Assuming INK_RED is defined for debugging
 from print_utils import printc
+from images.resampler import resample
 
 
 def generate_scaled_framebuffer(orig_img_pixels: framebuf.FrameBuffer,
                                 orig_width: int, orig_height: int,
                                 target_w: int, target_h: int,
-                                color_depth: int, buffer_format: int) -> framebuf.FrameBuffer:
+                                color_depth: int, buffer_format: int, orig_pixel_bytes=None) -> framebuf.FrameBuffer:
     """
     Generates a new FrameBuffer containing a scaled version of the original pixel data.
 
@@ -22,6 +23,7 @@ def generate_scaled_framebuffer(orig_img_pixels: framebuf.FrameBuffer,
         target_h: Target height for the new scaled FrameBuffer.
         color_depth: Bits per pixel (1, 2, 4, 8, 16).
         buffer_format: The framebuf.FORMAT constant (e.g., framebuf.GS4_HMSB).
+        orig_pixel_bytes: The buffer behind orig_img_pixels (optional, read from the FrameBuffer otherwise).
 
     Returns:
         A new framebuf.FrameBuffer object with the scaled image.
@@ -59,38 +61,12 @@ def generate_scaled_framebuffer(orig_img_pixels: framebuf.FrameBuffer,
         printc(f"Error creating new FrameBuffer: {target_w}x{target_h}, format {buffer_format}, bytes {len(new_pixel_bytes)}", INK_RED)
         raise e
 
-    # Scaling logic (nearest neighbor)
+    # Scaling logic (nearest neighbor), on the pixel bytes (see images/resampler.py)
     if orig_width > 0 and orig_height > 0:
-        x_ratio = orig_width / target_w
-        y_ratio = orig_height / target_h
-
-        for y_coord in range(target_h):
-            orig_y = min(int(y_coord * y_ratio), orig_height - 1)
-
-            if color_depth == 4: # Specific logic for 4-bit from your original code
-                for x_coord_pair_start in range(0, target_w, 2):
-                    src_x1 = min(int(x_coord_pair_start * x_ratio), orig_width - 1)
-                    color1 = orig_img_pixels.pixel(src_x1, orig_y)
-                    if color1 is None: # Debugging the TypeError
-                        printc(f"CRITICAL: orig_img_pixels.pixel({src_x1}, {orig_y}) returned None for color1!", INK_RED)
-                        color1 = 0 # Default to prevent crash, for debugging
-                    new_fb.pixel(x_coord_pair_start, y_coord, color1)
-
-                    if x_coord_pair_start + 1 < target_w:
-                        src_x2 = min(int((x_coord_pair_start + 1) * x_ratio), orig_width - 1)
-                        color2 = orig_img_pixels.pixel(src_x2, orig_y)
-                        if color2 is None: # Debugging the TypeError
-                            printc(f"CRITICAL: orig_img_pixels.pixel({src_x2}, {orig_y}) returned None for color2!", INK_RED)
-                            color2 = 0 # Default to prevent crash
-                        new_fb.pixel(x_coord_pair_start + 1, y_coord, color2)
-            else:  # For 1, 2, 8, 16 bit
-                for x_coord in range(target_w):
-                    orig_x = min(int(x_coord * x_ratio), orig_width - 1)
-                    color = orig_img_pixels.pixel(orig_x, orig_y)
-                    if color is None: # Debugging the TypeError
-                        printc(f"CRITICAL: orig_img_pixels.pixel({orig_x}, {orig_y}) returned None for color (non-4bit)!", INK_RED)
-                        color = 0 # Default to prevent crash
-                    new_fb.pixel(x_coord, y_coord, color)
+        if orig_pixel_bytes is None:
+            orig_pixel_bytes = memoryview(orig_img_pixels)  # FrameBuffer supports the buffer protocol
+
+        resample(orig_pixel_bytes, orig_width, orig_height, new_pixel_bytes, target_w, target_h, color_depth)
     # else: Source image was 0-width or 0-height, new_fb remains blank.
 
     return new_fb
@@ -153,41 +129,8 @@ def scale_img(orig_img: Image, new_width: int, new_height: int, color_depth: int
         raise e
 
     if orig_img.width > 0 and orig_img.height > 0:
-        x_ratio = orig_img.width / target_w
-        y_ratio = orig_img.height / target_h
-
-        for y_coord in range(target_h):
-            orig_y = min(int(y_coord * y_ratio), orig_img.height - 1)
-            if color_depth == 4:
-                for x_coord_pair_start in range(0, target_w, 2): # Renamed from x_coord
-                    src_x1 = min(int(x_coord_pair_start * x_ratio), orig_img.width - 1)
-                    color1 = orig_img.pixels.pixel(src_x1, orig_y)
-                    if color1 is None: # Your original check was inside the non-4bit else block
-                        printc(f"VALUE ERROR (color1): x={src_x1} y={orig_y} color={color1}", INK_RED)
-                        # To debug the TypeError, you need to find out WHY color1 is None
-                        # For now, to prevent crash during testing other parts:
-                        # color1 = 0 # Or some other default valid color index
-                        raise ValueError("Pixel color1 is None") # Or handle as an error
-                    new_fb.pixel(x_coord_pair_start, y_coord, color1)
-
-                    if x_coord_pair_start + 1 < target_w:
-                        src_x2 = min(int((x_coord_pair_start + 1) * x_ratio), orig_img.width - 1)
-                        color2 = orig_img.pixels.pixel(src_x2, orig_y)
-                        if color2 is None:
-                            printc(f"VALUE ERROR (color2): x={src_x2} y={orig_y} color={color2}", INK_RED)
-                            # color2 = 0
-                            raise ValueError("Pixel color2 is None")
-                        new_fb.pixel(x_coord_pair_start + 1, y_coord, color2)
-            else:
-                for x_coord in range(target_w):
-                    orig_x = min(int(x_coord * x_ratio), orig_img.width - 1)
-                    color = orig_img.pixels.pixel(orig_x, orig_y)
-                    # This is the check from your uploaded image_scaler.py
-                    if x_coord is None or y_coord is None or color is None: # x_coord and y_coord will not be None here
-                        printc(f"VALUE ERROR (color, non-4bit): x={orig_x} y={orig_y} color={color}", INK_RED)
-                        # color = 0
-                        raise ValueError("Pixel color is None (non-4bit path)")
-                    new_fb.pixel(x_coord, y_coord, color)
+        resample(orig_img.pixel_bytes, orig_img.width, orig_img.height, new_pixel_bytes, target_w, target_h,
+                 color_depth)
     else:
         pass # Source image 0-width or 0-height
 
@@ -0,0 +1,284 @@
+import math
+import struct
+
+import uasyncio as asyncio
+import utime
+from uctypes import addressof
+
+from framebuf import FrameBuffer
+
+from images.image_loader import ImageLoader
+from images.indexed_image import SheetFrames
+from images.sprite_asset import SpriteAssetReader, SPRITE_EXT, HEADER_SIZE, HEADER_FORMAT, MAGIC, VERSION
+from utils import aligned_buffer
+
+class StreamJob:
+    """ One image being streamed: the generator that decodes it, and how far along it is """
+    def __init__(self, filename, size):
+        self.filename = filename
+        self.size = size            # bytes, to weight the progress of each image
+        self.steps = None           # generator, one step per row (or chunk) decoded
+        self.total_steps = 1        # known once the header has been read
+        self.steps_done = 0
+        self.max_step_us = 0        # slowest step seen so far, to predict whether the next one fits in the slice
+        self.start_us = 0
+
+class ImageStreamer:
+    """
+    Loads images in the background, in time slices, so that the render loop keeps running while they load (ie: a
+    title screen or stage intro can animate while the sprites of the next stage are loaded).
+
+    Each image is decoded by a generator which yields after every row (BMP) or chunk of rows (.spr / asset bundle).
+    run_slice() advances the current image until the next step would go over budget_us (judging by the slowest step so
+    far), and every image starts in a new slice. run() does the same from a coroutine, yielding to the event loop
+    between slices, and sets progress_event after each one.
+
+    Loaded images end up in the ImageLoader cache, so ImageLoader.load_image() returns them right away afterwards.
+    An image that fails to load (missing or invalid file) is logged, counted in 'errors' and skipped, like the lazy
+    path of the registry does, so that a caller waiting for 'done' is never left hanging.
+
+    Usage:
+        streamer = ImageStreamer()
+        streamer.queue("/img/bike_sprite.bmp", 32, 22)
+        asyncio.create_task(streamer.run())
+        ...
+        await streamer.progress_event.wait()
+        streamer.progress_event.clear()
+        draw_bar(streamer.progress)
+    """
+    spr_chunk_rows = 8  # rows copied per step, for pre-decoded (.spr) images
+
+    def __init__(self, budget_us=4000, max_steps=64, ticks_us=None):
+        self.ticks_us = ticks_us or utime.ticks_us  # a fake clock can be passed in, for testing
+        self.budget_us = budget_us
+        self.max_steps = max_steps  # steps per slice, no matter how fast they are
+
+        self.jobs = []
+        self.current = None
+        self.done = False
+        self.progress = 0
+        self.progress_event = asyncio.Event()
+
+        self.total_bytes = 0
+        self.loaded_bytes = 0
+        self.errors = 0
+
+        """ Stats """
+        self.slices = 0
+        self.last_slice_us = 0
+        self.max_slice_us = 0
+
+    def queue(self, filename, frame_width=0, frame_height=0, color_depth=None):
+        """ Add an image to be loaded. Images which are already in the cache are skipped """
+        if ImageLoader.cache.has(filename):
+            return False
+
+        try:
+            job = StreamJob(filename, max(1, ImageLoader.get_size(filename)))
+            job.steps = self._steps(job, filename, frame_width, frame_height)
+        except (OSError, ValueError) as error:
+            self._error(filename, error)
+            return False
+
+        self.add_job(job)
+        return True
+
+    def add_job(self, job):
+        self.jobs.append(job)
+        self.total_bytes += job.size
+        self.done = False
+
+    def _steps(self, job, filename, frame_width, frame_height):
+        """ Same lookup order as ImageLoader.load_image(): asset bundle, then .spr, then BMP """
+        bundle = ImageLoader.get_bundle()
+        asset_id = bundle.find(filename) if bundle else -1
+
+        if asset_id >= 0:
+            offset = bundle.entry(asset_id)[0]
+            return self._spr_steps(job, bundle.file, offset, frame_width, frame_height, close=False)
+
+        if filename.endswith(".bmp"):
+            try:
+                file = open(filename[:-4] + SPRITE_EXT, "rb")
+                return self._spr_steps(job, file, 0, frame_width, frame_height)
+            except OSError:
+                pass
+
+        return self._bmp_steps(job, filename, frame_width, frame_height)
+
+    def _spr_steps(self, job, file, offset, frame_width, frame_height, close=True):
+        """ .spr payloads are already in FrameBuffer layout, so they are just copied in, a few rows at a time. The file
+        position is restored before every read, since the file (asset bundle) may be shared with other readers """
+        header = bytearray(HEADER_SIZE)
+        file.seek(offset)
+        file.readinto(header)
+
+        magic, version, color_depth, num_colors, width, height, sheet_frame_height, _, \
+            palette_offset, pixels_offset, pixels_size, payload_size = struct.unpack(HEADER_FORMAT, header)
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a sprite asset: {job.filename}")
+
+        buffer = aligned_buffer(payload_size)
+        payload = memoryview(buffer)[0:payload_size]
+        chunk = max(1, (width * color_depth + 7) // 8 * self.spr_chunk_rows)
+        pos = 0
+        job.total_steps = 1 + (payload_size + chunk - 1) // chunk
+        yield
+
+        while pos < payload_size:
+            end = min(pos + chunk, payload_size)
+            file.seek(offset + HEADER_SIZE + pos)
+            file.readinto(payload[pos:end])
+            pos = end
+            yield
+
+        if close:
+            file.close()
+
+        return SpriteAssetReader().as_image(payload, color_depth, num_colors, width, height, palette_offset,
+                                            pixels_offset, pixels_size, frame_height or sheet_frame_height)
+
+    def _bmp_steps(self, job, filename, frame_width, frame_height):
+        """ Same decoding as BMPReader.load(), one row per step """
+        reader = ImageLoader.bmp_reader
+        file = open(filename, "rb")
+
+        meta = reader._read_header(file)
+        meta.ppb = ppb = 8 // meta.color_depth
+        meta.pmask = pmask = 0xFF >> (8 - meta.color_depth)
+        palette, palette_bytes = reader._read_palette(file, meta)
+
+        width, color_depth, is_top_down = meta.width, meta.color_depth, meta.is_top_down
+        if frame_width and frame_height and frame_height < meta.height:
+            num_frames = math.floor(meta.height / frame_height)
+            is_sheet = True
+        else:
+            num_frames = 1
+            frame_width, frame_height = width, meta.height
+            is_sheet = False
+
+        job.total_steps = 1 + num_frames * frame_height
+        yield
+
+        row_size = (width * color_depth + 7) // 8
+        row_buffer = bytearray((row_size + 3) // 4 * 4)
+        extract = reader._extract_from_bytes
+
+        if is_sheet:
+            """ One buffer for the whole sheet, like BMPReader """
+            frame_bytes = (frame_width * color_depth + 7) // 8 * frame_height
+            frames = SheetFrames(aligned_buffer(frame_bytes * num_frames), frame_width, frame_height, num_frames,
+                                 meta.color_format, color_depth)
+        else:
+            frames = None
+
+        for frame_idx in range(num_frames):
+            if is_sheet:
+                slot = frame_idx if is_top_down else num_frames - frame_idx - 1
+                frame_buffer = FrameBuffer(frames.frame_bytes(slot), frame_width, frame_height, meta.color_format)
+            else:
+                frame_buffer, byte_data = reader._create_frame_buffer(frame_width, frame_height, meta.color_format)
+                pixels = frame_buffer
+
+            for row in range(frame_height):
+                y = row if is_top_down else frame_height - row - 1
+                file.readinto(row_buffer)
+
+                for x in range(width):
+                    frame_buffer.pixel(x, y, extract(row_buffer, x, color_depth, ppb, pmask))
+                yield
+
+        file.close()
+
+        if is_sheet:
+            pixels = frames[0]
+            byte_data = frames.frame_bytes(0)
+
+        return reader._as_image(meta, pixels, byte_data, addressof(byte_data), palette, palette_bytes, color_depth,
+                                frames)
+
+    def run_slice(self):
+        """ Do one slice of work. Returns False once there is nothing left to load """
+        if not self.current:
+            if not self.jobs:
+                self.done = True
+                self.progress = 1
+                return False
+
+            self.current = self.jobs.pop(0)
+            self.current.start_us = self.ticks_us()
+
+        job = self.current
+        ticks_diff = utime.ticks_diff
+        start = last = self.ticks_us()
+        elapsed = 0
+        steps = 0
+
+        while True:
+            try:
+                next(job.steps)
+            except StopIteration as result:
+                self._finish(job, result.value)
+                break
+            except Exception as error:
+                self._error(job.filename, error)
+                self._finish(job, None)
+                break
+
+            now = self.ticks_us()
+            step_us = ticks_diff(now, last)
+            last = now
+            if step_us > job.max_step_us:
+                job.max_step_us = step_us
+
+            job.steps_done += 1
+            steps += 1
+            elapsed = ticks_diff(now, start)
+
+            if steps >= self.max_steps or elapsed + job.max_step_us > self.budget_us:
+                break
+
+        self.slices += 1
+        self.last_slice_us = elapsed
+        if elapsed > self.max_slice_us:
+            self.max_slice_us = elapsed
+
+        self._update_progress()
+        return True
+
+    def _finish(self, job, image):
+        self.current = None
+        self.loaded_bytes += job.size
+        if image:
+            ImageLoader.cache_image(job.filename, image, job.start_us)
+
+    def _error(self, filename, error):
+        self.errors += 1
+        print(f"Error loading image {filename}: {error}")
+
+    def _update_progress(self):
+        loaded = self.loaded_bytes
+        job = self.current
+        if job:
+            loaded += job.size * min(job.steps_done, job.total_steps) // job.total_steps
+
+        self.progress = loaded / self.total_bytes if self.total_bytes else 1
+
+    async def run(self):
+        """ Load everything in the queue, yielding to the event loop (render loop) after every slice """
+        try:
+            while self.run_slice():
+                self.progress_event.set()
+                await asyncio.sleep_ms(0)
+        finally:
+            self.done = True
+            self.progress_event.set()
+
+    def draw_progress(self, display, x=10, y=30, width=76, height=4, color=None, bg_color=None):
+        """ Draws the progress bar into the display framebuffer only, the render loop takes care of show() """
+        color = ImageLoader.progress_bar_color if color is None else color
+        bg_color = ImageLoader.progress_bar_bg_color if bg_color is None else bg_color
+
+        display.rect(x, y, width, height, bg_color, True)
+        display.rect(x, y, int(self.progress * width), height, color, True)
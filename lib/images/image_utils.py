@@ -3,6 +3,7 @@ import math
 import uctypes
 import framebuf
 from images.indexed_image import create_image, Image  # Adjust path if needed
+from images.resampler import resample
 
 
 def scale_indexed_img(orig_img: Image, new_width: int, new_height: int) -> Image:
@@ -71,27 +72,8 @@ def scale_indexed_img(orig_img: Image, new_width: int, new_height: int) -> Image
         # Fill new_framebuf with 0s (transparent or first palette color)
         for i in range(len(new_pixel_bytes)): new_pixel_bytes[i] = 0
     else:
-        x_ratio = orig_img.width / new_width
-        y_ratio = orig_img.height / new_height
-
-        for y_coord in range(new_height):
-            orig_y = min(int(y_coord * y_ratio), orig_img.height - 1)
-
-            if color_depth == 4:
-                for x_coord_pair_start in range(0, new_width, 2):
-                    orig_x1 = min(int(x_coord_pair_start * x_ratio), orig_img.width - 1)
-                    color1 = orig_img.pixels.pixel(orig_x1, orig_y)
-                    new_framebuf.pixel(x_coord_pair_start, y_coord, color1)
-
-                    if x_coord_pair_start + 1 < new_width:
-                        orig_x2 = min(int((x_coord_pair_start + 1) * x_ratio), orig_img.width - 1)
-                        color2 = orig_img.pixels.pixel(orig_x2, orig_y)
-                        new_framebuf.pixel(x_coord_pair_start + 1, y_coord, color2)
-            else:  # color_depth == 8
-                for x_coord in range(new_width):
-                    orig_x = min(int(x_coord * x_ratio), orig_img.width - 1)
-                    color = orig_img.pixels.pixel(orig_x, orig_y)
-                    new_framebuf.pixel(x_coord, y_coord, color)
+        resample(orig_img.pixel_bytes, orig_img.width, orig_img.height, new_pixel_bytes, new_width, new_height,
+                 color_depth)
 
     return create_image(
         new_width, new_height, new_framebuf, new_pixel_bytes, new_pixel_bytes_addr,
@@ -40,3 +40,40 @@ def create_image(
 
     return image
 
+class SheetFrames:
+    """
+    The frames of a spritesheet, as slices of one contiguous (aligned) buffer, in display order.
+    The FrameBuffer of a frame is only created the first time it is asked for.
+    """
+    def __init__(self, pixel_bytes, width: int, frame_height: int, num_frames: int, color_format: int, color_depth: int):
+        self.pixel_bytes = memoryview(pixel_bytes)
+        self.width = width
+        self.frame_height = frame_height
+        self.num_frames = num_frames
+        self.color_format = color_format
+        self.frame_stride = (width * color_depth + 7) // 8 * frame_height
+        self.buffers = [None] * num_frames
+
+    def __len__(self):
+        return self.num_frames
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += self.num_frames
+        if not 0 <= idx < self.num_frames:
+            raise IndexError(f"Frame {idx} is invalid (only {self.num_frames} frames)")
+
+        frame = self.buffers[idx]
+        if not frame:
+            frame = framebuf.FrameBuffer(self.frame_bytes(idx), self.width, self.frame_height, self.color_format)
+            self.buffers[idx] = frame
+        return frame
+
+    def __iter__(self):
+        for idx in range(self.num_frames):
+            yield self[idx]
+
+    def frame_bytes(self, idx):
+        start = idx * self.frame_stride
+        return self.pixel_bytes[start:start + self.frame_stride]
+
@@ -0,0 +1,230 @@
+import struct
+
+try:
+    import uos as os
+except ImportError:
+    import os
+
+try:
+    from framebuf import FrameBuffer, MONO_HMSB, GS4_HMSB, GS8
+    from utils import aligned_buffer
+except ImportError:
+    """ The generator itself (generate_mips) also runs on the host, see local/bench_mips.py """
+    FrameBuffer = None
+
+from images.sprite_spans import get_index, row_bytes
+
+"""
+Mipmaps for prescaled sprites.
+
+The scale levels are the same ones that SpriteRegistry has always used for prescaled types (num_frames levels, from
+1/num_frames of the size up to the original, widths rounded up to a whole byte), but every destination pixel is the
+majority color of the source box it covers, rather than a single nearest neighbour sample, so that thin details don't
+flicker in and out at the small sizes. The alpha color only wins if it covers more than half of the box.
+
+All the levels are stored in one buffer, which is written to the flash cache the first time, keyed by a hash of the
+source pixels (and everything else that the output depends on). On the next boots, all the levels are loaded with a
+single readinto() instead of being generated again.
+
+Cache file layout:
+- 12 byte header: magic, version, number of levels, reserved, size of the data
+- level table: (width, height, offset in the data) for every level
+- data: the pixels of every level, each one starting on a 4 byte boundary
+"""
+MAGIC = b'WZMP'
+VERSION = 1
+HEADER_FORMAT = "<4sBBHI"
+HEADER_SIZE = 12
+LEVEL_FORMAT = "<HHI"
+LEVEL_SIZE = 8
+
+MIP_DEPTHS = (1, 4, 8)
+CACHE_DIR = "/mipcache"
+
+def mip_levels(width, height, color_depth, num_levels):
+    """ (width, height) of every level below the original size, smallest first. The original image is the last
+    level, but it is not stored (the caller already has it) """
+    levels = []
+    px_per_byte = 8 // color_depth
+
+    for i in range(1, num_levels):
+        target_w = max(1, -(-width * i // num_levels))     # ceil()
+        target_h = max(1, -(-height * i // num_levels))
+        target_w = (target_w + px_per_byte - 1) // px_per_byte * px_per_byte
+        levels.append((target_w, target_h))
+
+    return levels
+
+def set_index(pixel_bytes, stride, x, y, color_depth, index):
+    if color_depth == 8:
+        pixel_bytes[y * stride + x] = index
+    elif color_depth == 4:
+        pos = y * stride + (x >> 1)
+        if x & 1:
+            pixel_bytes[pos] = (pixel_bytes[pos] & 0xF0) | index
+        else:
+            pixel_bytes[pos] = (pixel_bytes[pos] & 0x0F) | (index << 4)
+    else:
+        pos = y * stride + (x >> 3)
+        if index:
+            pixel_bytes[pos] |= 1 << (x & 0x07)
+        else:
+            pixel_bytes[pos] &= ~(1 << (x & 0x07)) & 0xFF
+
+def downsample(src, src_w, src_h, dst, dst_w, dst_h, color_depth, alpha_index=None):
+    """ Majority (mode) filter of the source box under every destination pixel, writes into dst """
+    src_stride = row_bytes(src_w, color_depth)
+    dst_stride = row_bytes(dst_w, color_depth)
+    counts = [0] * (1 << color_depth)
+
+    for dst_y in range(dst_h):
+        y0 = dst_y * src_h // dst_h
+        y1 = max(y0 + 1, (dst_y + 1) * src_h // dst_h)
+
+        for dst_x in range(dst_w):
+            x0 = dst_x * src_w // dst_w
+            x1 = max(x0 + 1, (dst_x + 1) * src_w // dst_w)
+            x1 = min(x1, src_w)
+            x0 = min(x0, x1 - 1)
+
+            for y in range(y0, y1):
+                for x in range(x0, x1):
+                    counts[get_index(src, src_stride, x, y, color_depth)] += 1
+
+            total = (y1 - y0) * (x1 - x0)
+            best = alpha_index if alpha_index is not None else 0
+            best_count = 0
+            alpha_count = counts[alpha_index] if alpha_index is not None else 0
+
+            if alpha_count * 2 <= total:
+                for index in range(len(counts)):
+                    if index != alpha_index and counts[index] > best_count:
+                        best = index
+                        best_count = counts[index]
+
+            set_index(dst, dst_stride, dst_x, dst_y, color_depth, best)
+
+            for i in range(len(counts)):
+                counts[i] = 0
+
+def level_offsets(levels, color_depth):
+    """ Offset of every level in the data, and the total size """
+    offsets = []
+    size = 0
+    for width, height in levels:
+        offsets.append(size)
+        size += (row_bytes(width, color_depth) * height + 3) & ~3
+    return offsets, size
+
+def generate_mips(pixel_bytes, width, height, color_depth, num_levels, alpha_index=None, out=None):
+    """ Generate all the levels into one buffer (allocated if not given). Returns (levels, offsets, buffer) """
+    levels = mip_levels(width, height, color_depth, num_levels)
+    offsets, size = level_offsets(levels, color_depth)
+    if out is None:
+        out = bytearray(size)
+
+    mv = memoryview(out)
+    for (level_w, level_h), offset in zip(levels, offsets):
+        dst = mv[offset:offset + row_bytes(level_w, color_depth) * level_h]
+        downsample(pixel_bytes, width, height, dst, level_w, level_h, color_depth, alpha_index)
+
+    return levels, offsets, out
+
+def pack_mips(levels, offsets, data):
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, len(levels), 0, len(data))
+    table = b''.join(struct.pack(LEVEL_FORMAT, w, h, offset) for (w, h), offset in zip(levels, offsets))
+    return header + table + bytes(data)
+
+def source_key(pixel_bytes, width, height, color_depth, num_levels, alpha_index):
+    """ 32 bit FNV-1a of the source pixels and the parameters """
+    hash = 0x811C9DC5
+    params = (width, height, color_depth, num_levels, 0xFF if alpha_index is None else alpha_index, VERSION)
+    for value in params:
+        hash = ((hash ^ (value & 0xFF)) * 0x01000193) & 0xFFFFFFFF
+    for byte in pixel_bytes:
+        hash = ((hash ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return hash
+
+class MipCache:
+    """ Loads the mip levels of a sprite from the flash cache, or generates (and saves) them on a miss """
+    formats = {1: MONO_HMSB, 4: GS4_HMSB, 8: GS8} if FrameBuffer else {}
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.header_buf = bytearray(HEADER_SIZE)
+
+        """ Stats """
+        self.hits = 0
+        self.misses = 0
+
+    def filename(self, key):
+        return f"{self.cache_dir}/{key:08x}.mip"
+
+    def get_frames(self, pixel_bytes, width, height, color_depth, num_levels, alpha_index=None):
+        """ Returns (frames, num_bytes): a FrameBuffer per level, smallest first, all backed by the same buffer. The
+        original image is not included """
+        key = source_key(pixel_bytes, width, height, color_depth, num_levels, alpha_index)
+
+        loaded = self.load(key)
+        if loaded:
+            self.hits += 1
+            levels, offsets, data = loaded
+        else:
+            self.misses += 1
+            _, size = level_offsets(mip_levels(width, height, color_depth, num_levels), color_depth)
+            levels, offsets, data = generate_mips(pixel_bytes, width, height, color_depth, num_levels, alpha_index,
+                                                  out=aligned_buffer(size))
+            self.save(key, levels, offsets, data)
+
+        color_format = self.formats[color_depth]
+        mv = memoryview(data)
+        frames = []
+        for (level_w, level_h), offset in zip(levels, offsets):
+            frame_bytes = mv[offset:offset + row_bytes(level_w, color_depth) * level_h]
+            frames.append(FrameBuffer(frame_bytes, level_w, level_h, color_format))
+
+        return frames, len(data)
+
+    def load(self, key):
+        """ All the levels, in one readinto() after the header. Returns None if they are not cached """
+        try:
+            file = open(self.filename(key), "rb")
+        except OSError:
+            return None
+
+        with file:
+            header = self.header_buf
+            if file.readinto(header) != HEADER_SIZE:
+                return None
+
+            magic, version, num_levels, _, data_size = struct.unpack(HEADER_FORMAT, header)
+            if magic != MAGIC or version != VERSION:
+                return None
+
+            table_size = num_levels * LEVEL_SIZE
+            buffer = aligned_buffer(table_size + data_size)
+            if file.readinto(buffer) != table_size + data_size:
+                return None
+
+        levels = []
+        offsets = []
+        for i in range(num_levels):
+            width, height, offset = struct.unpack_from(LEVEL_FORMAT, buffer, i * LEVEL_SIZE)
+            levels.append((width, height))
+            offsets.append(offset)
+
+        return levels, offsets, memoryview(buffer)[table_size:]
+
+    def save(self, key, levels, offsets, data):
+        try:
+            os.mkdir(self.cache_dir)
+        except OSError:
+            pass  # Already there
+
+        try:
+            with open(self.filename(key), "wb") as file:
+                file.write(pack_mips(levels, offsets, data))
+        except OSError as err:
+            print(f"Could not write mip cache {self.filename(key)}: {err}")
+
+mip_cache = MipCache()
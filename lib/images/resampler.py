@@ -0,0 +1,102 @@
+"""
+Nearest neighbour resampling of indexed images, straight on the pixel bytes (MONO_HMSB, GS2_HMSB, GS4_HMSB, GS8 or
+RGB565 layout), shared by all the prescaling code.
+
+Rather than a FrameBuffer.pixel() get and set per pixel:
+- the source byte and bit shift of every destination column are computed once per (src_w, dst_w, depth) and cached
+- every destination row is built with byte operations, packing 2 (or 4, or 8) pixels per byte
+- consecutive destination rows which sample the same source row are copied from the previous row instead
+"""
+
+_column_tables = {}
+
+def row_bytes(width, color_depth):
+    return (width * color_depth + 7) // 8
+
+def column_table(src_w, dst_w, color_depth):
+    """ (source byte offset, shift) of every destination column, in two bytearrays """
+    key = (src_w, dst_w, color_depth)
+    table = _column_tables.get(key)
+    if table:
+        return table
+
+    offsets = bytearray(dst_w) if row_bytes(src_w, color_depth) < 256 else [0] * dst_w
+    shifts = bytearray(dst_w)
+
+    for x in range(dst_w):
+        src_x = min(x * src_w // dst_w, src_w - 1)
+
+        if color_depth == 16:
+            offsets[x] = src_x * 2
+        elif color_depth == 8:
+            offsets[x] = src_x
+        elif color_depth == 4:
+            offsets[x] = src_x >> 1
+            shifts[x] = 0 if (src_x & 1) else 4
+        elif color_depth == 2:
+            offsets[x] = src_x >> 2
+            shifts[x] = (src_x & 3) * 2
+        else:
+            offsets[x] = src_x >> 3
+            shifts[x] = src_x & 0x07
+
+    table = (offsets, shifts)
+    _column_tables[key] = table
+    return table
+
+def resample(src, src_w, src_h, dst, dst_w, dst_h, color_depth):
+    """ Scale the pixels in 'src' into 'dst', which must hold row_bytes(dst_w, color_depth) * dst_h bytes """
+    src_stride = row_bytes(src_w, color_depth)
+    dst_stride = row_bytes(dst_w, color_depth)
+    offsets, shifts = column_table(src_w, dst_w, color_depth)
+    last_src_y = -1
+    last_row = 0
+
+    for y in range(dst_h):
+        src_y = min(y * src_h // dst_h, src_h - 1)
+        row = y * dst_stride
+
+        if src_y == last_src_y:
+            dst[row:row + dst_stride] = dst[last_row:last_row + dst_stride]
+            last_row = row
+            continue
+
+        last_src_y = src_y
+        last_row = row
+        base = src_y * src_stride
+
+        if color_depth == 8:
+            for x in range(dst_w):
+                dst[row + x] = src[base + offsets[x]]
+
+        elif color_depth == 4:
+            x = 0
+            while x < dst_w - 1:
+                high = (src[base + offsets[x]] >> shifts[x]) & 0x0F
+                low = (src[base + offsets[x + 1]] >> shifts[x + 1]) & 0x0F
+                dst[row + (x >> 1)] = (high << 4) | low
+                x += 2
+            if x < dst_w:
+                dst[row + (x >> 1)] = ((src[base + offsets[x]] >> shifts[x]) & 0x0F) << 4
+
+        elif color_depth == 16:
+            for x in range(dst_w):
+                src_pos = base + offsets[x]
+                dst[row + x * 2] = src[src_pos]
+                dst[row + x * 2 + 1] = src[src_pos + 1]
+
+        elif color_depth == 2:
+            for byte_x in range(dst_stride):
+                value = 0
+                for x in range(byte_x * 4, min(byte_x * 4 + 4, dst_w)):
+                    value |= ((src[base + offsets[x]] >> shifts[x]) & 0x03) << ((x & 3) * 2)
+                dst[row + byte_x] = value
+
+        else:
+            for byte_x in range(dst_stride):
+                value = 0
+                for x in range(byte_x * 8, min(byte_x * 8 + 8, dst_w)):
+                    value |= ((src[base + offsets[x]] >> shifts[x]) & 0x01) << (x & 0x07)
+                dst[row + byte_x] = value
+
+    return dst
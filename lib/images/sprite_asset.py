@@ -0,0 +1,183 @@
+import struct
+
+try:
+    from framebuf import FrameBuffer, MONO_HMSB, GS4_HMSB, GS8
+    from uctypes import addressof
+    from utils import aligned_buffer
+    from colors.framebuffer_palette import FramebufferPalette
+    from images.indexed_image import SheetFrames, create_image
+except ImportError:
+    """ The converter half of this module (convert_bmp) runs on the host, as part of the build """
+    FrameBuffer = None
+
+"""
+Device native sprite format (.spr)
+
+A 32 byte header, followed by the payload:
+- the RGB565 palette, exactly as stored in FramebufferPalette.palette (2 bytes per color), padded to 4 bytes
+- the pixels of the whole image, top-down, already in FrameBuffer memory order (MONO_HMSB, GS4_HMSB or GS8)
+
+Every row starts on a byte boundary, so the frames of a spritesheet are just contiguous slices of the pixel data,
+which the loader wraps in memoryviews without copying. The payload is 4 byte aligned when loaded, so the scaler can
+read it through addressof().
+"""
+MAGIC = b'WZSP'
+VERSION = 1
+HEADER_FORMAT = "<4sBBHHHHHIIII"
+HEADER_SIZE = 32
+SPRITE_EXT = ".spr"
+
+COLOR_DEPTHS = (1, 4, 8) # Bits per pixel of the supported BMPs
+
+def row_bytes(width, color_depth):
+    return (width * color_depth + 7) // 8
+
+def pack_sprite(width, height, color_depth, palette_bytes, pixel_bytes, frame_height=0):
+    """ Build the .spr file contents from a palette buffer and the pixel buffer of the whole image """
+    palette_size = (len(palette_bytes) + 3) & ~3
+    pixels_size = len(pixel_bytes)
+    payload_size = palette_size + pixels_size
+
+    header = struct.pack(
+        HEADER_FORMAT,
+        MAGIC,
+        VERSION,
+        color_depth,
+        len(palette_bytes) // 2,
+        width,
+        height,
+        frame_height,
+        0,
+        0,              # Palette offset, from the start of the payload
+        palette_size,   # Pixels offset
+        pixels_size,
+        payload_size)
+
+    padding = bytes(palette_size - len(palette_bytes))
+    return header + bytes(palette_bytes) + padding + bytes(pixel_bytes)
+
+def convert_bmp(data, frame_height=0):
+    """
+    Convert the contents of an indexed BMP file (1, 4 or 8 bits) to the .spr format. Pure Python, so that it can run
+    at build time on the host. Produces the same palette and pixel bytes as BMPReader.
+    """
+    data = bytes(data)
+    if data[0:2] != b'BM':
+        raise ValueError("Not a BMP file")
+
+    pixel_offset, = struct.unpack("<I", data[10:14])
+    header_len, = struct.unpack("<I", data[14:18])
+    width, height, _, color_depth, compression, _, _, _, num_colors, _ = \
+        struct.unpack("<iiHHIIiiII", data[18:54])
+
+    if color_depth not in COLOR_DEPTHS or compression != 0:
+        raise ValueError(f"Unsupported BMP: {color_depth} bits per pixel, compression {compression}")
+
+    if not num_colors:
+        num_colors = 1 << color_depth
+
+    """ Palette: BGRA entries to screen RGB565, as BMPReader._read_palette does """
+    palette = bytearray(num_colors * 2)
+    pos = 14 + header_len
+    for i in range(num_colors):
+        blue, green, red = data[pos], data[pos + 1], data[pos + 2]
+        rgb565 = ((blue & 0xF8) << 8) | ((green & 0xFC) << 3) | (red >> 3)
+        palette[i * 2] = rgb565 >> 8
+        palette[i * 2 + 1] = rgb565 & 0xFF
+        pos += 4
+
+    top_down = height < 0
+    height = abs(height)
+    ppb = 8 // color_depth
+    pmask = 0xFF >> (8 - color_depth)
+    src_row = (row_bytes(width, color_depth) + 3) // 4 * 4
+    dst_row = row_bytes(width, color_depth)
+    pixels = bytearray(dst_row * height)
+
+    for row in range(height):
+        y = row if top_down else height - row - 1
+        src = pixel_offset + row * src_row
+        dst = y * dst_row
+
+        for x in range(width):
+            byte_index, pos_in_byte = divmod(x, ppb)
+            color = (data[src + byte_index] >> (8 - color_depth * (pos_in_byte + 1))) & pmask
+
+            """ Same bit layout as the FrameBuffer setpixel functions """
+            if color_depth == 8:
+                pixels[dst + x] = color
+            elif color_depth == 4:
+                shift = 0 if (x % 2) else 4
+                pixels[dst + (x >> 1)] |= color << shift
+            else:
+                pixels[dst + (x >> 3)] |= (1 if color else 0) << (x & 0x07)
+
+    return pack_sprite(width, height, color_depth, palette, pixels, frame_height)
+
+class SpriteAssetReader():
+    """
+    Loads .spr files (see above) into an Image, with the same fields as the ones that BMPReader produces: one
+    readinto() of the whole payload into an aligned buffer, and palette / frames as views of that buffer.
+    """
+    header_buf = bytearray(HEADER_SIZE)
+
+    """ BMP color depth -> framebuf format """
+    color_formats = {1: MONO_HMSB, 4: GS4_HMSB, 8: GS8} if FrameBuffer else {}
+
+    def load(self, filename, frame_width=None, frame_height=None):
+        with open(filename, "rb") as file:
+            return self.read(file, frame_width, frame_height)
+
+    def read(self, file, frame_width=None, frame_height=None, buffer=None):
+        """ Pass a preallocated (aligned) buffer to reuse it, otherwise one is allocated for the payload """
+        header = self.header_buf
+        if file.readinto(header) != HEADER_SIZE:
+            raise ValueError("Truncated sprite header")
+
+        magic, version, color_depth, num_colors, width, height, sheet_frame_height, _, \
+            palette_offset, pixels_offset, pixels_size, payload_size = struct.unpack(HEADER_FORMAT, header)
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a sprite asset (magic: {magic}, version: {version})")
+
+        if buffer is None:
+            buffer = aligned_buffer(payload_size)
+
+        payload = memoryview(buffer)[0:payload_size]
+        if file.readinto(payload) != payload_size:
+            raise ValueError("Truncated sprite payload")
+
+        return self.as_image(payload, color_depth, num_colors, width, height, palette_offset, pixels_offset,
+                             pixels_size, frame_height or sheet_frame_height)
+
+    def as_image(self, payload, color_depth, num_colors, width, height, palette_offset, pixels_offset, pixels_size,
+                 frame_height=0):
+        color_format = self.color_formats[color_depth]
+        palette = FramebufferPalette(payload[palette_offset:palette_offset + num_colors * 2])
+        stride = row_bytes(width, color_depth)
+
+        if frame_height and frame_height < height:
+            """ Spritesheet: frames are anchored to the bottom of the image, like in BMPReader """
+            num_frames = height // frame_height
+            first_row = height - (num_frames * frame_height)
+            start = pixels_offset + first_row * stride
+            frames = SheetFrames(payload[start:start + num_frames * frame_height * stride], width, frame_height,
+                                 num_frames, color_format, color_depth)
+
+            pixels = frames[0]
+            pixel_bytes = frames.frame_bytes(0)
+        else:
+            frames = None
+            pixel_bytes = payload[pixels_offset:pixels_offset + pixels_size]
+            pixels = FrameBuffer(pixel_bytes, width, height, color_format)
+
+        return create_image(
+            width,
+            height,
+            pixels,
+            pixel_bytes,
+            addressof(pixel_bytes),
+            palette,
+            palette.palette,
+            color_depth,
+            frames)
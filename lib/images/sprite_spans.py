@@ -0,0 +1,156 @@
+"""
+Alpha skip metadata for indexed sprites.
+
+Sprites like the walls and lines are mostly made of the alpha color, but the scaler reads (and looks up in the palette)
+every source pixel, and blit() copies the full rectangle. SpriteSpans keeps the first and last opaque pixel of every
+row, plus the bounding box of the opaque pixels, so that the renderers can skip the fully transparent rows / columns.
+
+encode_rle() goes further and stores only the opaque runs of every row, for sprites that are kept around but rarely
+drawn (decode_rle() rebuilds the FrameBuffer).
+
+Pixel data is read straight from the FrameBuffer memory (MONO_HMSB, GS4_HMSB or GS8), so this works with the images of
+both BMPReader and SpriteAssetReader.
+"""
+
+def row_bytes(width, color_depth):
+    return (width * color_depth + 7) // 8
+
+def get_index(pixel_bytes, stride, x, y, color_depth):
+    """ Palette index of a pixel, in the same bit layout as the FrameBuffer formats """
+    if color_depth == 8:
+        return pixel_bytes[y * stride + x]
+    elif color_depth == 4:
+        byte = pixel_bytes[y * stride + (x >> 1)]
+        return byte & 0x0F if (x & 1) else byte >> 4
+    else:
+        return (pixel_bytes[y * stride + (x >> 3)] >> (x & 0x07)) & 0x01
+
+class SpriteSpans:
+    """ Per row (first, last) opaque pixel. Empty rows have first > last """
+    def __init__(self, width, height, color_depth):
+        self.width = width
+        self.height = height
+        self.color_depth = color_depth
+        self.rows = bytearray(height * 2)
+
+        """ Bounding box of the opaque pixels """
+        self.top = height
+        self.bottom = -1
+        self.left = width
+        self.right = -1
+        self.opaque_px = 0
+
+    @property
+    def opaque_height(self):
+        return max(0, self.bottom - self.top + 1)
+
+    @property
+    def opaque_width(self):
+        return max(0, self.right - self.left + 1)
+
+    def is_empty(self):
+        return self.bottom < self.top
+
+    def row_span(self, y):
+        return self.rows[y * 2], self.rows[y * 2 + 1]
+
+    def stats(self):
+        """ Pixels skipped by the scaler (transparent rows above / below) and blit (outside the bounding box) """
+        total_px = self.width * self.height
+        return {
+            'pixels': total_px,
+            'opaque_px': self.opaque_px,
+            'scaler_skipped_px': (self.height - self.opaque_height) * self.width,
+            'blit_skipped_px': total_px - self.opaque_height * self.opaque_width,
+            'bytes': row_bytes(self.width, self.color_depth) * self.height,
+        }
+
+def compute_spans(pixel_bytes, width, height, color_depth, alpha_index):
+    """ Scan an image once, at load time """
+    spans = SpriteSpans(width, height, color_depth)
+    stride = row_bytes(width, color_depth)
+    rows = spans.rows
+
+    for y in range(height):
+        first = width
+        last = -1
+        for x in range(width):
+            if get_index(pixel_bytes, stride, x, y, color_depth) != alpha_index:
+                if first == width:
+                    first = x
+                last = x
+                spans.opaque_px += 1
+
+        if last < 0:
+            rows[y * 2] = min(width, 255)
+            rows[y * 2 + 1] = 0
+            continue
+
+        rows[y * 2] = first
+        rows[y * 2 + 1] = last
+
+        if y < spans.top:
+            spans.top = y
+        spans.bottom = y
+        if first < spans.left:
+            spans.left = first
+        if last > spans.right:
+            spans.right = last
+
+    return spans
+
+def encode_rle(pixel_bytes, width, height, color_depth, alpha_index):
+    """
+    Opaque runs of every row: [num_runs, (start_x, length, packed indices...) * num_runs] per row. The indices of each
+    run are packed at the same color depth as the image, starting on a byte boundary.
+    """
+    stride = row_bytes(width, color_depth)
+    ppb = 8 // color_depth
+    out = bytearray()
+
+    for y in range(height):
+        runs = []
+        x = 0
+        while x < width:
+            if get_index(pixel_bytes, stride, x, y, color_depth) == alpha_index:
+                x += 1
+                continue
+
+            start = x
+            while x < width and get_index(pixel_bytes, stride, x, y, color_depth) != alpha_index and x - start < 255:
+                x += 1
+            runs.append((start, x - start))
+
+        out.append(len(runs))
+        for start, length in runs:
+            out.append(start)
+            out.append(length)
+
+            packed = bytearray(row_bytes(length, color_depth))
+            for i in range(length):
+                index = get_index(pixel_bytes, stride, start + i, y, color_depth)
+                shift = 8 - color_depth * (i % ppb + 1)
+                packed[i // ppb] |= index << shift
+            out += packed
+
+    return out
+
+def decode_rle(rle, frame_buffer, height, color_depth, alpha_index):
+    """ Fill a FrameBuffer with the alpha index, and draw the runs of encode_rle() over it """
+    ppb = 8 // color_depth
+    pmask = 0xFF >> (8 - color_depth)
+    frame_buffer.fill(alpha_index)
+    pos = 0
+
+    for y in range(height):
+        num_runs = rle[pos]
+        pos += 1
+        for _ in range(num_runs):
+            start, length = rle[pos], rle[pos + 1]
+            pos += 2
+            for i in range(length):
+                shift = 8 - color_depth * (i % ppb + 1)
+                frame_buffer.pixel(start + i, y, (rle[pos + i // ppb] >> shift) & pmask)
+            pos += row_bytes(length, color_depth)
+
+    return pos
@@ -1,24 +1,36 @@
-from input.rotary_irq import RotaryIRQ
+from input.input_queue import InputQueue, BUTTON_ACTION
 from micropython import const
 
 class GameInput:
     """
-    Can handle any random combination of inputs and handlers, besides game related ones
+    Can handle any random combination of inputs and handlers, besides game related ones.
+
+    The encoder IRQ only queues the steps (see InputQueue). The handlers run from poll(), which the game calls once per
+    frame, at the start of its update.
     """
     LEFT = const(0)
     RIGHT = const(1)
     ACTION = const(2)
     handler_left = None
     handler_right = None
+    handler_action = None
+    recorder = None     # SessionRecorder (replay.py), when the session is being recorded
 
     pin_dt   = 26
     pin_clk  = 27
 
-    def __init__(self, half_step=False):
+    def __init__(self, half_step=False, encoder=None, clock=None):
         self.last_pos = 0
-        self.init_input(half_step)
+        self.queue = InputQueue(clock=clock)
+        if encoder:
+            self.encoder = encoder  # ie: InjectedEncoder, on the host
+            self.encoder.add_listener(("read_input", self))
+        else:
+            self.init_input(half_step)
 
     def init_input(self, half_step):
+        from input.rotary_irq import RotaryIRQ     # Here, so that the host can use GameInput with an injected encoder
+
         self.encoder = RotaryIRQ(
             self.pin_clk,
             self.pin_dt,
@@ -28,19 +40,40 @@ class GameInput:
         self.encoder.add_listener(("read_input", self))
 
     def read_input(self, position):
-        """ This is the direct listener of the IRQ callback from the encoder, which triggers the secondary callback functions """
+        """ This is the direct listener of the IRQ callback from the encoder. It only queues the steps (> 0 is to the
+        right) """
         position = int(self.encoder.value())
 
         if position != self.last_pos:
-            if position < self.last_pos:
-                if self.handler_right:
-                    self.handler_right()
-            elif position > self.last_pos:
-                if self.handler_left:
-                    self.handler_left()
-
+            self.queue.push(self.last_pos - position)
             self.last_pos = position
 
+    def press_action(self):
+        self.queue.push(0, BUTTON_ACTION)
+
+    def poll(self):
+        """ Run the handlers for the inputs queued since the last frame. Quick encoder steps are coalesced into one
+        move per frame, in the direction of their sum """
+        queue = self.queue
+        delta = queue.drain()
+
+        if delta > 0:
+            if self.recorder:
+                self.recorder.input(self.RIGHT)
+            if self.handler_right:
+                self.handler_right()
+        elif delta < 0:
+            if self.recorder:
+                self.recorder.input(self.LEFT)
+            if self.handler_left:
+                self.handler_left()
+
+        if queue.pressed & BUTTON_ACTION:
+            if self.recorder:
+                self.recorder.input(self.ACTION)
+            if self.handler_action:
+                self.handler_action()
+
     def add_listener_right(self, listener):
         self.handler_right = listener
 
@@ -0,0 +1,137 @@
+try:
+    import utime
+except ImportError:
+    utime = None    # On the host, pass a clock (ie: frame_scheduler.SimClock)
+
+try:
+    from uarray import array
+except ImportError:
+    from array import array
+
+BUTTON_ACTION = 1     # bit in the buttons of an event
+
+class InputQueue:
+    """
+    Preallocated ring buffer of input events (timestamp in us, encoder steps, buttons), between the encoder IRQ and the
+    game. The IRQ only push()es, which doesn't allocate, and the game drain()s all the events once per frame, at the
+    start of its update, so that game state only ever changes at that point of the frame.
+
+    drain() coalesces the events of the frame: the encoder steps are added up (a quick right-left wiggle cancels out),
+    and the buttons are OR'ed.
+
+    Input latency: the timestamp of the oldest event of a frame is kept until frame_shown() is called, right after the
+    frame is sent to the display, and the difference is the time from the input to the photons (well, to the end of
+    display.show()).
+
+    When the buffer is full, new events are dropped (and counted), since the ones already in it happened first.
+    """
+    ema_alpha = 0.1
+
+    def __init__(self, size=32, clock=None):
+        self.clock = clock or utime
+        self.size = size
+        self.timestamps = array('I', [0] * size)
+        self.deltas = array('b', [0] * size)
+        self.buttons = bytearray(size)
+        self.head = 0       # next slot to write (IRQ)
+        self.tail = 0       # next slot to read (game)
+        self.dropped = 0
+
+        """ Result of the last drain() """
+        self.delta = 0
+        self.pressed = 0
+
+        """ Latency, in us """
+        self.oldest_us = 0
+        self.waiting = False    # drained events that are not on screen yet
+        self.last_latency_us = 0
+        self.avg_latency_us = 0.0
+        self.max_latency_us = 0
+        self.latency_samples = 0
+
+    def push(self, delta, buttons=0):
+        """ Add an event. Safe to call from an IRQ handler: the slot is written before head moves past it """
+        head = self.head
+        next_head = (head + 1) % self.size
+        if next_head == self.tail:
+            self.dropped += 1
+            return False
+
+        self.timestamps[head] = self.clock.ticks_us()
+        self.deltas[head] = delta
+        self.buttons[head] = buttons
+        self.head = next_head
+        return True
+
+    def __len__(self):
+        return (self.head - self.tail) % self.size
+
+    def drain(self):
+        """ Consume all the events so far. Returns the sum of their encoder steps, the buttons are left in 'pressed' """
+        tail = self.tail
+        head = self.head
+        delta = 0
+        pressed = 0
+
+        if tail != head and not self.waiting:
+            self.oldest_us = self.timestamps[tail]
+            self.waiting = True
+
+        while tail != head:
+            delta += self.deltas[tail]
+            pressed |= self.buttons[tail]
+            tail = (tail + 1) % self.size
+
+        self.tail = tail
+        self.delta = delta
+        self.pressed = pressed
+        return delta
+
+    def frame_shown(self):
+        """ Call after the frame is sent to the display, to measure the latency of the inputs it applied """
+        if not self.waiting:
+            return
+
+        latency = self.clock.ticks_diff(self.clock.ticks_us(), self.oldest_us)
+        self.waiting = False
+        self.last_latency_us = latency
+        if self.latency_samples:
+            self.avg_latency_us += (latency - self.avg_latency_us) * self.ema_alpha
+        else:
+            self.avg_latency_us = latency
+        if latency > self.max_latency_us:
+            self.max_latency_us = latency
+        self.latency_samples += 1
+
+    def stats(self):
+        return {
+            'samples': self.latency_samples,
+            'last_us': self.last_latency_us,
+            'avg_us': int(self.avg_latency_us),
+            'max_us': self.max_latency_us,
+            'dropped': self.dropped,
+        }
+
+class InjectedEncoder:
+    """
+    Host stand in for RotaryIRQ, to drive GameInput from tests: turn() moves the position and calls the listeners,
+    the way the encoder IRQ does.
+    """
+
+    def __init__(self):
+        self.position = 0
+        self.listeners = []
+
+    def value(self):
+        return self.position
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def turn(self, steps):
+        """ One IRQ per step, like the real encoder (steps < 0 turns to the left) """
+        step = 1 if steps > 0 else -1
+        for _ in range(abs(steps)):
+            self.position -= step   # The position goes down when turning right
+            for meth, obj in self.listeners:
+                getattr(obj, meth)(self.position)
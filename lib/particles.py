@@ -0,0 +1,183 @@
+import random
+
+try:
+    from uarray import array
+except ImportError:
+    from array import array
+
+"""
+Pooled particle system for the explosion effects (DeathAnim, Crash). Explosions are exactly when the frame time
+spikes, so the particles live in preallocated parallel arrays (struct of arrays) instead of a dict or a list per
+particle, and are moved and drawn in a single pass, with fixed point integer math.
+
+Positions and speeds are in 1/4096ths of a pixel (FP_SHIFT), speeds and gravity per ms.
+"""
+FP_SHIFT = 12
+FP_ONE = 1 << FP_SHIFT
+
+class ParticleSystem:
+    """
+    A fixed number of particles, each with: position (x, y), speed (dx, dy), age and max age (ms), sprite id and
+    palette id. Dead particles are swapped with the last live one, so the live ones are always the first 'count'.
+
+    Particles are drawn in one of two ways:
+    - sprites: display.blit(sprites[sprite_id], x, y, 0, palettes[palette_id])
+    - dots (sprites=None): display.fill_rect(x, y, size, size, colors[palette_id]), with the sprite id as the size
+
+    time_scale (256 = 1.0) slows down or speeds up the motion, but not the aging, ie: for the explosion debris slowing
+    down.
+    """
+
+    def __init__(self, capacity, sprites=None, palettes=None, colors=None, gravity=0.0, width=96, height=64,
+                 bounce=False):
+        self.capacity = capacity
+        self.count = 0
+        self.sprites = sprites
+        self.palettes = palettes
+        self.colors = colors
+        self.gravity = int(gravity * FP_ONE * 256)     # 8 more bits, or small gravities would round away
+        self.time_scale = 256
+        self.bounce = bounce    # off the left and right edges
+        self.max_x = width << FP_SHIFT
+        self.max_y = height << FP_SHIFT
+
+        self.x = array('i', [0] * capacity)
+        self.y = array('i', [0] * capacity)
+        self.dx = array('i', [0] * capacity)
+        self.dy = array('i', [0] * capacity)
+        self.age = array('H', [0] * capacity)
+        self.max_age = array('H', [0] * capacity)
+        self.sprite = bytearray(capacity)
+        self.palette = bytearray(capacity)
+
+    def clear(self):
+        self.count = 0
+        self.time_scale = 256
+
+    def add(self, x, y, dx, dy, max_age, sprite_id=0, palette_id=0):
+        """ x, y in pixels, dx, dy in pixels per ms. Returns False if the system is full """
+        return self.add_fixed(int(x * FP_ONE), int(y * FP_ONE), int(dx * FP_ONE), int(dy * FP_ONE), max_age,
+                              sprite_id, palette_id)
+
+    def add_fixed(self, x, y, dx, dy, max_age, sprite_id=0, palette_id=0):
+        """ Same as add(), with everything already in fixed point """
+        i = self.count
+        if i >= self.capacity:
+            return False
+
+        self.x[i] = x
+        self.y[i] = y
+        self.dx[i] = dx
+        self.dy[i] = dy
+        self.age[i] = 0
+        self.max_age[i] = max_age
+        self.sprite[i] = sprite_id
+        self.palette[i] = palette_id
+        self.count = i + 1
+        return True
+
+    def kill(self, i):
+        """ Move the last live particle into slot i """
+        last = self.count - 1
+        self.x[i] = self.x[last]
+        self.y[i] = self.y[last]
+        self.dx[i] = self.dx[last]
+        self.dy[i] = self.dy[last]
+        self.age[i] = self.age[last]
+        self.max_age[i] = self.max_age[last]
+        self.sprite[i] = self.sprite[last]
+        self.palette[i] = self.palette[last]
+        self.count = last
+
+    def update_and_draw(self, display, elapsed_ms):
+        """ Age, move and draw all the particles, in a single pass. Returns how many are still alive """
+        xs = self.x
+        ys = self.y
+        dxs = self.dx
+        dys = self.dy
+        ages = self.age
+        max_ages = self.max_age
+        sprite_ids = self.sprite
+        palette_ids = self.palette
+        sprites = self.sprites
+        palettes = self.palettes
+        colors = self.colors
+        max_x = self.max_x
+        max_y = self.max_y
+        bounce = self.bounce
+
+        dt = elapsed_ms * self.time_scale       # in 1/256 ms
+        gravity = (self.gravity * dt + 0x8000) >> 16
+
+        i = 0
+        while i < self.count:
+            age = ages[i] + elapsed_ms
+            if age > max_ages[i]:
+                self.kill(i)
+                continue
+            ages[i] = age
+
+            x = xs[i] + ((dxs[i] * dt) >> 8)
+            y = ys[i] + ((dys[i] * dt) >> 8)
+            dys[i] += gravity
+
+            if bounce and (x < 0 or x >= max_x):
+                x = 0 if x < 0 else max_x - 1
+                dxs[i] = -dxs[i]
+
+            xs[i] = x
+            ys[i] = y
+
+            if 0 <= x < max_x and 0 <= y < max_y:
+                if sprites:
+                    display.blit(sprites[sprite_ids[i]], x >> FP_SHIFT, y >> FP_SHIFT, 0, palettes[palette_ids[i]])
+                else:
+                    size = sprite_ids[i]
+                    display.fill_rect(x >> FP_SHIFT, y >> FP_SHIFT, size, size, colors[palette_ids[i]])
+            i += 1
+
+        return self.count
+
+class Emitter:
+    """
+    How an effect spawns its particles: how many, how far from the origin (spread, in pixels), their speed range
+    (pixels per ms), lifetime range (ms), and the sprite and palette ids to pick from at random.
+
+    The direction is random, or upwards only (up=True) for debris thrown up into the air, as DeathAnim does.
+    """
+
+    def __init__(self, count, speed=(0.5, 1.5), max_age=(800, 1300), spread=0, up=False, sprite_ids=(0,),
+                 palette_ids=(0,)):
+        self.count = count
+        self.min_speed = int(speed[0] * FP_ONE)
+        self.max_speed = int(speed[1] * FP_ONE)
+        self.min_age, self.max_age = max_age
+        self.spread = spread
+        self.up = up
+        self.sprite_ids = sprite_ids
+        self.palette_ids = palette_ids
+
+    def emit(self, system, x, y):
+        """ Spawn all the particles of the emitter around (x, y). Returns how many fit in the system """
+        randint = random.randint
+        spread = self.spread
+        sprite_ids = self.sprite_ids
+        palette_ids = self.palette_ids
+        x = int(x) << FP_SHIFT
+        y = int(y) << FP_SHIFT
+
+        for num in range(self.count):
+            speed = randint(self.min_speed, self.max_speed)
+            dx = randint(-speed, speed)
+            dy = -randint(speed >> 1, speed) if self.up else randint(-speed, speed)
+            added = system.add_fixed(
+                x + (randint(-spread, spread) << FP_SHIFT),
+                y + (randint(-spread, spread) << FP_SHIFT),
+                dx, dy,
+                randint(self.min_age, self.max_age),
+                sprite_ids[randint(0, len(sprite_ids) - 1)],
+                palette_ids[randint(0, len(palette_ids) - 1)])
+            if not added:
+                return num
+
+        return self.count
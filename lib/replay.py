@@ -0,0 +1,284 @@
+import gc
+import struct
+
+try:
+    import utime
+    ticks_us, ticks_diff = utime.ticks_us, utime.ticks_diff
+except ImportError:
+    import time
+    ticks_us = lambda: int(time.perf_counter() * 1_000_000)
+    ticks_diff = lambda end, start: end - start
+
+try:
+    from uarray import array
+except ImportError:
+    from array import array
+
+"""
+Record and replay of game sessions: the elapsed time of every frame and the inputs that came in during it, so that the
+same session can be played back exactly, and benchmarked from one commit to the next (frame times and allocations).
+
+Session file layout (little endian):
+- 16 byte header: magic, version, reserved, random seed (u32), number of frames (u32)
+- one record per frame: u16 with the elapsed ms in the low 14 bits and the number of inputs (0-3) in the top 2, then
+  one byte per input (GameInput.LEFT, RIGHT or ACTION). Frames with more inputs carry the rest into extra frames of
+  0 ms. A frame with no input is 2 bytes.
+
+Inputs are applied at the start of the frame they were recorded in, which is also where the game applies them (see
+GameInput.poll()), so a replay goes exactly like the original session.
+"""
+MAGIC = b'WZRP'
+VERSION = 1
+HEADER_FORMAT = "<4sBBHII"
+HEADER_SIZE = 16
+
+MAX_ELAPSED_MS = 0x3FFF
+MAX_FRAME_INPUTS = 3
+
+class SessionRecorder:
+    """ Logs frames and inputs to a session file. Writes are buffered, so that the flash is only written every
+    buffer_size bytes """
+
+    def __init__(self, filename, seed, buffer_size=512):
+        self.file = open(filename, "wb")
+        self.seed = seed
+        self.num_frames = 0
+        self.buffer = bytearray(buffer_size)
+        self.used = 0
+
+        """ Inputs of the current frame, in a preallocated buffer so that input() does not allocate """
+        self.pending = bytearray(16)
+        self.num_pending = 0
+
+        self.file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, 0, 0, seed, 0))
+
+    def input(self, code):
+        if self.num_pending < len(self.pending):
+            self.pending[self.num_pending] = code
+            self.num_pending += 1
+
+    def frame(self, elapsed_ms):
+        pending = self.pending
+        num_inputs = self.num_pending
+        self.num_pending = 0
+        first = 0
+
+        while True:
+            count = min(num_inputs - first, MAX_FRAME_INPUTS)
+            self.write_frame(elapsed_ms, pending, first, count)
+            first += count
+            elapsed_ms = 0
+            if first >= num_inputs:
+                break
+
+    def write_frame(self, elapsed_ms, inputs, first, count):
+        if self.used + 2 + count > len(self.buffer):
+            self.flush()
+
+        buffer, used = self.buffer, self.used
+        value = min(max(elapsed_ms, 0), MAX_ELAPSED_MS) | (count << 14)
+        buffer[used] = value & 0xFF
+        buffer[used + 1] = value >> 8
+        for i in range(count):
+            buffer[used + 2 + i] = inputs[first + i]
+
+        self.used = used + 2 + count
+        self.num_frames += 1
+
+    def flush(self):
+        if self.used:
+            self.file.write(memoryview(self.buffer)[:self.used])
+            self.used = 0
+
+    def close(self):
+        """ Writes the number of frames into the header """
+        self.flush()
+        self.file.seek(0)
+        self.file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, 0, 0, self.seed, self.num_frames))
+        self.file.close()
+
+class SessionReader:
+    """ Reads a session file back, one frame at a time """
+
+    def __init__(self, filename):
+        with open(filename, "rb") as file:
+            data = file.read()
+
+        magic, version, _, _, self.seed, self.num_frames = struct.unpack(HEADER_FORMAT, data[:HEADER_SIZE])
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{filename} is not a session file")
+
+        self.data = data
+        self.pos = HEADER_SIZE
+        self.frame_idx = 0
+
+    def rewind(self):
+        self.pos = HEADER_SIZE
+        self.frame_idx = 0
+
+    def next_frame(self, inputs):
+        """ Elapsed ms of the next frame, with its inputs copied into 'inputs' (a bytearray of at least
+        MAX_FRAME_INPUTS). Returns (-1, 0) at the end of the session """
+        data, pos = self.data, self.pos
+        if self.frame_idx >= self.num_frames or pos + 2 > len(data):
+            return -1, 0
+
+        value = data[pos] | (data[pos + 1] << 8)
+        count = value >> 14
+        for i in range(count):
+            inputs[i] = data[pos + 2 + i]
+
+        self.pos = pos + 2 + count
+        self.frame_idx += 1
+        return value & MAX_ELAPSED_MS, count
+
+def mem_alloc():
+    """ Bytes allocated on the heap (MicroPython), or traced by tracemalloc on the host """
+    if hasattr(gc, 'mem_alloc'):
+        return gc.mem_alloc()
+
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return tracemalloc.get_traced_memory()[0]
+
+def zeros(typecode, size, item_size):
+    """ An array of 'size' zeros, built from a bytearray instead of a temporary list of ints """
+    return array(typecode, bytearray(size * item_size))
+
+class FrameTrace:
+    """
+    Per frame timings and allocations of a replay. The rows go into small preallocated arrays, which are written out
+    to the CSV file (if any) every buffer_frames frames, so that the trace takes the same RAM for a session of any
+    length.
+
+    The summary is kept as running totals, with the frame times in a histogram of 1ms buckets for the 95th percentile.
+    """
+    columns = ('elapsed_ms', 'update_us', 'render_us', 'update_alloc', 'heap_used')
+    histogram_size = 128    # frames of 127ms and up all go into the last bucket
+
+    def __init__(self, filename=None, buffer_frames=32):
+        self.file = None
+        if filename:
+            self.file = open(filename, "w")
+            self.file.write(",".join(self.columns) + "\n")
+
+        self.num_frames = 0
+        self.used = 0
+        self.elapsed_ms = zeros('H', buffer_frames, 2)
+        self.update_us = zeros('I', buffer_frames, 4)
+        self.render_us = zeros('I', buffer_frames, 4)
+        self.update_alloc = zeros('i', buffer_frames, 4)
+        self.heap_used = zeros('I', buffer_frames, 4)
+
+        self.total_us = 0
+        self.max_us = 0
+        self.total_alloc = 0
+        self.histogram = zeros('I', self.histogram_size, 4)
+
+    def add(self, elapsed_ms, update_us, render_us, update_alloc, heap_used):
+        i = self.used
+        self.elapsed_ms[i] = elapsed_ms
+        self.update_us[i] = update_us
+        self.render_us[i] = render_us
+        self.update_alloc[i] = update_alloc
+        self.heap_used[i] = heap_used
+        self.used = i + 1
+        self.num_frames += 1
+
+        frame_us = update_us + render_us
+        self.total_us += frame_us
+        self.total_alloc += update_alloc
+        if frame_us > self.max_us:
+            self.max_us = frame_us
+        self.histogram[min(frame_us // 1000, self.histogram_size - 1)] += 1
+
+        if self.used >= len(self.elapsed_ms):
+            self.flush()
+
+    def flush(self):
+        """ Write the buffered rows as CSV, to compare runs with local/replay_tool.py """
+        file = self.file
+        if file:
+            for i in range(self.used):
+                file.write(f"{self.elapsed_ms[i]},{self.update_us[i]},{self.render_us[i]},{self.update_alloc[i]},"
+                           f"{self.heap_used[i]}\n")
+        self.used = 0
+
+    def close(self):
+        self.flush()
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def percentile_us(self, pct):
+        """ Upper bound of the histogram bucket that holds the given percentile of the frame times """
+        target = min(self.num_frames - 1, self.num_frames * pct // 100)
+        seen = 0
+        for bucket in range(self.histogram_size):
+            seen += self.histogram[bucket]
+            if seen > target:
+                return min((bucket + 1) * 1000, self.max_us)
+        return self.max_us
+
+    def summary(self):
+        count = self.num_frames
+        if not count:
+            return {}
+
+        return {
+            'frames': count,
+            'avg_frame_us': self.total_us // count,
+            'p95_frame_us': self.percentile_us(95),
+            'max_frame_us': self.max_us,
+            'update_alloc': self.total_alloc,
+        }
+
+class ReplayDriver:
+    """
+    Plays a session back through a screen: for every recorded frame, the inputs go to the input handlers (by input
+    code, ie: {GameInput.LEFT: player.move_left, ...}), then screen.do_update() runs with the recorded elapsed time,
+    and screen.do_render(). The time and allocations of both are traced, and streamed to trace_file, if given.
+    """
+
+    def __init__(self, screen, reader, handlers, render=True, trace_file=None):
+        self.screen = screen
+        self.reader = reader
+        self.handlers = handlers
+        self.render = render
+        self.inputs = bytearray(MAX_FRAME_INPUTS)
+        self.trace = FrameTrace(trace_file)
+
+    def run(self, num_frames=None):
+        screen, reader, handlers, inputs, trace = self.screen, self.reader, self.handlers, self.inputs, self.trace
+        frames = 0
+
+        while num_frames is None or frames < num_frames:
+            elapsed_ms, count = reader.next_frame(inputs)
+            if elapsed_ms < 0:
+                break
+
+            for i in range(count):
+                handler = handlers.get(inputs[i])
+                if handler:
+                    handler()
+
+            alloc_start = mem_alloc()
+            start_us = ticks_us()
+            screen.do_update(elapsed_ms)
+            update_end = ticks_us()
+            update_alloc = mem_alloc() - alloc_start
+
+            if self.render:
+                screen.do_render()
+            render_end = ticks_us()
+
+            trace.add(elapsed_ms, ticks_diff(update_end, start_us), ticks_diff(render_end, update_end), update_alloc,
+                      mem_alloc())
+            frames += 1
+
+        trace.flush()
+        return trace
+
+    def close(self):
+        self.trace.close()
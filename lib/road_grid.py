@@ -110,6 +110,11 @@ class RoadGrid():
     # reinforce the edges of the road
     bright_lines = [5, 10]
     bright_color = None
+
+    # Let the SSD1331 draw the vertical lines after the frame DMA (see SSD1331PIO.enable_hw_draw). Note that they will
+    # then be drawn on top of the sprites.
+    hw_lines = False
+
     display_width = const(96)
     display_height = const(64)
     far_z = 0
@@ -167,58 +172,27 @@ class RoadGrid():
 
     def init_palettes(self):
         self.num_horiz_colors = len(self.horiz_palette)
-        new_palette = []
-
-        for i, hex_color in enumerate(self.horiz_palette):
-            new_col = list(colors.hex_to_rgb(hex_color))
-            new_palette.append(new_col)
 
-        tmp_palette = fp(new_palette)
-
-        color_list = []
         """ Make an look up table to quickly reference colors by Y coordinate"""
-        for color_idx in range(len(tmp_palette)):
-            # color_idx = self.horiz_palette.pick_from_value(i, total_height, 0)
-            color = tmp_palette.get_bytes(color_idx)
-            color_list.append(color)
-
-        self.horiz_palette = color_list
-
+        self.horiz_palette = colors.hex_to_565_array(self.horiz_palette, format=colors.BGR565)
 
         """ Make static horizon palette """
         self.check_mem()
-        tmp_palette = fp(len(self.horizon_palette))
-        color_list = []
-
-        for i, hex_color in enumerate(self.horizon_palette):
-            new_col = list(colors.hex_to_rgb(hex_color))
-            tmp_palette.set_rgb(i, new_col)
-
-        for color_idx in range(len(tmp_palette)):
-            new_col = tmp_palette.get_bytes(color_idx)
-            color_list.append(new_col)
-
-        self.horizon_palette = color_list
-
-        """ Make vertical palette """
-        new_palette = []
-        for i, hex_color in enumerate(self.vert_palette):
-            new_palette.append(colors.hex_to_rgb(hex_color))
-
-        vert_palette = fp(new_palette)
-        vert_palette_2 = vert_palette.mirror()
+        self.horizon_palette = colors.hex_to_565_array(self.horizon_palette, format=colors.BGR565)
 
-        # Concatenate the two mirrored palettes into one
-        final_palette = vert_palette + vert_palette_2
-        tmp_palette = []
+        """ Make vertical palette: the colors, followed by the same colors mirrored, in a single buffer """
+        num_vert = len(self.vert_palette)
+        arena = bytearray(num_vert * 4)
+        colors.hex_to_565_buffer(self.vert_palette, format=colors.BGR565, out=arena)
 
-        for idx in range(final_palette.num_colors):
-            tmp_palette.append(final_palette.get_bytes(idx, False))
+        vert_palette = fp(memoryview(arena)[0:num_vert * 2])
+        vert_palette.mirror(arena, num_vert)
+        final_palette = fp(arena)
 
         self.bright_color = colors.hex_to_565(0x00ffff, format=colors.BGR565)
 
         # Simplify palette to an array of rgb565 colors, for performance
-        self.vert_palette = tmp_palette
+        self.vert_palette = final_palette.get_ints()
 
         print("After vertical palette")
         self.check_mem()
@@ -345,19 +319,20 @@ class RoadGrid():
         index = 0
 
         end_y = self.height
+        line = self.display.hw_line if self.hw_lines else self.display.line
 
         for start, end in zip(top_points, bottom_points):
             start_x = int(start + start_x_far)
             end_x = int(end + start_x_near)
 
             color = self.vert_palette[index]
-            self.display.line(start_x, self.start_y, end_x, end_y, color)
+            line(start_x, self.start_y, end_x, end_y, color)
 
             if index in bright_lines:
                 if index == bright_lines[0]:
-                    self.display.line(start_x-1, self.start_y, end_x-1, end_y, bright_color)
+                    line(start_x-1, self.start_y, end_x-1, end_y, bright_color)
                 else:
-                    self.display.line(start_x+1, self.start_y, end_x+1, end_y, bright_color)
+                    line(start_x+1, self.start_y, end_x+1, end_y, bright_color)
 
             index += 1
 
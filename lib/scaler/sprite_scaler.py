@@ -168,17 +168,32 @@ class SpriteScaler():
         write_addrs[row_id] = 0x00000000
 
     #@timed
-    def draw_sprite(self, sprite: SpriteType, image: Image, x=0, y=0, h_scale=1.0, v_scale=1.0):
+    def draw_sprite(self, sprite: SpriteType, image: Image, x=0, y=0, h_scale=1.0, v_scale=1.0, spans=None):
         """
         Draw a scaled sprite at the specified position.
         This method is synchronous and will not return until the whole sprite has been drawn
         Supports 16x16 and 32x32 px images only.
+
+        With spans (SpriteSpans), the fully transparent rows above and below the opaque pixels are not read at all.
         """
         if not h_scale or not v_scale :
             raise AttributeError("Both v_scale and h_scale must be non-zero")
 
         self.base_read = addressof(image.pixel_bytes)
-        h_scale, v_scale, scaled_width, scaled_height = self.init_scaling(sprite, h_scale, v_scale, x, y)
+        top = 0
+        height = sprite.height
+
+        if spans:
+            if spans.is_empty():
+                return False
+
+            top = spans.top
+            height = spans.opaque_height
+            self.base_read += top * ((sprite.width * image.color_depth + 7) // 8)
+
+        h_scale, v_scale, scaled_width, scaled_height = self.init_scaling(sprite, h_scale, v_scale, x, y, height)
+        if top:
+            self.draw_y += int(top * v_scale)
 
         if not self.clip_sprite(sprite.width, sprite.height, h_scale, v_scale):
             return False
@@ -188,8 +203,11 @@ class SpriteScaler():
         self.wait_for_render()
         self.finish_sprite()
 
-    def init_scaling(self, sprite, h_scale, v_scale, x, y):
+    def init_scaling(self, sprite, h_scale, v_scale, x, y, height=None):
         self.reset()
+        if height is None:
+            height = sprite.height
+
 
         """ Snap the input scale to one of the valid scale patterns """
         new_scale = self.dma.patterns.find_closest_scale(h_scale)
@@ -214,7 +232,7 @@ class SpriteScaler():
             print(f"Only 16x16, 32x32, 16x32 or 32x16 sprites allowed, not {sprite.width}x{sprite.height}")
             sys.exit(1)
 
-        scaled_height = math.ceil(sprite.height * v_scale)
+        scaled_height = math.ceil(height * v_scale)
         scaled_width = math.ceil(sprite.width * h_scale)
 
         if DEBUG_SCALES:
@@ -254,7 +272,8 @@ class SpriteScaler():
             self.dbg.debug_draw_instance(sprite, self.draw_x, self.draw_y, self.base_read, self.framebuf.min_write_addr,
                                          h_scale, v_scale, self.framebuf.display_stride)
 
-        palette_addr = addressof(image.palette.palette)
+        palette = sprite.palette if sprite.palette is not None else image.palette   # Own copy, see registry.own_palette()
+        palette_addr = addressof(palette.palette)
         self.init_pio(palette_addr)
         self.palette_addr = palette_addr
         self.dma.init_dma_counts(self.read_stride_px, scaled_height, h_scale)
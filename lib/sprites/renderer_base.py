@@ -1,6 +1,6 @@
 import math
 
-from framebuf import FrameBuffer
+from framebuf import FrameBuffer, MONO_HMSB, GS4_HMSB, GS8
 
 from images.image_loader import ImageLoader
 from scaler.const import DEBUG
@@ -10,6 +10,7 @@ from sprites.sprite_types import SpriteType
 class Renderer:
     """ A composable sprite renderer that can be used by a sprite manager (or standalone)
     to render sprites in different ways. """
+    buffer_formats = {1: MONO_HMSB, 4: GS4_HMSB, 8: GS8}
 
     def __init__(self, display):
         self.display = display
@@ -78,12 +79,27 @@ class Renderer:
 
         return frames
 
-    def do_blit(self, x: int, y: int, frame, palette, alpha=None):
-        if alpha is not None:
-            self.display.blit(frame, x, y, alpha, palette)
-        else:
-            self.display.blit(frame, x, y, -1, palette)
+    def do_blit(self, x: int, y: int, frame, palette, alpha=None, spans=None, pixel_bytes=None):
+        """ With spans (SpriteSpans) and the pixel_bytes of the frame, only the bounding box of the opaque pixels is
+        blitted, as a (buffer, width, height, format, stride) source """
+        if alpha is None:
+            alpha = -1
+
+        if spans and pixel_bytes is not None:
+            if spans.is_empty():
+                return False
+
+            depth = spans.color_depth
+            stride = (spans.width * depth + 7) // 8
+            left = spans.left & ~(8 // depth - 1)   # Start on a byte boundary
+            start = spans.top * stride + (left * depth) // 8
+
+            frame = (memoryview(pixel_bytes)[start:], spans.right - left + 1, spans.opaque_height,
+                     self.buffer_formats[depth], spans.width)
+            x += left
+            y += spans.top
 
+        self.display.blit(frame, x, y, alpha, palette)
         return True
 
     def set_alpha_color(self, sprite_type: SpriteType):
@@ -7,6 +7,8 @@ from images.image_loader import ImageLoader
 from images.indexed_image import create_image
 from scaler.const import DEBUG
 from sprites.renderer_base import Renderer
+from sprites.sprite_registry import registry
+from images.resampler import resample
 from sprites.sprite_types import SpriteType as types, FLAG_VISIBLE, FLAG_BLINK_FLIP, FLAG_BLINK, SpriteType
 from framebuf import FrameBuffer, GS4_HMSB, GS8
 
@@ -46,38 +48,23 @@ class RendererPrescaled(Renderer):
             buffer_format = GS8
 
         new_buffer = FrameBuffer(new_bytes, new_width, new_height, buffer_format)
-
-        x_ratio = orig_img.width / new_width
-        y_ratio = orig_img.height / new_height
-
-        for y in range(new_height):
-            for x in range(0, new_width, 2 if color_depth == 4 else 1):
-                x_1 = min(int(x * x_ratio), orig_img.width - 1)
-                y_1 = min(int(y * y_ratio), orig_img.height - 1)
-
-                color1 = orig_img.pixels.pixel(x_1, y_1)
-                new_buffer.pixel(x, y, color1)
-
-                if color_depth == 4:
-                    x_2 = min(int((x + 1) * x_ratio), orig_img.width - 1)
-                    color2 = orig_img.pixels.pixel(x_2, y_1)
-                    new_buffer.pixel(x + 1, y, color2)
+        resample(orig_img.pixel_bytes, orig_img.width, orig_img.height, new_bytes, new_width, new_height, color_depth)
 
         return create_image(new_width, new_height, new_buffer, new_bytes, new_bytes_addr,
                             orig_img.palette, orig_img.palette_bytes, color_depth)
 
-    def render_sprite(self, sprite, meta, images, palette):
+    def render_sprite(self, sprite_inst, meta, images, palette):
         """
                Renders a sprite instance using pre-scaled images from the SpriteRegistry.
                sprite_inst: The uctypes struct for the sprite.
                camera_for_transform: Not directly used here for blitting, but affects sprite_inst.draw_x/y/scale.
                """
         type_id = sprite_inst.sprite_type
-        meta = sprite_registry.get_metadata(type_id)
+        meta = registry.get_metadata(type_id)
 
         # For prescaled, get_img returns a LIST of Image objects
-        scaled_image_list = sprite_registry.get_img(type_id)
-        palette = sprite_registry.get_palette(type_id)
+        scaled_image_list = registry.get_img(type_id)
+        palette = registry.get_palette(type_id)
 
         if not meta or not scaled_image_list or not palette:
             if DEBUG:
@@ -91,10 +78,10 @@ class RendererPrescaled(Renderer):
             return False
 
         # Visibility and blink flags
-        if not types_meta.get_flag(sprite_inst, FLAG_VISIBLE):
+        if not types.get_flag(sprite_inst, FLAG_VISIBLE):
             if DEBUG: print(f"RendererPrescaled: Sprite {type_id} invisible (flag).")
             return False
-        if types_meta.get_flag(sprite_inst, FLAG_BLINK) and types_meta.get_flag(sprite_inst, FLAG_BLINK_FLIP):
+        if types.get_flag(sprite_inst, FLAG_BLINK) and types.get_flag(sprite_inst, FLAG_BLINK_FLIP):
             if DEBUG: print(f"RendererPrescaled: Sprite {type_id} blinked off.")
             return False
 
@@ -124,6 +111,11 @@ class RendererPrescaled(Renderer):
         frame_buffer_to_blit = image_to_blit.pixels  # This is a FrameBuffer
         alpha_color = meta.alpha_color if hasattr(meta, 'alpha_color') else -1
 
+        """ The spans are those of the full size image, so only the prescaled frame of that same size can use them """
+        spans = registry.get_spans(type_id)
+        if spans and (image_to_blit.width != spans.width or image_to_blit.height != spans.height):
+            spans = None
+
         # Handle sprite repeating (horizontal clones)
         if meta.repeats < 2:
             self.do_blit(
@@ -131,7 +123,9 @@ class RendererPrescaled(Renderer):
                 y=int(sprite_inst.draw_y),
                 frame=frame_buffer_to_blit,
                 palette=palette,
-                alpha=alpha_color
+                alpha=alpha_color,
+                spans=spans,
+                pixel_bytes=image_to_blit.pixel_bytes
             )
         else:
             # For repeated sprites, the scale used for spacing should be the sprite's current visual scale,
@@ -150,7 +144,9 @@ class RendererPrescaled(Renderer):
                     y=int(sprite_inst.draw_y),
                     frame=frame_buffer_to_blit,
                     palette=palette,
-                    alpha=alpha_color
+                    alpha=alpha_color,
+                    spans=spans,
+                    pixel_bytes=image_to_blit.pixel_bytes
                 )
 
                 # Used to be:
@@ -65,11 +65,13 @@ class RendererScaler(Renderer):
             inst.scale = self.min_scale
 
         draw_scale = inst.scale
+        spans = registry.get_spans(type_id)
         if DEBUG_INST:
             printc(f"Rendering sprite at scale {draw_scale}x", INK_YELLOW)
 
         if meta.repeats < 2:
-            self.scaler.draw_sprite(meta, img_asset, inst.draw_x, inst.draw_y, h_scale=draw_scale, v_scale=draw_scale)
+            self.scaler.draw_sprite(meta, img_asset, inst.draw_x, inst.draw_y, h_scale=draw_scale, v_scale=draw_scale,
+                                    spans=spans)
         else:
             original_draw_x = inst.draw_x  # Save original for repeated sprites
             for i in range(meta.repeats):
@@ -79,7 +81,8 @@ class RendererScaler(Renderer):
 
                 # This is hacky and should be rewritten
                 inst.draw_x = int(current_draw_x)
-                self.scaler.draw_sprite(meta, img_asset, inst.draw_x, inst.draw_y, h_scale=draw_scale, v_scale=draw_scale)
+                self.scaler.draw_sprite(meta, img_asset, inst.draw_x, inst.draw_y, h_scale=draw_scale, v_scale=draw_scale,
+                                        spans=spans)
             inst.draw_x = original_draw_x  # Restore original draw_x
 
         return True
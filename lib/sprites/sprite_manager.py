@@ -54,6 +54,7 @@ class SpriteManager:
     min_draw_y = -32
     max_draw_y = None
     max_scale = 8
+    interp_alpha = None     # Set by a fixed timestep loop (FixedStep.alpha), to draw the sprites between two updates
 
     def __init__(self, display: ssd1331_pio, renderer, max_sprites, camera=None, grid=None):
         self.display = display
@@ -202,6 +203,8 @@ class SpriteManager:
         while current:
             sprite = current.sprite
             kind = self.get_meta(sprite)
+            sprite.prev_draw_x = sprite.draw_x
+            sprite.prev_draw_y = sprite.draw_y
             self.update_sprite(sprite, kind, elapsed)
 
             if not types.get_flag(sprite, FLAG_ACTIVE):
@@ -236,18 +239,38 @@ class SpriteManager:
     def show(self, display: framebuf.FrameBuffer):
         """ Display all the active sprites """
         current = self.pool.head
+        alpha = self.interp_alpha
 
         while current:
             sprite = current.sprite
 
             if types.get_flag(sprite, FLAG_VISIBLE):
-                self.show_sprite(sprite, display)
+                if alpha is None:
+                    self.show_sprite(sprite, display)
+                else:
+                    self.show_interpolated(sprite, display, alpha)
             current = current.next
 
+    def show_interpolated(self, sprite, display, alpha):
+        """ Draw the sprite 'alpha' of the way from its previous draw position to the current one, then put it back """
+        draw_x, draw_y = sprite.draw_x, sprite.draw_y
+        prev_x, prev_y = sprite.prev_draw_x, sprite.prev_draw_y
+        sprite.draw_x = prev_x + int((draw_x - prev_x) * alpha)
+        sprite.draw_y = prev_y + int((draw_y - prev_y) * alpha)
+
+        shown = self.show_sprite(sprite, display)
+
+        sprite.draw_x = draw_x
+        sprite.draw_y = draw_y
+        return shown
+
     def show_sprite(self, sprite, display: framebuf.FrameBuffer):
         """ Use the renderer to draw a single sprite on the display (or several, if multisprites)"""
         sprite_type = sprite.sprite_type
         meta = registry.sprite_metadata[sprite_type]
+        if sprite_type not in registry.sprite_images:
+            registry.ensure_loaded(sprite_type)  # Evicted while on screen
+
         images = registry.sprite_images[sprite_type]
         palette: FramebufferPalette = registry.sprite_palettes[sprite_type]
 
@@ -280,9 +303,13 @@ class SpriteManager:
 
         meta = registry.sprite_metadata[sprite_type]
 
+        """ Lazy load: the images of a type are only loaded on its first spawn (or after being evicted) """
+        registry.ensure_loaded(sprite_type)
+
         # new_sprite.x = new_sprite.y = new_sprite.z = 0
         new_sprite, idx = self.pool.get(sprite_type)
         new_sprite.scale = 1
+        new_sprite.z_frac = 0
         self.phy.set_pos(new_sprite, 50, 24)
 
         # Set default dimensions from the metadata *before* applying kwargs
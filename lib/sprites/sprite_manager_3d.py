@@ -62,11 +62,15 @@ class SpriteManager3D(SpriteManager):
             return False
 
 
-        """ Apply motion (FIX) """
+        """ Apply motion, in 1/256 units of z, so that the short steps of a fixed timestep still add up (int() used to
+        round the motion of every update to a whole unit) """
         if sprite.speed:
-            new_z = int(sprite.z + (sprite.speed * elapsed))
+            z_fixed = (sprite.z << 8) + sprite.z_frac + int(sprite.speed * elapsed * 256)
+            new_z = z_fixed >> 8
+            new_frac = z_fixed & 0xFF
         else:
             new_z = sprite.z
+            new_frac = sprite.z_frac
 
 
         if sprite.z < cam.near:
@@ -84,9 +88,11 @@ class SpriteManager3D(SpriteManager):
             """ We check for sprite.scale to give static sprites that just spawned a change to calculate its render 
             attributes once. """
             """ No need to calculate draw coords, since the sprite hasn't moved during this update frame """
+            sprite.z_frac = new_frac
             return False
         else:
             sprite.z = new_z
+            sprite.z_frac = new_frac
 
 
         """ The rest of the calculations are only relevant for visible sprites within the frustum"""
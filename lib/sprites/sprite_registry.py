@@ -8,6 +8,9 @@ from print_utils import printc
 from sprites.sprite_types import SpriteType  # Ensure this path is correct
 # Import the new, more efficient scaling function that returns a FrameBuffer
 from images.image_scaler import generate_scaled_framebuffer  # Make sure image_scaler.py has this function
+from images.sprite_spans import compute_spans, encode_rle
+from images.mip_generator import mip_cache, MIP_DEPTHS
+from colors.palette_pool import palette_pool
 
 
 class SpriteRegistry:
@@ -28,13 +31,20 @@ class SpriteRegistry:
         # For prescaled images, Image.frames will be a list of FrameBuffer objects.
         self.sprite_images = {}
         self.sprite_palettes = {}  # Stores Palette objects
+        self.type_prescale = {}  # Whether the images of each type are prescaled, to load them later (lazy types)
+        self.sprite_spans = {}  # Opaque row spans (SpriteSpans) of the types with an alpha index, to skip transparent rows
         self._is_initialized = True  # Mark as initialized
 
-    def add_type(self, type_id, sprite_class, prescale: bool = False, **kwargs):
+        # Images evicted from the ImageLoader cache must be dropped here too, or their memory won't be freed
+        ImageLoader.cache.add_listener(self._on_evict)
+
+    def add_type(self, type_id, sprite_class, prescale: bool = False, lazy: bool = False, **kwargs):
         """
         Registers a sprite type by extracting 'sprite_type' (type_id) and
         'sprite_class' from kwargs. Instantiates 'sprite_class' with remaining
         kwargs and loads assets.
+
+        With lazy=True the images are not loaded until the first spawn of the type (or a prefetch()).
         """
         if DEBUG:
             printc(f"{sprite_class} sprite registered as ID: {type_id}", INK_YELLOW)
@@ -60,6 +70,10 @@ class SpriteRegistry:
         if not hasattr(meta, 'num_frames'):
             meta.num_frames = 1
 
+        self.type_prescale[type_id] = prescale
+        if lazy:
+            return
+
         base_img_obj = ImageLoader.load_image(
             filename=meta.image_path,
             frame_width=meta.width,
@@ -73,7 +87,7 @@ class SpriteRegistry:
             self.sprite_palettes[type_id] = None
             return
 
-        self.sprite_palettes[type_id] = base_img_obj.palette
+        self.sprite_palettes[type_id] = palette_pool.acquire(base_img_obj.palette)  # Shared, see own_palette()
         meta.palette = base_img_obj.palette
 
         has_predefined_alpha_color = hasattr(meta, 'alpha_color') and meta.alpha_color is not None
@@ -88,6 +102,8 @@ class SpriteRegistry:
         elif not has_predefined_alpha_color:
             meta.alpha_color = None
 
+        self._set_spans(type_id, meta, base_img_obj)
+
         if prescale:
             prescaled_framebuffers = []
             num_total_levels = meta.num_frames
@@ -105,7 +121,11 @@ class SpriteRegistry:
             else:
                 raise ValueError(f"Unsupported meta.color_depth {meta.color_depth} for prescaling type {type_id}")
 
-            if num_total_levels <= 0:
+            scaled_bytes = 0
+
+            if meta.color_depth in MIP_DEPTHS and num_total_levels > 1:
+                prescaled_framebuffers, scaled_bytes = self._mip_frames(meta, base_img_obj)
+            elif num_total_levels <= 0:
                 if base_img_obj.pixels: prescaled_framebuffers.append(base_img_obj.pixels)
             else:
                 for i in range(1, num_total_levels):
@@ -128,12 +148,17 @@ class SpriteRegistry:
                             orig_img_pixels=base_img_obj.pixels,
                             orig_width=meta.width, orig_height=meta.height,
                             target_w=int(target_w), target_h=int(target_h),
-                            color_depth=meta.color_depth, buffer_format=base_buffer_format
+                            color_depth=meta.color_depth, buffer_format=base_buffer_format,
+                            orig_pixel_bytes=base_img_obj.pixel_bytes
                         )
-                        if scaled_fb: prescaled_framebuffers.append(scaled_fb)
+                        if scaled_fb:
+                            prescaled_framebuffers.append(scaled_fb)
+                            scaled_bytes += (target_w * meta.color_depth + 7) // 8 * target_h
 
                 if base_img_obj.pixels: prescaled_framebuffers.append(base_img_obj.pixels)
 
+            ImageLoader.cache.grow(meta.image_path, scaled_bytes)
+
             if not prescaled_framebuffers and base_img_obj.pixels:
                 prescaled_framebuffers.append(base_img_obj.pixels)
 
@@ -161,7 +186,7 @@ class SpriteRegistry:
             raise ValueError(f"Sprite type {type_id} not registered with add_type() first.")
 
         meta = self.sprite_metadata[type_id]
-        # Load the base image (this is an Image object from BMPReader)
+        # Load the base image (an Image object, from the asset bundle when there is one, otherwise from BMPReader)
         base_img_obj = ImageLoader.load_image(
             filename=meta.image_path,
             frame_width=meta.width,  # Used by BMPReader if it's a spritesheet
@@ -176,7 +201,7 @@ class SpriteRegistry:
             return
 
         # Store palette from the base image and update meta
-        self.sprite_palettes[type_id] = base_img_obj.palette
+        self.sprite_palettes[type_id] = palette_pool.acquire(base_img_obj.palette)  # Shared, see own_palette()
         meta.palette = base_img_obj.palette  # Keep direct ref on meta for convenience
 
         # Set alpha color on the metadata object
@@ -189,6 +214,8 @@ class SpriteRegistry:
         else:
             meta.alpha_color = None
 
+        self._set_spans(type_id, meta, base_img_obj)
+
         if prescale:
             prescaled_framebuffers = []  # This will hold FrameBuffer objects
             num_total_levels = meta.num_frames  # How many scale levels desired (incl. original)
@@ -208,7 +235,12 @@ class SpriteRegistry:
             else:
                 raise ValueError(f"Unsupported meta.color_depth {meta.color_depth} for prescaling type {type_id}")
 
-            if num_total_levels <= 0:
+            scaled_bytes = 0
+
+            if meta.color_depth in MIP_DEPTHS and num_total_levels > 1:
+                # Majority filtered levels, from the flash cache after the first boot
+                prescaled_framebuffers, scaled_bytes = self._mip_frames(meta, base_img_obj)
+            elif num_total_levels <= 0:
                 print(
                     f"Warning: prescale=True for type {type_id} but meta.num_frames ({num_total_levels}) is unsuitable. Using original FrameBuffer only.")
                 prescaled_framebuffers.append(base_img_obj.pixels)
@@ -240,10 +272,12 @@ class SpriteRegistry:
                             target_w=int(target_w),  # Target dimensions
                             target_h=int(target_h),
                             color_depth=meta.color_depth,  # BPP
-                            buffer_format=base_buffer_format  # framebuf.FORMAT constant
+                            buffer_format=base_buffer_format,  # framebuf.FORMAT constant
+                            orig_pixel_bytes=base_img_obj.pixel_bytes
                         )
                         if scaled_fb:
                             prescaled_framebuffers.append(scaled_fb)
+                            scaled_bytes += (target_w * meta.color_depth + 7) // 8 * target_h
                         else:
                             # generate_scaled_framebuffer should raise an error if it fails critically
                             print(
@@ -255,6 +289,9 @@ class SpriteRegistry:
                 # Add the original (largest) FrameBuffer as the last one in the list
                 prescaled_framebuffers.append(base_img_obj.pixels)
 
+            # The scaled copies live as long as the base image, so they count towards its size in the cache
+            ImageLoader.cache.grow(meta.image_path, scaled_bytes)
+
             # If, after all attempts, the list is empty but the base image was valid, add base image's FrameBuffer
             if not prescaled_framebuffers and base_img_obj.pixels:
                 prescaled_framebuffers.append(base_img_obj.pixels)
@@ -280,6 +317,40 @@ class SpriteRegistry:
             # If it's a spritesheet, its .frames attribute (from BMPReader) contains animation FrameBuffers.
             self.sprite_images[type_id] = base_img_obj
 
+    def ensure_loaded(self, type_id: int) -> Image:
+        """
+        Returns the Image of a type, loading it first if it is not resident (lazy type, or evicted from the cache).
+        Also marks the image as recently used, so that types which keep spawning are not evicted.
+        """
+        if type_id not in self.sprite_images:
+            self._load_images(type_id, self.type_prescale.get(type_id, False))
+        else:
+            ImageLoader.cache.get(self.sprite_metadata[type_id].image_path)
+
+        return self.sprite_images.get(type_id)
+
+    def prefetch(self, type_ids):
+        """ Load the images of these types ahead of their first spawn (ie: at the start of a stage) """
+        for type_id in type_ids:
+            self.ensure_loaded(type_id)
+
+    def pin(self, type_id: int):
+        """ Load the images of a type and keep them resident """
+        self.ensure_loaded(type_id)
+        return ImageLoader.pin(self.sprite_metadata[type_id].image_path)
+
+    def unpin(self, type_id: int):
+        return ImageLoader.unpin(self.sprite_metadata[type_id].image_path)
+
+    def _on_evict(self, filename):
+        """ Drop our references to an image that the cache evicted, it will be reloaded on the next spawn """
+        for type_id, meta in self.sprite_metadata.items():
+            if type_id in self.sprite_images and meta.image_path == filename:
+                del self.sprite_images[type_id]
+                palette_pool.release(self.sprite_palettes.pop(type_id, None))
+                self.sprite_spans.pop(type_id, None)
+                meta.palette = None
+
     def get_metadata(self, type_id: int) -> SpriteType:
         """Gets the registered SpriteType metadata instance."""
         return self.sprite_metadata.get(type_id)
@@ -294,9 +365,57 @@ class SpriteRegistry:
         return self.sprite_images.get(type_id)
 
     def get_palette(self, type_id: int):  # Returns your Palette object
-        """Gets the loaded palette for the sprite type."""
+        """Gets the loaded palette for the sprite type. It may be shared with other types: read only, unless it
+        comes from own_palette()"""
         return self.sprite_palettes.get(type_id)
 
+    def own_palette(self, type_id: int):
+        """A palette that this type can animate without changing the colors of the other types (copy on write).
+        Pin the type as well, or a reload after an eviction goes back to the shared palette"""
+        self.ensure_loaded(type_id)
+        meta = self.sprite_metadata[type_id]
+        palette = palette_pool.make_unique(self.sprite_palettes.get(type_id))
+
+        self.sprite_palettes[type_id] = palette
+        meta.palette = palette
+        if meta.alpha_index is not None and meta.alpha_index != -1 and palette:
+            meta.alpha_color = palette.get_bytes(meta.alpha_index)
+
+        return palette
+
+    def _mip_frames(self, meta, image):
+        """Scaled levels from the mip cache (generated on the first boot), plus the original as the last one"""
+        alpha_index = meta.alpha_index if meta.alpha_index != -1 else None
+        frames, num_bytes = mip_cache.get_frames(
+            image.pixel_bytes, meta.width, meta.height, meta.color_depth, meta.num_frames, alpha_index)
+        frames.append(image.pixels)
+        return frames, num_bytes
+
+    def get_spans(self, type_id: int):
+        """Opaque spans of the base image of the type, or None if it has no alpha index."""
+        return self.sprite_spans.get(type_id)
+
+    def _set_spans(self, type_id, meta, image):
+        if meta.alpha_index is None or meta.alpha_index == -1 or meta.color_depth not in (1, 4, 8):
+            self.sprite_spans.pop(type_id, None)
+            return
+
+        self.sprite_spans[type_id] = compute_spans(
+            image.pixel_bytes, meta.width, meta.height, meta.color_depth, meta.alpha_index)
+
+    def print_span_stats(self):
+        """Bytes (RLE vs. raw) and pixels saved per sprite type, by skipping transparent pixels"""
+        for type_id, spans in self.sprite_spans.items():
+            meta = self.sprite_metadata[type_id]
+            stats = spans.stats()
+            rle_bytes = len(encode_rle(self.sprite_images[type_id].pixel_bytes, meta.width, meta.height,
+                                       meta.color_depth, meta.alpha_index))
+
+            print(f"Type {type_id} ({meta.width}x{meta.height}): rows {spans.top}-{spans.bottom}, "
+                  f"opaque {stats['opaque_px']}/{stats['pixels']} px")
+            print(f"  skipped px - scaler: {stats['scaler_skipped_px']} / blit: {stats['blit_skipped_px']}")
+            print(f"  bytes - raw: {stats['bytes']} / RLE: {rle_bytes} (saved {stats['bytes'] - rle_bytes})")
+
 
 # Global instance
 registry = SpriteRegistry()
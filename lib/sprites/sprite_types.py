@@ -80,9 +80,13 @@ SPRITE_DATA_LAYOUT = {
 
     "dir_x": uctypes.INT16 | 32,            # 2 byte at offset 32
     "dir_y": uctypes.INT16 | 34,            # 2 byte at offset 34
+
+    "z_frac": uctypes.UINT8 | 36,           # 1 byte at offset 36, fraction of z in 1/256 units
+    "prev_draw_x": uctypes.INT8 | 37,       # 1 byte at offset 37, draw_x / draw_y before the last update, for
+    "prev_draw_y": uctypes.INT8 | 38,       # 1 byte at offset 38  interpolated rendering (see FixedStep)
 }
 
-SPRITE_DATA_SIZE = 36
+SPRITE_DATA_SIZE = 40
 
 # Get all field names for outside use
 sprite_fields = SPRITE_DATA_LAYOUT.keys()
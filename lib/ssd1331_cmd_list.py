@@ -0,0 +1,262 @@
+try:
+    from micropython import const
+except ImportError:
+    def const(x):
+        return x
+
+""" SSD1331 graphics acceleration commands. Parameters are sent in command mode (D/C low), just like the opcode """
+CMD_DRAW_LINE = const(0x21)  # x1, y1, x2, y2, color (3 bytes)
+CMD_DRAW_RECT = const(0x22)  # x1, y1, x2, y2, outline color (3 bytes), fill color (3 bytes)
+CMD_CLEAR = const(0x25)      # x1, y1, x2, y2
+CMD_FILL = const(0x26)       # 0x01: fill rects, 0x00: outline only
+CMD_NOP = const(0xE3)
+
+LINE_SIZE = const(8)
+RECT_SIZE = const(11)
+FILL_SIZE = const(2)
+
+""" Time (us) the controller needs to finish each command before it can accept the next one """
+DELAY_LINE = const(400)
+DELAY_RECT = const(1000)
+
+""" Nominal bit clock of the pixels_to_spi PIO program (120Mhz / 4 cycles per bit) """
+SPI_HZ = const(30_000_000)
+
+class DrawCommandList():
+    """
+    Records lines and rectangles as SSD1331 hardware draw commands into a preallocated bytearray, so that they can
+    be sent to the display right after the frame DMA, instead of being rasterized into the framebuffer by the CPU.
+
+    The list holds at most `max_cmds` primitives per frame. Once the budget is spent (or when a primitive falls
+    outside of the screen, since the controller does not clip) the add methods return False, and the caller is
+    expected to rasterize that primitive in software instead.
+
+    Colors are taken in the same (byte swapped) RGB565 format as the framebuffer, so that the callers can reuse
+    their palettes as they are.
+    """
+    width = 96
+    height = 64
+
+    def __init__(self, max_cmds=16, width=96, height=64):
+        self.max_cmds = max_cmds
+        self.width = width
+        self.height = height
+
+        """ Worst case: every command is a rect that toggles the fill mode """
+        self.buffer = bytearray(max_cmds * (RECT_SIZE + FILL_SIZE))
+        self.delays = bytearray(max_cmds) # Delay of each command, in units of 100us
+        self.num_bytes = 0
+        self.num_cmds = 0
+        self.fill_on = None
+
+        """ Frame stats, used to report the budget usage """
+        self.overflows = 0
+        self.raster_px = 0
+
+    def reset(self):
+        self.num_bytes = 0
+        self.num_cmds = 0
+        self.overflows = 0
+        self.raster_px = 0
+
+        """ The fill mode is global to the controller, and the other list may have changed it since this one ran """
+        self.fill_on = None
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def line(self, x1, y1, x2, y2, color):
+        if (self.num_cmds >= self.max_cmds) or not (self.in_bounds(x1, y1) and self.in_bounds(x2, y2)):
+            self.overflows += 1
+            return False
+
+        buf = self.buffer
+        i = self.num_bytes
+        buf[i] = CMD_DRAW_LINE
+        buf[i+1] = x1
+        buf[i+2] = y1
+        buf[i+3] = x2
+        buf[i+4] = y2
+        self._put_color(i+5, color)
+
+        self.num_bytes = i + LINE_SIZE
+        self.delays[self.num_cmds] = DELAY_LINE // 100
+        self.num_cmds += 1
+        self.raster_px += max(abs(x2 - x1), abs(y2 - y1)) + 1
+        return True
+
+    def rect(self, x, y, width, height, color, fill=None):
+        """ Same signature as framebuf.rect(). Pass fill=True to fill the rectangle with the outline color """
+        x2 = x + width - 1
+        y2 = y + height - 1
+
+        if (self.num_cmds >= self.max_cmds) or (width < 1) or (height < 1) or \
+                not (self.in_bounds(x, y) and self.in_bounds(x2, y2)):
+            self.overflows += 1
+            return False
+
+        buf = self.buffer
+        i = self.num_bytes
+        fill = bool(fill)
+
+        if fill != self.fill_on:
+            buf[i] = CMD_FILL
+            buf[i+1] = 0x01 if fill else 0x00
+            i += FILL_SIZE
+            self.fill_on = fill
+
+        buf[i] = CMD_DRAW_RECT
+        buf[i+1] = x
+        buf[i+2] = y
+        buf[i+3] = x2
+        buf[i+4] = y2
+        self._put_color(i+5, color)
+        self._put_color(i+8, color)
+
+        self.num_bytes = i + RECT_SIZE
+        self.delays[self.num_cmds] = DELAY_RECT // 100
+        self.num_cmds += 1
+
+        if fill:
+            self.raster_px += width * height
+        else:
+            self.raster_px += (width + height) * 2
+        return True
+
+    def _put_color(self, index, color):
+        """ Unswap the framebuffer color and split it into the three 6 bit channels the draw commands expect,
+        sent in the same order as the fields of the RGB565 word (the A0 remap applies to them as well) """
+        color = ((color & 0xFF) << 8) | ((color >> 8) & 0xFF)
+        buf = self.buffer
+        buf[index] = (color >> 11) << 1
+        buf[index+1] = (color >> 5) & 0x3F
+        buf[index+2] = (color & 0x1F) << 1
+
+    def commands(self):
+        """ Yields (start, end, delay_us) for each recorded command, including the fill mode toggle before a rect """
+        buf = self.buffer
+        start = 0
+        num = 0
+
+        while start < self.num_bytes:
+            opcode = buf[start]
+            if opcode == CMD_FILL:
+                end = start + FILL_SIZE
+                opcode = buf[end]
+            else:
+                end = start
+
+            end += LINE_SIZE if opcode == CMD_DRAW_LINE else RECT_SIZE
+            yield start, end, self.delays[num] * 100
+            start = end
+            num += 1
+
+    def get_bytes(self):
+        return memoryview(self.buffer)[0:self.num_bytes]
+
+class CommandRecorder():
+    """
+    Host side decoder for the bytes produced by DrawCommandList. It checks that the stream is well formed (known
+    opcodes, complete parameters, on-screen coordinates, 6 bit colors) and estimates how much SPI time the command
+    path costs, compared to pushing the same pixels to the display as raw RGB565 data through a window.
+    """
+    def __init__(self, width=96, height=64, spi_hz=SPI_HZ):
+        self.width = width
+        self.height = height
+        self.spi_hz = spi_hz
+        self.errors = []
+        self.cmds = []
+
+    def decode(self, data):
+        data = bytes(data)
+        self.errors = []
+        self.cmds = []
+        fill = False
+        i = 0
+
+        while i < len(data):
+            opcode = data[i]
+            if opcode == CMD_FILL:
+                if i + FILL_SIZE > len(data):
+                    self.errors.append(f"Truncated fill command at {i}")
+                    break
+                fill = data[i+1] == 0x01
+                i += FILL_SIZE
+                continue
+
+            if opcode == CMD_DRAW_LINE:
+                size = LINE_SIZE
+            elif opcode == CMD_DRAW_RECT:
+                size = RECT_SIZE
+            else:
+                self.errors.append(f"Unknown opcode 0x{opcode:02X} at {i}")
+                break
+
+            if i + size > len(data):
+                self.errors.append(f"Truncated command 0x{opcode:02X} at {i}")
+                break
+
+            x1, y1, x2, y2 = data[i+1:i+5]
+            if not (x1 < self.width and x2 < self.width and y1 < self.height and y2 < self.height):
+                self.errors.append(f"Coordinates off screen at {i}: {x1},{y1} - {x2},{y2}")
+
+            colors = data[i+5:i+size]
+            if any(c > 0x3F for c in colors):
+                self.errors.append(f"Color out of range at {i}: {list(colors)}")
+
+            if opcode == CMD_DRAW_LINE:
+                self.cmds.append(('line', x1, y1, x2, y2))
+            else:
+                self.cmds.append(('rect', x1, y1, x2, y2, fill))
+            i += size
+
+        return self.cmds
+
+    def is_valid(self):
+        return not self.errors
+
+    def pixels(self):
+        """ Number of pixels the decoded commands touch """
+        total = 0
+        for cmd in self.cmds:
+            x1, y1, x2, y2 = cmd[1:5]
+            if cmd[0] == 'line':
+                total += max(abs(x2 - x1), abs(y2 - y1)) + 1
+            else:
+                width = abs(x2 - x1) + 1
+                height = abs(y2 - y1) + 1
+                if cmd[5]:
+                    total += width * height
+                else:
+                    total += (width + height) * 2
+        return total
+
+    def estimate(self, data):
+        """ Returns a dict with the SPI cost of the command stream vs. raw pixel writes, in bytes and microseconds """
+        self.decode(data)
+        cmd_bytes = len(data)
+        px_bytes = 0
+
+        """ Raw path: 6 byte column/row window per primitive, then 2 bytes per pixel """
+        for cmd in self.cmds:
+            x1, y1, x2, y2 = cmd[1:5]
+            if cmd[0] == 'line' and x1 != x2 and y1 != y2:
+                """ Diagonal lines need one window per step of the major axis (their pixels are added below) """
+                px_bytes += (max(abs(x2 - x1), abs(y2 - y1)) + 1) * 6
+            else:
+                px_bytes += 6
+
+        px_bytes += self.pixels() * 2
+
+        us_per_byte = 8_000_000 / self.spi_hz
+        cmd_us = cmd_bytes * us_per_byte
+        px_us = px_bytes * us_per_byte
+
+        return {
+            'commands': len(self.cmds),
+            'cmd_bytes': cmd_bytes,
+            'px_bytes': px_bytes,
+            'cmd_us': cmd_us,
+            'px_us': px_us,
+            'saved_us': px_us - cmd_us,
+        }
@@ -21,6 +21,7 @@ from scaler.const import DEBUG_DMA, DMA_BASE_1, DMA_READ_ADDR_TRIG, DMA_WRITE_AD
     PIO1_BASE, PIO0_TX0, PIO0_CTRL, DMA_BASE, DEBUG_DISPLAY, DMA_TRANS_COUNT, DREQ_PIO0_TX0, MULTI_CHAN_TRIGGER, \
     PIO0_SM0_SHIFTCTRL, DEBUG_PIO, DMA_WRITE_ADDR, DEBUG_IRQ, DMA_BASE_8, DMA_BASE_7, DEBUG_LED, DMA_BASE_0
 from utils import aligned_buffer
+from ssd1331_cmd_list import DrawCommandList, CMD_NOP
 
 class SSD1331PIO():
     """ Display driver that uses DMA to transfer bytes from the memory location of a framebuf to the queue of a PIO
@@ -52,14 +53,22 @@ class SSD1331PIO():
     flip = False
     flop = not flip
 
-    buffer0 = aligned_buffer(HEIGHT * WIDTH * 2)  # RGB565 is 2 bytes per px
-    buffer1 = aligned_buffer(HEIGHT * WIDTH * 2)
+    BYTES_PER_PX = 2 # RGB565
+    FB_MODE = framebuf.RGB565
+    CMD_WORD_BYTES = 4 # Bytes shifted out by the SPI state machine for every word in the TX FIFO
+
+    buffer0 = None
+    buffer1 = None
 
     dma_tx_count = 0
 
     fps = None
     paused = True
 
+    """ Hardware draw commands (lines / rects) sent after the frame DMA. Disabled unless enable_hw_draw() is called """
+    cmd_write: DrawCommandList = None
+    cmd_read: DrawCommandList = None
+
     """ 
     xA0 x72 -> RGB
     xA0 x76 -> BGR
@@ -108,6 +117,9 @@ class SSD1331PIO():
 
         self.flip = False
 
+        self.buffer0 = aligned_buffer(self.HEIGHT * self.WIDTH * self.BYTES_PER_PX)
+        self.buffer1 = aligned_buffer(self.HEIGHT * self.WIDTH * self.BYTES_PER_PX)
+
         if DEBUG_DMA:
             addr0 = addressof(self.buffer0)
             addr1 = addressof(self.buffer1)
@@ -117,7 +129,7 @@ class SSD1331PIO():
         self.is_render_done = False
         self.is_render_ctrl_done = False
 
-        mode = framebuf.RGB565
+        mode = self.FB_MODE
         gc.collect()
 
         # Buffer #1: the one we write to
@@ -127,7 +139,7 @@ class SSD1331PIO():
         # Buffer #2: the one we read from, is the one that gets sent to the display
         # DMA copies the write buffer to this one when the writing finishes
         self.framebuf1 = framebuf.FrameBuffer(self.buffer1, self.WIDTH, self.HEIGHT, mode)
-        self.framebuf1.fill(colors.hex_to_565(0x0B0B0B))
+        self.framebuf1.fill(self.clear_color())
 
         # Set starting alias to each framebuffer, just to make it clear that they will swap places
         # framebuf0 -> buffer0
@@ -142,6 +154,9 @@ class SSD1331PIO():
         self.buffer1_addr = int(addressof(self.buffer1))
         self.buffer1_addr_buf = self.buffer1_addr.to_bytes(4, "little")
 
+    def clear_color(self):
+        return colors.hex_to_565(0x0B0B0B)
+
     def start(self):
         self.init_display()
         self.init_dma()
@@ -169,6 +184,12 @@ class SSD1331PIO():
         while self.dma0.active():
             utime.sleep_ms(1)
 
+        if self.cmd_write:
+            """ The previous frame is now fully on the display RAM, so its overlay can be drawn on top """
+            self.send_commands(self.cmd_read)
+            self.cmd_read, self.cmd_write = self.cmd_write, self.cmd_read
+            self.cmd_write.reset()
+
         self.is_render_done = False
 
         # Use the trigger register so we dont have to kick off the DMA1 after reconfig
@@ -242,6 +263,46 @@ class SSD1331PIO():
         self.pin_cs(1)
         self.pin_dc(self.DC_MODE_DATA)
 
+    def enable_hw_draw(self, max_cmds=16):
+        """ Allow up to max_cmds lines / rects per frame to be drawn by the SSD1331 itself (see hw_line, hw_rect).
+        Two command lists are used, so that the CPU can record the next frame while the last one is being sent. """
+        self.cmd_write = DrawCommandList(max_cmds, self.width, self.height)
+        self.cmd_read = DrawCommandList(max_cmds, self.width, self.height)
+
+    def disable_hw_draw(self):
+        self.cmd_write = self.cmd_read = None
+
+    def send_commands(self, cmd_list):
+        """ Push a list of draw commands through the PIO SM in command mode. Must only be called while the frame
+        DMA is idle. The SM shifts out whole 32bit words, so each command is padded with NOPs. """
+        if not cmd_list.num_cmds:
+            return
+
+        sm = self.sm
+        buf = cmd_list.buffer
+        self.wait_tx_empty()
+        self.pin_dc(self.DC_MODE_CMD)
+
+        word_bytes = self.CMD_WORD_BYTES
+        pad = (4 - word_bytes) * 8
+
+        for start, end, delay in cmd_list.commands():
+            for i in range(start, end, word_bytes):
+                word = 0
+                for j in range(i, i + word_bytes):
+                    word = (word << 8) | (buf[j] if j < end else CMD_NOP)
+                sm.put(word << pad)
+
+            self.wait_tx_empty()
+            utime.sleep_us(delay)
+
+        self.pin_dc(self.DC_MODE_DATA)
+
+    def wait_tx_empty(self):
+        while self.sm.tx_fifo():
+            pass
+        utime.sleep_us(2) # Let the last word shift out (32 bits @ ~30Mhz)
+
     def init_pio_spi(self, freq=120_000_000):
         """"""
         # Define the SPI pins
@@ -417,6 +478,16 @@ class SSD1331PIO():
     def line(self, x1, y1, x2, y2, color):
         return self.write_framebuf.line(x1, y1, x2, y2, color)
 
+    def hw_line(self, x1, y1, x2, y2, color):
+        """ Like line(), but drawn by the display controller on top of the frame, if there is budget left for it.
+        Falls back to the framebuffer otherwise. """
+        if not (self.cmd_write and self.cmd_write.line(x1, y1, x2, y2, color)):
+            self.write_framebuf.line(x1, y1, x2, y2, color)
+
+    def hw_rect(self, x, y, width, height, color, fill=None):
+        if not (self.cmd_write and self.cmd_write.rect(x, y, width, height, color, fill)):
+            self.write_framebuf.rect(x, y, width, height, color, fill)
+
     def debug_dma(self):
         channels = [self.dma0, self.dma1]
         print("DMA DEBUG --------------------------")
@@ -0,0 +1,211 @@
+import framebuf
+import utime
+from micropython import const
+from rp2 import PIO, DMA, StateMachine
+import rp2
+from uctypes import addressof
+
+from ssd1331_pio import SSD1331PIO
+from colors.color_lut import ColorLUT, lut_buffer
+from scaler.const import DEBUG_DMA, DMA_BASE, DMA_READ_ADDR_TRIG, PIO0_TX0, PIO0_TX1, PIO0_RX1, DREQ_PIO0_TX0, \
+    DREQ_PIO0_TX1, DREQ_PIO0_RX1, PIO0_SM0_SHIFTCTRL
+
+LUT_ALIGN = const(512) # 256 colors * 2 bytes. The PIO ORs the index into the low bits of the LUT address
+
+class SSD1331PIOIndexed(SSD1331PIO):
+    """
+    Variant of the PIO display driver where the framebuffers are GS8 (1 byte per pixel, 6KB each instead of 12KB),
+    and every pixel is an index into a 256 color RGB565 lookup table (see ColorLUT). The expansion to RGB565 happens
+    at scan-out, on the way to the SPI pins, without any CPU involvement:
+
+    DMA0 (index) : framebuffer bytes  -> PIO0 SM1 TX            (paced by SM1 TX)
+    SM1          : index              -> lut_addr | index << 1  (see index_to_addr)
+    DMA2 (addr)  : PIO0 SM1 RX        -> DMA3 READ_ADDR_TRIG    (paced by SM1 RX)
+    DMA3 (pixel) : 1 halfword of LUT  -> PIO0 SM0 TX            (paced by SM0 TX, chains back to DMA2)
+    SM0          : 16 bits per word   -> SPI                    (see pixels_to_spi_16)
+
+    DMA1 is the same control channel as in the parent class, which kicks off DMA0 with the address of the buffer
+    to send.
+
+    All the drawing functions take LUT indices as colors. Use lut.load_palette() to turn a FramebufferPalette into
+    an index palette that can be passed to blit().
+    """
+    BYTES_PER_PX = 1
+    FB_MODE = framebuf.GS8
+    CMD_WORD_BYTES = 2
+
+    dma2: DMA = None
+    dma3: DMA = None
+    sm_addr = None
+    lut: ColorLUT = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lut = ColorLUT(lut_buffer(LUT_ALIGN, ColorLUT.NUM_COLORS * 2))
+        assert addressof(self.lut.lut) % LUT_ALIGN == 0, "The LUT must be aligned for the PIO address generator"
+        self.dma2 = DMA()
+        self.dma3 = DMA()
+
+    def clear_color(self):
+        return 0
+
+    def init_dma(self):
+        self.total_bytes = self.width * self.height
+        self.dma_tx_count = self.total_bytes
+
+        if DEBUG_DMA:
+            print(" - SSD1331 PIO Indexed Driver. Acquired DMA channels:")
+            for ch in (self.dma0, self.dma1, self.dma2, self.dma3):
+                print(f"   * DMA (CH:{ch.channel})")
+            print(f" LUT Addr:    {addressof(self.lut.lut):08X}")
+
+        """ Index channel: one byte per pixel into the address generator """
+        ctrl0 = self.dma0.pack_ctrl(
+            size=0,
+            inc_read=True,
+            inc_write=False,
+            treq_sel=DREQ_PIO0_TX1,
+            irq_quiet=True,
+            chain_to=self.dma0.channel # No chain
+        )
+        self.dma0.config(
+            count=self.dma_tx_count,
+            read=0,
+            write=PIO0_TX1,
+            ctrl=ctrl0,
+        )
+
+        """ Control Channel """
+        ctrl1 = self.dma1.pack_ctrl(
+            size=2,
+            inc_read=False,
+            inc_write=False,
+        )
+        self.dma1.config(
+            count=1,
+            read=0,
+            write=DMA_BASE + DMA_READ_ADDR_TRIG,
+            ctrl=ctrl1,
+        )
+
+        """ Pixel channel: reads one LUT entry and sends it to the SPI SM. Each trigger reloads the count (1) """
+        ctrl3 = self.dma3.pack_ctrl(
+            size=1,
+            inc_read=False,
+            inc_write=False,
+            treq_sel=DREQ_PIO0_TX0,
+            irq_quiet=True,
+            chain_to=self.dma2.channel
+        )
+        self.dma3.config(
+            count=1,
+            read=addressof(self.lut.lut),
+            write=PIO0_TX0,
+            ctrl=ctrl3,
+        )
+
+        """ Address channel: LUT entry address from SM1 into the read trigger of the pixel channel """
+        ctrl2 = self.dma2.pack_ctrl(
+            size=2,
+            inc_read=False,
+            inc_write=False,
+            treq_sel=DREQ_PIO0_RX1,
+            irq_quiet=True,
+        )
+        self.dma2.config(
+            count=1,
+            read=PIO0_RX1,
+            write=DMA_BASE + (self.dma3.channel * 0x40) + DMA_READ_ADDR_TRIG,
+            ctrl=ctrl2,
+            trigger=True # Waits on the SM1 RX FIFO until the first frame
+        )
+
+    def init_pio_spi(self, freq=120_000_000):
+        pin_dc = self.pin_dc
+        pin_cs = self.pin_cs
+
+        pin_cs.value(0)
+        pin_dc.value(1)
+
+        sm = StateMachine(0)
+        sm.init(
+            self.pixels_to_spi_16,
+            freq=freq,
+            out_base=self.pin_sda,
+            set_base=pin_cs,
+            sideset_base=self.pin_sck,
+        )
+        self.is_spi_done = False
+        sm.active(1)
+        self.sm = sm
+
+        """ Address generator: load the upper 23 bits of the LUT address into Y once """
+        sm_addr = StateMachine(1)
+        sm_addr.init(self.index_to_addr, freq=freq)
+        sm_addr.put(addressof(self.lut.lut) >> 9)
+        sm_addr.exec("pull()")
+        sm_addr.exec("mov(y, osr)")
+        sm_addr.active(1)
+        self.sm_addr = sm_addr
+
+    def wait_tx_empty(self):
+        """ Pixels may still be on their way through the address SM and the LUT channel """
+        while self.sm_addr.tx_fifo() or self.sm_addr.rx_fifo() or self.dma3.active():
+            pass
+        super().wait_tx_empty()
+
+    @rp2.asm_pio(in_shiftdir=PIO.SHIFT_LEFT)
+    def index_to_addr():
+        """ Turns a byte written to the TX FIFO (replicated across the word by the bus) into the address of its LUT
+        entry: (Y << 9) | (index << 1) """
+        wrap_target()
+        pull(block)
+        in_(y, 23)
+        in_(osr, 8)
+        in_(null, 1)
+        push(block)
+        wrap()
+
+    @rp2.asm_pio(
+        out_shiftdir=PIO.SHIFT_LEFT,
+        set_init=PIO.OUT_LOW,
+        sideset_init=PIO.OUT_HIGH,
+        out_init=PIO.OUT_LOW,
+        pull_thresh=32
+        )
+    def pixels_to_spi_16():
+        """ Same as pixels_to_spi, but only shifts out the top 16 bits of every word, since halfword DMA writes to
+        the FIFO are replicated in both halves """
+        label("start")
+        set(pins, 1)
+        nop()             [1].side(1)
+        nop()                               .side(0)
+        nop()                         .side(0)
+
+        label("wrap_target")
+        wrap_target()
+        set(x, 15)
+
+        pull(block)                 .side(1)
+        set(pins, 0)                .side(1)
+
+        label("bitloop")
+        out(pins, 1)              [1]  .side(0)
+        jmp(x_dec, "bitloop")     [1]  .side(1)
+
+        nop()                .side(0)
+        set(pins, 1)                .side(0)
+        nop()                    [1] .side(0)
+
+        mov(y, status)
+        jmp(invert(not_y), "wrap_target")
+        jmp("start")
+
+    """ DRAWING FUNCTIONS: colors are LUT indices """
+    def hw_line(self, x1, y1, x2, y2, color):
+        if not (self.cmd_write and self.cmd_write.line(x1, y1, x2, y2, self.lut.get_color(color))):
+            self.write_framebuf.line(x1, y1, x2, y2, color)
+
+    def hw_rect(self, x, y, width, height, color, fill=None):
+        if not (self.cmd_write and self.cmd_write.rect(x, y, width, height, self.lut.get_color(color), fill)):
+            self.write_framebuf.rect(x, y, width, height, color, fill)
@@ -1,43 +1,43 @@
 import math
-import utime
-import uasyncio as asyncio
 
 from profiler import prof
 from print_utils import printc
-from sprites.sprite_manager import SpriteManager
-from sprites.sprite_registry import SpriteRegistry
+from sprites.sprite_registry import registry
 
 
 class Event:
-    started_ms: int
+    """
+    Events run on the stage clock (ms since the stage started), which the update loop advances with Stage.update().
+    Every event knows the exact time it started and finished, so the next one starts when the previous one was due
+    (not on the tick that noticed it), and the timing does not depend on the frame rate or on scheduler jitter.
+    """
+    started_ms: int = 0
+    finished_ms: int = 0
     active: bool = False
     finished: bool = False
     next_event = None
     speed: int = 0
-    elapsed = 0
-    last_tick = 0
     sprite_manager = None
     extra_kwargs = None
 
+    """ Set while a stage fast forwards (Stage.skip_to()), so that one shot events are skipped instead of fired """
+    muted = False
+
     def __init__(self, **kwargs):
         self.extra_kwargs = kwargs
 
-    def start(self):
-        self.started_ms = utime.ticks_ms()
+    def start(self, now_ms=0):
+        self.started_ms = now_ms
         self.active = True
         self.finished = False
 
-    def update(self):
-        """ Override and call from child classes """
-        if not self.active:
-            return False
+    def update(self, now_ms):
+        """ Advance the event to the stage time now_ms. Override in child classes """
+        return self.active
 
-        if not self.last_tick:
-            self.last_tick = self.started_ms
-
-        return True
-
-    def finish(self):
+    def finish(self, at_ms=None):
+        """ at_ms: the stage time at which the event was due to finish (defaults to when it started) """
+        self.finished_ms = self.started_ms if at_ms is None else at_ms
         self.finished = True
         self.active = False
 
@@ -81,22 +81,26 @@ class Event:
 
 class EventChain(Event):
     """ A list of events that will be executed from first to last"""
-    events: [] = []
     current_event: Event = None
-    finished: bool = False
-    sprite_manager: SpriteManager = None
+    sprite_manager = None   # SpriteManager
 
-    def start(self, sprite_manager=None):
-        self.sprite_manager = sprite_manager
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.events = []
+
+    def start(self, now_ms=0):
+        super().start(now_ms)
+        if not self.events:
+            self.finish(now_ms)
+            return
 
-        super().start()
         self.current_event = self.events[0]
-        self.current_event.start()
+        self.current_event.start(now_ms)
 
     def reset(self):
         self.active = False
-        self.current_event = self.events[0]
-        # TODO: add task cancellation
+        self.finished = False
+        self.current_event = self.events[0] if self.events else None
 
     def add(self, new_event: Event):
         """ Chain the last event added to this one"""
@@ -108,26 +112,27 @@ class EventChain(Event):
 
     def add_many(self, all_events):
         for event in all_events:
-            self.add_sprite(event)
+            self.add(event)
 
-    async def update(self):
-        if not super().update():
-            await asyncio.sleep_ms(10)
+    def update(self, now_ms):
+        """ Run every event that is due by now_ms, each one starting exactly when the previous one finished """
+        if not self.active:
             return False
 
-        if self.current_event.finished:
-            if self.current_event.next_event:
-                next_event = self.current_event.next_event
-                self.current_event = next_event
-                self.current_event.start()
-            else:
+        current = self.current_event
+        current.update(now_ms)
+
+        while current.finished:
+            next_event = current.next_event
+            if not next_event:
                 """ No more events """
-                self.finish()
-        else:
-            await asyncio.sleep_ms(10)
-            return self.current_event.update()
+                self.finish(current.finished_ms)
+                return False
+
+            next_event.start(current.finished_ms)
+            next_event.update(now_ms)
+            current = self.current_event = next_event
 
-        await asyncio.sleep_ms(10)
         return True
 
 
@@ -139,20 +144,16 @@ class WaitEvent(Event):
         super().__init__(**kwargs)
         self.delay_ms = int(delay_ms)
 
-    def start(self):
-        self.started_ms = utime.ticks_ms()
-        self.active = True
-        self.finished = False
-
-    def update(self):
-        if not super().update():
+    def update(self, now_ms):
+        if not self.active:
             return False
 
-        now = utime.ticks_ms()
-        if utime.ticks_diff(now, self.started_ms) > self.delay_ms:
-            self.finish()
+        if now_ms - self.started_ms >= self.delay_ms:
+            self.finish(self.started_ms + self.delay_ms)
             return False
 
+        return True
+
 
 class MultiEvent(Event):
     events = []
@@ -160,8 +161,8 @@ class MultiEvent(Event):
     repeat_count = 0
 
     """ A class that allows multiple other events to fire off at once
-        `times` allows us to repeat the whole set of events more than once 
-        (once the first set is finished)
+        `repeat` is how many more times the whole set of events runs once the first set is finished (so repeat=1
+        runs it twice). Every run starts when the longest event of the previous one finished.
     """
 
     def __init__(self, events, repeat=1, **kwargs):
@@ -169,39 +170,43 @@ class MultiEvent(Event):
         self.events = events
         self.repeat_max = repeat
 
-    def start(self):
-        super().start()
-
-        self.active = True
-        self.finished = False
+    def start(self, now_ms=0):
+        super().start(now_ms)
+        self.repeat_count = 0
+        self.start_all(now_ms)
 
+    def start_all(self, now_ms):
         for event in self.events:
-            event.start()
+            event.start(now_ms)
 
-    def update(self):
-        if not super().update():
+    def update(self, now_ms):
+        if not self.active:
             return False
-        all_finished = True
-        for event in self.events:
-            if event.finished or not event.active:
-                continue
-            else:
-                all_finished = False
-                event.update()
 
-        if not all_finished:
-            return True
+        while True:
+            all_finished = True
+            end_ms = self.started_ms
 
-        """All events finished"""
-        for reset_event in self.events:
-            reset_event.reset()
+            for event in self.events:
+                if event.active:
+                    event.update(now_ms)
 
-        self.repeat_count += 1
-        if (self.repeat_count > self.repeat_max):
-            self.finish()
-            return False
-        else:
-            self.start()
+                if not event.finished:
+                    all_finished = False
+                elif event.finished_ms > end_ms:
+                    end_ms = event.finished_ms
+
+            if not all_finished:
+                return True
+
+            """All events finished"""
+            self.repeat_count += 1
+            if self.repeat_count > self.repeat_max:
+                self.finish(end_ms)
+                return False
+
+            self.started_ms = end_ms
+            self.start_all(end_ms)
 
 
 class SequenceEvent(Event):
@@ -211,48 +216,53 @@ class SequenceEvent(Event):
     current_event_index = 0
 
     """ A class that allows multiple events to fire off sequentially
-        `repeat` allows us to repeat the whole sequence of events more than once 
-        (once the first sequence is finished)
+        `repeat` is how many times the whole sequence runs (0 and 1 both run it once)
     """
 
-    def __init__(self, events, repeat=1):
+    def __init__(self, events, repeat=1, **kwargs):
+        super().__init__(**kwargs)
         self.events = events
         self.repeat_max = repeat
 
-    def start(self):
-        super().start()
+    def start(self, now_ms=0):
+        super().start(now_ms)
+        self.repeat_count = 0
 
-        self.active = True
-        self.finished = False
-        self.current_event_index = 0
+        if not self.events:
+            self.finish(now_ms)
+            return
 
-        if self.events:
-            self.events[0].start()
+        self.start_pass(now_ms)
 
-    def update(self):
-        if not super().update():
+    def start_pass(self, now_ms):
+        self.current_event_index = 0
+        self.events[0].start(now_ms)
+
+    def update(self, now_ms):
+        if not self.active:
             return False
 
-        if self.current_event_index >= len(self.events):
-            self.repeat_count += 1
-            if self.repeat_count >= self.repeat_max:
-                self.finish()
-                return False
-            else:
-                self.reset()
-                self.start()
-                return True
+        events = self.events
+        while True:
+            current_event = events[self.current_event_index]
+            if current_event.active:
+                current_event.update(now_ms)
 
-        current_event = self.events[self.current_event_index]
+            if not current_event.finished:
+                return True
 
-        if current_event.finished or not current_event.active:
+            end_ms = current_event.finished_ms
             self.current_event_index += 1
-            if self.current_event_index < len(self.events):
-                self.events[self.current_event_index].start()
-        else:
-            current_event.update()
+            if self.current_event_index < len(events):
+                events[self.current_event_index].start(end_ms)
+                continue
 
-        return True
+            self.repeat_count += 1
+            if self.repeat_count >= self.repeat_max:
+                self.finish(end_ms)
+                return False
+
+            self.start_pass(end_ms)
 
     def reset(self):
         super().reset()
@@ -269,10 +279,11 @@ def sequence(self, events, repeat=1):
 
 
 class OneShotEvent(Event):
-    def start(self):
-        super().start()
-        self.do_thing()
-        self.finish()
+    def start(self, now_ms=0):
+        super().start(now_ms)
+        if not Event.muted:
+            self.do_thing()
+        self.finish(now_ms)
 
     def do_thing(self):
         """ Override """
@@ -299,29 +310,35 @@ class SpawnEnemyEvent(OneShotEvent):
         self.lane = lane
 
     def do_thing(self):
-        sprite_type = self.sprite_type
-        meta = registry.sprite_metadata[sprite_type]
-        mgr = self.sprite_mgr
+        sprite = spawn_sprite(self.sprite_mgr, self.sprite_type, self.x, self.y, self.z, self.lane, self.extra_kwargs)
+        self.finish()
+        return sprite
 
-        base_args = {
-            'x': self.x, 'y': self.y, 'z': self.z
-        }
-        if self.extra_kwargs:
-            all_args = base_args | self.extra_kwargs
-            sprite, _ = mgr.spawn(sprite_type, **all_args)
-        else:
-            sprite, _ = mgr.spawn(sprite_type, base_args)
 
-        mgr.set_lane(sprite, self.lane)  # ??? really?? the SpriteManager should do this within its own lifecycle,
-        # or lane should be passed as another extra kwarg from parent spawn()
+def spawn_sprite(mgr, sprite_type, x, y, z, lane, extra_kwargs=None):
+    """ Spawn a sprite in a lane, used by SpawnEnemyEvent and by compiled stage schedules """
+    meta = registry.sprite_metadata[sprite_type]
 
-        sprite.floor_y, scale = mgr.camera.get_scale(sprite.z)
-        # if math.isinf(scale):
-        #     scale = self.max_scale
-        mgr.set_draw_xy(sprite, meta.height, scale)
+    base_args = {
+        'x': x, 'y': y, 'z': z
+    }
+    if extra_kwargs:
+        all_args = base_args | extra_kwargs
+        sprite, _ = mgr.spawn(sprite_type, **all_args)
+    else:
+        sprite, _ = mgr.spawn(sprite_type, **base_args)
 
-        self.finish()
-        return sprite
+    mgr.set_lane(sprite, lane)  # ??? really?? the SpriteManager should do this within its own lifecycle,
+    # or lane should be passed as another extra kwarg from parent spawn()
+
+    sprite.floor_y, scale = mgr.camera.get_scale(sprite.z)
+    # if math.isinf(scale):
+    #     scale = self.max_scale
+    mgr.set_draw_xy(sprite, meta.height, scale)
+    sprite.prev_draw_x = sprite.draw_x     # Nothing to interpolate from yet
+    sprite.prev_draw_y = sprite.draw_y
+
+    return sprite
 
 
 class MoveCircle(Event):
@@ -343,12 +360,11 @@ class MoveCircle(Event):
         self.orig_x = item.x
         self.orig_y = item.y
 
-    def update(self):
-        elapsed = super().update()
-        if not elapsed:
+    def update(self, now_ms):
+        if not self.active:
             return False
 
-        age = utime.ticks_ms() - self.started_ms
+        age = now_ms - self.started_ms
         distance = (age * self.speed) / 1000
         angle = distance * 2 * math.pi / self.radius
 
@@ -360,6 +376,3 @@ class MoveCircle(Event):
 
         if self.curr_count >= self.total_count:
             return False
-
-# Global instance
-registry = SpriteRegistry()
\ No newline at end of file
@@ -1,6 +1,7 @@
-import asyncio
-
-from stages.events import MultiEvent, WaitEvent, SpawnEnemyEvent, EventChain, SequenceEvent
+from stages.events import Event, MultiEvent, WaitEvent, SpawnEnemyEvent, EventChain, SequenceEvent, spawn_sprite
+from stages.stage_compiler import Schedule, compile_events
+from stages.stage_file import StageStream
+from sprites.sprite_registry import registry
 
 
 class Stage:
@@ -8,19 +9,85 @@ class Stage:
     A stage is mainly a series of events which are chained to one another so that they will be executed in
     sequence. These events can be multiple in parallel, wait events or enemy spawn events.
     Meant to be subclassed by individual stages
+
+    The events run on the stage clock (now_ms), which only moves forward when the update loop calls update(), so a
+    stage plays out the same no matter the frame rate. skip_to() fast forwards it.
+
+    Unless use_schedule is off, the events are compiled into a flat spawn schedule when the stage starts (or loaded
+    from schedule_file, see stage_compiler.build()), and the update loop only advances a cursor through it.
+
+    A stage with a stage_file (built from a JSON definition, see stage_file.py) that is present on the device streams
+    its spawns from flash instead, and never builds its event tree (script()).
     """
-    events = EventChain()
+    events: EventChain = None
     running = False
+    now_ms = 0
+
+    use_schedule = True
+    schedule_file = None
+    schedule: Schedule = None
+    cursor = 0
+
+    stage_file = None
+    stream: StageStream = None
+
+    """ Sprite types whose images are loaded when the stage starts, rather than on their first spawn """
+    prefetch_types = ()
 
     def __init__(self, sprite_manager):
         self.sprite_manager = sprite_manager
         self.current_event = 0
+        self.events = EventChain()
+        self.now_ms = 0
 
     def start(self):
         # self.reset()
+        registry.prefetch(self.prefetch_types)
         self.running = True
-        self.events.start()
-        # self.current_event
+        self.now_ms = 0
+        self.cursor = 0
+
+        if self.stage_file and not self.stream:
+            self.stream = StageStream.open(self.stage_file)
+
+        if self.stream:
+            self.stream.rewind()
+            self.run_stream(0)
+            return
+
+        if not self.events.events:
+            self.script()
+
+        if self.use_schedule and not self.schedule:
+            self.schedule = self.load_schedule()
+
+        if self.schedule:
+            self.run_schedule(0)    # Same as the events: whatever is due at 0 spawns on start
+        else:
+            self.events.start(0)
+
+    def load_schedule(self):
+        """ The prebuilt schedule, or one compiled from the events. None if the events can't be compiled, or
+        have no spawns """
+        schedule = Schedule.load(self.schedule_file) if self.schedule_file else None
+        if schedule:
+            return schedule
+
+        try:
+            schedule = compile_events(self.events)
+        except ValueError as err:
+            print(f"Stage not compiled, running its events instead: {err}")
+            return None
+
+        if not schedule.count:
+            print("Stage compiled to no spawns, running its events instead")
+            return None
+
+        return schedule
+
+    def script(self):
+        """ Build the event tree of the stage (in child classes), only needed when there is no stage file """
+        pass
 
     def stop(self):
         self.running = False
@@ -37,14 +104,95 @@ class Stage:
         else:
             return self
 
-    def update(self, elapsed):
-        """ Update the current event in the stage, provided it is running"""
+    def update(self, elapsed_ms):
+        """ Advance the stage clock by elapsed_ms and run the events that are due, provided the stage is running.
+        Synchronous, and no allocations unless an event fires """
         if not self.running:
             return False
 
-        loop = asyncio.get_event_loop()
-        loop.create_task(self.events.update())
-
+        self.now_ms += elapsed_ms
+        if self.stream:
+            return self.run_stream(self.now_ms)
+
+        if self.schedule:
+            return self.run_schedule(self.now_ms)
+
+        return self.events.update(self.now_ms)
+
+    def run_schedule(self, now_ms):
+        """ Spawn everything in the schedule that is due by now_ms """
+        schedule = self.schedule
+        times = schedule.t_ms
+        count = schedule.count
+        cursor = self.cursor
+
+        while cursor < count and times[cursor] <= now_ms:
+            self.spawn_scheduled(cursor)
+            cursor += 1
+
+        self.cursor = cursor
+        return now_ms < schedule.end_ms
+
+    def run_stream(self, now_ms):
+        """ Spawn everything in the stage file that is due by now_ms """
+        stream = self.stream
+        while stream.due(now_ms):
+            _, sprite_type, lane, x, y, z, speed = stream.next()
+            extra_kwargs = {'speed': speed} if speed == speed else None
+            spawn_sprite(self.sprite_manager, sprite_type, x, y, z, lane, extra_kwargs)
+
+        return now_ms < stream.end_ms
+
+    def spawn_scheduled(self, idx):
+        schedule = self.schedule
+        speed = schedule.speeds[idx]
+        extra_kwargs = {'speed': speed} if speed == speed else None     # NaN: no speed given
+
+        return spawn_sprite(self.sprite_manager, schedule.sprite_types[idx], schedule.x[idx], schedule.y[idx],
+                            schedule.z[idx], schedule.lanes[idx], extra_kwargs)
+
+    def is_finished(self):
+        if self.stream:
+            return self.stream.is_finished(self.now_ms)
+
+        if self.schedule:
+            return self.cursor >= self.schedule.count and self.now_ms >= self.schedule.end_ms
+
+        return self.events.finished
+
+    def skip_to(self, target_ms, fire=False):
+        """ Fast forward the stage clock to target_ms. The events in between run in order, at their exact times, but
+        one shot events (spawns) are skipped unless 'fire'. Going back in time restarts the stage from 0 """
+        if target_ms < self.now_ms:
+            self.now_ms = 0
+            self.cursor = 0
+            if self.stream:
+                self.stream.rewind()
+            elif not self.schedule:
+                self.events.start(0)
+
+        if self.stream:
+            self.now_ms = target_ms
+            if fire:
+                return self.run_stream(target_ms)
+
+            self.stream.seek(self.stream.find(target_ms))
+            return target_ms < self.stream.end_ms
+
+        if self.schedule:
+            self.now_ms = target_ms
+            if fire:
+                return self.run_schedule(target_ms)
+
+            self.cursor = self.schedule.find(target_ms)
+            return target_ms < self.schedule.end_ms
+
+        Event.muted = not fire
+        try:
+            self.now_ms = target_ms
+            return self.events.update(target_ms)
+        finally:
+            Event.muted = False
 
     def reset(self):
         self.current_event = 0
@@ -1,4 +1,4 @@
-from anim.palette_rotate_one import PaletteRotateOne
+from anim.palette_animator import animator
 from colors.color_util import BGR565
 from scaler.const import DEBUG
 from sprites.sprite_registry import registry
@@ -14,11 +14,22 @@ from colors.palettes import convert_hex_palette, PALETTE_FIRE
 import micropython
 
 class Stage1(Stage):
+    prefetch_types = (SPRITE_TEST_SKULL,)
+    schedule_file = "/stage_1.sched"   # stage_compiler.build(Stage1(None), Stage1.schedule_file)
+    stage_file = "/stages/stage_1.stg"  # > python local/stage_tool.py build stages/stage_1.json
+
     def __init__(self, sprite_manager):
         super().__init__(sprite_manager)
 
-        self.base_speed = base_speed = -1
-        # self.base_speed = wall_speed = base_speed = 0
+        self.base_speed = -1
+        # self.base_speed = 0
+
+        self.load_types()
+        # self.init_palettes()
+
+    def script(self):
+        """ The same stage as /stages/stage_1.json, for when the stage file is not on the device """
+        base_speed = self.base_speed
         wall_speed = base_speed * 30
         fire_palette = None
         shared_palette = None
@@ -33,10 +44,7 @@ class Stage1(Stage):
         tiny_wait = 500
 
         evt = self.events
-        evt.sprite_manager = sprite_manager
-
-        self.load_types()
-        # self.init_palettes()
+        evt.sprite_manager = self.sprite_manager
 
         # You can also add events programmatically:
         #
@@ -112,27 +120,31 @@ class Stage1(Stage):
 
         print(micropython.mem_info())
 
-        self.color_anim = PaletteRotateOne(self.shared_palette, self.fire_palette, 100, 0)
-        self.color_anim.stop()
+        self.color_anim = animator.add_cycle(self.shared_palette, self.fire_palette, 100, 0)
+        animator.pause(self.color_anim)
 
         print(micropython.mem_info())
 
         return True
 
     def load_types(self):
+        """ Images are loaded on the first spawn of each type (see prefetch_types for the ones needed right away) """
         registry.add_type(
             SPRITE_TEST_SKULL,
             TestSkull,
+            lazy=True,
             speed=self.base_speed)
 
         registry.add_type(
             SPRITE_BARRIER_LEFT,
             WarningWall,
+            lazy=True,
             speed=self.base_speed)
 
         registry.add_type(
             SPRITE_BARRIER_LEFT_x2,
             WarningWall,
+            lazy=True,
             speed=self.base_speed,
             repeats=3,
             repeat_spacing=16)
@@ -141,12 +153,14 @@ class Stage1(Stage):
         registry.add_type(
             SPRITE_BARRIER_RIGHT,
             WarningWall,
+            lazy=True,
             image_path="/img/road_barrier_yellow_inv_32.bmp",
             speed=self.base_speed)
 
         registry.add_type(
             SPRITE_BARRIER_RIGHT_x2,
             WarningWall,
+            lazy=True,
             image_path="/img/road_barrier_yellow_inv_32.bmp",
             speed=self.base_speed,
             repeats=2,
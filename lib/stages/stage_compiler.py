@@ -0,0 +1,160 @@
+import struct
+
+try:
+    from uarray import array
+except ImportError:
+    from array import array
+
+from stages.events import EventChain, MultiEvent, SequenceEvent, WaitEvent, SpawnEnemyEvent
+
+"""
+Stage compiler: flattens the event tree of a stage (sequences, multis, waits and spawns, with their repeats) into a
+time sorted schedule of spawns, so that at runtime a stage only has to advance a cursor through a few arrays instead of
+walking the tree on every tick.
+
+The times are the same ones the events produce when they run on the stage clock (see events.py), including the
+repeat counts: a multi runs repeat + 1 times, a sequence max(repeat, 1) times.
+
+Only spawns with no extra arguments other than 'speed' can be compiled (ValueError otherwise), so that every spawn fits
+in one record: (t_ms, sprite type, lane, x, y, z, speed). A speed of NaN means "not given" (the type default).
+
+Binary file layout (little endian), written by Schedule.save():
+- 16 byte header: magic, version, reserved, number of spawns, end of the stage in ms
+- the arrays, one after the other: t_ms (u32), sprite type (u8), lane (i8), x, y, z (i16) and speed (f32)
+"""
+MAGIC = b'WZST'
+VERSION = 1
+HEADER_FORMAT = "<4sBBHII"
+HEADER_SIZE = 16
+
+NO_SPEED = float('nan')
+
+class Schedule:
+    """ Spawn records in parallel arrays, sorted by time """
+    array_types = ('I', 'B', 'b', 'h', 'h', 'h', 'f')
+    item_sizes = (4, 1, 1, 2, 2, 2, 4)
+
+    def __init__(self, count=0, end_ms=0):
+        self.count = count
+        self.end_ms = end_ms
+        zeros = [0] * count
+        self.t_ms, self.sprite_types, self.lanes, self.x, self.y, self.z, self.speeds = \
+            [array(typecode, zeros) for typecode in self.array_types]
+
+    def arrays(self):
+        return self.t_ms, self.sprite_types, self.lanes, self.x, self.y, self.z, self.speeds
+
+    def find(self, t_ms):
+        """ Index of the first spawn after t_ms (binary search) """
+        times = self.t_ms
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if times[mid] <= t_ms:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def save(self, filename):
+        with open(filename, "wb") as file:
+            file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, 0, 0, self.count, self.end_ms))
+            for values in self.arrays():
+                file.write(values)
+
+    @staticmethod
+    def load(filename):
+        """ Returns None if there is no (valid) schedule file """
+        try:
+            file = open(filename, "rb")
+        except OSError:
+            return None
+
+        with file:
+            header = file.read(HEADER_SIZE)
+            if len(header) != HEADER_SIZE:
+                return None
+
+            magic, version, _, _, count, end_ms = struct.unpack(HEADER_FORMAT, header)
+            if magic != MAGIC or version != VERSION or not count:
+                return None     # An empty schedule would play a stage with no spawns at all
+
+            schedule = Schedule(count, end_ms)
+            for values, item_size in zip(schedule.arrays(), Schedule.item_sizes):
+                if count and file.readinto(values) != count * item_size:
+                    return None
+
+        return schedule
+
+def compile_events(events):
+    """ Compile an event (usually the EventChain of a stage) into a Schedule. Raises ValueError for the events that
+    can't be compiled """
+    spawns = []
+    end_ms = walk(events, 0, spawns)
+
+    """ Stable sort, so spawns due at the same time keep the order they have in the script """
+    order = sorted(range(len(spawns)), key=lambda i: spawns[i][0])
+
+    schedule = Schedule(len(spawns), end_ms)
+    for pos, i in enumerate(order):
+        t_ms, event = spawns[i]
+        schedule.t_ms[pos] = t_ms
+        schedule.sprite_types[pos] = event.sprite_type
+        schedule.lanes[pos] = event.lane
+        schedule.x[pos] = int(event.x)
+        schedule.y[pos] = int(event.y)
+        schedule.z[pos] = int(event.z)
+
+        speed = event.extra_kwargs.get('speed') if event.extra_kwargs else None
+        schedule.speeds[pos] = NO_SPEED if speed is None else speed
+
+    return schedule
+
+def walk(event, t_ms, spawns):
+    """ Append (t_ms, event) for every spawn under 'event', which starts at t_ms. Returns the time it finishes """
+    if isinstance(event, SpawnEnemyEvent):
+        extra = event.extra_kwargs
+        if extra and any(key != 'speed' for key in extra):
+            raise ValueError(f"Can't compile spawn arguments: {list(extra.keys())}")
+        spawns.append((t_ms, event))
+        return t_ms
+
+    if isinstance(event, WaitEvent):
+        return t_ms + event.delay_ms
+
+    if isinstance(event, MultiEvent):
+        for _ in range(event.repeat_max + 1):
+            end_ms = t_ms
+            for child in event.events:
+                end_ms = max(end_ms, walk(child, t_ms, spawns))
+            t_ms = end_ms
+        return t_ms
+
+    if isinstance(event, SequenceEvent):
+        for _ in range(max(event.repeat_max, 1)):
+            for child in event.events:
+                t_ms = walk(child, t_ms, spawns)
+        return t_ms
+
+    if isinstance(event, EventChain):
+        for child in event.events:
+            t_ms = walk(child, t_ms, spawns)
+        return t_ms
+
+    raise ValueError(f"Can't compile {type(event).__name__}")
+
+def build(stage, filename):
+    """ Build step: compile the events of a stage and save them, to be loaded at stage start (see
+    Stage.schedule_file). Run it from the REPL whenever the stage script changes, ie:
+    >>> build(Stage1(None), Stage1.schedule_file)
+    """
+    if not stage.events.events:
+        stage.script()
+
+    schedule = compile_events(stage.events)
+    if not schedule.count:
+        raise ValueError(f"{type(stage).__name__} has no spawns to compile")
+
+    schedule.save(filename)
+    print(f"Saved {schedule.count} spawns ({schedule.end_ms}ms) to {filename}")
+    return schedule
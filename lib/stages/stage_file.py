@@ -0,0 +1,125 @@
+import struct
+
+"""
+Compiled stage files: the spawns of a whole stage as fixed size records, sorted by time, which the stage reads from
+flash a few at a time as it plays (StageStream), so that only one small chunk of the stage is ever in RAM, and there
+is no event tree to build at import time.
+
+They are built on the host from a JSON stage definition (see local/stage_tool.py), and uploaded to /stages.
+
+File layout (little endian):
+- 16 byte header: magic, version, reserved, number of spawns, end of the stage in ms
+- one 16 byte record per spawn: t_ms (u32), sprite type (u8), lane (i8), x, y, z (i16), speed (f32, NaN: not given)
+"""
+MAGIC = b'WZSF'
+VERSION = 1
+HEADER_FORMAT = "<4sBBHII"
+HEADER_SIZE = 16
+RECORD_FORMAT = "<IBbhhhf"
+RECORD_SIZE = 16
+
+NO_SPEED = float('nan')
+
+class StageStream:
+    """ Reads the spawns of a stage file in order, chunk_records at a time """
+
+    def __init__(self, file, count, end_ms, chunk_records=16):
+        self.file = file
+        self.count = count
+        self.end_ms = end_ms
+        self.chunk_records = chunk_records
+        self.chunk = bytearray(chunk_records * RECORD_SIZE)
+        self.chunk_view = memoryview(self.chunk)
+        self.probe = bytearray(4)
+
+        self.cursor = 0         # Index in the file of the next record
+        self.chunk_start = 0    # Index in the file of the first record in the chunk
+        self.chunk_len = 0      # Records loaded in the chunk
+
+    @staticmethod
+    def open(filename, chunk_records=16):
+        """ Returns None if there is no (valid) stage file """
+        try:
+            file = open(filename, "rb")
+        except OSError:
+            return None
+
+        header = file.read(HEADER_SIZE)
+        if len(header) == HEADER_SIZE:
+            magic, version, _, _, count, end_ms = struct.unpack(HEADER_FORMAT, header)
+            if magic == MAGIC and version == VERSION and count:
+                return StageStream(file, count, end_ms, chunk_records)  # An empty stage file would have no spawns
+
+        file.close()
+        return None
+
+    def close(self):
+        self.file.close()
+
+    def rewind(self):
+        self.seek(0)
+
+    def seek(self, index):
+        """ Move to a record. The chunk is loaded on the next read """
+        self.cursor = min(index, self.count)
+        self.chunk_start = self.cursor
+        self.chunk_len = 0
+
+    def load_chunk(self):
+        file = self.file
+        file.seek(HEADER_SIZE + self.cursor * RECORD_SIZE)
+        num_records = min(self.chunk_records, self.count - self.cursor)
+        file.readinto(self.chunk_view[:num_records * RECORD_SIZE])
+        self.chunk_start = self.cursor
+        self.chunk_len = num_records
+
+    def due(self, now_ms):
+        """ Whether the next record spawns at or before now_ms. Reads the time straight from the bytes, so that
+        polling the stream on every frame doesn't allocate """
+        if self.cursor >= self.count:
+            return False
+
+        pos = self.cursor - self.chunk_start
+        if pos >= self.chunk_len:
+            self.load_chunk()
+            pos = 0
+
+        chunk = self.chunk
+        offset = pos * RECORD_SIZE
+        t_ms = chunk[offset] | (chunk[offset + 1] << 8) | (chunk[offset + 2] << 16) | (chunk[offset + 3] << 24)
+        return t_ms <= now_ms
+
+    def next(self):
+        """ (t_ms, sprite type, lane, x, y, z, speed) of the next record. Only call it after due() """
+        record = struct.unpack_from(RECORD_FORMAT, self.chunk, (self.cursor - self.chunk_start) * RECORD_SIZE)
+        self.cursor += 1
+        return record
+
+    def find(self, t_ms):
+        """ Index of the first record after t_ms: binary search on the times in the file, 4 bytes read per probe """
+        file, probe = self.file, self.probe
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            file.seek(HEADER_SIZE + mid * RECORD_SIZE)
+            file.readinto(probe)
+            if (probe[0] | (probe[1] << 8) | (probe[2] << 16) | (probe[3] << 24)) <= t_ms:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def is_finished(self, now_ms):
+        return self.cursor >= self.count and now_ms >= self.end_ms
+
+def save_stage(filename, records, end_ms):
+    """ Write a stage file from (t_ms, sprite type, lane, x, y, z, speed) records, sorted by time """
+    with open(filename, "wb") as file:
+        file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, 0, 0, len(records), end_ms))
+        for record in records:
+            file.write(struct.pack(RECORD_FORMAT, *record))
+
+def schedule_records(schedule):
+    """ The records of a compiled Schedule (stage_compiler.py), to save as a stage file """
+    return [(schedule.t_ms[i], schedule.sprite_types[i], schedule.lanes[i], schedule.x[i], schedule.y[i],
+             schedule.z[i], schedule.speeds[i]) for i in range(schedule.count)]
@@ -2,7 +2,7 @@ import fonts.vtks_blocketo_6px as font_vtks
 import fonts.bm_japan as large_font
 import framebuf
 
-from anim.palette_rotate_one import PaletteRotateOne
+from anim.palette_animator import animator
 from font_writer_new import ColorWriter
 
 from sprites_old.sprite_rect import SpriteRect
@@ -96,6 +96,7 @@ class ui_screen():
 
         self.lives_text.orig_x = 7
         self.lives_text.orig_y = 1
+        self.lives_text.cache_strings(max_strings=2)
         self.num_lives = num_lives
 
         self.lives_sprites.append(self.life_sprite)
@@ -119,6 +120,7 @@ class ui_screen():
         self.score_text.orig_x = 60
         self.score_text.orig_y = 0
         self.score_text.visible = True
+        self.score_text.cache_strings()
 
         return self.score_text
 
@@ -136,6 +138,7 @@ class ui_screen():
 
         game_over_text.row_clip = True  # Clip or scroll when screen full
         game_over_text.col_clip = True  # Clip or new line when row is full
+        game_over_text.cache_strings(max_strings=1)
 
         game_over_text.render_text("GAME OVER")
         self.game_over_text = game_over_text
@@ -195,14 +198,12 @@ class ui_screen():
         for i, color in enumerate(PALETTE_UI_FLASH_TEXT):
             color_list_palette.set_rgb(i, colors.hex_to_rgb(color))
 
-        self.game_over_anim = PaletteRotateOne(self.palette_all, color_list_palette, 10, 3)
-        loop = asyncio.get_event_loop()
-        loop.create_task(self.game_over_anim.run())
+        self.game_over_anim = animator.add_cycle(self.palette_all, color_list_palette, 10, 3)
 
         return True
 
     def reset_game_over(self):
-        self.game_over_anim.stop()
+        animator.remove(self.game_over_anim)
         self.game_over_text.visible = False
         self.center_text_bg.visible = False
         self.sprites.remove(self.game_over_text)
@@ -0,0 +1,81 @@
+""" Bakes the DeathAnim explosion into an effect file (see lib/baked_fx.py), and times its playback against drawing it
+live, with a display that only counts the rects.
+
+Usage, from the project root:
+> python local/bake_fx.py [--variants 4] [--seed 1] [--out fx/explosion.fx]
+
+Upload the .fx file to /fx on the device. Without it, DeathAnim bakes one on its first run.
+"""
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+def load_module(name, *path):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, 'lib', *path))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module      # explosion_fx imports baked_fx
+    spec.loader.exec_module(module)
+    return module
+
+baked_fx = load_module('baked_fx', 'baked_fx.py')
+explosion_fx = load_module('explosion_fx', 'explosion_fx.py')
+
+NUM_COLORS = 7      # DeathAnim.debris_colors_hex
+CENTER = (48, 58)   # Where the bike explodes
+
+class CountingDisplay:
+    def __init__(self):
+        self.rects = 0
+
+    def fill_rect(self, x, y, width, height, color):
+        self.rects += 1
+
+def time_live(colors):
+    display = CountingDisplay()
+    start = time.perf_counter()
+    for elapsed_ms in range(0, explosion_fx.DURATION_MS, explosion_fx.FRAME_MS):
+        radius = explosion_fx.explosion_radius(elapsed_ms)
+        if radius > 0:
+            explosion_fx.draw_explosion(display, *CENTER, radius, elapsed_ms, colors)
+    return (time.perf_counter() - start) * 1_000_000, display.rects
+
+def time_baked(effect, colors):
+    display = CountingDisplay()
+    start = time.perf_counter()
+    effect.start()
+    for elapsed_ms in range(0, explosion_fx.DURATION_MS, explosion_fx.FRAME_MS):
+        frame_idx = effect.frame_at(elapsed_ms)
+        if frame_idx >= 0:
+            effect.draw(display, frame_idx, *CENTER, colors)
+    return (time.perf_counter() - start) * 1_000_000, display.rects
+
+def main():
+    parser = argparse.ArgumentParser(description="Bake the explosion effect")
+    parser.add_argument('--variants', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', default=os.path.join('fx', 'explosion.fx'))
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    dropped = explosion_fx.bake_explosion(args.out, NUM_COLORS, args.variants)
+
+    effect = baked_fx.BakedEffect.open(args.out)
+    colors = list(range(NUM_COLORS))
+    print(f"{args.out}: {args.variants} variants of {effect.num_frames} frames ({effect.frame_ms}ms), "
+          f"{os.path.getsize(args.out)} bytes, largest frame {len(effect.buffer)} bytes, {dropped} off screen rects "
+          f"dropped")
+
+    live_us, live_rects = time_live(colors)
+    baked_us, baked_rects = time_baked(effect, colors)
+    effect.close()
+
+    print(f"live:  {live_us:>8.0f}us for the whole explosion, {live_rects} rects")
+    print(f"baked: {baked_us:>8.0f}us for the whole explosion, {baked_rects} rects")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+""" Host benchmark for the batch color conversion functions in lib/colors/color_util.py
+
+Compares, for palettes of 16 to 4096 colors:
+- one color at a time with hex_to_565() (what the boot code used to do)
+- the batch functions, pure Python path (same code that runs on the device)
+- the batch functions, NumPy path (only if numpy is installed)
+
+Also checks that all paths produce the same bytes. Run from the project root:
+> python local/bench_color_util.py
+"""
+import os
+import sys
+import time
+import random
+
+# Appended, so that lib/inspect.py does not shadow the standard library one (numpy needs it)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'lib'))
+from colors import color_util as colors
+
+SIZES = [16, 64, 256, 1024, 4096]
+STOPS = [0x000000, 0x520014, 0x00687b, 0x00FFFF, 0xFFFFFF]
+
+def time_it(func, repeat=20):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best * 1_000_000
+
+def scalar_hex(hex_values):
+    out = bytearray(len(hex_values) * 2)
+    for i, hex_value in enumerate(hex_values):
+        color = colors.hex_to_565(hex_value, format=colors.BGR565)
+        out[i * 2] = color & 0xFF
+        out[i * 2 + 1] = color >> 8
+    return out
+
+def with_numpy(enabled, func, *args, **kwargs):
+    saved = colors.np
+    if not enabled:
+        colors.np = None
+    try:
+        return func(*args, **kwargs)
+    finally:
+        colors.np = saved
+
+def main():
+    has_np = colors.np is not None
+    if not has_np:
+        print("numpy not installed, only the pure Python path will be measured")
+
+    print(f"{'colors':>7} | {'hex scalar':>11} {'hex batch':>11} {'hex numpy':>11} | {'grad batch':>11} {'grad numpy':>11}   (us)")
+
+    for size in SIZES:
+        hex_values = [random.randint(0, 0xFFFFFF) for _ in range(size)]
+
+        expected = scalar_hex(hex_values)
+        batch = with_numpy(False, colors.hex_to_565_buffer, hex_values, colors.BGR565)
+        assert batch == expected, "Batch conversion differs from hex_to_565()"
+
+        t_scalar = time_it(lambda: scalar_hex(hex_values))
+        t_batch = time_it(lambda: with_numpy(False, colors.hex_to_565_buffer, hex_values, colors.BGR565))
+
+        grad = with_numpy(False, colors.gradient_to_buffer, STOPS, size, colors.BGR565)
+        t_grad = time_it(lambda: with_numpy(False, colors.gradient_to_buffer, STOPS, size, colors.BGR565))
+
+        t_np = t_grad_np = float('nan')
+        if has_np:
+            assert colors.hex_to_565_buffer(hex_values, colors.BGR565) == expected, "NumPy path differs"
+            assert colors.gradient_to_buffer(STOPS, size, colors.BGR565) == grad, "NumPy gradient differs"
+            t_np = time_it(lambda: colors.hex_to_565_buffer(hex_values, colors.BGR565))
+            t_grad_np = time_it(lambda: colors.gradient_to_buffer(STOPS, size, colors.BGR565))
+
+        print(f"{size:>7} | {t_scalar:>11.1f} {t_batch:>11.1f} {t_np:>11.1f} | {t_grad:>11.1f} {t_grad_np:>11.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+""" Host benchmark for the HUD text cache (lib/font_atlas.py)
+
+Simulates 60 seconds of the score at 60 fps: the score goes up by a random amount every few frames, and the HUD asks
+for the 9 digit score string every frame. Compares:
+- per char: every time the string changes, every char is rasterized again from the 1 bit font data (what
+  ColorWriter.render_char() does with a FrameBuffer and a blit per char)
+- atlas + cache: glyphs rasterized once, strings built from the atlas on a cache miss, one lookup per frame otherwise
+
+The fonts in fonts/ are compiled .mpy files, which CPython can't import, so this uses a font with the same interface
+and the same glyph size as vtks_blocketo_6px (4x6), with random glyphs.
+
+Run from the project root:
+> python local/bench_font_atlas.py
+"""
+import importlib.util
+import os
+import random
+import time
+
+LIB = os.path.join(os.path.dirname(__file__), '..', 'lib')
+spec = importlib.util.spec_from_file_location('font_atlas', os.path.join(LIB, 'font_atlas.py'))
+font_atlas = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(font_atlas)
+
+FPS = 60
+SECONDS = 60
+GLYPH_WIDTH = 4
+GLYPH_HEIGHT = 6
+TEXT_WIDTH = 36
+
+class TestFont:
+    """ Same interface as the font_to_py fonts """
+    def __init__(self):
+        self.glyphs = {code: bytes(random.getrandbits(8) & 0xF0 for _ in range(GLYPH_HEIGHT)) for code in range(32, 128)}
+
+    def height(self):
+        return GLYPH_HEIGHT
+
+    def max_width(self):
+        return GLYPH_WIDTH
+
+    def get_ch(self, char_code):
+        return self.glyphs[char_code], GLYPH_HEIGHT, GLYPH_WIDTH
+
+class TestPalette:
+    def get_int(self, index):
+        return index
+
+def per_char(font, text, out):
+    """ Rasterize every char straight from the font data into the text buffer """
+    stride = (TEXT_WIDTH + 1) // 2
+    x = 0
+    for char in text:
+        glyph, height, width = font.get_ch(ord(char))
+        for y in range(height):
+            for i in range(width):
+                color = 1 if glyph[y] & (0x80 >> i) else 0
+                pos = y * stride + ((x + i) >> 1)
+                if (x + i) & 1:
+                    out[pos] = (out[pos] & 0xF0) | color
+                else:
+                    out[pos] = (out[pos] & 0x0F) | (color << 4)
+        x += width
+
+def score_frames():
+    """ The score string of every frame """
+    random.seed(1)
+    score = 0
+    frames = []
+    for frame in range(FPS * SECONDS):
+        if frame % 6 == 0:
+            score += random.choice((0, 0, 10, 25, 100))
+        frames.append(f"{score:09}")
+    return frames
+
+def main():
+    font = TestFont()
+    frames = score_frames()
+    out = bytearray((TEXT_WIDTH + 1) // 2 * GLYPH_HEIGHT)
+
+    start = time.perf_counter()
+    last = None
+    for text in frames:
+        if text != last:
+            per_char(font, text, out)
+            last = text
+    per_char_ms = (time.perf_counter() - start) * 1000
+
+    atlas = font_atlas.GlyphAtlas(font, TestPalette(), fixed_width=GLYPH_WIDTH)
+    cache = font_atlas.TextCache(atlas, max_strings=8, max_width=TEXT_WIDTH)
+    start = time.perf_counter()
+    for text in frames:
+        cache.get(text)
+    cached_ms = (time.perf_counter() - start) * 1000
+
+    """ Both must produce the same pixels """
+    reference = bytearray(len(out))
+    per_char(font, frames[-1], reference)
+    cached, width = cache.get(frames[-1])
+    assert bytes(cached) == bytes(reference), "atlas output differs"
+
+    stats = cache.stats()
+    num_frames = len(frames)
+    print(f"{num_frames} frames ({SECONDS}s at {FPS} fps), {len(set(frames))} different score strings")
+    print(f"per char:      {per_char_ms:8.1f} ms total, {per_char_ms * 1000 / num_frames:7.1f} us / frame")
+    print(f"atlas + cache: {cached_ms:8.1f} ms total, {cached_ms * 1000 / num_frames:7.1f} us / frame "
+          f"({stats['hits']} hits, {stats['misses']} misses, {stats['glyphs']} glyphs, "
+          f"{stats['atlas_bytes']} atlas bytes)")
+
+if __name__ == '__main__':
+    main()
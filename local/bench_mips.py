@@ -0,0 +1,156 @@
+""" Host benchmark for the prescaled sprite levels (lib/images/mip_generator.py)
+
+For a few sprites, compares the old nearest neighbour levels (same sampling as generate_scaled_framebuffer) with the
+majority filtered ones:
+- quality: isolated pixels (no neighbour of the same color: the speckles that flicker while scaling) and the share of
+  every destination pixel's source box that is not the color it ended up with
+- boot time: generating every level vs. loading them all from a cache file
+
+Run from the project root:
+> python local/bench_mips.py
+"""
+import importlib.util
+import os
+import struct
+import sys
+import tempfile
+import time
+import types
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+LIB = os.path.join(ROOT, 'lib')
+
+def load_module(name, *path):
+    """ Load the modules straight from their files, since the 'images' package pulls in device only modules """
+    spec = importlib.util.spec_from_file_location(name, os.path.join(LIB, *path))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+images_pkg = types.ModuleType('images')
+images_pkg.__path__ = [os.path.join(LIB, 'images')]
+sys.modules['images'] = images_pkg
+
+sprite_asset = load_module('images.sprite_asset', 'images', 'sprite_asset.py')
+spans = load_module('images.sprite_spans', 'images', 'sprite_spans.py')
+mips = load_module('images.mip_generator', 'images', 'mip_generator.py')
+get_index, row_bytes = spans.get_index, spans.row_bytes
+
+""" (file, frame height, num_frames, alpha_index), as registered by the sprite types """
+SPRITES = [
+    ('skull_16.bmp', 16, 16, 0),
+    ('laser_wall.bmp', 10, 24, 0),
+    ('road_barrier_yellow_32.bmp', 20, 32, 0),
+    ('alien_fighter.bmp', 16, 24, 0),
+]
+
+def load_sprite(filename, frame_height):
+    with open(os.path.join(ROOT, 'img', filename), 'rb') as file:
+        data = sprite_asset.convert_bmp(file.read())
+
+    header = struct.unpack(sprite_asset.HEADER_FORMAT, data[:sprite_asset.HEADER_SIZE])
+    color_depth, width, height, pixels_offset = header[2], header[4], header[5], header[9]
+    frame_height = min(frame_height, height)
+
+    """ First frame, bottom anchored like in the readers """
+    stride = row_bytes(width, color_depth)
+    first_row = height - (height // frame_height) * frame_height
+    start = sprite_asset.HEADER_SIZE + pixels_offset + first_row * stride
+    return data[start:start + stride * frame_height], width, frame_height, color_depth
+
+def nearest(src, src_w, src_h, dst_w, dst_h, color_depth):
+    dst = bytearray(row_bytes(dst_w, color_depth) * dst_h)
+    x_ratio = src_w / dst_w
+    y_ratio = src_h / dst_h
+    for y in range(dst_h):
+        src_y = min(int(y * y_ratio), src_h - 1)
+        for x in range(dst_w):
+            src_x = min(int(x * x_ratio), src_w - 1)
+            index = get_index(src, row_bytes(src_w, color_depth), src_x, src_y, color_depth)
+            mips.set_index(dst, row_bytes(dst_w, color_depth), x, y, color_depth, index)
+    return dst
+
+def quality(src, src_w, src_h, dst, dst_w, dst_h, color_depth):
+    """ (isolated pixels, mismatch %) of one level """
+    src_stride = row_bytes(src_w, color_depth)
+    dst_stride = row_bytes(dst_w, color_depth)
+    isolated = 0
+    mismatch = 0.0
+
+    for y in range(dst_h):
+        for x in range(dst_w):
+            index = get_index(dst, dst_stride, x, y, color_depth)
+            neighbours = [(x + dx, y + dy) for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1))
+                          if 0 <= x + dx < dst_w and 0 <= y + dy < dst_h]
+            if neighbours and all(get_index(dst, dst_stride, nx, ny, color_depth) != index for nx, ny in neighbours):
+                isolated += 1
+
+            x0 = x * src_w // dst_w
+            x1 = min(src_w, max(x0 + 1, (x + 1) * src_w // dst_w))
+            y0 = y * src_h // dst_h
+            y1 = max(y0 + 1, (y + 1) * src_h // dst_h)
+            box = [get_index(src, src_stride, sx, sy, color_depth) for sy in range(y0, y1) for sx in range(x0, x1)]
+            mismatch += 1 - box.count(index) / len(box)
+
+    return isolated, mismatch / (dst_w * dst_h) * 100
+
+def time_it(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+def main():
+    cache_dir = tempfile.mkdtemp()
+    print(f"{'sprite':30} {'levels':>6} {'isolated nn/mip':>16} {'mismatch nn/mip':>16} "
+          f"{'gen nn ms':>10} {'gen mip ms':>10} {'cached ms':>10}")
+
+    for filename, frame_height, num_levels, alpha_index in SPRITES:
+        try:
+            src, width, height, depth = load_sprite(filename, frame_height)
+        except (OSError, ValueError) as err:
+            print(f"{filename:30} skipped: {err}")
+            continue
+
+        levels = mips.mip_levels(width, height, depth, num_levels)
+        _, offsets, mip_data = mips.generate_mips(src, width, height, depth, num_levels, alpha_index)
+
+        nn_isolated = mip_isolated = 0
+        nn_mismatch = mip_mismatch = 0.0
+        for (level_w, level_h), offset in zip(levels, offsets):
+            nn_level = nearest(src, width, height, level_w, level_h, depth)
+            mip_level = mip_data[offset:offset + row_bytes(level_w, depth) * level_h]
+
+            isolated, mismatch = quality(src, width, height, nn_level, level_w, level_h, depth)
+            nn_isolated += isolated
+            nn_mismatch += mismatch / len(levels)
+
+            isolated, mismatch = quality(src, width, height, mip_level, level_w, level_h, depth)
+            mip_isolated += isolated
+            mip_mismatch += mismatch / len(levels)
+
+        gen_nn = time_it(lambda: [nearest(src, width, height, w, h, depth) for w, h in levels])
+        gen_mip = time_it(lambda: mips.generate_mips(src, width, height, depth, num_levels, alpha_index))
+
+        cache_file = os.path.join(cache_dir, f"{filename}.mip")
+        with open(cache_file, 'wb') as file:
+            file.write(mips.pack_mips(levels, offsets, mip_data))
+
+        def load_cached():
+            with open(cache_file, 'rb') as file:
+                header = file.read(mips.HEADER_SIZE)
+                _, _, num, _, data_size = struct.unpack(mips.HEADER_FORMAT, header)
+                buffer = bytearray(num * mips.LEVEL_SIZE + data_size)
+                file.readinto(buffer)
+
+        cached = time_it(load_cached)
+
+        print(f"{filename:30} {len(levels):>6} {nn_isolated:>7} / {mip_isolated:<6} "
+              f"{nn_mismatch:>6.1f}% / {mip_mismatch:<5.1f}% {gen_nn:>10.2f} {gen_mip:>10.2f} {cached:>10.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+""" Host benchmark of a full DeathAnim explosion: the debris as one dict per particle with float math (the old
+DeathAnim code, copied here) against the particle system in lib/particles.py.
+
+Both run the same explosion: 80 pieces, 1 in 4 large, 2 seconds of frames, with the debris slowing down as in
+DeathAnim. The display only counts the blits. Times are per frame (update and draw of all the debris), and the
+memory is what tracemalloc sees allocated during the frames.
+
+> python local/bench_particles.py [--frame-ms 33] [--runs 20]
+"""
+import argparse
+import importlib.util
+import os
+import random
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+def load_module(name, *path):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, 'lib', *path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+particles = load_module('particles', 'particles.py')
+
+WIDTH, HEIGHT = 96, 64
+DEBRIS_COUNT = 80
+DURATION_MS = 2000
+ORIG_SPEED = 300
+GRAVITY = 0.0012
+SMALL_SPRITES = ['small'] * 4
+LARGE_SPRITES = ['large'] * 3
+PALETTES = ['palette'] * 7
+
+class CountingDisplay:
+    width, height = WIDTH, HEIGHT
+
+    def __init__(self):
+        self.blits = 0
+
+    def blit(self, sprite, x, y, alpha, palette):
+        self.blits += 1
+
+class DictDebris:
+    """ The old DeathAnim: start_animation() and the debris part of update_and_draw() """
+    def __init__(self):
+        self.debris = [None] * DEBRIS_COUNT
+
+    def start(self, center):
+        debris_speed = ORIG_SPEED * 0.0007
+        for idx in range(DEBRIS_COUNT):
+            pid = random.randint(0, len(PALETTES) - 1)
+            choice = random.choice([0, 1, 2, 3]) - 1
+
+            if choice < 0:
+                sprite = random.choice(LARGE_SPRITES)
+                max_age = int(1500 + (random.uniform(-200, 300)))
+                this_speed = random.uniform(0.5, 1.5) * debris_speed
+            else:
+                sprite = random.choice(SMALL_SPRITES)
+                max_age = int(1000 + (random.uniform(-200, 300)))
+                this_speed = random.uniform(0.7, 1.8) * debris_speed
+
+            self.debris[idx] = {
+                'x': center[0] + random.randint(-8, 8),
+                'y': center[1] + random.randint(-8, 8),
+                'dx': random.uniform(-this_speed, this_speed),
+                'dy': random.uniform(-this_speed / 2, -this_speed),
+                'sprite': sprite,
+                'palette_id': pid,
+                'max_age': max_age,
+            }
+
+    def frame(self, display, frame_time, elapsed_ms, speed):
+        delta_time = elapsed_ms * (speed / 1000)
+        for d in self.debris:
+            if frame_time > d['max_age']:
+                continue
+
+            d['x'] += d['dx'] * delta_time
+            d['y'] += d['dy'] * delta_time
+            d['dy'] += GRAVITY * delta_time
+
+            palette = PALETTES[d['palette_id']]
+
+            if 0 <= d['x'] < WIDTH and 0 <= d['y'] < HEIGHT:
+                display.blit(d['sprite'], int(d['x']), int(d['y']), 0, palette)
+
+class PooledDebris:
+    """ The new DeathAnim """
+    def __init__(self):
+        num_small = len(SMALL_SPRITES)
+        self.system = particles.ParticleSystem(DEBRIS_COUNT, sprites=SMALL_SPRITES + LARGE_SPRITES, palettes=PALETTES,
+                                               gravity=GRAVITY, width=WIDTH, height=HEIGHT)
+        debris_speed = ORIG_SPEED * 0.0007
+        num_large = DEBRIS_COUNT // 4
+        palette_ids = tuple(range(len(PALETTES)))
+        self.emitters = [
+            particles.Emitter(DEBRIS_COUNT - num_large, speed=(0.7 * debris_speed, 1.8 * debris_speed),
+                              max_age=(800, 1300), spread=8, up=True, sprite_ids=tuple(range(num_small)),
+                              palette_ids=palette_ids),
+            particles.Emitter(num_large, speed=(0.5 * debris_speed, 1.5 * debris_speed), max_age=(1300, 1800),
+                              spread=8, up=True,
+                              sprite_ids=tuple(range(num_small, num_small + len(LARGE_SPRITES))),
+                              palette_ids=palette_ids),
+        ]
+
+    def start(self, center):
+        self.system.clear()
+        for emitter in self.emitters:
+            emitter.emit(self.system, *center)
+
+    def frame(self, display, frame_time, elapsed_ms, speed):
+        self.system.time_scale = (speed << 8) // 1000
+        self.system.update_and_draw(display, elapsed_ms)
+
+def run(debris, frame_ms, runs):
+    """ Returns the spawn time, the time of every frame (us, best of all runs), the blits and the bytes allocated """
+    spawn_us = None
+    frame_us = None
+    alloc = 0
+
+    for run_idx in range(runs):
+        random.seed(run_idx)
+        display = CountingDisplay()
+
+        start = time.perf_counter()
+        debris.start((40, 30))
+        elapsed = (time.perf_counter() - start) * 1_000_000
+        spawn_us = elapsed if spawn_us is None else min(spawn_us, elapsed)
+
+        times = []
+        speed = ORIG_SPEED
+        if run_idx == 0:
+            tracemalloc.start()
+
+        for frame_time in range(frame_ms, DURATION_MS + 1, frame_ms):
+            start = time.perf_counter()
+            debris.frame(display, frame_time, frame_ms, speed)
+            times.append((time.perf_counter() - start) * 1_000_000)
+            speed = max(speed - 6, 20)
+
+        if run_idx == 0:
+            _, alloc = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        frame_us = times if frame_us is None else [min(a, b) for a, b in zip(frame_us, times)]
+
+    return spawn_us, frame_us, display.blits, alloc
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the explosion debris, dicts vs. particle system")
+    parser.add_argument('--frame-ms', type=int, default=33)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{DEBRIS_COUNT} particles, {DURATION_MS}ms at {args.frame_ms}ms per frame, best of {args.runs} runs\n")
+    print(f"{'':<16}{'spawn us':>10}{'avg frame us':>14}{'max frame us':>14}{'blits':>8}{'peak alloc':>12}")
+    for name, debris in (('dicts', DictDebris()), ('particle system', PooledDebris())):
+        spawn_us, frame_us, blits, alloc = run(debris, args.frame_ms, args.runs)
+        print(f"{name:<16}{spawn_us:>10.0f}{sum(frame_us) / len(frame_us):>14.1f}{max(frame_us):>14.1f}{blits:>8}"
+              f"{alloc:>12}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+""" Benchmark for the shared nearest neighbour resampler (lib/images/resampler.py)
+
+Scales 16x16 and 32x32 sprites (4 and 8 bit) to 20 scale levels, with the old method (FrameBuffer.pixel() get and set
+for every pixel) and with resample(), and checks that both produce the same bytes.
+
+Runs on the host (where the per pixel method is emulated on the bytes, since there is no framebuf module):
+> python local/bench_resampler.py
+
+or on the device, from the MP REPL, after uploading it:
+>>> import local.bench_resampler
+"""
+import random
+
+try:
+    import utime
+    ticks_us, ticks_diff = utime.ticks_us, utime.ticks_diff
+except ImportError:
+    import time
+    ticks_us = lambda: int(time.perf_counter() * 1_000_000)
+    ticks_diff = lambda end, start: end - start
+
+try:
+    import framebuf
+except ImportError:
+    framebuf = None
+
+try:
+    from images.resampler import resample, row_bytes
+except ImportError:
+    import importlib.util
+    import os
+    _path = os.path.join(os.path.dirname(__file__), '..', 'lib', 'images', 'resampler.py')
+    _spec = importlib.util.spec_from_file_location('resampler', _path)
+    _module = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(_module)
+    resample, row_bytes = _module.resample, _module.row_bytes
+
+SIZES = [16, 32]
+DEPTHS = [4, 8]
+NUM_LEVELS = 20
+REPEAT = 3
+
+def level_sizes(size, depth):
+    sizes = []
+    for i in range(1, NUM_LEVELS + 1):
+        target = max(1, -(-size * i // NUM_LEVELS))
+        if depth == 4:
+            target += target % 2
+        sizes.append(target)
+    return sizes
+
+def per_pixel_host(src, size, dst, target, depth):
+    """ What the FrameBuffer.pixel() loops did, one get and one set per pixel """
+    for y in range(target):
+        src_y = min(int(y * (size / target)), size - 1)
+        for x in range(target):
+            src_x = min(int(x * (size / target)), size - 1)
+            if depth == 8:
+                dst[y * target + x] = src[src_y * size + src_x]
+            else:
+                byte = src[src_y * (size // 2) + (src_x >> 1)]
+                color = byte & 0x0F if (src_x & 1) else byte >> 4
+                pos = y * (target // 2) + (x >> 1)
+                dst[pos] = (dst[pos] & 0xF0) | color if (x & 1) else (dst[pos] & 0x0F) | (color << 4)
+
+def per_pixel_device(src, size, dst, target, depth):
+    fmt = framebuf.GS8 if depth == 8 else framebuf.GS4_HMSB
+    src_fb = framebuf.FrameBuffer(src, size, size, fmt)
+    dst_fb = framebuf.FrameBuffer(dst, target, target, fmt)
+    for y in range(target):
+        src_y = min(int(y * (size / target)), size - 1)
+        for x in range(target):
+            src_x = min(int(x * (size / target)), size - 1)
+            dst_fb.pixel(x, y, src_fb.pixel(src_x, src_y))
+
+def time_levels(func, src, size, depth, outputs):
+    best = None
+    for _ in range(REPEAT):
+        start = ticks_us()
+        for target, dst in zip(level_sizes(size, depth), outputs):
+            func(src, size, dst, target, depth)
+        elapsed = ticks_diff(ticks_us(), start)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    per_pixel = per_pixel_device if framebuf else per_pixel_host
+    print(f"Per pixel method: {'FrameBuffer.pixel()' if framebuf else 'emulated on the host'}")
+    print(f"{'sprite':>10} {'per pixel us':>13} {'resample us':>12} {'speedup':>8}  same")
+
+    for size in SIZES:
+        for depth in DEPTHS:
+            src = bytearray(random.getrandbits(8) for _ in range(row_bytes(size, depth) * size))
+            targets = level_sizes(size, depth)
+            old_out = [bytearray(row_bytes(t, depth) * t) for t in targets]
+            new_out = [bytearray(row_bytes(t, depth) * t) for t in targets]
+
+            old_us = time_levels(per_pixel, src, size, depth, old_out)
+            new_us = time_levels(lambda s, sz, d, t, dp: resample(s, sz, sz, d, t, t, dp), src, size, depth, new_out)
+
+            same = all(bytes(a) == bytes(b) for a, b in zip(old_out, new_out))
+            print(f"{size:>4}x{size:<2} {depth}b {old_us:>13} {new_us:>12} {old_us / max(1, new_us):>7.1f}x  {same}")
+
+main()
@@ -0,0 +1,63 @@
+""" RAM used by the player spritesheet (bike_sprite.bmp, 32x22 frames), with one buffer and FrameBuffer per frame
+(how BMPReader used to load spritesheets) vs. one contiguous buffer with SheetFrames
+
+Needs framebuf and the gc stats of the device, so run it from the MP REPL, after uploading it:
+>>> import local.bench_sheet_memory
+"""
+import gc
+import math
+
+from framebuf import FrameBuffer, GS4_HMSB
+from images.bmp_reader import BMPReader
+from images.indexed_image import SheetFrames
+from utils import aligned_buffer
+
+FILENAME = "/img/bike_sprite.bmp"
+FRAME_WIDTH = 32
+FRAME_HEIGHT = 22
+COLOR_DEPTH = 4
+SHEET_HEIGHT = 374
+
+def used_by(func):
+    """ Bytes of heap still allocated by whatever func() returns """
+    gc.collect()
+    before = gc.mem_free()
+    kept = func()
+    gc.collect()
+    used = before - gc.mem_free()
+    del kept
+    gc.collect()
+    return used
+
+def per_frame():
+    frame_bytes = (FRAME_WIDTH * COLOR_DEPTH + 7) // 8 * FRAME_HEIGHT
+    frames = []
+    for _ in range(math.floor(SHEET_HEIGHT / FRAME_HEIGHT)):
+        frames.append(FrameBuffer(aligned_buffer(frame_bytes), FRAME_WIDTH, FRAME_HEIGHT, GS4_HMSB))
+    return frames
+
+def contiguous(num_buffers=1):
+    num_frames = math.floor(SHEET_HEIGHT / FRAME_HEIGHT)
+    frame_bytes = (FRAME_WIDTH * COLOR_DEPTH + 7) // 8 * FRAME_HEIGHT
+    frames = SheetFrames(aligned_buffer(frame_bytes * num_frames), FRAME_WIDTH, FRAME_HEIGHT, num_frames, GS4_HMSB,
+                         COLOR_DEPTH)
+    for idx in range(num_buffers):
+        frames[idx]
+    return frames
+
+def main():
+    num_frames = math.floor(SHEET_HEIGHT / FRAME_HEIGHT)
+    pixel_bytes = (FRAME_WIDTH * COLOR_DEPTH + 7) // 8 * FRAME_HEIGHT * num_frames
+    print(f"{FILENAME}: {num_frames} frames, {pixel_bytes} bytes of pixels")
+
+    old = used_by(per_frame)
+    new = used_by(contiguous)
+    new_all = used_by(lambda: contiguous(num_frames))
+    print(f"Buffer + FrameBuffer per frame:        {old:>6} bytes")
+    print(f"One buffer, first FrameBuffer only:    {new:>6} bytes ({old - new} saved)")
+    print(f"One buffer, every FrameBuffer created: {new_all:>6} bytes ({old - new_all} saved)")
+
+    loaded = used_by(lambda: BMPReader().load(FILENAME, FRAME_WIDTH, FRAME_HEIGHT))
+    print(f"BMPReader.load() (incl. palette):      {loaded:>6} bytes")
+
+main()
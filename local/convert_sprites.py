@@ -0,0 +1,63 @@
+""" Build step: convert the indexed BMPs in img/ to the device native .spr format (lib/images/sprite_asset.py)
+
+ImageLoader picks up "<name>.spr" instead of "<name>.bmp" when both are on the device, so upload the .spr files
+along with (or instead of) the BMPs.
+
+Usage, from the project root:
+> python local/convert_sprites.py [img_dir] [--out out_dir] [--frames bike_sprite.bmp=22 ...]
+
+--frames stores a default frame height in the header, for spritesheets that are loaded without frame sizes.
+"""
+import argparse
+import importlib.util
+import os
+
+""" Load the module straight from its file: importing the 'images' package would pull in the device only modules """
+_path = os.path.join(os.path.dirname(__file__), '..', 'lib', 'images', 'sprite_asset.py')
+_spec = importlib.util.spec_from_file_location('sprite_asset', _path)
+sprite_asset = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(sprite_asset)
+
+convert_bmp, SPRITE_EXT, HEADER_SIZE = sprite_asset.convert_bmp, sprite_asset.SPRITE_EXT, sprite_asset.HEADER_SIZE
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert BMP sprites to the native .spr format")
+    parser.add_argument('img_dir', nargs='?', default='img')
+    parser.add_argument('--out', default=None, help="Output dir (default: same as img_dir)")
+    parser.add_argument('--frames', nargs='*', default=[], help="name.bmp=frame_height")
+    args = parser.parse_args()
+
+    out_dir = args.out or args.img_dir
+    os.makedirs(out_dir, exist_ok=True)
+    frame_heights = dict(spec.split('=') for spec in args.frames)
+
+    converted = skipped = 0
+    bmp_total = spr_total = 0
+
+    for filename in sorted(os.listdir(args.img_dir)):
+        if not filename.endswith('.bmp'):
+            continue
+
+        with open(os.path.join(args.img_dir, filename), 'rb') as file:
+            data = file.read()
+
+        try:
+            asset = convert_bmp(data, int(frame_heights.get(filename, 0)))
+        except ValueError as err:
+            print(f"  skip {filename}: {err}")
+            skipped += 1
+            continue
+
+        out_name = filename[:-4] + SPRITE_EXT
+        with open(os.path.join(out_dir, out_name), 'wb') as file:
+            file.write(asset)
+
+        print(f"  {filename:32} {len(data):>6} -> {len(asset):>6} bytes (payload {len(asset) - HEADER_SIZE})")
+        converted += 1
+        bmp_total += len(data)
+        spr_total += len(asset)
+
+    print(f"Converted {converted} images ({bmp_total:,} -> {spr_total:,} bytes), skipped {skipped}")
+
+if __name__ == '__main__':
+    main()
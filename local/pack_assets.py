@@ -0,0 +1,98 @@
+""" Build step: pack the sprites, fonts and sounds into a single asset bundle (see lib/assets/asset_bundle.py)
+
+BMPs are converted to the native .spr format on the way in (the ones that can't be converted are skipped). Assets
+keep their device path as name, ie: "/img/skull_16.bmp", so that ImageLoader can look them up with the same file
+names as before. Upload the result to the root of the device as /assets.bin.
+
+Usage, from the project root:
+> python local/pack_assets.py [--out assets.bin] [--dirs img fonts] [--list]
+
+The sound folders are several MB, so leave them out with --dirs when the bundle has to fit in the flash with them.
+"""
+import argparse
+import importlib.util
+import os
+import struct
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+ASSET_DIRS = {
+    'img': ('.bmp',),
+    'fonts': ('.mpy',),
+    'sound': ('.wav', '.mid'),
+    '_sound': ('.wav', '.mid'),
+}
+
+def load_module(name, *path):
+    """ Load the modules straight from their files, since their packages pull in device only modules """
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, 'lib', *path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+sprite_asset = load_module('sprite_asset', 'images', 'sprite_asset.py')
+asset_bundle = load_module('asset_bundle', 'assets', 'asset_bundle.py')
+
+def collect_assets(dirs):
+    assets = []
+
+    for dirname in dirs:
+        extensions = ASSET_DIRS[dirname]
+        full_dir = os.path.join(ROOT, dirname)
+        if not os.path.isdir(full_dir):
+            continue
+
+        for filename in sorted(os.listdir(full_dir)):
+            ext = os.path.splitext(filename)[1].lower()
+            if ext not in extensions:
+                continue
+
+            name = f"/{dirname}/{filename}"
+            with open(os.path.join(full_dir, filename), 'rb') as file:
+                data = file.read()
+
+            if ext == '.bmp':
+                try:
+                    data = sprite_asset.convert_bmp(data)
+                except ValueError as err:
+                    print(f"  skip {name}: {err}")
+                    continue
+
+                _, _, _, _, width, height, _, _, palette_offset, _, _, _ = \
+                    struct.unpack(sprite_asset.HEADER_FORMAT, data[:sprite_asset.HEADER_SIZE])
+                assets.append((name, asset_bundle.TYPE_SPRITE, data, width, height,
+                               sprite_asset.HEADER_SIZE + palette_offset))
+            elif ext == '.mpy':
+                assets.append((name, asset_bundle.TYPE_FONT, data, 0, 0, 0))
+            else:
+                assets.append((name, asset_bundle.TYPE_SOUND, data, 0, 0, 0))
+
+    return assets
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack img/, fonts/ and sound/ into a single asset bundle")
+    parser.add_argument('--out', default='assets.bin')
+    parser.add_argument('--dirs', nargs='*', default=list(ASSET_DIRS), choices=list(ASSET_DIRS))
+    parser.add_argument('--list', action='store_true', help="Print every packed asset")
+    args = parser.parse_args()
+
+    assets = collect_assets(args.dirs)
+    bundle = asset_bundle.pack_bundle(assets)
+
+    with open(args.out, 'wb') as file:
+        file.write(bundle)
+
+    if args.list:
+        for name, asset_type, data, width, height, _ in assets:
+            print(f"  {asset_bundle.name_hash(name):08X}  type {asset_type}  {width:>3}x{height:<3} {len(data):>8}  {name}")
+
+    """ Check that every asset can be found again """
+    reader = asset_bundle.AssetBundle(args.out, use_mmap=True)
+    for name, _, data, _, _, _ in assets:
+        asset_id = reader.find(name)
+        assert asset_id >= 0 and bytes(reader.view(asset_id)) == data, f"Bad bundle entry for {name}"
+    reader.close()
+
+    print(f"Packed {len(assets)} assets into {args.out} ({len(bundle):,} bytes)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+""" Host tool for recorded sessions (lib/replay.py) and the frame traces of their replays.
+
+Record a session on the device by setting GameScreen.record_file, and replay it with GameScreen.replay_file: the
+replay writes a trace (GameScreen.trace_file) with the time and allocations of every frame. Copy the traces over from
+two commits and compare them here.
+
+> python local/replay_tool.py info session.rpl
+> python local/replay_tool.py compare base.csv new.csv
+"""
+import argparse
+import csv
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+def load_module(name, *path):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, 'lib', *path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+replay = load_module('replay', 'replay.py')
+
+INPUT_NAMES = {0: 'left', 1: 'right', 2: 'action'}     # GameInput.LEFT, RIGHT, ACTION
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, len(values) * pct // 100)]
+
+def info(args):
+    reader = replay.SessionReader(args.session)
+    inputs = bytearray(replay.MAX_FRAME_INPUTS)
+    frame_times = []
+    counts = {}
+
+    while True:
+        elapsed_ms, count = reader.next_frame(inputs)
+        if elapsed_ms < 0:
+            break
+        frame_times.append(elapsed_ms)
+        for i in range(count):
+            name = INPUT_NAMES.get(inputs[i], str(inputs[i]))
+            counts[name] = counts.get(name, 0) + 1
+
+    print(f"{args.session}: seed {reader.seed}, {reader.num_frames} frames, {sum(frame_times) / 1000:.1f}s")
+    if frame_times:
+        print(f"  frame time  avg {sum(frame_times) / len(frame_times):.1f}ms  p95 {percentile(frame_times, 95)}ms  "
+              f"max {max(frame_times)}ms")
+    print("  inputs      " + (", ".join(f"{name}: {count}" for name, count in sorted(counts.items())) or "none"))
+
+def load_trace(filename):
+    with open(filename, newline='') as file:
+        return [{key: int(value) for key, value in row.items()} for row in csv.DictReader(file)]
+
+def summarize(rows):
+    frame_us = [row['update_us'] + row['render_us'] for row in rows]
+    return {
+        'frames': len(rows),
+        'avg_frame_us': sum(frame_us) // len(rows),
+        'p95_frame_us': percentile(frame_us, 95),
+        'max_frame_us': max(frame_us),
+        'avg_update_us': sum(row['update_us'] for row in rows) // len(rows),
+        'avg_render_us': sum(row['render_us'] for row in rows) // len(rows),
+        'update_alloc': sum(row['update_alloc'] for row in rows),
+        'max_heap_used': max(row['heap_used'] for row in rows),
+    }
+
+def compare(args):
+    base, new = summarize(load_trace(args.base)), summarize(load_trace(args.new))
+    if base['frames'] != new['frames']:
+        print(f"Warning: {base['frames']} frames against {new['frames']}, not the same session?")
+
+    print(f"{'':<15}{'base':>12}{'new':>12}{'change':>10}")
+    for key in base:
+        change = f"{(new[key] - base[key]) * 100 / base[key]:+.1f}%" if base[key] else ""
+        print(f"{key:<15}{base[key]:>12}{new[key]:>12}{change:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect recorded sessions and compare replay traces")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    info_parser = commands.add_parser('info', help="Frames, time and inputs of a session file")
+    info_parser.add_argument('session')
+    info_parser.set_defaults(func=info)
+
+    compare_parser = commands.add_parser('compare', help="Compare the traces of two replays")
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    try:
+        args.func(args)
+    except (OSError, ValueError) as error:
+        print(error)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+""" Host simulation of the game loop: the old update and render tasks, each sleeping a fixed 30ms, against the frame
+scheduler (lib/frame_scheduler.py), with the same simulated workload.
+
+The workload is made up, but in the range of what the profiler shows on the device: a steady update, a render that
+spikes when the screen is busy, and the small jobs that used to be separate tasks. Every sleep oversleeps a little,
+like asyncio.sleep_ms() does.
+
+> python local/sim_frame_scheduler.py [--frames 600] [--period 33] [--seed 1]
+"""
+import argparse
+import importlib.util
+import os
+import random
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+def load_module(name, *path):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, 'lib', *path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+frame_scheduler = load_module('frame_scheduler', 'frame_scheduler.py')
+FrameScheduler, SimClock = frame_scheduler.FrameScheduler, frame_scheduler.SimClock
+
+OVERSLEEP_US = 1500
+UPDATE_US = 6000
+RENDER_US = (14000, 24000)      # usual range
+RENDER_SPIKE_US = 32000         # busy screen, one frame in 8
+JOBS = [
+    # name, cost (us), interval (ms), low priority
+    ('speed', 200, 0, False),
+    ('palettes', 1200, 0, True),
+    ('hud', 3000, 1000, True),
+    ('fps_print', 800, 1000, True),
+]
+
+class Workload:
+    def __init__(self, clock, seed):
+        self.clock = clock
+        self.random = random.Random(seed)
+        self.frame_starts = []
+
+    def update(self):
+        self.frame_starts.append(self.clock.ticks_us())
+        self.clock.advance(UPDATE_US)
+
+    def render(self):
+        if self.random.randrange(8) == 0:
+            self.clock.advance(RENDER_SPIKE_US)
+        else:
+            self.clock.advance(self.random.randrange(*RENDER_US))
+
+    def job(self, cost_us):
+        def run():
+            self.clock.advance(cost_us)
+        return run
+
+def simulate_old(num_frames, seed):
+    """ The update and render loops handing over to each other through flags, each sleeping 30ms, plus the other
+    tasks on their own timers (AnimAttr at 60 FPS, FPS and score printouts every second) """
+    clock = SimClock()
+    work = Workload(clock, seed)
+    state = {'render_finished': True, 'update_finished': False, 'frames': 0}
+
+    def update_loop():
+        if state['render_finished']:
+            state['render_finished'] = False
+            work.update()
+            work.job(1200)()    # the palette animator ticked inside do_update()
+            state['update_finished'] = True
+        return 30
+
+    def render_loop():
+        if state['update_finished']:
+            state['update_finished'] = False
+            work.render()
+            state['render_finished'] = True
+            state['frames'] += 1
+        return 30
+
+    tasks = [[0, update_loop], [0, render_loop], [0, lambda: work.job(200)() or 16],
+             [0, lambda: work.job(3000)() or 1000], [0, lambda: work.job(800)() or 1000]]
+
+    while state['frames'] < num_frames:
+        task = min(tasks, key=lambda task: task[0])
+        clock.now_us = max(clock.now_us, task[0])
+        sleep_ms = task[1]()
+        task[0] = clock.now_us + sleep_ms * 1000 + OVERSLEEP_US
+
+    return work.frame_starts, None
+
+def simulate_scheduler(num_frames, period_ms, seed):
+    clock = SimClock(oversleep_us=OVERSLEEP_US)
+    work = Workload(clock, seed)
+    scheduler = FrameScheduler(period_ms, update=work.update, render=work.render, clock=clock)
+    for name, cost_us, interval_ms, low_priority in JOBS:
+        scheduler.add_job(work.job(cost_us), name, interval_ms, low_priority)
+
+    scheduler.run_sync(num_frames)
+    return work.frame_starts, scheduler
+
+def report(name, frame_starts, period_ms):
+    periods = [(end - start) / 1000 for start, end in zip(frame_starts, frame_starts[1:])]
+    average = sum(periods) / len(periods)
+    late = sum(1 for period in periods if period > period_ms + 1)
+    print(f"{name:<10} {1000 / average:>6.1f} FPS  avg frame {average:>5.1f}ms  max {max(periods):>5.1f}ms  "
+          f"{late * 100 / len(periods):>5.1f}% over {period_ms}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the old screen loops against the frame scheduler")
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--period', type=int, default=33, help="Frame budget of the scheduler, in ms")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    old_starts, _ = simulate_old(args.frames, args.seed)
+    new_starts, scheduler = simulate_scheduler(args.frames, args.period, args.seed)
+
+    report('30ms loops', old_starts, args.period)
+    report('scheduler', new_starts, args.period)
+    print()
+    scheduler.print_stats()
+
+if __name__ == '__main__':
+    main()
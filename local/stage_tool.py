@@ -0,0 +1,343 @@
+""" Build step for the data driven stages: validates JSON stage definitions, compiles them into the binary stage files
+that the device streams from flash (see lib/stages/stage_file.py), and simulates them.
+
+Usage, from the project root:
+> python local/stage_tool.py check stages/stage_1.json
+> python local/stage_tool.py build stages/stage_1.json [--out stages/stage_1.stg]
+> python local/stage_tool.py simulate stages/stage_1.json [--speed -1] [--max-sprites 128]
+
+Upload the .stg files to /stages on the device.
+
+A stage definition is a timeline of steps that run one after the other:
+
+{
+    "name": "Stage 1",
+    "defaults": {"type": "SPRITE_TEST_SKULL", "z": 300, "speed": -30},
+    "timeline": [
+        {"wave": {"lanes": "all", "y": [32, 40, 48]}, "every": 10000, "repeat": 1},
+        {"wait": 5000},
+        {"loop": [{"wave": {"lanes": "edges"}}, {"wait": 500}], "repeat": 3}
+    ]
+}
+
+- wave: spawns one sprite in every lane, and at every y when y is a list. "repeat" spawns the wave again that many
+  times, "every" ms apart. The step lasts (repeat + 1) * every ms. "sweep" delays every lane after the first by that many
+  ms, for waves that sweep across the road.
+  Wave fields: type (a SPRITE_* name from sprite_types.py, or its number), lanes (a list or one of LANE_PATTERNS), x, y,
+  z, speed (leave it out for the default speed of the type). Missing fields come from "defaults".
+- wait: ms before the next step.
+- loop: runs its steps repeat + 1 times.
+
+The simulator reports the peak number of active sprites in every second of the stage. A sprite is active from its spawn
+until it moves past the near plane of the camera, at its speed (z units per second, like SpriteManager3D).
+"""
+import argparse
+import importlib.util
+import json
+import math
+import os
+import re
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+NUM_LANES = 5
+LANE_PATTERNS = {
+    'all': [0, 1, 2, 3, 4],
+    'left': [0, 1],
+    'right': [3, 4],
+    'center': [2],
+    'edges': [0, 4],
+    'inner': [1, 2, 3],
+    'even': [0, 2, 4],
+    'odd': [1, 3],
+}
+WAVE_FIELDS = ('type', 'lanes', 'x', 'y', 'z', 'speed', 'sweep')
+INT16_RANGE = (-32768, 32767)
+MAX_TIME_MS = 0xFFFFFFFF
+
+CAMERA_NEAR = -1
+DEFAULT_SPEED = -1  # base_speed of the sprite types in Stage1
+
+def load_module(name, *path):
+    """ Load the modules straight from their files, since their packages pull in device only modules """
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, 'lib', *path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+stage_file = load_module('stage_file', 'stages', 'stage_file.py')
+
+def load_type_ids():
+    """ SPRITE_* constants from sprite_types.py, parsed rather than imported (it needs uctypes) """
+    with open(os.path.join(ROOT, 'lib', 'sprites', 'sprite_types.py')) as file:
+        source = file.read()
+    return {name: int(value) for name, value in re.findall(r'^(SPRITE_\w+)\s*=\s*(\d+)', source, re.MULTILINE)}
+
+def is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def validate(definition, type_ids):
+    """ List of the errors in a stage definition, empty if it can be compiled """
+    errors = []
+    if not isinstance(definition, dict):
+        return ["The stage must be an object"]
+
+    for key in definition:
+        if key not in ('name', 'defaults', 'timeline'):
+            errors.append(f"Unknown key '{key}'")
+
+    defaults = definition.get('defaults', {})
+    if not isinstance(defaults, dict):
+        errors.append("defaults: must be an object")
+        defaults = {}
+    for key in defaults:
+        if key not in WAVE_FIELDS:
+            errors.append(f"defaults: unknown field '{key}'")
+
+    timeline = definition.get('timeline')
+    if not isinstance(timeline, list) or not timeline:
+        errors.append("timeline: must be a list of steps")
+        return errors
+
+    validate_steps(timeline, 'timeline', defaults, type_ids, errors)
+    if not errors:
+        _, end_ms = expand(definition, type_ids)
+        if end_ms > MAX_TIME_MS:
+            errors.append(f"The stage is too long ({end_ms}ms)")
+    return errors
+
+def validate_steps(steps, path, defaults, type_ids, errors):
+    for i, step in enumerate(steps):
+        where = f"{path}[{i}]"
+        if not isinstance(step, dict):
+            errors.append(f"{where}: must be an object")
+            continue
+
+        kinds = [kind for kind in ('wave', 'wait', 'loop') if kind in step]
+        if len(kinds) != 1:
+            errors.append(f"{where}: needs exactly one of wave, wait or loop")
+            continue
+
+        kind = kinds[0]
+        allowed = {'wave': ('wave', 'every', 'repeat'), 'wait': ('wait',), 'loop': ('loop', 'repeat')}[kind]
+        for key in step:
+            if key not in allowed:
+                errors.append(f"{where}: unknown key '{key}' in a {kind} step")
+
+        repeat = step.get('repeat', 0)
+        if not is_int(repeat) or repeat < 0:
+            errors.append(f"{where}.repeat: must be an integer >= 0")
+
+        if kind == 'wait':
+            if not is_int(step['wait']) or step['wait'] < 0:
+                errors.append(f"{where}.wait: must be an integer >= 0 (ms)")
+
+        elif kind == 'loop':
+            if not isinstance(step['loop'], list) or not step['loop']:
+                errors.append(f"{where}.loop: must be a list of steps")
+            else:
+                validate_steps(step['loop'], f"{where}.loop", defaults, type_ids, errors)
+
+        else:
+            every = step.get('every', 0)
+            if not is_int(every) or every < 0:
+                errors.append(f"{where}.every: must be an integer >= 0 (ms)")
+            elif is_int(repeat) and repeat and not every:
+                errors.append(f"{where}: a repeated wave needs 'every', or the repeats spawn on top of each other")
+
+            if not isinstance(step['wave'], dict):
+                errors.append(f"{where}.wave: must be an object")
+            else:
+                validate_wave(dict(defaults, **step['wave']), f"{where}.wave", type_ids, errors)
+
+def validate_wave(wave, where, type_ids, errors):
+    for key in wave:
+        if key not in WAVE_FIELDS:
+            errors.append(f"{where}: unknown field '{key}'")
+
+    sprite_type = wave.get('type')
+    if sprite_type is None:
+        errors.append(f"{where}: no sprite type")
+    elif is_int(sprite_type):
+        if not 0 <= sprite_type <= 255:
+            errors.append(f"{where}.type: {sprite_type} is not a sprite type (0-255)")
+    elif sprite_type not in type_ids:
+        errors.append(f"{where}.type: unknown sprite type '{sprite_type}'")
+
+    lanes = wave.get('lanes', [0])
+    if isinstance(lanes, str):
+        if lanes not in LANE_PATTERNS:
+            errors.append(f"{where}.lanes: unknown pattern '{lanes}' (one of {', '.join(LANE_PATTERNS)})")
+    elif not isinstance(lanes, list) or not lanes:
+        errors.append(f"{where}.lanes: must be a list of lanes or a pattern name")
+    elif not all(is_int(lane) and 0 <= lane < NUM_LANES for lane in lanes):
+        errors.append(f"{where}.lanes: lanes go from 0 to {NUM_LANES - 1}")
+
+    for key in ('x', 'y', 'z'):
+        values = wave.get(key, 0)
+        values = values if isinstance(values, list) and key == 'y' else [values]
+        if not values or not all(is_int(value) and INT16_RANGE[0] <= value <= INT16_RANGE[1] for value in values):
+            errors.append(f"{where}.{key}: must be a 16 bit integer" + (" or a list of them" if key == 'y' else ""))
+
+    if 'speed' in wave and not is_number(wave['speed']):
+        errors.append(f"{where}.speed: must be a number")
+
+    sweep = wave.get('sweep', 0)
+    if not is_int(sweep) or sweep < 0:
+        errors.append(f"{where}.sweep: must be an integer >= 0 (ms)")
+
+def expand(definition, type_ids):
+    """ (t_ms, sprite type, lane, x, y, z, speed) of every spawn, in timeline order, and the end of the stage """
+    records = []
+    defaults = definition.get('defaults', {})
+    end_ms = expand_steps(definition['timeline'], 0, defaults, type_ids, records)
+    return records, end_ms
+
+def expand_steps(steps, t_ms, defaults, type_ids, records):
+    for step in steps:
+        repeat = step.get('repeat', 0)
+
+        if 'wait' in step:
+            t_ms += step['wait']
+
+        elif 'loop' in step:
+            for _ in range(repeat + 1):
+                t_ms = expand_steps(step['loop'], t_ms, defaults, type_ids, records)
+
+        else:
+            wave = dict(defaults, **step['wave'])
+            every = step.get('every', 0)
+            end_ms = t_ms + (repeat + 1) * every
+            for count in range(repeat + 1):
+                last_ms = spawn_wave(wave, t_ms + count * every, type_ids, records)
+                end_ms = max(end_ms, last_ms)
+            t_ms = end_ms
+
+    return t_ms
+
+def spawn_wave(wave, t_ms, type_ids, records):
+    sprite_type = wave['type']
+    sprite_type = sprite_type if is_int(sprite_type) else type_ids[sprite_type]
+
+    lanes = wave.get('lanes', [0])
+    lanes = LANE_PATTERNS[lanes] if isinstance(lanes, str) else lanes
+
+    rows = wave.get('y', 0)
+    rows = rows if isinstance(rows, list) else [rows]
+
+    speed = wave.get('speed', stage_file.NO_SPEED)
+    sweep = wave.get('sweep', 0)
+    spawn_ms = t_ms
+
+    for i, lane in enumerate(lanes):
+        spawn_ms = t_ms + i * sweep
+        for y in rows:
+            records.append((spawn_ms, sprite_type, lane, wave.get('x', 0), y, wave.get('z', 0), speed))
+
+    return spawn_ms
+
+def compile_stage(definition, type_ids):
+    """ Time sorted records and the end of the stage. Raises ValueError with every error in the definition """
+    errors = validate(definition, type_ids)
+    if errors:
+        raise ValueError("\n".join(errors))
+
+    records, end_ms = expand(definition, type_ids)
+    records.sort(key=lambda record: record[0])     # Stable: spawns at the same time keep the order of the script
+    return records, end_ms
+
+def load_records(filename, type_ids):
+    """ Records from a JSON definition, or from an already built stage file """
+    if filename.endswith('.json'):
+        with open(filename) as file:
+            return compile_stage(json.load(file), type_ids)
+
+    stream = stage_file.StageStream.open(filename)
+    if not stream:
+        raise ValueError(f"{filename} is not a stage file")
+
+    records = []
+    while stream.due(MAX_TIME_MS):
+        records.append(stream.next())
+    stream.close()
+    return records, stream.end_ms
+
+def lifetime_ms(z, speed, default_speed, max_life_ms):
+    if speed != speed:
+        speed = default_speed
+    if speed >= 0:
+        return max_life_ms
+    return min(max_life_ms, math.ceil((z - CAMERA_NEAR) / (-speed / 1000)))   # speed is in z units per second
+
+def simulate(records, end_ms, default_speed=DEFAULT_SPEED, max_life_ms=60000):
+    """ (spawns, peak active sprites) for every second of the stage """
+    changes = []
+    for t_ms, _, _, _, _, z, speed in records:
+        changes.append((t_ms, 1))
+        changes.append((t_ms + lifetime_ms(z, speed, default_speed, max_life_ms), -1))
+    changes.sort()  # At the same ms, sprites leave before new ones come in
+
+    last_ms = max([end_ms] + [t_ms for t_ms, _ in changes])
+    seconds = last_ms // 1000 + 1
+    spawns = [0] * seconds
+    peaks = [0] * seconds
+
+    active = 0
+    i = 0
+    for second in range(seconds):
+        peak = active
+        while i < len(changes) and changes[i][0] < (second + 1) * 1000:
+            active += changes[i][1]
+            if changes[i][1] > 0:
+                spawns[second] += 1
+            peak = max(peak, active)
+            i += 1
+        peaks[second] = peak
+
+    return spawns, peaks
+
+def main():
+    parser = argparse.ArgumentParser(description="Check, build and simulate JSON stage definitions")
+    parser.add_argument('command', choices=('check', 'build', 'simulate'))
+    parser.add_argument('stage', help="JSON stage definition (simulate also takes a built .stg file)")
+    parser.add_argument('--out', help="Stage file to build (default: the definition with a .stg extension)")
+    parser.add_argument('--speed', type=float, default=DEFAULT_SPEED,
+                        help="Speed of the spawns that don't set one (the default of their type)")
+    parser.add_argument('--max-life', type=int, default=60000, help="ms before sprites that never leave are dropped")
+    parser.add_argument('--max-sprites', type=int, default=128, help="Size of the sprite pool (GameScreen)")
+    args = parser.parse_args()
+
+    type_ids = load_type_ids()
+    try:
+        records, end_ms = load_records(args.stage, type_ids)
+    except ValueError as err:
+        print(f"{args.stage}: invalid stage\n{err}")
+        sys.exit(1)
+
+    if args.command == 'check':
+        print(f"{args.stage}: OK, {len(records)} spawns, {end_ms}ms")
+
+    elif args.command == 'build':
+        out = args.out or os.path.splitext(args.stage)[0] + '.stg'
+        stage_file.save_stage(out, records, end_ms)
+        size = stage_file.HEADER_SIZE + len(records) * stage_file.RECORD_SIZE
+        print(f"Built {out}: {len(records)} spawns, {end_ms}ms, {size:,} bytes")
+
+    else:
+        spawns, peaks = simulate(records, end_ms, args.speed, args.max_life)
+        print(f"{'second':>6} {'spawns':>7} {'peak active':>12}")
+        for second, (num_spawns, peak) in enumerate(zip(spawns, peaks)):
+            print(f"{second:>6} {num_spawns:>7} {peak:>12}")
+
+        peak = max(peaks)
+        print(f"{len(records)} spawns in {end_ms}ms, peak of {peak} active sprites at {peaks.index(peak)}s")
+        if peak > args.max_sprites:
+            print(f"WARNING: more active sprites than the sprite pool holds ({args.max_sprites})")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -11,14 +11,20 @@ from perspective_camera import PerspectiveCamera
 from death_anim import DeathAnim
 from sprites.renderer_scaler import RendererScaler
 from stages.stage_1 import Stage1
+from fixed_step import FixedStep
 from ui_elements import ui_screen
 
-from anim.anim_attr import AnimAttr
+from anim.easing import EASE_IN_OUT_SINE
+from anim.tween_manager import tweens
+from anim.palette_animator import animator
 from images.image_loader import ImageLoader
+from images.image_streamer import ImageStreamer
+from sprites.sprite_registry import registry
 from sprites_old.player_sprite import PlayerSprite
 from road_grid import RoadGrid
 
-from input.game_input import make_input_handler
+from input.game_input import make_input_handler, GameInput
+from replay import SessionRecorder, SessionReader, ReplayDriver
 from screens.screen import Screen
 import uasyncio as asyncio
 import utime
@@ -59,6 +65,17 @@ class GameScreen(Screen):
     score = 0
     stage = None
     num_lanes = 5
+    step_ms = 8         # Fixed timestep of the simulation
+    max_steps = 8       # per frame, past which the game slows down
+    fixed_step: FixedStep = None
+
+    """ Record the session (frame times and input) to record_file, or play back replay_file instead of the live game
+    and save its frame times and allocations to trace_file (see replay.py) """
+    record_file = None
+    record_max_frames = 9000    # 5 minutes at 30 FPS
+    replay_file = None
+    trace_file = "/replay_trace.csv"
+    recorder: SessionRecorder = None
 
     def __init__(self, display, *args, **kwargs):
         super().__init__(display, *args, **kwargs)
@@ -70,9 +87,6 @@ class GameScreen(Screen):
         renderer = RendererScaler(display)
         self.scaler = renderer.scaler
 
-        print("-- Preloading images...")
-        # self.preload_images() # Still haven't gotten this to work
-
         print("-- Creating UI...")
         self.ui = ui_screen(display, self.num_lives)
         check_gc_mem()
@@ -80,6 +94,10 @@ class GameScreen(Screen):
         print("-- Creating player sprite...")
         self.player = PlayerSprite(camera=self.camera)
 
+        """ The player and the HUD are always on screen, so they are never evicted from the image cache """
+        ImageLoader.pin(self.player.filename)
+        ImageLoader.pin(self.ui.life_sprite.filename)
+
         self.collider = Collider(self.player, self.mgr, self.crash_y_start, self.crash_y_end)
         self.collider.add_callback(self.do_crash)
 
@@ -102,6 +120,7 @@ class GameScreen(Screen):
         self.display.fps = self.fps
 
         self.stage = Stage1(self.mgr)
+        self.fixed_step = FixedStep(self.step, self.step_ms, self.max_steps)
         check_gc_mem()
         self.sun_start_x = 39
 
@@ -118,26 +137,58 @@ class GameScreen(Screen):
 
     async def mock_update_score(self):
         while True:
-            self.score += random.randrange(0, 100000)
-            self.ui.update_score(self.score)
+            self.update_score()
             await asyncio.sleep(1)
 
+    def update_score(self):
+        self.score += random.randrange(0, 100000)
+        self.ui.update_score(self.score)
+
+    def print_input_latency(self):
+        stats = self.input.queue.stats()
+        if stats['samples']:
+            printc(f"INPUT LATENCY: avg {stats['avg_us'] // 1000}ms, max {stats['max_us'] // 1000}ms "
+                   f"({stats['dropped']} dropped)", INK_CYAN)
+
+    def start_speed_up(self):
+        """ The road speeds up to full speed. The tween advances with the simulation steps, so it plays out the same in
+        a replay """
+        self.ground_speed = 0
+        tweens.add(self, 'ground_speed', self.max_ground_speed, 3000, EASE_IN_OUT_SINE)
+
     def preload_images(self):
-        images = [
-            {"name": "bike_sprite.bmp", "width": 32, "height": 22, "color_depth": 4},
-            # {"name": "laser_wall.bmp", "width": 24, "height": 10, "color_depth": 4},
-            # {"name": "alien_fighter.bmp", "width": 24, "height": 16, "color_depth": 4},
-            # {"name": "road_barrier_yellow.bmp", "width": 24, "height": 15, "color_depth": 4},
-            # {"name": "road_barrier_yellow_inv.bmp", "width": 24, "height": 15, "color_depth": 4},
-            {"name": "sunset.bmp", "width": 20, "height": 10, "color_depth": 8},
-            {"name": "life.bmp", "width": 12, "height": 8},
-            {"name": "debris_bits.bmp", "width": 4, "height": 4, "color_depth": 1},
-            {"name": "debris_large.bmp", "width": 8, "height": 6, "color_depth": 1},
-            # {"name": "test_white_line.bmp", "width": 24, "height": 2},
-            {"name": "test_white_line_vert.bmp", "width": 2, "height": 24},
-        ]
-
-        ImageLoader.load_images(images, self.display)
+        """ Load the images of the stage sprite types in the background, in time slices, so that they are already in
+        the image cache on their first spawn. Returns the ImageStreamer, for its progress / progress_event """
+        streamer = ImageStreamer()
+        queued = set()
+        for meta in registry.sprite_metadata.values():
+            if meta.image_path not in queued:
+                queued.add(meta.image_path)
+                streamer.queue(meta.image_path, meta.width, meta.height)
+
+        asyncio.create_task(streamer.run())
+        return streamer
+
+    async def load_stage(self):
+        """ Show a progress bar while the stage images stream in, then start the stage and the frame loop """
+        print("-- Preloading images...")
+        display = self.display
+        streamer = self.preload_images()
+
+        while not streamer.done:
+            await streamer.progress_event.wait()
+            streamer.progress_event.clear()
+            display.fill(0x0)
+            streamer.draw_progress(display)
+            display.show()
+
+        printc(f"-- {streamer.total_bytes:,} bytes of images loaded in {streamer.slices} slices "
+               f"(max {streamer.max_slice_us}us), {streamer.errors} errors --", INK_CYAN)
+        display.fill(0x0)
+        self.start()
+
+        printc("-- STARTING FRAME LOOP ... ---", INK_BRIGHT_GREEN)
+        await self.start_frame_loop()
 
     def run(self):
         """ Quick flash of white"""
@@ -149,29 +200,38 @@ class GameScreen(Screen):
 
         self.is_render_finished = True  # this will trigger the first update loop
 
+        if self.replay_file:
+            return self.run_replay()
+
         barrier_speed = self.max_ground_speed / 200
         print(f"Sprite speed: {barrier_speed}")
 
         self.input = make_input_handler(self.player)
+        if self.record_file:
+            self.start_recording()
+
         loop = asyncio.get_event_loop()
 
+        """ Everything that used to run as its own task on its own timer is now a job of the frame scheduler. The low
+        priority ones wait for a later frame when the current one is over budget """
+        scheduler = self.make_scheduler()
+
+        # Start the road speed-up
+        self.start_speed_up()
+
+        # Palette animations run even while paused (ie: game over text)
+        scheduler.add_job(animator.tick, 'palettes', low_priority=True)
+        scheduler.add_job(self.update_score, 'hud', interval_ms=1000, low_priority=True)
+
         if prof.enabled:
-            loop.create_task(self.update_profiler())
+            scheduler.add_job(prof.dump_profile, 'profiler', interval_ms=5000, low_priority=True)
 
         if self.fps_enabled:
             printc("... STARTING FPS COUNTER ...")
-            self.fps_counter_task = loop.create_task(self.start_fps_counter(self.mgr.pool))
-
-        self.update_score_task = loop.create_task(self.mock_update_score())
+            scheduler.add_job(lambda: self.print_fps(self.mgr.pool), 'fps_print', interval_ms=1000, low_priority=True)
+            scheduler.add_job(self.print_input_latency, 'input_latency', interval_ms=5000, low_priority=True)
 
-        # Start the road speed-up task
-        self.speed_anim = AnimAttr(self, 'ground_speed', self.max_ground_speed, 3000, easing=AnimAttr.ease_in_out_sine)
-        loop.create_task(self.speed_anim.run(fps=60))
-        self.start()
-
-        printc("-- STARTING UPDATE_LOOP and RENDER_LOOP ... ---", INK_BRIGHT_GREEN)
-        loop.create_task(self.start_update_loop())
-        loop.create_task(self.start_render_loop())
+        loop.create_task(self.load_stage())
         loop.run_forever()
 
     async def stop_stage(self):
@@ -180,7 +240,41 @@ class GameScreen(Screen):
         self.pause()
         self.stage.stop()
 
-    def do_update(self):
+    def start_recording(self):
+        seed = utime.ticks_us()
+        random.seed(seed)
+        self.recorder = SessionRecorder(self.record_file, seed)
+        self.input.recorder = self.recorder
+        printc(f"-- RECORDING SESSION TO {self.record_file} --", INK_CYAN)
+
+    def stop_recording(self):
+        if not self.recorder:
+            return
+
+        self.input.recorder = None
+        self.recorder.close()
+        printc(f"-- RECORDED {self.recorder.num_frames} FRAMES TO {self.record_file} --", INK_CYAN)
+        self.recorder = None
+
+    def run_replay(self):
+        """ Play back a recorded session as fast as possible (no sleeps), without asyncio """
+        reader = SessionReader(self.replay_file)
+        random.seed(reader.seed)
+        printc(f"-- REPLAYING {reader.num_frames} FRAMES FROM {self.replay_file} --", INK_CYAN)
+
+        self.start_speed_up()
+        self.last_update_ms = utime.ticks_ms()
+        self.start()
+
+        handlers = {GameInput.LEFT: self.player.move_left, GameInput.RIGHT: self.player.move_right}
+        driver = ReplayDriver(self, reader, handlers, trace_file=self.trace_file)
+        trace = driver.run()
+        driver.close()
+        print(f"Replay: {trace.summary()}, trace saved to {self.trace_file}")
+        return trace
+
+    def do_update(self, elapsed_ms=None):
+        """ elapsed_ms comes from the clock, unless the frame is being replayed """
         if DEBUG_MEM:
             print(micropython.mem_info())
 
@@ -192,26 +286,45 @@ class GameScreen(Screen):
         self.grid.speed_ms = self.ground_speed / 10
 
         now = utime.ticks_ms()
-        elapsed = utime.ticks_diff(now, self.last_update_ms)
-        elapsed = elapsed / 1000  # @TODO change to MS?
+        if elapsed_ms is None:
+            elapsed_ms = utime.ticks_diff(now, self.last_update_ms)
         self.last_update_ms = now
 
-        """ Call the update methods of all the subsystems that are updated every frame """
-        if not self.paused:
-            if DEBUG_FRAME_ID:
-                printc("-- Updating subsystems --", INK_YELLOW)
+        # All the input of the frame is applied here, before the simulation steps (and recorded with this frame)
+        if self.input:
+            self.input.poll()
+
+        if self.recorder:
+            self.recorder.frame(elapsed_ms)
+            if self.recorder.num_frames >= self.record_max_frames:
+                self.stop_recording()
 
+        if not self.paused:
             self.update_profiler_sync()
-            self.grid.update_horiz_lines(elapsed)
-            self.player.update(elapsed)
-            self.sun.x = self.sun_start_x - round(self.player.turn_angle * 4)
+            self.fixed_step.advance(elapsed_ms)
+            self.mgr.interp_alpha = self.fixed_step.alpha
+
+    def step(self, step_ms):
+        """ One fixed step of the simulation: call the update methods of all the subsystems """
+        if DEBUG_FRAME_ID:
+            printc("-- Updating subsystems --", INK_YELLOW)
+
+        if self.paused:
+            return  # Crashed in an earlier step of this frame
 
-            # The sprite manager is one of these instances, this is how it receives world updates
-            for sprite in self.instances:
-                sprite.update(elapsed)
+        tweens.tick(step_ms)
 
-            self.collider.check_collisions(self.mgr.pool.active_sprites)
-            self.stage.update(elapsed)
+        elapsed = step_ms / 1000  # @TODO change to MS?
+        self.grid.update_horiz_lines(elapsed)
+        self.player.update(elapsed)
+        self.sun.x = self.sun_start_x - round(self.player.turn_angle * 4)
+
+        # The sprite manager is one of these instances, this is how it receives world updates
+        for sprite in self.instances:
+            sprite.update(elapsed)
+
+        self.collider.check_collisions(self.mgr.pool.active_sprites)
+        self.stage.update(step_ms)
 
     def do_render(self):
         """ Overrides parent method """
@@ -234,6 +347,9 @@ class GameScreen(Screen):
         # self.ui.show()
         self.display.show()
 
+        if self.input:
+            self.input.queue.frame_shown()
+
         gc.enable()
         gc.collect()
 
@@ -265,6 +381,7 @@ class GameScreen(Screen):
         self.grid.start()
 
         print("-- Starting stage...")
+        self.fixed_step.reset()
         self.stage.start()
 
         loop = asyncio.get_event_loop()
@@ -290,6 +407,7 @@ class GameScreen(Screen):
         if self.num_lives == 0:
             self.player.visible = False
             self.ui.show_game_over()
+            self.stop_recording()
         else:
             self.num_lives = self.num_lives - 1
             self.ui.update_lives(self.num_lives)
@@ -5,6 +5,7 @@ import uasyncio as asyncio
 from ucollections import namedtuple
 
 from fps_counter import FpsCounter
+from frame_scheduler import FrameScheduler
 from profiler import prof, timed
 from scaler.const import INK_BRIGHT_YELLOW, DEBUG_FPS, DEBUG_FRAME_ID, INK_CYAN, INK_GREEN
 from print_utils import printc
@@ -39,6 +40,8 @@ class Screen:
     half_width = 0
     last_perf_dump_ms = 0
     total_frames = 0
+    frame_period_ms = 33    # Frame budget of the frame scheduler (30 FPS)
+    scheduler: FrameScheduler = None
 
     # This will be set to True by the render loop when it finishes (then the game world is ready to be updated)
     is_render_finished = True
@@ -91,6 +94,29 @@ class Screen:
             # but also to free up the event loop for other tasks
             await asyncio.sleep_ms(30)
 
+    def make_scheduler(self):
+        """ A frame scheduler running do_update() and do_render(). Add the per frame jobs to it before
+        start_frame_loop() """
+        self.scheduler = FrameScheduler(self.frame_period_ms, update=self.do_update, render=self.do_render)
+        if DEBUG_FPS:
+            self.scheduler.add_job(self.fps.tick, 'fps')
+        if DEBUG_FRAME_ID:
+            self.scheduler.add_job(self.count_frame, 'frame_id')
+        return self.scheduler
+
+    def count_frame(self):
+        self.total_frames += 1
+
+    async def start_frame_loop(self):
+        """ Update and render in a single loop which only sleeps what is left of the frame budget. Replaces
+        start_update_loop() + start_render_loop() """
+        printc("<< FRAME LOOP START (screen.py) >>", INK_CYAN)
+        if not self.scheduler:
+            self.make_scheduler()
+
+        self.last_update_ms = self.last_perf_dump_ms = utime.ticks_ms()
+        await self.scheduler.run()
+
     async def _start_update_loop(self):
         await asyncio.gather(
             self.update_loop(),
@@ -119,23 +145,25 @@ class Screen:
         await asyncio.sleep(5)          # wait for a few seconds before starting to measure FPS
 
         while True:
-            fps = self.fps.fps()
-            if not fps:     # if FPS is not available yet (not enough measurements)
-                pass
-            else:
-                fps_str = "{: >6.2f}".format(fps)
-                if pool:
-                    extra_text = pool.active_count
-                    printc(f"FPS: {fps_str} // {extra_text:03.} SPRITES", INK_BRIGHT_YELLOW)
-                else:
-                    printc(f"FPS: {fps_str}", INK_BRIGHT_YELLOW)
-
-                # # ColorWriter.set_textpos(self.display.write_framebuf, 0, 0)
-                # self.fps_text.row_clip = True
-                # self.fps_text.render_text(fps_str)
-
+            self.print_fps(pool)
             await asyncio.sleep(1)      # Update every second at most
 
+    def print_fps(self, pool=None):
+        fps = self.fps.fps()
+        if not fps:     # if FPS is not available yet (not enough measurements)
+            return
+
+        fps_str = "{: >6.2f}".format(fps)
+        if pool:
+            extra_text = pool.active_count
+            printc(f"FPS: {fps_str} // {extra_text:03.} SPRITES", INK_BRIGHT_YELLOW)
+        else:
+            printc(f"FPS: {fps_str}", INK_BRIGHT_YELLOW)
+
+        # # ColorWriter.set_textpos(self.display.write_framebuf, 0, 0)
+        # self.fps_text.row_clip = True
+        # self.fps_text.render_text(fps_str)
+
     def do_render(self):
         """ Meant to be overridden in child classes """
         raise NotImplementedError
@@ -0,0 +1,118 @@
+import os
+import sys
+import unittest
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_asset_bundle
+
+Round trip: BMPs -> .spr (convert_bmp) -> bundle (pack_bundle) -> AssetBundle lookups and sprites, compared against
+what BMPReader loads from the same BMPs.
+"""
+
+sys.path.insert(0, '../lib')
+from assets.asset_bundle import AssetBundle, pack_bundle, TYPE_SPRITE, TYPE_RAW
+from images.bmp_reader import BMPReader
+from images.image_loader import ImageLoader
+from images.sprite_asset import convert_bmp
+
+IMG_DIR = '../img/'
+FILENAME = 'test_assets.bin'
+
+""" (filename, frame_width, frame_height): 4 bit, 8 bit, 1 bit and a spritesheet """
+TEST_IMAGES = [
+    ('skull_16.bmp', None, None),
+    ('title_zero.bmp', None, None),
+    ('life.bmp', None, None),
+    ('bike_sprite.bmp', 32, 22),
+]
+RAW_NAME = '/sound/test.raw'
+RAW_DATA = bytes(range(7))  # Not a multiple of 4, so the next asset has to be padded
+
+def asset_name(filename):
+    return '/img/' + filename
+
+class TestAssetBundle(unittest.TestCase):
+    def setUp(self):
+        self.data = {}
+        assets = [(RAW_NAME, TYPE_RAW, RAW_DATA, 0, 0, 0)]
+        self.data[RAW_NAME] = RAW_DATA
+
+        for filename, _, _ in TEST_IMAGES:
+            with open(IMG_DIR + filename, 'rb') as file:
+                data = convert_bmp(file.read())
+            self.data[asset_name(filename)] = data
+            assets.append((asset_name(filename), TYPE_SPRITE, data, 0, 0, 0))
+
+        with open(FILENAME, 'wb') as file:
+            file.write(pack_bundle(assets))
+
+        self.bundle = AssetBundle(FILENAME)
+
+    def tearDown(self):
+        self.bundle.close()
+        try:
+            os.remove(FILENAME)
+        except OSError:
+            pass
+
+    def test_find_and_read(self):
+        bundle = self.bundle
+        self.assertEqual(bundle.num_entries, len(self.data))
+
+        for name, data in self.data.items():
+            asset_id = bundle.find(name)
+            self.assertGreaterEqual(asset_id, 0, name)
+            self.assertEqual(bundle.size(asset_id), len(data), name)
+            self.assertEqual(bundle.entry(asset_id)[0] % 4, 0, name)
+
+            buffer = bytearray(len(data) + 8)
+            self.assertEqual(bundle.readinto(asset_id, buffer), len(data), name)
+            self.assertEqual(bytes(buffer[:len(data)]), data, name)
+
+        self.assertEqual(bundle.find('/img/not_there.bmp'), -1)
+
+    def test_load_sprite_matches_bmp(self):
+        for filename, frame_width, frame_height in TEST_IMAGES:
+            bmp_image = BMPReader(IMG_DIR).load(filename, frame_width, frame_height)
+            image = self.bundle.load_sprite(self.bundle.find(asset_name(filename)), frame_width, frame_height)
+
+            self.assertEqual((image.width, image.height, image.color_depth),
+                             (bmp_image.width, bmp_image.height, bmp_image.color_depth), filename)
+            self.assertEqual(bytes(image.palette.palette), bytes(bmp_image.palette.palette), filename)
+
+            if frame_height:
+                pairs = list(zip(bmp_image.frames, image.frames))
+                self.assertEqual(len(image.frames), len(bmp_image.frames), filename)
+                width, height = frame_width, frame_height
+            else:
+                pairs = [(bmp_image.pixels, image.pixels)]
+                width, height = bmp_image.width, bmp_image.height
+
+            for bmp_frame, frame in pairs:
+                for y in range(height):
+                    for x in range(width):
+                        self.assertEqual(frame.pixel(x, y), bmp_frame.pixel(x, y), f"{filename} {x},{y}")
+
+    def test_not_a_sprite(self):
+        with self.assertRaises(ValueError):
+            self.bundle.load_sprite(self.bundle.find(RAW_NAME))
+
+    def test_bad_bundle(self):
+        """ A stale or truncated bundle is ignored by ImageLoader, which falls back to the image files """
+        with open(FILENAME, 'wb') as file:
+            file.write(b'WZAB')
+
+        with self.assertRaises(ValueError):
+            AssetBundle(FILENAME)
+
+        bundle_path = ImageLoader.bundle_path
+        try:
+            ImageLoader.bundle_path = FILENAME
+            ImageLoader.bundle_checked = False
+            self.assertIsNone(ImageLoader.get_bundle())
+        finally:
+            ImageLoader.bundle_path = bundle_path
+            ImageLoader.bundle_checked = False
+            ImageLoader.bundle = None
+
+unittest.main()
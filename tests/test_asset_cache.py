@@ -0,0 +1,95 @@
+import sys
+import unittest
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_asset_cache
+
+LRU order, pins and eviction listeners of the AssetCache behind ImageLoader, with plain strings as the assets.
+"""
+
+sys.path.insert(0, '../lib')
+from assets.asset_cache import AssetCache
+
+class TestAssetCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = AssetCache(max_bytes=300)
+        self.evicted = []
+        self.cache.add_listener(self.evicted.append)
+
+    def test_lru_order(self):
+        cache = self.cache
+        cache.put('a', 'A', 100)
+        cache.put('b', 'B', 100)
+        cache.put('c', 'C', 100)
+        self.assertEqual(cache.get('a'), 'A')   # b is now the least recently used
+
+        cache.put('d', 'D', 100)
+        self.assertEqual(self.evicted, ['b'])
+        self.assertIsNone(cache.get('b'))
+
+        cache.put('e', 'E', 150)                # c, then a
+        self.assertEqual(self.evicted, ['b', 'c', 'a'])
+        self.assertEqual(cache.resident_bytes, 250)
+
+        stats = cache.stats()
+        self.assertEqual((stats['evictions'], stats['evicted_bytes']), (3, 300))
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_pinned_survives_over_ceiling(self):
+        cache = self.cache
+        cache.put('player', 'P', 200)
+        cache.pin('player')
+        cache.put('hud', 'H', 100)
+        cache.pin('hud')
+
+        """ Nothing can be evicted, so the new asset goes in over the ceiling """
+        cache.put('enemy', 'E', 100)
+        self.assertEqual(self.evicted, [])
+        self.assertEqual(cache.resident_bytes, 400)
+
+        cache.put('wall', 'W', 50)
+        self.assertEqual(self.evicted, ['enemy'])
+        self.assertTrue(cache.has('player') and cache.has('hud'))
+
+        """ Pins are counted """
+        cache.pin('player')
+        cache.unpin('player')
+        self.assertTrue(cache.is_pinned('player'))
+        cache.unpin('player')
+        self.assertFalse(cache.is_pinned('player'))
+        self.assertFalse(cache.unpin('player'))
+
+    def test_listener(self):
+        cache = self.cache
+        calls = []
+        cache.add_listener(lambda key: calls.append((key, cache.has(key))))
+        cache.put('a', 'A', 200)
+        cache.put('b', 'B', 200)
+
+        """ Called after the entry is gone, and not for plain removes """
+        self.assertEqual(calls, [('a', False)])
+        cache.remove('b')
+        self.assertEqual(calls, [('a', False)])
+
+    def test_grow(self):
+        cache = self.cache
+        cache.put('a', 'A', 100)
+        cache.put('b', 'B', 100)
+        cache.put('c', 'C', 50)
+
+        """ Prescaled frames of c push the cache over the ceiling: the LRU entries go, c stays """
+        self.assertTrue(cache.grow('c', 120))
+        self.assertEqual(self.evicted, ['a'])
+        self.assertEqual(cache.resident_bytes, 270)
+
+        """ Even when it is the least recently used, and alone over the ceiling """
+        cache.get('b')
+        self.assertTrue(cache.grow('c', 200))
+        self.assertEqual(self.evicted, ['a', 'b'])
+        self.assertTrue(cache.has('c'))
+        self.assertFalse(cache.is_pinned('c'))
+        self.assertEqual(cache.resident_bytes, 370)
+
+        self.assertFalse(cache.grow('missing', 10))
+
+unittest.main()
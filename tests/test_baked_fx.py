@@ -0,0 +1,94 @@
+import os
+import sys
+import unittest
+import random
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_baked_fx
+"""
+
+sys.path.insert(0, '../lib')
+from baked_fx import BakeRecorder, BakedEffect, bake, save_baked
+from explosion_fx import bake_explosion, draw_explosion, explosion_radius, FRAME_MS, DURATION_MS
+
+FILENAME = 'test_effect.fx'
+
+class RectDisplay:
+    width = 96
+    height = 64
+
+    def __init__(self):
+        self.rects = []
+
+    def fill_rect(self, x, y, width, height, color):
+        self.rects.append((x, y, width, height, color))
+
+class TestBakedFx(unittest.TestCase):
+    def tearDown(self):
+        try:
+            os.remove(FILENAME)
+        except OSError:
+            pass
+
+    def test_playback(self):
+        """ Three variants of a square that moves to the left, each its own color """
+        variant_colors = iter([0, 1, 2])
+        def draw_frame(recorder, frame_idx):
+            if frame_idx == 0:
+                recorder.color = next(variant_colors)
+            recorder.fill_rect(-frame_idx * 10, -5, 10, 10, recorder.color)
+            recorder.hline(0, frame_idx, 20, recorder.color)
+
+        variants, _ = bake(draw_frame, 3, 4)
+        save_baked(FILENAME, variants, 50)
+
+        effect = BakedEffect.open(FILENAME)
+        self.assertEqual((effect.num_variants, effect.num_frames, effect.duration_ms), (3, 4, 200))
+
+        display = RectDisplay()
+        effect.start(variant=2)
+        frame_idx = effect.frame_at(160)
+        effect.draw(display, frame_idx, 50, 30, [0x1111, 0x2222, 0x3333])
+        self.assertEqual(display.rects, [(20, 25, 10, 10, 0x3333), (50, 33, 20, 1, 0x3333)])
+        self.assertEqual(effect.frame_at(200), -1)
+        effect.close()
+
+    def test_offscreen_rects_are_dropped(self):
+        recorder = BakeRecorder(96, 64)
+        recorder.fill_rect(-200, 0, 10, 10, 1)
+        recorder.fill_rect(0, 64, 10, 10, 1)
+        recorder.fill_rect(0, 0, 0, 10, 1)
+        recorder.fill_rect(-150, -10, 60, 10, 1)     # Still visible with the effect at the right of the screen
+        recorder.end_frame()
+        self.assertEqual(recorder.dropped, 3)
+        self.assertEqual(len(recorder.frames[0]), 5)
+
+    def test_explosion(self):
+        """ The baked explosion plays the same rects as the live one did while baking, minus those off screen """
+        random.seed(5)
+        bake_explosion(FILENAME, 7, num_variants=1)
+
+        random.seed(5)
+        live = RectDisplay()
+        num_frames = DURATION_MS // FRAME_MS + 1
+        for frame_idx in range(num_frames):
+            radius = explosion_radius(frame_idx * FRAME_MS)
+            if radius > 0:
+                draw_explosion(live, 0, 0, radius, frame_idx * FRAME_MS, tuple(range(7)))
+
+        visible = [rect for rect in live.rects if rect[0] < 96 and rect[1] < 64 and rect[0] + rect[2] > -96 and
+                   rect[1] + rect[3] > -64 and rect[2] > 0]
+
+        effect = BakedEffect.open(FILENAME)
+        effect.start()
+        baked = RectDisplay()
+        for frame_idx in range(effect.num_frames):
+            effect.draw(baked, frame_idx, 0, 0, tuple(range(7)))
+        effect.close()
+
+        self.assertEqual(baked.rects, visible)
+
+    def test_missing_file(self):
+        self.assertIsNone(BakedEffect.open('no_such_effect.fx'))
+
+unittest.main()
@@ -0,0 +1,162 @@
+import sys
+import unittest
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_cmd_list
+
+Records frames of hw_line() / hw_rect() calls into the two alternating command lists, the way SSD1331PIO does, and
+decodes what would be sent to the display. As in SSD1331PIO.swap_buffers(), the commands of a frame are sent on the
+show() after the one which ends it, once the frame itself is on the display RAM.
+"""
+
+sys.path.insert(0, '../lib')
+from ssd1331_cmd_list import DrawCommandList, CommandRecorder, CMD_FILL, CMD_DRAW_RECT, LINE_SIZE, RECT_SIZE, \
+    FILL_SIZE
+
+WHITE = 0xFFFF
+RED = 0x00F8    # byte swapped, like the framebuffer
+
+class FakeFramebuf:
+    """ Records what falls back to the framebuffer """
+    def __init__(self):
+        self.drawn = []
+
+    def line(self, x1, y1, x2, y2, color):
+        self.drawn.append(('line', x1, y1, x2, y2))
+
+    def rect(self, x, y, width, height, color, fill=None):
+        self.drawn.append(('rect', x, y, width, height))
+
+class FakeDisplay:
+    """ The command list handling of SSD1331PIO: hw_line(), hw_rect(), and the send and swap of swap_buffers(), in
+    the same order """
+    def __init__(self, max_cmds=4):
+        self.cmd_write = DrawCommandList(max_cmds)
+        self.cmd_read = DrawCommandList(max_cmds)
+        self.write_framebuf = FakeFramebuf()
+        self.sent = b''
+
+    def hw_line(self, x1, y1, x2, y2, color):
+        if not (self.cmd_write and self.cmd_write.line(x1, y1, x2, y2, color)):
+            self.write_framebuf.line(x1, y1, x2, y2, color)
+
+    def hw_rect(self, x, y, width, height, color, fill=None):
+        if not (self.cmd_write and self.cmd_write.rect(x, y, width, height, color, fill)):
+            self.write_framebuf.rect(x, y, width, height, color, fill)
+
+    def send_commands(self, cmd_list):
+        if not cmd_list.num_cmds:
+            return
+        self.sent = bytes(cmd_list.get_bytes())
+
+    def show(self):
+        """ Only what this show() sends ends up in self.sent """
+        self.sent = b''
+        if self.cmd_write:
+            self.send_commands(self.cmd_read)
+            self.cmd_read, self.cmd_write = self.cmd_write, self.cmd_read
+            self.cmd_write.reset()
+
+def fill_toggles(data):
+    """ The fill modes set by the stream, in order """
+    toggles = []
+    i = 0
+    while i < len(data):
+        if data[i] == CMD_FILL:
+            toggles.append(data[i+1])
+            i += FILL_SIZE
+        else:
+            i += RECT_SIZE if data[i] == CMD_DRAW_RECT else LINE_SIZE
+    return toggles
+
+class TestCommandList(unittest.TestCase):
+    def setUp(self):
+        self.display = FakeDisplay()
+        self.recorder = CommandRecorder()
+
+    def test_frame(self):
+        display = self.display
+        display.hw_line(0, 0, 95, 63, WHITE)
+        display.hw_rect(10, 10, 20, 10, RED, True)
+        display.hw_rect(0, 0, 5, 5, RED)
+        display.hw_line(0, 0, 200, 0, WHITE)     # off screen
+        display.hw_rect(1, 1, 2, 2, RED)
+        display.hw_rect(2, 2, 2, 2, RED)         # over budget
+        display.show()
+        self.assertEqual(display.sent, b'')
+        self.assertEqual(display.cmd_read.overflows, 2)
+
+        display.show()
+        cmds = self.recorder.decode(display.sent)
+        self.assertTrue(self.recorder.is_valid(), self.recorder.errors)
+        self.assertEqual(cmds, [
+            ('line', 0, 0, 95, 63),
+            ('rect', 10, 10, 29, 19, True),
+            ('rect', 0, 0, 4, 4, False),
+            ('rect', 1, 1, 2, 2, False),
+        ])
+        self.assertEqual(fill_toggles(display.sent), [0x01, 0x00])
+        self.assertEqual(display.write_framebuf.drawn, [('line', 0, 0, 200, 0), ('rect', 2, 2, 2, 2)])
+
+        """ 6 bit channels, in the order of the RGB565 fields """
+        self.assertEqual(list(display.sent[5:8]), [0x3E, 0x3F, 0x3E])
+        self.assertEqual(list(display.sent[LINE_SIZE + FILL_SIZE + 5:LINE_SIZE + FILL_SIZE + 11]), [0x3E, 0, 0] * 2)
+
+    def test_fill_mode_across_lists(self):
+        """ Each list starts with its own fill mode command, since the other list changes the controller's """
+        display = self.display
+        display.hw_rect(0, 0, 4, 4, RED, True)
+        display.show()
+
+        display.hw_rect(0, 0, 4, 4, RED)
+        display.show()
+        self.assertEqual(fill_toggles(display.sent), [0x01])
+
+        display.hw_rect(0, 0, 4, 4, RED, True)
+        display.show()
+        self.assertEqual(fill_toggles(display.sent), [0x00])
+
+        display.show()
+        self.assertEqual(fill_toggles(display.sent), [0x01])
+        self.assertEqual(self.recorder.decode(display.sent), [('rect', 0, 0, 3, 3, True)])
+
+    def test_sent_one_frame_later(self):
+        """ The list of a frame is sent by the next show(), after the frame DMA has put that frame on the display """
+        display = self.display
+        display.show()
+        self.assertEqual(display.sent, b'')
+
+        display.hw_line(0, 0, 9, 0, WHITE)
+        display.show()
+        self.assertEqual(display.sent, b'')
+
+        display.hw_rect(0, 0, 4, 4, RED)
+        display.show()
+        self.assertEqual(self.recorder.decode(display.sent), [('line', 0, 0, 9, 0)])
+
+        display.show()
+        self.assertEqual(self.recorder.decode(display.sent), [('rect', 0, 0, 3, 3, False)])
+
+        display.show()
+        self.assertEqual(display.sent, b'')
+
+    def test_commands(self):
+        display = self.display
+        display.hw_line(0, 0, 9, 0, WHITE)
+        display.hw_rect(0, 0, 4, 4, RED, True)
+        cmds = list(display.cmd_write.commands())
+        self.assertEqual(cmds, [(0, LINE_SIZE, 400), (LINE_SIZE, LINE_SIZE + FILL_SIZE + RECT_SIZE, 1000)])
+
+    def test_estimate(self):
+        display = self.display
+        display.hw_line(0, 0, 3, 3, WHITE)      # 4 windows of 6 bytes, 4 pixels
+        display.hw_line(0, 0, 9, 0, WHITE)      # 1 window, 10 pixels
+        display.show()
+        display.show()
+
+        stats = self.recorder.estimate(display.sent)
+        self.assertEqual(stats['commands'], 2)
+        self.assertEqual(stats['cmd_bytes'], LINE_SIZE * 2)
+        self.assertEqual(stats['px_bytes'], (4 * 6 + 4 * 2) + (6 + 10 * 2))
+
+unittest.main()
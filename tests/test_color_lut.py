@@ -0,0 +1,82 @@
+import sys
+import unittest
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_color_lut
+
+Checks that the software emulation of the indexed display scan-out produces exactly the same bytes as the RGB565
+driver would send for the same image.
+"""
+
+sys.path.insert(0, '../lib')
+import framebuf
+from uctypes import addressof
+from colors.color_lut import ColorLUT, lut_buffer
+from colors.framebuffer_palette import FramebufferPalette
+
+WIDTH = 8
+HEIGHT = 4
+
+class TestColorLUT(unittest.TestCase):
+    def setUp(self):
+        self.lut = ColorLUT()
+        self.palette = FramebufferPalette([(0, 0, 0), (255, 0, 0), (0, 255, 0), (0, 0, 255), (18, 52, 86)])
+
+    def test_set_get_color(self):
+        for color in (0x0000, 0xFFFF, 0x1234, 0xF800, 0x001F):
+            self.lut.set_color(7, color)
+            self.assertEqual(self.lut.get_color(7), color)
+
+    def test_lut_buffer_aligned(self):
+        """ The PIO builds the entry address as (lut_addr >> 9) << 9 | index << 1, so the data must be 512 aligned """
+        for _ in range(8):
+            buffer = lut_buffer(512, ColorLUT.NUM_COLORS * 2)
+            self.assertEqual(len(buffer), 512)
+            self.assertEqual(addressof(buffer) % 512, 0)
+
+        lut = ColorLUT(lut_buffer(512))
+        lut.set_color(255, 0x1234)
+        self.assertEqual(lut.get_color(255), 0x1234)
+
+    def test_alloc(self):
+        self.assertEqual(self.lut.alloc(10), 1)
+        self.assertEqual(self.lut.alloc(5), 11)
+        with self.assertRaises(ValueError):
+            self.lut.alloc(250)
+
+    def test_load_palette(self):
+        index_palette = self.lut.load_palette(self.palette)
+        for i in range(self.palette.num_colors):
+            lut_idx = index_palette.pixel(i, 0)
+            self.assertEqual(lut_idx, i + 1)
+            self.assertEqual(self.lut.get_color(lut_idx), self.palette.get_bytes(i))
+
+    def test_expand_matches_rgb565(self):
+        """ The same pattern drawn into both kinds of framebuffer must reach the display as the same bytes """
+        index_palette = self.lut.load_palette(self.palette)
+        num_colors = self.palette.num_colors
+
+        rgb_buf = bytearray(WIDTH * HEIGHT * 2)
+        rgb_fb = framebuf.FrameBuffer(rgb_buf, WIDTH, HEIGHT, framebuf.RGB565)
+        idx_buf = bytearray(WIDTH * HEIGHT)
+        idx_fb = framebuf.FrameBuffer(idx_buf, WIDTH, HEIGHT, framebuf.GS8)
+
+        for y in range(HEIGHT):
+            for x in range(WIDTH):
+                color = (x + y * 3) % num_colors
+                rgb_fb.pixel(x, y, self.palette.get_bytes(color))
+                idx_fb.pixel(x, y, index_palette.pixel(color, 0))
+
+        self.assertEqual(bytes(self.lut.expand(idx_buf)), bytes(rgb_buf))
+
+    def test_expand_global_recolor(self):
+        idx_buf = bytearray([3] * 16)
+        self.lut.set_color(3, 0xABCD)
+        first = bytes(self.lut.expand(idx_buf))
+        self.lut.set_color(3, 0x1234)
+        second = bytes(self.lut.expand(idx_buf))
+
+        self.assertEqual(first, bytes([0xCD, 0xAB] * 16))
+        self.assertEqual(second, bytes([0x34, 0x12] * 16))
+
+unittest.main()
@@ -0,0 +1,128 @@
+import sys
+import unittest
+import random
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_fixed_step
+
+Sprites moving towards the player through the game camera and the Collider, updated with a fixed timestep while the
+frame times vary: the collisions must come out the same, at the same stage times.
+"""
+
+sys.path.insert(0, '../lib')
+from fixed_step import FixedStep
+from collider import Collider
+from perspective_camera import PerspectiveCamera
+
+STEP_MS = 8
+PLAYER_LANE = 2
+
+class FakeDisplay:
+    width = 96
+    height = 64
+
+class FakePlayer:
+    visible = True
+    active = True
+    has_physics = True
+    lane_mask = 1 << PLAYER_LANE
+
+class FakeSprite:
+    def __init__(self, name, lane, z, speed):
+        self.name = name
+        self.lane_mask = 1 << lane
+        self.z = z
+        self.z_frac = 0
+        self.speed = speed
+        self.floor_y = 0
+
+class World:
+    """ The part of GameScreen.step() that matters for collisions: z motion as in SpriteManager3D.update_sprite(),
+    the floor y from the camera, and the collider (GameScreen.init_camera() / crash_y_start and crash_y_end) """
+    def __init__(self):
+        self.camera = PerspectiveCamera(FakeDisplay(), pos_x=0, pos_y=50, pos_z=-25, vp_x=0, vp_y=16, min_y=20,
+                                        max_y=64, fov=90.0)
+        self.collider = Collider(FakePlayer(), None, 52, 100)
+        self.collider.add_callback(self.on_crash)
+        self.sprites = [
+            FakeSprite('fast', PLAYER_LANE, 300, -600),
+            FakeSprite('medium', PLAYER_LANE, 500, -250),
+            FakeSprite('slow', PLAYER_LANE, 160, -40),
+            FakeSprite('other lane', PLAYER_LANE + 1, 300, -600),
+        ]
+        self.now_ms = 0
+        self.crashes = []
+
+    def step(self, step_ms):
+        self.now_ms += step_ms
+        self.update(step_ms / 1000)
+
+    def update(self, elapsed):
+        for sprite in self.sprites:
+            z_fixed = (sprite.z << 8) + sprite.z_frac + int(sprite.speed * elapsed * 256)
+            sprite.z, sprite.z_frac = z_fixed >> 8, z_fixed & 0xFF
+            sprite.floor_y, _ = self.camera.get_scale(sprite.z)
+
+        self.collider.check_collisions(self.sprites)
+        self.sprites = [sprite for sprite in self.sprites if sprite.z > 60]     # Past the player
+
+    def on_crash(self):
+        """ Same check as the collider, to know which sprite it was """
+        for sprite in self.sprites:
+            if 52 <= sprite.floor_y < 100 and sprite.lane_mask & FakePlayer.lane_mask:
+                self.crashes.append((self.now_ms, sprite.name))
+                self.sprites.remove(sprite)
+                return
+
+def run_fixed(frame_times):
+    world = World()
+    fixed_step = FixedStep(world.step, STEP_MS, max_steps=100)
+    for elapsed_ms in frame_times:
+        fixed_step.advance(elapsed_ms)
+    return world.crashes
+
+def frames_for(total_ms, frame_ms_func):
+    frames = []
+    while sum(frames) < total_ms:
+        frames.append(frame_ms_func())
+    return frames
+
+class TestFixedStep(unittest.TestCase):
+    def test_identical_collisions(self):
+        """ Steady 60 FPS, jittery frames, and long explosion frames: same crashes at the same times """
+        rng = random.Random(3)
+        steady = run_fixed([16] * 200)
+        jitter = run_fixed(frames_for(3200, lambda: rng.randint(5, 60)))
+        spikes = run_fixed(([16] * 5 + [180]) * 20)
+
+        self.assertEqual([name for _, name in steady], ['fast', 'slow', 'medium'])
+        self.assertEqual(jitter, steady)
+        self.assertEqual(spikes, steady)
+
+    def test_variable_step_tunnels(self):
+        """ What the fixed step fixes: with the frame time fed straight into the update, the fast sprite jumps over
+        the collision window on a long frame """
+        world = World()
+        for elapsed_ms in [16] * 5 + [180] * 10:
+            world.now_ms += elapsed_ms
+            world.update(elapsed_ms / 1000)
+
+        self.assertNotIn('fast', [name for _, name in world.crashes])
+
+    def test_alpha(self):
+        steps = []
+        fixed_step = FixedStep(steps.append, STEP_MS, max_steps=8)
+        self.assertEqual(fixed_step.advance(12), 1)
+        self.assertEqual(fixed_step.alpha, 0.5)
+        self.assertEqual(fixed_step.advance(4), 1)
+        self.assertEqual(fixed_step.alpha, 0)
+        self.assertEqual(steps, [STEP_MS, STEP_MS])
+
+    def test_max_steps(self):
+        """ A very long frame only runs max_steps, and the rest of the time is dropped """
+        fixed_step = FixedStep(lambda step_ms: None, STEP_MS, max_steps=8)
+        self.assertEqual(fixed_step.advance(1003), 8)
+        self.assertEqual(fixed_step.dropped_ms, 1000 - 8 * STEP_MS)
+        self.assertEqual(fixed_step.accumulator_ms, 3)
+
+unittest.main()
@@ -0,0 +1,66 @@
+import sys
+import unittest
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_frame_scheduler
+
+The frame scheduler on a simulated clock: phase order, adaptive sleeps and skipping of low priority jobs.
+"""
+
+sys.path.insert(0, '../lib')
+from frame_scheduler import FrameScheduler, SimClock, PHASE_RENDER
+
+class TestFrameScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = SimClock()
+        self.calls = []
+
+    def work(self, name, ms):
+        def phase():
+            self.calls.append(name)
+            self.clock.advance(ms * 1000)
+        return phase
+
+    def test_order(self):
+        scheduler = FrameScheduler(33, update=self.work('update', 1), render=self.work('render', 1), clock=self.clock)
+        scheduler.add_job(self.work('a', 0))
+        scheduler.add_job(self.work('b', 0), low_priority=True)
+        scheduler.run_sync(2)
+        self.assertEqual(self.calls, ['update', 'a', 'b', 'render'] * 2)
+
+    def test_sleeps_rest_of_budget(self):
+        """ 10ms of work in a 33ms frame: the frames start 33ms apart, even when every sleep oversleeps by 2ms """
+        self.clock = SimClock(oversleep_us=2000)
+        starts = []
+        def update():
+            starts.append(self.clock.ticks_ms())
+            self.clock.advance(4000)
+
+        scheduler = FrameScheduler(33, update=update, render=self.work('render', 6), clock=self.clock)
+        scheduler.run_sync(200)
+
+        periods = [end - start for start, end in zip(starts[-50:], starts[-49:])]
+        self.assertEqual(scheduler.sleep_ms, 21)
+        self.assertTrue(all(period == 33 for period in periods), periods)
+        self.assertEqual(scheduler.overruns, 0)
+        self.assertEqual(scheduler.phase_max_us[PHASE_RENDER], 6000)
+
+    def test_skip_low_priority(self):
+        """ With a 30ms render in a 33ms frame, the 5ms low priority job only runs every max_skips + 1 frames. The high
+        priority one always runs """
+        scheduler = FrameScheduler(33, render=self.work('render', 30), clock=self.clock)
+        scheduler.add_job(self.work('hud', 5), low_priority=True)
+        scheduler.add_job(self.work('speed', 1))
+        scheduler.run_sync(50)
+
+        self.assertEqual(self.calls.count('speed'), 50)
+        self.assertLess(self.calls.count('hud'), 50 // (scheduler.max_skips + 1) + 3)
+        self.assertGreater(scheduler.job_skips[0], 0)
+
+    def test_interval_jobs(self):
+        scheduler = FrameScheduler(10, update=self.work('update', 1), clock=self.clock)
+        scheduler.add_job(self.work('fps_print', 0), interval_ms=100)
+        scheduler.run_sync(100)     # 1 second
+        self.assertEqual(self.calls.count('fps_print'), 10)
+
+unittest.main()
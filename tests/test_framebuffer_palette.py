@@ -0,0 +1,93 @@
+import sys
+import unittest
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_framebuffer_palette
+
+concat() and mirror() against the color by color copies they replaced (the old `+` and mirror()), and the vertical
+palette of RoadGrid built from a single arena against the one built the old way.
+"""
+
+sys.path.insert(0, '../lib')
+import framebuf
+from colors import color_util as colors
+from colors.framebuffer_palette import FramebufferPalette
+from road_grid import RoadGrid
+
+RED, GREEN, BLUE, WHITE, GRAY = (255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255), (80, 90, 100)
+
+def old_add(first, second):
+    """ What `first + second` used to do """
+    new = FramebufferPalette(first.num_colors + second.num_colors)
+    for i in range(first.num_colors):
+        new.set_bytes(i, first.get_bytes(i))
+    for i in range(second.num_colors):
+        new.set_bytes(first.num_colors + i, second.get_bytes(i))
+    return new
+
+def old_mirror(palette):
+    """ What palette.mirror() used to do """
+    num_colors = palette.num_colors
+    new = FramebufferPalette(num_colors)
+    for i in range(num_colors):
+        new.pixel(num_colors - i - 1, 0, palette.get_bytes(i))
+    return new
+
+class TestFramebufferPalette(unittest.TestCase):
+    def setUp(self):
+        self.first = FramebufferPalette([RED, GREEN, BLUE])
+        self.second = FramebufferPalette([WHITE, GRAY])
+
+    def test_concat(self):
+        expected = bytes(old_add(self.first, self.second).palette)
+        self.assertEqual(bytes((self.first + self.second).palette), expected)
+
+        joined = FramebufferPalette.concat([self.first, self.second])
+        self.assertEqual(bytes(joined.palette), expected)
+        self.assertEqual(joined.num_colors, 5)
+
+        """ Into an arena, after the colors already in it """
+        arena = bytearray(b'\xAA\xBB' * 7)
+        joined = FramebufferPalette.concat([self.first, self.second], arena, 2)
+        self.assertEqual(bytes(joined.palette), expected)
+        self.assertEqual(bytes(arena[:4]), b'\xAA\xBB' * 2)
+        self.assertEqual(joined.get_int(3), self.second.get_int(0))
+
+        """ It is a view: writing to it writes to the arena """
+        joined.set_int(0, 0x1234)
+        self.assertEqual(bytes(arena[4:6]), b'\x34\x12')
+
+    def test_mirror(self):
+        for palette in (self.first, self.second, FramebufferPalette([GRAY])):
+            expected = bytes(old_mirror(palette).palette)
+            self.assertEqual(bytes(palette.mirror().palette), expected)
+
+            out = bytearray(palette.num_colors * 4)
+            mirrored = palette.mirror(out, palette.num_colors)
+            self.assertEqual(bytes(mirrored.palette), expected)
+            self.assertEqual(bytes(out[palette.num_colors * 2:]), expected)
+
+    def test_mirror_needs_2_byte_colors(self):
+        for color_mode in (framebuf.GS8, framebuf.GS4_HMSB):
+            palette = FramebufferPalette(bytearray(4), color_mode=color_mode)
+            with self.assertRaises(ValueError):
+                palette.mirror()
+
+    def test_get_ints(self):
+        palette = self.first + self.second
+        ints = [palette.get_int(i) for i in range(palette.num_colors)]
+        self.assertEqual(list(palette.get_ints()), ints)
+        self.assertEqual(list(palette.get_ints(1, 3)), ints[1:4])
+
+    def test_road_grid_palette(self):
+        """ The colors, followed by the same colors mirrored, as the old RoadGrid made them """
+        vert_palette = FramebufferPalette([colors.hex_to_rgb(c) for c in RoadGrid.vert_palette])
+        final = vert_palette + old_mirror(vert_palette)
+        expected = [final.get_bytes(i, False) for i in range(final.num_colors)]
+
+        grid = RoadGrid.__new__(RoadGrid)
+        grid.check_mem = lambda: None
+        grid.init_palettes()
+        self.assertEqual(list(grid.vert_palette), expected)
+
+unittest.main()
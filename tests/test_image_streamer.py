@@ -0,0 +1,155 @@
+import sys
+import unittest
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_image_streamer
+
+ImageStreamer with a fake clock: the fake jobs advance the clock by a fixed cost per step, so that the length of
+every slice is known exactly, and can be checked against the time budget.
+"""
+
+sys.path.insert(0, '../lib')
+import uasyncio as asyncio
+from images.image_streamer import ImageStreamer, StreamJob
+from images.image_loader import ImageLoader
+from images.bmp_reader import BMPReader
+
+IMG_DIR = '../img/'
+
+class FakeClock:
+    def __init__(self):
+        self.now_us = 0
+
+    def ticks_us(self):
+        return self.now_us
+
+def fake_steps(clock, job, num_steps, step_us):
+    job.total_steps = num_steps
+    for _ in range(num_steps):
+        clock.now_us += step_us
+        yield
+
+    return None
+
+def failing_steps(clock, job, num_steps, step_us):
+    """ Like a step generator that hits a bad file halfway through """
+    job.total_steps = num_steps * 2
+    yield from fake_steps(clock, job, num_steps, step_us)
+    raise ValueError("Not a sprite asset")
+
+class TestImageStreamer(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def add_fake_job(self, streamer, name, num_steps, step_us, size=1000):
+        job = StreamJob(name, size)
+        job.steps = fake_steps(self.clock, job, num_steps, step_us)
+        streamer.add_job(job)
+
+    def run_all(self, streamer):
+        slices = []
+        progress = []
+        while True:
+            start_us = self.clock.now_us
+            if not streamer.run_slice():
+                break
+            slices.append(self.clock.now_us - start_us)
+            progress.append(streamer.progress)
+
+        return slices, progress
+
+    def test_slices_within_budget(self):
+        budget_us = 2000
+        streamer = ImageStreamer(budget_us=budget_us, max_steps=1000, ticks_us=self.clock.ticks_us)
+        self.add_fake_job(streamer, 'cheap', 200, 150)
+        self.add_fake_job(streamer, 'expensive', 50, 700)
+        self.add_fake_job(streamer, 'tiny', 3, 10)
+
+        slices, _ = self.run_all(streamer)
+
+        self.assertGreater(len(slices), 10)
+        for slice_us in slices:
+            self.assertLessEqual(slice_us, budget_us)
+        self.assertLessEqual(streamer.max_slice_us, budget_us)
+        self.assertEqual(self.clock.now_us, 200 * 150 + 50 * 700 + 3 * 10)
+
+    def test_max_steps(self):
+        streamer = ImageStreamer(budget_us=1000000, max_steps=10, ticks_us=self.clock.ticks_us)
+        self.add_fake_job(streamer, 'rows', 95, 1)
+
+        slices, _ = self.run_all(streamer)
+        self.assertEqual(len(slices), 10)
+
+    def test_progress(self):
+        streamer = ImageStreamer(budget_us=1000, ticks_us=self.clock.ticks_us)
+        self.add_fake_job(streamer, 'first', 40, 100, size=3000)
+        self.add_fake_job(streamer, 'second', 40, 100, size=1000)
+
+        _, progress = self.run_all(streamer)
+
+        for before, after in zip(progress, progress[1:]):
+            self.assertLessEqual(before, after)
+        self.assertEqual(progress[-1], 1)
+        self.assertTrue(streamer.done)
+
+    def test_missing_file(self):
+        streamer = ImageStreamer(ticks_us=self.clock.ticks_us)
+        self.assertFalse(streamer.queue(IMG_DIR + 'does_not_exist.bmp', 16, 16))
+        self.assertEqual(streamer.errors, 1)
+
+        self.assertFalse(streamer.run_slice())
+        self.assertTrue(streamer.done)
+        self.assertEqual(streamer.progress, 1)
+
+    def test_failing_job(self):
+        """ A job that raises is counted as done, and the next one still loads """
+        streamer = ImageStreamer(budget_us=1000, ticks_us=self.clock.ticks_us)
+        job = StreamJob('bad', 1000)
+        job.steps = failing_steps(self.clock, job, 20, 100)
+        streamer.add_job(job)
+        self.add_fake_job(streamer, 'good', 20, 100)
+
+        _, progress = self.run_all(streamer)
+        self.assertEqual(streamer.errors, 1)
+        self.assertTrue(streamer.done)
+        self.assertEqual(progress[-1], 1)
+        self.assertEqual(self.clock.now_us, 40 * 100)
+
+    def test_run_sets_done(self):
+        """ What GameScreen.load_stage() waits on: done, and the event set, even when every image fails """
+        streamer = ImageStreamer(ticks_us=self.clock.ticks_us)
+        streamer.queue(IMG_DIR + 'does_not_exist.bmp', 16, 16)
+        job = StreamJob('bad', 1000)
+        job.steps = failing_steps(self.clock, job, 2, 100)
+        streamer.add_job(job)
+
+        async def load():
+            task = asyncio.create_task(streamer.run())
+            while not streamer.done:
+                await streamer.progress_event.wait()
+                streamer.progress_event.clear()
+            await task
+
+        asyncio.run(load())
+        self.assertEqual(streamer.errors, 2)
+        self.assertTrue(streamer.done)
+
+    def test_bmp_matches_reader(self):
+        filename = IMG_DIR + 'bike_sprite.bmp'
+        ImageLoader.cache.remove(filename)
+
+        streamer = ImageStreamer(budget_us=500)
+        streamer.queue(filename, 32, 22)
+        while streamer.run_slice():
+            pass
+
+        streamed = ImageLoader.cache.get(filename)
+        loaded = BMPReader().load(filename, 32, 22)
+
+        self.assertEqual(len(streamed.frames), len(loaded.frames))
+        for streamed_frame, loaded_frame in zip(streamed.frames, loaded.frames):
+            for y in range(22):
+                for x in range(32):
+                    self.assertEqual(streamed_frame.pixel(x, y), loaded_frame.pixel(x, y))
+
+unittest.main()
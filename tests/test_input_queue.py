@@ -0,0 +1,108 @@
+import sys
+import unittest
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_input_queue
+
+The encoder is an InjectedEncoder and time a SimClock, so this also runs on the host.
+"""
+
+sys.path.insert(0, '../lib')
+from input.input_queue import InputQueue, InjectedEncoder, BUTTON_ACTION
+from input.game_input import GameInput
+from frame_scheduler import SimClock
+
+class Player:
+    def __init__(self):
+        self.moves = []
+
+    def move_left(self):
+        self.moves.append('left')
+
+    def move_right(self):
+        self.moves.append('right')
+
+class Recorder:
+    def __init__(self):
+        self.inputs = []
+
+    def input(self, code):
+        self.inputs.append(code)
+
+def make_input(clock):
+    encoder = InjectedEncoder()
+    player = Player()
+    game_input = GameInput(encoder=encoder, clock=clock)
+    game_input.add_listener_left(player.move_left)
+    game_input.add_listener_right(player.move_right)
+    return game_input, encoder, player
+
+class TestInputQueue(unittest.TestCase):
+    def test_handlers_only_run_on_poll(self):
+        game_input, encoder, player = make_input(SimClock())
+        encoder.turn(1)
+        self.assertEqual(player.moves, [])
+        self.assertEqual(len(game_input.queue), 1)
+
+        game_input.poll()
+        self.assertEqual(player.moves, ['right'])
+        game_input.poll()
+        self.assertEqual(player.moves, ['right'])
+
+    def test_coalescing(self):
+        game_input, encoder, player = make_input(SimClock())
+        game_input.recorder = Recorder()
+
+        encoder.turn(-3)
+        game_input.poll()
+        encoder.turn(2)
+        encoder.turn(-2)    # wiggle: cancels out
+        game_input.poll()
+        encoder.turn(2)
+        encoder.turn(-1)
+        game_input.poll()
+
+        self.assertEqual(player.moves, ['left', 'right'])
+        self.assertEqual(game_input.recorder.inputs, [GameInput.LEFT, GameInput.RIGHT])
+
+    def test_action(self):
+        game_input, _, player = make_input(SimClock())
+        game_input.handler_action = lambda: player.moves.append('action')
+        game_input.press_action()
+        game_input.poll()
+        self.assertEqual(player.moves, ['action'])
+
+    def test_latency(self):
+        """ Input 5ms into a frame, applied at the start of the next one (16ms), shown after rendering it (+20ms) """
+        clock = SimClock()
+        game_input, encoder, _ = make_input(clock)
+        queue = game_input.queue
+
+        clock.advance(5000)
+        encoder.turn(1)
+        clock.advance(3000)
+        encoder.turn(1)
+        clock.advance(8000)
+        game_input.poll()
+        clock.advance(20000)
+        queue.frame_shown()
+
+        """ Frames without input don't count """
+        game_input.poll()
+        clock.advance(20000)
+        queue.frame_shown()
+
+        self.assertEqual(queue.stats(), {'samples': 1, 'last_us': 31000, 'avg_us': 31000, 'max_us': 31000,
+                                         'dropped': 0})
+
+    def test_overflow(self):
+        queue = InputQueue(size=4, clock=SimClock())
+        for _ in range(5):
+            queue.push(1)
+        self.assertEqual(queue.dropped, 2)
+        self.assertEqual(queue.drain(), 3)
+        self.assertTrue(queue.push(-1, BUTTON_ACTION))
+        self.assertEqual(queue.drain(), -1)
+        self.assertEqual(queue.pressed, BUTTON_ACTION)
+
+unittest.main()
@@ -0,0 +1,88 @@
+import os
+import sys
+import unittest
+import math
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_mip_generator
+
+Sizes of the levels, the majority filter and a round trip through the flash cache.
+"""
+
+sys.path.insert(0, '../lib')
+from images.mip_generator import MipCache, mip_levels, downsample, source_key
+from images.bmp_reader import BMPReader
+
+IMG_DIR = '../img/'
+CACHE_DIR = 'mipcache_test'
+
+class TestMipGenerator(unittest.TestCase):
+    def tearDown(self):
+        try:
+            for filename in os.listdir(CACHE_DIR):
+                os.remove(CACHE_DIR + '/' + filename)
+            os.rmdir(CACHE_DIR)
+        except OSError:
+            pass
+
+    def test_levels_match_registry(self):
+        """ Same sizes that SpriteRegistry used to generate for prescaled types """
+        width, height, num_levels = 32, 20, 16
+        levels = mip_levels(width, height, 4, num_levels)
+        self.assertEqual(len(levels), num_levels - 1)
+
+        for i, (level_w, level_h) in enumerate(levels, 1):
+            target_w = math.ceil(width * i / num_levels)
+            target_w += target_w % 2
+            self.assertEqual(level_w, target_w)
+            self.assertEqual(level_h, math.ceil(height * i / num_levels))
+
+    def test_majority(self):
+        """ 4x4 GS8 image: a single stray pixel per 2x2 box must not survive the downscale """
+        src = bytearray([
+            1, 1, 2, 2,
+            1, 3, 2, 2,
+            0, 0, 5, 5,
+            0, 0, 4, 5,
+        ])
+        dst = bytearray(4)
+        downsample(src, 4, 4, dst, 2, 2, 8, alpha_index=0)
+        self.assertEqual(list(dst), [1, 2, 0, 5])
+
+    def test_alpha_needs_majority(self):
+        """ Half transparent boxes stay opaque """
+        src = bytearray([0, 7, 0, 0])
+        dst = bytearray(2)
+        downsample(src, 2, 2, dst, 1, 1, 8, alpha_index=0)
+        self.assertEqual(dst[0], 0)
+
+        src = bytearray([0, 7, 0, 7])
+        downsample(src, 2, 2, dst, 1, 1, 8, alpha_index=0)
+        self.assertEqual(dst[0], 7)
+
+    def test_cache_round_trip(self):
+        image = BMPReader(IMG_DIR).load('skull_16.bmp')
+        cache = MipCache(CACHE_DIR)
+
+        frames, num_bytes = cache.get_frames(image.pixel_bytes, 16, 16, 4, 16, 0)
+        self.assertEqual(cache.misses, 1)
+
+        cached_frames, cached_bytes = cache.get_frames(image.pixel_bytes, 16, 16, 4, 16, 0)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(num_bytes, cached_bytes)
+        self.assertEqual(len(frames), len(cached_frames))
+
+        levels = mip_levels(16, 16, 4, 16)
+        for (level_w, level_h), frame, cached_frame in zip(levels, frames, cached_frames):
+            for y in range(level_h):
+                for x in range(level_w):
+                    self.assertEqual(frame.pixel(x, y), cached_frame.pixel(x, y))
+
+    def test_key_changes_with_source(self):
+        pixels = bytearray(range(32))
+        key = source_key(pixels, 8, 8, 4, 8, 0)
+        pixels[5] ^= 1
+        self.assertNotEqual(key, source_key(pixels, 8, 8, 4, 8, 0))
+        self.assertNotEqual(key, source_key(bytearray(range(32)), 8, 8, 4, 8, 1))
+
+unittest.main()
@@ -0,0 +1,108 @@
+import sys
+import unittest
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_palette_animator
+
+Timing of tick() and the colors written by the cycle / rotate animations, plus the reuse of the slots and arena space
+of removed animations. The ticks are driven by passing 'now' in, so this also runs on the host.
+"""
+
+sys.path.insert(0, '../lib')
+from anim.palette_animator import PaletteAnimator
+from colors.framebuffer_palette import FramebufferPalette
+
+BLACK, RED, GREEN, BLUE, WHITE = (0, 0, 0), (255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255)
+
+def color_at(palette, idx):
+    return bytes(palette.palette[idx * 2:idx * 2 + 2])
+
+class TestPaletteAnimator(unittest.TestCase):
+    def setUp(self):
+        self.animator = PaletteAnimator(arena_size=64, max_anims=3)
+        self.palette = FramebufferPalette([BLACK, RED, GREEN, BLUE, WHITE])
+        self.colors = [color_at(self.palette, i) for i in range(self.palette.num_colors)]
+
+    def start_ms(self, handle):
+        """ When the animation was added (its first step is due one interval later) """
+        return self.animator.next_ms[handle] - self.animator.interval_ms[handle]
+
+    def test_cycle(self):
+        color_list = FramebufferPalette([GREEN, BLUE, WHITE])
+        handle = self.animator.add_cycle(self.palette, color_list, 100, idx=1)
+        start = self.start_ms(handle)
+        green, blue, white = (color_at(color_list, i) for i in range(3))
+
+        self.animator.tick(start + 99)
+        self.assertEqual(color_at(self.palette, 1), self.colors[1])    # not due yet
+
+        expected = [blue, white, green, blue]
+        for step, color in enumerate(expected, 1):
+            self.animator.tick(start + step * 100)
+            self.assertEqual(color_at(self.palette, 1), color, step)
+            self.assertEqual(color_at(self.palette, 0), self.colors[0])
+            self.assertEqual(color_at(self.palette, 2), self.colors[2])
+
+    def test_rotate(self):
+        handle = self.animator.add_rotate(self.palette, 50, start=1, end=4)
+        start = self.start_ms(handle)
+        black, red, green, blue, white = self.colors
+
+        self.animator.tick(start + 50)
+        self.assertEqual([color_at(self.palette, i) for i in range(5)], [black, green, blue, red, white])
+
+        """ A late tick only advances one step, and the next one is due an interval after it """
+        self.animator.tick(start + 180)
+        self.assertEqual([color_at(self.palette, i) for i in range(5)], [black, blue, red, green, white])
+        self.animator.tick(start + 229)
+        self.assertEqual(color_at(self.palette, 1), blue)
+        self.animator.tick(start + 230)
+        self.assertEqual([color_at(self.palette, i) for i in range(5)], [black, red, green, blue, white])
+
+    def test_pause_resume(self):
+        handle = self.animator.add_rotate(self.palette, 50, start=1, end=4)
+        start = self.start_ms(handle)
+        self.animator.pause(handle)
+        self.animator.tick(start + 500)
+        self.assertEqual(color_at(self.palette, 1), self.colors[1])
+
+        self.animator.resume(handle)
+        self.animator.tick(self.start_ms(handle) + 50)
+        self.assertEqual(color_at(self.palette, 1), self.colors[2])
+
+    def test_remove_reuses_slot_and_arena(self):
+        color_list = FramebufferPalette([GREEN, BLUE, WHITE])
+        rotate = self.animator.add_rotate(self.palette, 50, start=1, end=4)     # 10 bytes
+        cycle = self.animator.add_cycle(self.palette, color_list, 100, idx=0)  # 6 bytes
+        self.assertEqual(self.animator.stats()['arena_bytes'], 16)
+
+        self.animator.remove(rotate)
+        self.assertEqual(self.animator.stats()['arena_bytes'], 6)
+        self.assertEqual(self.animator.stats()['anims'], 1)
+
+        """ The cycle moved down to the start of the arena, and still plays the same colors """
+        start = self.start_ms(cycle)
+        self.animator.tick(start + 100)
+        self.assertEqual(color_at(self.palette, 0), color_at(color_list, 1))
+        self.assertEqual(color_at(self.palette, 1), self.colors[1])     # the removed rotation is not ticked
+
+        """ Adding and removing over and over neither runs out of slots, nor of arena """
+        for _ in range(20):
+            handle = self.animator.add_cycle(self.palette, color_list, 10, idx=4)
+            self.assertEqual(handle, rotate)
+            self.animator.remove(handle)
+
+        self.assertEqual(self.animator.stats()['arena_bytes'], 6)
+        self.animator.remove(rotate)    # already removed
+        self.assertEqual(self.animator.stats()['arena_bytes'], 6)
+
+    def test_max_anims(self):
+        color_list = FramebufferPalette([GREEN, BLUE])
+        handles = [self.animator.add_cycle(self.palette, color_list, 100, idx=i) for i in range(3)]
+        with self.assertRaises(ValueError):
+            self.animator.add_cycle(self.palette, color_list, 100, idx=3)
+
+        self.animator.remove(handles[1])
+        self.assertEqual(self.animator.add_cycle(self.palette, color_list, 100, idx=3), handles[1])
+
+unittest.main()
@@ -0,0 +1,74 @@
+import sys
+import unittest
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_palette_pool
+
+Interning of identical palettes, and copy on write for the ones that get animated.
+"""
+
+sys.path.insert(0, '../lib')
+from colors.framebuffer_palette import FramebufferPalette
+from colors.palette_pool import PalettePool
+from images.bmp_reader import BMPReader
+
+IMG_DIR = '../img/'
+
+def make_palette(colors):
+    palette = FramebufferPalette(len(colors))
+    for i, color in enumerate(colors):
+        palette.set_int(i, color)
+    return palette
+
+class TestPalettePool(unittest.TestCase):
+    def test_identical_images_share(self):
+        """ debris_bits.bmp and debris_large.bmp have the same 2 colors """
+        pool = PalettePool()
+        reader = BMPReader(IMG_DIR)
+        bits = reader.load('debris_bits.bmp').palette
+        large = reader.load('debris_large.bmp').palette
+
+        shared = pool.intern(bits)
+        self.assertIs(pool.intern(large), shared)
+        self.assertEqual(pool.refcount(shared), 2)
+        self.assertEqual(pool.stats()['saved_bytes'], len(large.palette))
+
+    def test_different_colors(self):
+        pool = PalettePool()
+        first = pool.intern(make_palette([0x0000, 0x1234]))
+        second = pool.intern(make_palette([0x0000, 0x4321]))
+        self.assertIsNot(first, second)
+        self.assertEqual(pool.stats()['palettes'], 2)
+
+    def test_copy_on_write(self):
+        pool = PalettePool()
+        shared = pool.intern(make_palette([0x0000, 0x1234, 0x5678]))
+        pool.acquire(shared)
+        alpha_color = shared.get_bytes(0)
+
+        own = pool.make_unique(shared)
+        self.assertIsNot(own, shared)
+        self.assertEqual(pool.refcount(shared), 1)
+        self.assertEqual(pool.refcount(own), 0)
+
+        """ Alpha color still resolves to the same value from the copy, and changes to it stay private """
+        self.assertEqual(own.get_bytes(0), alpha_color)
+        own.set_int(1, 0xFFFF)
+        self.assertEqual(shared.get_int(1), 0x1234)
+
+        """ Last holder: no copy, but it leaves the pool so nothing else gets it """
+        self.assertIs(pool.make_unique(shared), shared)
+        self.assertIsNot(pool.intern(make_palette([0x0000, 0x1234, 0x5678])), shared)
+
+    def test_release(self):
+        pool = PalettePool()
+        shared = pool.intern(make_palette([0x0000, 0x1234]))
+        pool.intern(make_palette([0x0000, 0x1234]))
+
+        self.assertTrue(pool.release(shared))
+        self.assertEqual(pool.stats()['palettes'], 1)
+        pool.release(shared)
+        self.assertEqual(pool.stats()['palettes'], 0)
+        self.assertFalse(pool.release(shared))
+
+unittest.main()
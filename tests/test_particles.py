@@ -0,0 +1,84 @@
+import sys
+import unittest
+import random
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_particles
+"""
+
+sys.path.insert(0, '../lib')
+from particles import ParticleSystem, Emitter, FP_SHIFT
+
+class FakeDisplay:
+    def __init__(self):
+        self.blits = []
+        self.rects = []
+
+    def blit(self, sprite, x, y, alpha, palette):
+        self.blits.append((sprite, x, y, palette))
+
+    def fill_rect(self, x, y, width, height, color):
+        self.rects.append((x, y, width, color))
+
+class TestParticleSystem(unittest.TestCase):
+    def test_motion(self):
+        system = ParticleSystem(4, sprites=['a', 'b'], palettes=['p0', 'p1'])
+        system.add(10, 20, 0.5, -0.25, 1000, sprite_id=1, palette_id=1)
+        display = FakeDisplay()
+
+        system.update_and_draw(display, 10)
+        self.assertEqual(display.blits, [('b', 15, 17, 'p1')])
+
+        """ Half speed """
+        system.time_scale = 128
+        system.update_and_draw(display, 20)
+        self.assertEqual(display.blits[-1], ('b', 20, 15, 'p1'))
+
+    def test_gravity(self):
+        system = ParticleSystem(1, colors=[7], gravity=0.002)
+        system.add(0, 0, 0, 0, 1000, sprite_id=1)
+        for _ in range(10):
+            system.update_and_draw(FakeDisplay(), 10)
+
+        """ Speed after 100ms: 0.2 px/ms. Each frame moves at the speed from before its gravity: (0 + 0.02 + ... +
+        0.18) * 10 = 9 pixels (give or take the fixed point rounding) """
+        self.assertTrue(abs(system.dy[0] / (1 << FP_SHIFT) - 0.2) < 0.002)
+        self.assertTrue(abs(system.y[0] / (1 << FP_SHIFT) - 9) < 0.1)
+
+    def test_dead_particles_are_swapped_out(self):
+        system = ParticleSystem(3, colors=[1, 2, 3])
+        system.add(1, 1, 0, 0, 10, 1, 0)
+        system.add(2, 2, 0, 0, 100, 1, 1)
+        system.add(3, 3, 0, 0, 100, 1, 2)
+
+        display = FakeDisplay()
+        self.assertEqual(system.update_and_draw(display, 20), 2)
+        self.assertEqual(sorted(display.rects), [(2, 2, 1, 2), (3, 3, 1, 3)])
+        self.assertFalse(system.add(0, 0, 0, 0, 10) and system.add(0, 0, 0, 0, 10))
+
+    def test_offscreen_and_bounce(self):
+        system = ParticleSystem(2, colors=[1], width=96, height=64, bounce=True)
+        system.add(94, 10, 1, 0, 100, 1)
+        system.add(10, 62, 0, 1, 100, 1)
+        display = FakeDisplay()
+        system.update_and_draw(display, 5)
+        self.assertEqual(display.rects, [(95, 10, 1, 1)])
+        self.assertTrue(system.dx[0] < 0)
+
+    def test_emitter(self):
+        random.seed(1)
+        system = ParticleSystem(20)
+        emitter = Emitter(15, speed=(0.1, 0.2), max_age=(500, 600), spread=8, up=True, sprite_ids=(3, 4),
+                          palette_ids=(5,))
+        self.assertEqual(emitter.emit(system, 40, 30), 15)
+        self.assertEqual(emitter.emit(system, 40, 30), 5)
+
+        for i in range(system.count):
+            self.assertTrue(32 <= system.x[i] >> FP_SHIFT <= 48)
+            self.assertTrue(system.dy[i] < 0)
+            self.assertTrue(abs(system.dx[i]) <= int(0.2 * (1 << FP_SHIFT)))
+            self.assertTrue(500 <= system.max_age[i] <= 600)
+            self.assertIn(system.sprite[i], (3, 4))
+            self.assertEqual(system.palette[i], 5)
+
+unittest.main()
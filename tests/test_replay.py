@@ -0,0 +1,113 @@
+import os
+import sys
+import unittest
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_replay
+
+Records a session of frame times and inputs, and plays it back through a fake screen.
+"""
+
+sys.path.insert(0, '../lib')
+from replay import SessionRecorder, SessionReader, ReplayDriver, FrameTrace, MAX_ELAPSED_MS
+
+LEFT, RIGHT = 0, 1
+FILENAME = 'test_session.rpl'
+TRACE_FILENAME = 'test_trace.csv'
+
+class FakeScreen:
+    """ Turns the inputs and frame times into a state that depends on their order """
+    def __init__(self):
+        self.lane = 2
+        self.log = []
+
+    def move_left(self):
+        self.lane = max(0, self.lane - 1)
+
+    def move_right(self):
+        self.lane = min(4, self.lane + 1)
+
+    def do_update(self, elapsed_ms):
+        self.log.append((elapsed_ms, self.lane))
+
+    def do_render(self):
+        pass
+
+def record(frames):
+    """ frames: (elapsed_ms, [inputs]) """
+    recorder = SessionRecorder(FILENAME, seed=1234, buffer_size=16)
+    for elapsed_ms, inputs in frames:
+        for code in inputs:
+            recorder.input(code)
+        recorder.frame(elapsed_ms)
+    recorder.close()
+    return recorder
+
+def replay(trace_file=None):
+    screen = FakeScreen()
+    reader = SessionReader(FILENAME)
+    driver = ReplayDriver(screen, reader, {LEFT: screen.move_left, RIGHT: screen.move_right}, trace_file=trace_file)
+    trace = driver.run()
+    driver.close()
+    return screen, reader, trace
+
+class TestReplay(unittest.TestCase):
+    def tearDown(self):
+        for filename in (FILENAME, TRACE_FILENAME):
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+
+    def test_round_trip(self):
+        frames = [(16, []), (33, [LEFT]), (17, []), (40, [RIGHT, RIGHT]), (16, [])] * 20
+        recorder = record(frames)
+        screen, reader, trace = replay()
+
+        self.assertEqual(reader.seed, 1234)
+        self.assertEqual(reader.num_frames, recorder.num_frames)
+        self.assertEqual([elapsed_ms for elapsed_ms, _ in screen.log], [elapsed_ms for elapsed_ms, _ in frames])
+        self.assertEqual(trace.num_frames, len(frames))
+        self.assertEqual(os.stat(FILENAME)[6], 16 + len(frames) * 2 + 3 * 20)
+
+    def test_identical_replays(self):
+        frames = [(16, [LEFT, LEFT, LEFT]), (20, [RIGHT]), (25, []), (16, [LEFT, RIGHT, RIGHT, RIGHT, RIGHT])] * 10
+        record(frames)
+        first, _, _ = replay()
+        second, _, _ = replay()
+        self.assertEqual(first.log, second.log)
+
+    def test_many_inputs_and_long_frames(self):
+        """ More inputs than fit in a frame carry over into 0ms frames, and long frames are clamped """
+        record([(16, [RIGHT] * 7), (MAX_ELAPSED_MS + 500, [])])
+        screen, _, _ = replay()
+        self.assertEqual(screen.log, [(16, 4), (0, 4), (0, 4), (MAX_ELAPSED_MS, 4)])
+
+    def test_trace_file(self):
+        """ The rows are streamed to the CSV file in chunks, and the last partial chunk on close """
+        frames = [(elapsed_ms, []) for elapsed_ms in range(10, 80)]
+        record(frames)
+        _, _, trace = replay(TRACE_FILENAME)
+
+        with open(TRACE_FILENAME) as file:
+            lines = file.read().splitlines()
+
+        self.assertEqual(lines[0], ",".join(FrameTrace.columns))
+        self.assertEqual([int(line.split(",")[0]) for line in lines[1:]], [elapsed_ms for elapsed_ms, _ in frames])
+        self.assertEqual(trace.num_frames, len(frames))
+        self.assertEqual(trace.used, 0)
+
+    def test_summary(self):
+        trace = FrameTrace(buffer_frames=4)
+        for frame_us in range(1000, 101000, 1000):  # 1 to 100ms
+            trace.add(16, frame_us - 100, 100, 8, 0)
+
+        summary = trace.summary()
+        self.assertEqual(summary['frames'], 100)
+        self.assertEqual(summary['avg_frame_us'], 50500)
+        self.assertEqual(summary['p95_frame_us'], 97000)    # the 96ms frame, rounded up to its bucket
+        self.assertEqual(summary['max_frame_us'], 100000)
+        self.assertEqual(summary['update_alloc'], 800)
+        self.assertEqual(FrameTrace().summary(), {})
+
+unittest.main()
@@ -0,0 +1,66 @@
+import sys
+import unittest
+import io
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_sprite_asset
+
+Round trip: BMP -> .spr (convert_bmp) -> Image (SpriteAssetReader), compared against what BMPReader loads from the
+same BMP.
+"""
+
+sys.path.insert(0, '../lib')
+from images.bmp_reader import BMPReader
+from images.sprite_asset import convert_bmp, SpriteAssetReader, HEADER_SIZE
+
+IMG_DIR = '../img/'
+
+""" (filename, frame_width, frame_height): 4 bit, 8 bit, 1 bit and a spritesheet """
+TEST_IMAGES = [
+    ('skull_16.bmp', None, None),
+    ('title_zero.bmp', None, None),
+    ('life.bmp', None, None),
+    ('bike_sprite.bmp', 32, 22),
+]
+
+class TestSpriteAsset(unittest.TestCase):
+    def load_both(self, filename, frame_width, frame_height):
+        bmp_image = BMPReader(IMG_DIR).load(filename, frame_width, frame_height)
+
+        with open(IMG_DIR + filename, 'rb') as file:
+            asset = convert_bmp(file.read())
+
+        spr_image = SpriteAssetReader().read(io.BytesIO(asset), frame_width, frame_height)
+        return bmp_image, spr_image
+
+    def assert_frames_equal(self, bmp_frame, spr_frame, width, height):
+        for y in range(height):
+            for x in range(width):
+                self.assertEqual(bmp_frame.pixel(x, y), spr_frame.pixel(x, y), f"Pixel {x},{y}")
+
+    def test_round_trip(self):
+        for filename, frame_width, frame_height in TEST_IMAGES:
+            bmp_image, spr_image = self.load_both(filename, frame_width, frame_height)
+
+            self.assertEqual(bmp_image.width, spr_image.width, filename)
+            self.assertEqual(bmp_image.height, spr_image.height, filename)
+            self.assertEqual(bmp_image.color_depth, spr_image.color_depth, filename)
+            self.assertEqual(bytes(bmp_image.palette.palette), bytes(spr_image.palette.palette), filename)
+
+            if frame_height:
+                self.assertEqual(len(bmp_image.frames), len(spr_image.frames), filename)
+                for bmp_frame, spr_frame in zip(bmp_image.frames, spr_image.frames):
+                    self.assert_frames_equal(bmp_frame, spr_frame, frame_width, frame_height)
+            else:
+                self.assertIsNone(spr_image.frames)
+                self.assert_frames_equal(bmp_image.pixels, spr_image.pixels, bmp_image.width, bmp_image.height)
+
+    def test_pixel_bytes_aligned(self):
+        _, spr_image = self.load_both('skull_16.bmp', None, None)
+        self.assertEqual(spr_image.pixel_bytes_addr % 4, 0)
+
+    def test_bad_magic(self):
+        with self.assertRaises(ValueError):
+            SpriteAssetReader().read(io.BytesIO(bytes(HEADER_SIZE)))
+
+unittest.main()
@@ -0,0 +1,107 @@
+import sys
+import unittest
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_sprite_spans
+
+Opaque spans and bounding box of small test images, and a round trip through the RLE of their opaque runs, at every
+color depth the registry computes spans for.
+"""
+
+sys.path.insert(0, '../lib')
+import framebuf
+from images.sprite_spans import compute_spans, encode_rle, decode_rle, row_bytes
+
+ALPHA = 0
+WIDTH = 12
+HEIGHT = 8
+FORMATS = {1: framebuf.MONO_HMSB, 4: framebuf.GS4_HMSB, 8: framebuf.GS8}
+
+def make_image(color_depth, width=WIDTH, height=HEIGHT):
+    pixel_bytes = bytearray(row_bytes(width, color_depth) * height)
+    return pixel_bytes, framebuf.FrameBuffer(pixel_bytes, width, height, FORMATS[color_depth])
+
+def draw_shape(frame, color_depth):
+    """ Transparent rows 0, 1 and 7, a solid bar, a row with two runs, and single pixels at the edges """
+    max_color = (1 << color_depth) - 1
+    frame.fill(ALPHA)
+    frame.fill_rect(3, 2, 6, 2, max_color)
+    frame.pixel(2, 4, 1)
+    frame.pixel(3, 4, max_color)
+    frame.pixel(9, 4, 1)
+    frame.pixel(0, 5, 1)
+    frame.pixel(WIDTH - 1, 6, max_color)
+
+class TestSpriteSpans(unittest.TestCase):
+    def test_spans(self):
+        for color_depth in FORMATS:
+            pixel_bytes, frame = make_image(color_depth)
+            draw_shape(frame, color_depth)
+            spans = compute_spans(pixel_bytes, WIDTH, HEIGHT, color_depth, ALPHA)
+
+            self.assertEqual(spans.row_span(2), (3, 8), color_depth)
+            self.assertEqual(spans.row_span(4), (2, 9), color_depth)
+            self.assertEqual(spans.row_span(5), (0, 0), color_depth)
+            self.assertEqual(spans.row_span(6), (WIDTH - 1, WIDTH - 1), color_depth)
+
+            """ Empty rows have first > last """
+            for y in (0, 1, 7):
+                first, last = spans.row_span(y)
+                self.assertGreater(first, last, color_depth)
+
+            self.assertEqual((spans.top, spans.bottom, spans.left, spans.right), (2, 6, 0, WIDTH - 1), color_depth)
+            self.assertEqual(spans.opaque_height, 5)
+            self.assertEqual(spans.opaque_px, 12 + 3 + 1 + 1)
+
+            stats = spans.stats()
+            self.assertEqual(stats['scaler_skipped_px'], 3 * WIDTH)
+            self.assertEqual(stats['blit_skipped_px'], 3 * WIDTH)
+
+    def test_bounding_box(self):
+        pixel_bytes, frame = make_image(4)
+        frame.fill(ALPHA)
+        frame.fill_rect(4, 3, 3, 2, 5)
+        spans = compute_spans(pixel_bytes, WIDTH, HEIGHT, 4, ALPHA)
+
+        self.assertEqual((spans.top, spans.bottom, spans.left, spans.right), (3, 4, 4, 6))
+        self.assertEqual((spans.opaque_width, spans.opaque_height), (3, 2))
+        self.assertEqual(spans.stats()['blit_skipped_px'], WIDTH * HEIGHT - 6)
+
+    def test_empty(self):
+        pixel_bytes, frame = make_image(8)
+        frame.fill(ALPHA)
+        spans = compute_spans(pixel_bytes, WIDTH, HEIGHT, 8, ALPHA)
+        self.assertTrue(spans.is_empty())
+        self.assertEqual(spans.opaque_px, 0)
+        self.assertEqual(spans.opaque_height, 0)
+
+    def test_rle_round_trip(self):
+        for color_depth in FORMATS:
+            pixel_bytes, frame = make_image(color_depth)
+            draw_shape(frame, color_depth)
+            rle = encode_rle(pixel_bytes, WIDTH, HEIGHT, color_depth, ALPHA)
+
+            decoded_bytes, decoded = make_image(color_depth)
+            decoded.fill((1 << color_depth) - 1)  # decode_rle() has to clear it first
+            end = decode_rle(rle, decoded, HEIGHT, color_depth, ALPHA)
+
+            self.assertEqual(end, len(rle), color_depth)
+            self.assertEqual(bytes(decoded_bytes), bytes(pixel_bytes), color_depth)
+
+            """ No runs in the transparent rows at the top """
+            self.assertEqual(rle[0], 0)
+            self.assertEqual(rle[1], 0)
+
+    def test_rle_all_opaque(self):
+        pixel_bytes, frame = make_image(8)
+        for y in range(HEIGHT):
+            for x in range(WIDTH):
+                frame.pixel(x, y, 1 + (x + y) % 200)
+        rle = encode_rle(pixel_bytes, WIDTH, HEIGHT, 8, ALPHA)
+        self.assertEqual(len(rle), HEIGHT * (3 + WIDTH))
+
+        decoded_bytes, decoded = make_image(8)
+        decode_rle(rle, decoded, HEIGHT, 8, ALPHA)
+        self.assertEqual(bytes(decoded_bytes), bytes(pixel_bytes))
+
+unittest.main()
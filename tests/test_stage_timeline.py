@@ -0,0 +1,193 @@
+import sys
+import unittest
+import random
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_stage_timeline
+
+Replays Stage1 on the stage clock, with a fake sprite manager that records when every sprite is spawned. Every test
+runs three times: walking the event tree, through the compiled schedule (stage_compiler.py), and streamed from a stage
+file (stage_file.py).
+"""
+import os
+
+sys.path.insert(0, '../lib')
+from stages.stage_1 import Stage1
+from sprites.sprite_types import SPRITE_TEST_SKULL
+from stages.stage_compiler import Schedule, compile_events, build
+from stages.stage_file import StageStream, save_stage, schedule_records
+
+""" Stage1: a wave of 15 skulls (5 lanes x 3 rows), and the same wave again 10s later, then a 5s wait """
+WAVE_MS = (0, 10000)
+WAVE_SIZE = 15
+END_MS = 25000
+
+class FakeSprite:
+    z = 0
+    floor_y = 0
+    draw_x = 0
+    draw_y = 0
+
+class FakeCamera:
+    def get_scale(self, z):
+        return 0, 1
+
+class FakeManager:
+    def __init__(self):
+        self.camera = FakeCamera()
+        self.stage = None
+        self.spawns = []
+
+    def spawn(self, sprite_type, **kwargs):
+        self.spawns.append([self.stage.now_ms, sprite_type, None, kwargs['y']])
+        return FakeSprite(), None
+
+    def set_lane(self, sprite, lane):
+        self.spawns[-1][2] = lane
+
+    def set_draw_xy(self, sprite, height, scale):
+        pass
+
+def compile_stage_1():
+    stage = Stage1(FakeManager())
+    stage.script()
+    return compile_events(stage.events)
+
+def remove_file(filename):
+    try:
+        os.remove(filename)
+    except OSError:
+        pass
+
+class TimelineTests:
+    use_schedule = True
+    stage_file = None
+
+    def setUp(self):
+        if self.stage_file:
+            save_stage(self.stage_file, schedule_records(compile_stage_1()), END_MS)
+
+        self.mgr = FakeManager()
+        self.stage = Stage1(self.mgr)
+        self.stage.prefetch_types = ()  # No images needed
+        self.stage.use_schedule = self.use_schedule
+        self.stage.stage_file = self.stage_file
+        self.mgr.stage = self.stage
+        self.stage.start()
+
+    def run_ticks(self, ticks):
+        for elapsed_ms in ticks:
+            self.stage.update(elapsed_ms)
+
+    def tearDown(self):
+        if self.stage.stream:
+            self.stage.stream.close()
+        if self.stage_file:
+            remove_file(self.stage_file)
+
+    def assert_finished(self):
+        self.assertTrue(self.stage.is_finished())
+        if self.stage_file:
+            self.assertEqual(self.stage.stream.end_ms, END_MS)
+        elif self.use_schedule:
+            self.assertEqual(self.stage.schedule.end_ms, END_MS)
+        else:
+            self.assertEqual(self.stage.events.finished_ms, END_MS)
+
+    def test_exact_spawn_times(self):
+        self.run_ticks([1] * (END_MS + 10))
+
+        times = [spawn[0] for spawn in self.mgr.spawns]
+        self.assertEqual(times, [WAVE_MS[0]] * WAVE_SIZE + [WAVE_MS[1]] * WAVE_SIZE)
+        self.assertTrue(all(spawn[1] == SPRITE_TEST_SKULL for spawn in self.mgr.spawns))
+        self.assertEqual(sorted(set(spawn[2] for spawn in self.mgr.spawns)), [0, 1, 2, 3, 4])
+        self.assert_finished()
+
+    def test_frame_jitter(self):
+        """ Uneven frames only delay a spawn to the first tick at or after its time, they don't shift later events """
+        random.seed(1)
+        ticks = [random.randint(8, 40) for _ in range(2000)]
+        self.run_ticks(ticks)
+
+        tick_ends = []
+        now = 0
+        for elapsed_ms in ticks:
+            now += elapsed_ms
+            tick_ends.append(now)
+
+        expected = [min(t for t in tick_ends if t >= wave_ms) if wave_ms else 0 for wave_ms in WAVE_MS]
+        times = [spawn[0] for spawn in self.mgr.spawns]
+        self.assertEqual(times, [expected[0]] * WAVE_SIZE + [expected[1]] * WAVE_SIZE)
+        self.assert_finished()
+
+    def test_skip_to(self):
+        """ Skipped spawns don't fire, the rest of the stage keeps its times """
+        self.mgr.spawns = []
+        self.stage.skip_to(5000)
+        self.assertEqual(self.mgr.spawns, [])
+
+        self.run_ticks([1] * 6000)
+        self.assertEqual([spawn[0] for spawn in self.mgr.spawns], [WAVE_MS[1]] * WAVE_SIZE)
+
+    def test_skip_to_fire(self):
+        self.stage.skip_to(END_MS, fire=True)
+        self.assertEqual(len(self.mgr.spawns), WAVE_SIZE * 2)
+        self.assertTrue(self.stage.is_finished())
+
+class TestStageEvents(TimelineTests, unittest.TestCase):
+    use_schedule = False
+
+class TestStageSchedule(TimelineTests, unittest.TestCase):
+    use_schedule = True
+
+    def test_compiled(self):
+        self.assertIsNotNone(self.stage.schedule)
+        self.assertEqual(self.stage.schedule.count, WAVE_SIZE * 2)
+
+class TestStageStream(TimelineTests, unittest.TestCase):
+    stage_file = 'stage_test.stg'
+
+    def test_streamed(self):
+        """ No event tree was built, and only one chunk of the file is in memory """
+        self.assertIsNotNone(self.stage.stream)
+        self.assertEqual(self.stage.events.events, [])
+        self.assertLess(self.stage.stream.chunk_records, WAVE_SIZE * 2)
+
+class TestScheduleFile(unittest.TestCase):
+    filename = 'stage_test.sched'
+
+    def tearDown(self):
+        remove_file(self.filename)
+
+    def test_save_load(self):
+        compiled = compile_stage_1()
+        compiled.save(self.filename)
+        loaded = Schedule.load(self.filename)
+
+        self.assertEqual(loaded.count, compiled.count)
+        self.assertEqual(loaded.end_ms, compiled.end_ms)
+        for loaded_values, compiled_values in zip(loaded.arrays(), compiled.arrays()[:-1]):
+            self.assertEqual(list(loaded_values), list(compiled_values))
+
+        """ NaN != NaN, compare the speeds as bytes """
+        self.assertEqual(bytes(loaded.speeds), bytes(compiled.speeds))
+
+    def test_missing_file(self):
+        self.assertIsNone(Schedule.load('no_such_stage.sched'))
+
+    def test_build(self):
+        """ The documented build step, on a stage whose script() hasn't run yet """
+        build(Stage1(FakeManager()), self.filename)
+        loaded = Schedule.load(self.filename)
+        self.assertEqual(loaded.count, WAVE_SIZE * 2)
+        self.assertEqual(loaded.end_ms, END_MS)
+
+    def test_empty_schedule(self):
+        Schedule(0, END_MS).save(self.filename)
+        self.assertIsNone(Schedule.load(self.filename))
+
+    def test_empty_stage_file(self):
+        save_stage(self.filename, [], END_MS)
+        self.assertIsNone(StageStream.open(self.filename))
+
+unittest.main()
@@ -0,0 +1,41 @@
+import importlib.util
+import json
+import os
+import unittest
+
+""" Host only (local/stage_tool.py is a host build step), run from the tests folder:
+> python test_stage_tool.py
+
+Simulates stages/stage_1.json and checks how many sprites are on screen in every second.
+"""
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def load_stage_tool():
+    spec = importlib.util.spec_from_file_location('stage_tool', os.path.join(ROOT, 'local', 'stage_tool.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+stage_tool = load_stage_tool()
+
+class TestSimulate(unittest.TestCase):
+    def test_stage_1(self):
+        """ Two waves of 15 skulls, 10s apart, at z 300 and speed -30 (z units per second): each wave takes ~10s to
+        go past the camera, so they overlap for a moment at 10s """
+        with open(os.path.join(ROOT, 'stages', 'stage_1.json')) as file:
+            records, end_ms = stage_tool.compile_stage(json.load(file), stage_tool.load_type_ids())
+
+        spawns, peaks = stage_tool.simulate(records, end_ms)
+        self.assertEqual(spawns[0], 15)
+        self.assertEqual(spawns[10], 15)
+        self.assertEqual(peaks[:10], [15] * 10)
+        self.assertEqual(peaks[10], 30)
+        self.assertEqual(peaks[11:21], [15] * 10)
+        self.assertEqual(peaks[21:], [0] * (len(peaks) - 21))
+
+    def test_lifetime(self):
+        self.assertEqual(stage_tool.lifetime_ms(299, -30, -1, 60000), 10000)
+        self.assertEqual(stage_tool.lifetime_ms(299, float('nan'), -100, 60000), 3000)
+        self.assertEqual(stage_tool.lifetime_ms(299, 0, -1, 60000), 60000)
+
+unittest.main()
@@ -0,0 +1,130 @@
+import math
+import sys
+import unittest
+
+""" Run from a MP REPL (see test_scale_patterns.py for how to install unittest):
+>>> import tests.test_tween_manager
+
+The allocation test needs tracemalloc, so it only runs on the host.
+"""
+
+sys.path.insert(0, '../lib')
+from anim.easing import ease, ONE, LINEAR, EASE_IN_CUBIC, EASE_IN_SINE, EASE_IN_OUT_SINE, EASE_OUT_CUBIC
+from anim.tween_manager import TweenManager
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    from uarray import array
+except ImportError:
+    from array import array
+
+class Target:
+    def __init__(self):
+        self.x = 0
+        self.y = 100
+        self.speed = 0
+
+class TestEasing(unittest.TestCase):
+    def test_luts(self):
+        """ Within a few 1/4096ths of the float curves """
+        curves = {
+            LINEAR: lambda t: t,
+            EASE_IN_CUBIC: lambda t: t * t * t,
+            EASE_IN_SINE: lambda t: 1 - math.cos((t * math.pi) / 2),
+            EASE_IN_OUT_SINE: lambda t: -(math.cos(math.pi * t) - 1) / 2,
+            EASE_OUT_CUBIC: lambda t: 1 - (1 - t) ** 3,
+        }
+        for easing, curve in curves.items():
+            for pos in range(0, ONE + 1, 37):
+                self.assertTrue(abs(ease(easing, pos) - curve(pos / ONE) * ONE) <= 3)
+            self.assertEqual(ease(easing, 0), 0)
+            self.assertEqual(ease(easing, ONE), ONE)
+
+class TestTweenManager(unittest.TestCase):
+    def test_tween(self):
+        tweens = TweenManager(4)
+        target = Target()
+        done = []
+        tweens.add(target, 'x', 1000, 100, callback=lambda: done.append(True))
+
+        tweens.tick(50)
+        self.assertEqual(target.x, 500)
+        self.assertTrue(tweens.is_running(target, 'x'))
+
+        tweens.tick(60)
+        self.assertEqual(target.x, 1000)
+        self.assertEqual(done, [True])
+        self.assertFalse(tweens.is_running(target))
+        self.assertEqual(tweens.count, 0)
+
+    def test_easing_and_negative(self):
+        tweens = TweenManager(4)
+        target = Target()
+        tweens.add(target, 'speed', -3000, 3000, EASE_IN_OUT_SINE)
+        values = []
+        for _ in range(375):
+            tweens.tick(8)
+            values.append(target.speed)
+
+        self.assertEqual(values[-1], -3000)
+        self.assertEqual(values, sorted(values, reverse=True))
+        self.assertTrue(abs(values[186] + 1500) < 20)   # halfway
+
+    def test_index_slot(self):
+        tweens = TweenManager(4)
+        fields = array('h', [0, 10, 20])
+        tweens.add(fields, 1, -10, 40)
+        tweens.tick(20)
+        self.assertEqual(list(fields), [0, 0, 20])
+
+    def test_replace_and_cancel(self):
+        tweens = TweenManager(2)
+        target = Target()
+        tweens.add(target, 'x', 100, 100)
+        tweens.add(target, 'x', 200, 100)
+        tweens.add(target, 'y', 0, 100)
+        self.assertEqual(tweens.count, 2)
+
+        with self.assertRaises(ValueError):
+            tweens.add(Target(), 'x', 1, 10)
+
+        tweens.cancel(target, 'y')
+        tweens.tick(100)
+        self.assertEqual((target.x, target.y), (200, 100))
+
+    @unittest.skipIf(tracemalloc is None, "No tracemalloc")
+    def test_tick_does_not_allocate(self):
+        """ A full table of tweens, ticked for 1000 frames: nothing is left allocated, and the peak does not grow with
+        the frames (only short lived ints, which are not heap objects on MicroPython). The values stay out of the
+        range of the ints that CPython caches, so that the ones held by the targets are the same size before and after """
+        tweens = TweenManager(16)
+        targets = [Target() for _ in range(8)]
+        for i, target in enumerate(targets):
+            target.x, target.speed = 1000, -1000
+            tweens.add(target, 'x', 5000 + i, 100000, i % 5)
+            tweens.add(target, 'speed', -3000, 100000, EASE_IN_OUT_SINE)
+
+        tracemalloc.start()
+        tweens.tick(1)
+        before = tracemalloc.take_snapshot()
+        start_mem, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        for _ in range(1000):
+            tweens.tick(8)
+
+        end_mem, peak_mem = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        diff = after.compare_to(before, 'lineno')
+        grown = [stat for stat in diff if 'anim' in stat.traceback[0].filename and stat.size_diff > 0]
+        self.assertEqual(grown, [])
+        self.assertTrue(peak_mem - start_mem < 1024)
+        self.assertTrue(targets[0].x > 1000)
+
+unittest.main()